@@ -0,0 +1,46 @@
+"""
+    Run the framework as a long-running server, the workflows are submitted over a local HTTP API
+        python -m framework.api --port 8080
+        curl -X POST localhost:8080/jobs -d '{"workflow": "pod-config", "files": ["config/pod-config.yml"]}'
+        curl localhost:8080/jobs/<job_id>
+"""
+
+import argparse
+import os
+from pathlib import Path
+from framework.helpers.config_cache import configure_config_cache, CONFIG_CACHE_DIRECTORY
+from framework.helpers.log_utils import get_logger, ConfigureRootLogger
+from framework.helpers.vault_utils import configure_credential_cache
+from .jobs import JobManager, RUNS, DEFAULT_MAX_CONCURRENT_JOBS, DEFAULT_CREDENTIAL_CACHE_TTL_IN_SEC
+from .server import ApiServer, DEFAULT_HOST, DEFAULT_PORT
+
+parser = argparse.ArgumentParser(description="Run the workflows submitted over a local HTTP API")
+parser.add_argument("--host", type=str, default=DEFAULT_HOST, help="address to listen on")
+parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_CONCURRENT_JOBS, help="max jobs running at a time")
+parser.add_argument("--debug", action='store_true')
+
+# Find path to the project root
+project_root = Path(__file__).parents[2]
+
+
+def main():
+    args = parser.parse_args()
+    ConfigureRootLogger(args.debug, file_name="api_server.log")
+    logger = get_logger(__name__)
+    configure_credential_cache(ttl=DEFAULT_CREDENTIAL_CACHE_TTL_IN_SEC)
+    configure_config_cache(os.path.join(project_root, RUNS, CONFIG_CACHE_DIRECTORY))
+
+    server = ApiServer(JobManager(project_root, max_concurrent_jobs=args.max_jobs), host=args.host, port=args.port)
+    logger.info(f"API server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping the API server, waiting for the running jobs...")
+    finally:
+        server.server_close()
+        server.job_manager.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    main()
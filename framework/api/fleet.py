@@ -0,0 +1,161 @@
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Dict, List
+from framework.helpers.general_utils import get_json_file_contents, get_yml_file_contents
+from framework.helpers.log_utils import get_logger
+from .jobs import JobManager, Job, RUNS, SUCCEEDED, DEFAULT_MAX_CONCURRENT_JOBS
+
+logger = get_logger(__name__)
+
+FLEET_DIRECTORY = "fleet-runs"
+CONFIG_EXTENSIONS = (".yml", ".yaml", ".json")
+
+"""
+A fleet is either a directory of input configs, each config is run on its own with the workflow of the command line,
+or a manifest that lists the configs:
+    max_concurrent: 8                   -> optional, --max-concurrent overrides it
+    configs:
+      - name: site-1                    -> optional, the name of the first input file by default
+        files: [config/site-1.yml]      -> input files of the config, merged like the -f files of a single run
+        workflow: pod-config            -> optional, the workflow of the command line by default
+      - files: [config/site-2.yml, config/site-2-extra.yml]
+        scripts: [CreateContainerPe]
+        schema: ...
+"""
+
+
+def load_fleet(project_root: str, fleet: str, workflow: Optional[str] = None, scripts: Optional[List[str]] = None,
+               schema: Optional[str] = None, plan: bool = False) -> Dict:
+    """
+    Read the fleet, see above
+
+    Args:
+        project_root (str): Root of the project, the fleet & the input files are relative to it
+        fleet (str): Directory of the input configs, or a yml/ json manifest
+        workflow (str, optional): Workflow of the configs that don't specify one
+        scripts (list, optional): Scripts of the configs that don't specify a workflow or scripts
+        schema (str, optional): Schema of the scripts
+        plan (bool, optional): Plan the changes instead of making them
+    Returns:
+        dict: {"max_concurrent": .., "configs": [..]}, a config is a request of JobManager.submit
+    Raises:
+        ValueError: If the fleet is invalid
+    """
+    path = os.path.join(project_root, fleet)
+    if os.path.isdir(path):
+        manifest = {"configs": [{"files": [os.path.join(path, file)]} for file in sorted(os.listdir(path))
+                                if file.endswith(CONFIG_EXTENSIONS)]}
+    elif os.path.isfile(path):
+        manifest = get_json_file_contents(path) if path.endswith(".json") else get_yml_file_contents(path)
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("configs"), list):
+            raise ValueError(f"The fleet manifest {fleet!r} has to list the 'configs'")
+    else:
+        raise ValueError(f"The fleet {fleet!r} doesn't exist")
+    if not manifest["configs"]:
+        raise ValueError(f"There are no configs in the fleet {fleet!r}")
+
+    configs = []
+    names = set()
+    for config in manifest["configs"]:
+        if isinstance(config, str):
+            config = {"files": [config]}
+        files = config.get("files")
+        if isinstance(files, str):
+            files = files.split(",")
+        if not files:
+            raise ValueError(f"Specify the input 'files' of the config {config}")
+        if not config.get("workflow") and not config.get("scripts"):
+            config = {**config, "workflow": workflow, "scripts": scripts, "schema": config.get("schema", schema)}
+
+        # The names are the log files of the configs
+        name = str(config.get("name") or Path(files[0].strip()).stem)
+        unique_name, count = name, 1
+        while unique_name in names:
+            count += 1
+            unique_name = f"{name}-{count}"
+        names.add(unique_name)
+        configs.append({**config, "name": unique_name, "files": files, "plan": config.get("plan", plan)})
+
+    return {"max_concurrent": manifest.get("max_concurrent"), "configs": configs}
+
+
+class FleetRunner:
+    """
+    Runs the independent configs of a fleet concurrently in the process, instead of a process per config. The configs
+    are jobs of a JobManager, so they share the sessions & connection pools, the worker pool, the credentials and the
+    parsed global.yml. Each config has its own workflow data and log file in runs/fleet-runs/<fleet_id>.
+    """
+
+    def __init__(self, project_root: str, max_concurrent: int = DEFAULT_MAX_CONCURRENT_JOBS,
+                 fleet_id: Optional[str] = None):
+        """
+        Args:
+            project_root (str): Root of the project
+            max_concurrent (int, optional): Max configs running at a time, the other ones are queued
+            fleet_id (str, optional): Id of the run, the directory of the logs & the summary
+        """
+        self.project_root = str(project_root)
+        self.max_concurrent = max_concurrent
+        self.fleet_id = fleet_id or str(uuid.uuid4())
+        self.directory = os.path.join(self.project_root, RUNS, FLEET_DIRECTORY, self.fleet_id)
+
+    def run(self, configs: List[Dict]) -> Dict:
+        """
+        Run the configs & wait for all of them
+
+        Args:
+            configs (list): Requests of JobManager.submit, see load_fleet
+        Returns:
+            dict: Summary of the run, also saved in summary.json of the fleet directory
+        Raises:
+            ValueError: If a config is invalid, nothing is run then
+        """
+        job_manager = JobManager(self.project_root, max_concurrent_jobs=self.max_concurrent,
+                                 max_finished_jobs=len(configs), logs_directory=self.directory)
+        start_time = time.time()
+        try:
+            # Validated before any config is run, an invalid fleet doesn't half run
+            for config in configs:
+                job_manager.validate(config)
+            jobs = [job_manager.submit(config) for config in configs]
+            job_manager.wait(jobs)
+        finally:
+            job_manager.shutdown(wait=True)
+        summary = self.get_summary(jobs, round(time.time() - start_time, 3))
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "summary.json"), "w") as f:
+            json.dump({**summary, "results": {job.name: job.json_output for job in jobs}}, f, indent=2, default=str)
+        self.log_summary(summary)
+        return summary
+
+    def get_summary(self, jobs: List[Job], elapsed: float) -> Dict:
+        configs = [{"name": job.name, "status": job.status, "timings": dict(job.timings), "error": job.error,
+                    "log_file": job.log_file, "event_log": job.event_log} for job in jobs]
+        succeeded = sum(1 for job in jobs if job.status == SUCCEEDED)
+        return {
+            "fleet_id": self.fleet_id,
+            "directory": self.directory,
+            "total": len(jobs),
+            "succeeded": succeeded,
+            "failed": len(jobs) - succeeded,
+            # Wall time of the fleet, against the time the configs would take one after the other
+            "elapsed": elapsed,
+            "sequential": round(sum(job.timings.get("total", 0) for job in jobs), 3),
+            "configs": configs
+        }
+
+    @staticmethod
+    def log_summary(summary: Dict):
+        width = max(len(config["name"]) for config in summary["configs"])
+        lines = [f"{'config':<{width}}  {'status':<9}  {'queued':>8}  {'total':>8}  error"]
+        for config in summary["configs"]:
+            timings = config["timings"]
+            lines.append(f"{config['name']:<{width}}  {config['status']:<9}  {timings.get('queued', 0):>7.1f}s  "
+                         f"{timings.get('total', 0):>7.1f}s  {config['error'] or ''}")
+        logger.info("Fleet summary\n" + "\n".join(lines))
+        logger.info(f"{summary['succeeded']}/{summary['total']} configs succeeded in {summary['elapsed']}s, "
+                    f"{summary['sequential']}s one after the other. Logs & summary.json in {summary['directory']}")
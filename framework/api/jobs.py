@@ -0,0 +1,265 @@
+import contextvars
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+from framework.helpers.checkpoint_utils import to_json
+from framework.helpers.event_utils import get_event_log_path
+from framework.helpers.helper_functions import CONFIG_DIRECTORY, GLOBAL_CONFIG_NAME, configure_process, \
+    read_global_config
+from framework.helpers.log_utils import get_logger, log_context
+from framework.helpers.registry import get_run_config
+from framework.helpers.session_registry import session_registry
+from framework.helpers.vault_utils import credential_cache
+from framework.helpers.worker_pool import get_worker_pool
+from framework.helpers.workflow_utils import Workflow
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+RUNS = "runs"
+JOBS_DIRECTORY = "api-jobs"
+DEFAULT_MAX_CONCURRENT_JOBS = 4
+# Finished jobs kept for the status queries, the oldest ones are dropped first
+DEFAULT_MAX_FINISHED_JOBS = 500
+# Credentials fetched from the vault are reused across the jobs, global.yml can override it with "credential_cache"
+DEFAULT_CREDENTIAL_CACHE_TTL_IN_SEC = 900
+# Names of the jobs are file names, eg. of the log file of the job
+JOB_NAME_PATTERN = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+class Job:
+    """
+    A workflow, or scripts run on their own, submitted to the API server
+    """
+
+    def __init__(self, workflow: Optional[str], scripts: Optional[List[str]], schema: Optional[str],
+                 input_files: List[str], plan: bool = False, resume: Optional[str] = None, name: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        # Name of the log file of the job, the id if not specified
+        self.name = name
+        self.workflow = workflow
+        self.scripts = scripts
+        self.schema = schema
+        self.input_files = input_files
+        self.plan = plan
+        # Id of the job to resume, the steps that succeeded in it are skipped
+        self.resume = resume
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # Phase to its duration in seconds, eg. {"queued": 0.1, "pre_run_actions": 2.3, "scripts": 120.5}
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.json_output = None
+        self.log_file: Optional[str] = None
+        self.event_log: Optional[str] = None
+        self.done = threading.Event()
+
+    def to_dict(self, details: bool = False) -> Dict:
+        job = {"id": self.id, "name": self.name, "workflow": self.workflow, "scripts": self.scripts,
+               "status": self.status, "submitted": self.submitted, "started": self.started, "finished": self.finished,
+               "timings": dict(self.timings), "error": self.error}
+        if details:
+            job.update({"schema": self.schema, "input_files": self.input_files, "plan": self.plan,
+                        "resume": self.resume, "log_file": self.log_file, "event_log": self.event_log,
+                        "json_output": self.json_output})
+        return job
+
+
+class JobManager:
+    """
+    Runs the submitted jobs concurrently in the process. The jobs share what the process keeps warm between them:
+    the sessions & connection pools of the SessionRegistry, the worker pool, the credentials fetched from the vault,
+    the parsed global.yml and the PC versions. Each job has its own workflow data, checkpoint journal and log file.
+
+    The post_run_actions of the workflows are not run, they push the log files of the process and write
+    results.html in the working directory. A job keeps its log in runs/api-jobs and its results in the job instead.
+    """
+
+    def __init__(self, project_root: str, max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_JOBS,
+                 max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS, logs_directory: Optional[str] = None):
+        """
+        Args:
+            project_root (str): Root of the project, the input files & the config directory are relative to it
+            max_concurrent_jobs (int, optional): Max jobs running at a time, the other ones are queued
+            max_finished_jobs (int, optional): Max finished jobs kept for the status queries
+            logs_directory (str, optional): Directory of the log files of the jobs, runs/api-jobs by default
+        """
+        self.project_root = str(project_root)
+        self.logs_directory = logs_directory or os.path.join(self.project_root, RUNS, JOBS_DIRECTORY)
+        self.max_finished_jobs = max_finished_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="ApiJob")
+        # The state shared by the jobs is configured from global.yml once, the input files of the jobs can't change it
+        global_config_file = os.path.join(self.project_root, CONFIG_DIRECTORY, GLOBAL_CONFIG_NAME)
+        if os.path.exists(global_config_file):
+            configure_process(read_global_config(global_config_file))
+
+    def validate(self, request: Dict) -> Dict:
+        """
+        Validate a job request, see submit
+
+        Returns:
+            dict: The input files & the run config of the job
+        Raises:
+            ValueError: If the request is invalid
+        """
+        scripts = request.get("scripts")
+        if isinstance(scripts, str):
+            scripts = scripts.split(",")
+        files = request.get("files")
+        if isinstance(files, str):
+            files = files.split(",")
+        if not files:
+            raise ValueError("Specify the input 'files' of the job")
+
+        # The name & the id of the job to resume are used in the paths of the log, journal & event log of the job
+        name = request.get("name")
+        if name is not None and (not isinstance(name, str) or not JOB_NAME_PATTERN.fullmatch(name)):
+            raise ValueError(f"Invalid job name {name!r}, use letters, digits, '_', '.' & '-' only")
+        resume = request.get("resume")
+        if resume is not None and not self.get(str(resume)) and not self.is_uuid(resume):
+            raise ValueError(f"Invalid job to resume {resume!r}, specify the id of a job")
+
+        input_files = [os.path.join(self.project_root, file.strip()) for file in files]
+        for file in input_files:
+            if not os.path.exists(file):
+                raise ValueError(f"Input file {file!r} doesn't exist")
+        # Validates the names, the modules are imported once and stay warm for the next jobs
+        run_config = get_run_config(workflow=request.get("workflow"), scripts=scripts, schema=request.get("schema"))
+        return {"scripts": scripts, "input_files": input_files, "run_config": run_config}
+
+    @staticmethod
+    def is_uuid(value) -> bool:
+        try:
+            return str(uuid.UUID(str(value))) == value
+        except ValueError:
+            return False
+
+    def submit(self, request: Dict) -> Job:
+        """
+        Submit a job
+
+        Args:
+            request (dict): {"workflow": "pod-config", "files": ["config/pod-config.yml"]}, or {"scripts":
+              ["CreateContainerPe"], "schema": "...", "files": [...]} to run scripts on their own. Optional "plan"
+              to plan the changes instead of making them, "resume" with the id of a job to resume & "name" for the
+              log file of the job
+        Returns:
+            Job: The queued job
+        Raises:
+            ValueError: If the request is invalid
+        """
+        workflow = request.get("workflow")
+        validated = self.validate(request)
+        scripts, input_files, run_config = validated["scripts"], validated["input_files"], validated["run_config"]
+
+        job = Job(workflow, scripts if not workflow else None, request.get("schema"), input_files,
+                  plan=bool(request.get("plan")), resume=request.get("resume"), name=request.get("name"))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._drop_finished_jobs()
+        # Every job starts from an empty context, the checkpoint journal, plan & log context are per job
+        self._executor.submit(contextvars.Context().run, self._run, job, run_config)
+        logger.info(f"Submitted the job {job.id} for {workflow or scripts}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    @staticmethod
+    def wait(jobs: List[Job], timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the jobs to finish
+
+        Returns:
+            bool: True if all the jobs finished, False on timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for job in jobs:
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            if not job.done.wait(remaining):
+                return False
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Jobs per status and the state the process keeps warm between the jobs
+        """
+        jobs = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self.list():
+            jobs[job.status] += 1
+        return {"jobs": jobs, "sessions": session_registry.get_stats(), "worker_pool": get_worker_pool().get_stats(),
+                "credentials": credential_cache.get_stats()}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _drop_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            self._jobs.pop(job_id)
+
+    @staticmethod
+    @contextmanager
+    def _timed(job: Job, phase: str):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            job.timings[phase] = round(time.time() - start_time, 3)
+
+    def _run(self, job: Job, run_config: Dict):
+        job.status = RUNNING
+        job.started = time.time()
+        job.timings["queued"] = round(job.started - job.submitted, 3)
+        os.makedirs(self.logs_directory, exist_ok=True)
+        job.log_file = os.path.join(self.logs_directory, f"{job.name or job.id}.log")
+        # Plans make no calls, only the runs have an event log
+        job.event_log = None if job.plan else get_event_log_path(self.project_root, job.resume or job.id)
+
+        workflow = Workflow(
+            workflow_type=job.workflow,
+            project_root=self.project_root,
+            schema=run_config["schema"],
+            input_files=job.input_files,
+            run_id=job.resume or job.id,
+            resume=bool(job.resume),
+            plan=job.plan
+        )
+        with log_context(job.id, file_name=job.log_file):
+            logger.info(f"Running the job {job.id}")
+            try:
+                with self._timed(job, "pre_run_actions"):
+                    workflow.run_functions(run_config["pre_run_actions"])
+                with self._timed(job, "scripts"):
+                    workflow.run_scripts(run_config["scripts"])
+                job.status = SUCCEEDED
+            except BaseException as e:
+                # The actions exit on invalid inputs, the server keeps running
+                logger.exception(e)
+                job.error = str(e) or type(e).__name__
+                job.status = FAILED
+            finally:
+                job.json_output = to_json(workflow.data.get("json_output"))
+                job.finished = time.time()
+                job.timings["total"] = round(job.finished - job.started, 3)
+                logger.info(f"Job {job.name or job.id} {job.status} in {job.timings['total']}s")
+                job.done.set()
@@ -0,0 +1,111 @@
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+from framework.helpers.log_utils import get_logger
+from .jobs import JobManager
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_REQUEST_SIZE = 1024 * 1024
+
+"""
+Local HTTP API of the server
+    GET  /health        -> {"status": "ok"}
+    GET  /stats         -> jobs per status, sessions & connection pools, worker pool, credential cache
+    GET  /jobs          -> summary of the jobs
+    POST /jobs          -> submit a job, eg. {"workflow": "pod-config", "files": ["config/pod-config.yml"]}
+    GET  /jobs/<job_id> -> status, timings, results & log file of the job
+"""
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server: "ApiServer"
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        job_manager = self.server.job_manager
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif path == "/stats":
+            self._send_json(HTTPStatus.OK, job_manager.get_stats())
+        elif path == "/jobs":
+            self._send_json(HTTPStatus.OK, {"jobs": [job.to_dict() for job in job_manager.list()]})
+        elif path.startswith("/jobs/"):
+            job = job_manager.get(path[len("/jobs/"):])
+            if job:
+                self._send_json(HTTPStatus.OK, job.to_dict(details=True))
+            else:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Job not found"})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path!r}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path!r}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_REQUEST_SIZE:
+                raise ValueError("Request is too large")
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request has to be a json object")
+            job = self.server.job_manager.submit(request)
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def _send_json(self, status: HTTPStatus, body: Dict[str, Any]):
+        payload = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    Long-running server that runs the workflows submitted over a local HTTP API, see JobManager
+    """
+    daemon_threads = True
+
+    def __init__(self, job_manager: JobManager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Args:
+            job_manager (JobManager): Runs the submitted jobs
+            host (str, optional): Address to listen on, local only by default
+            port (int, optional): Port to listen on, 0 picks a free port
+        """
+        super(ApiServer, self).__init__((host, port), ApiRequestHandler)
+        self.job_manager = job_manager
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve in a background thread, see stop
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name="ApiServer", daemon=True)
+        self._thread.start()
+        logger.info(f"API server listening on {self.url}")
+
+    def stop(self, wait: bool = True):
+        """
+        Stop serving, the running jobs finish if wait is set
+        """
+        self.shutdown()
+        self.server_close()
+        self.job_manager.shutdown(wait=wait)
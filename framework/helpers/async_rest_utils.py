@@ -0,0 +1,330 @@
+import asyncio
+import json
+import ssl
+import threading
+import time
+from typing import Optional, Union, Tuple, Iterable, Awaitable, List, Any, Coroutine
+import aiohttp
+from requests.exceptions import HTTPError
+from .event_utils import emit_http_event
+from .log_utils import get_logger
+from .rest_utils import parse_response, raise_rest_error, check_response
+
+logger = get_logger(__name__)
+
+# Same defaults as the Retry strategy & TimeoutHTTPAdapter used by RestAPIUtil
+DEFAULT_TIMEOUT = (5, 300)
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 2
+RETRY_STATUS_FORCELIST = [429, 500, 502, 503, 504]
+# Max connections per event loop, a single loop can drive hundreds of endpoints
+connection_limit = 500
+connection_limit_per_host = 20
+
+
+class AsyncResponse:
+    """
+    Fully read aiohttp response. The body is read before the connection is released, so the response can be
+    parsed the same way as a requests.Response in rest_api_call.
+    """
+
+    def __init__(self, status_code: int, headers: dict, content: bytes, reason: str = "", url: str = ""):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.reason = reason
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise HTTPError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}")
+
+    def __bool__(self):
+        return self.ok
+
+    def __str__(self):
+        return f"<Response [{self.status_code}]>"
+
+    __repr__ = __str__
+
+
+def async_rest_api_call(func):
+    """
+    Decorator function to handle async API calls and exceptions. Same semantics as rest_api_call.
+
+    Args:
+        func: The coroutine function that is making the call
+    """
+
+    async def make_call(*args, **kwargs):
+        r = None
+        try:
+            r = await func(*args, **kwargs)
+            response = parse_response(r)
+            r.raise_for_status()
+        except Exception as err:
+            raise_rest_error(r, err)
+
+        return check_response(response)
+
+    return make_call
+
+
+async def gather_with_concurrency(coroutines: Iterable[Awaitable], limit: int = connection_limit_per_host,
+                                  return_exceptions: bool = False) -> List[Any]:
+    """
+    Run the coroutines concurrently, with at most "limit" of them in flight at any time
+
+    Args:
+        coroutines (Iterable[Awaitable]): Coroutines to run
+        limit (int): Max coroutines in flight
+        return_exceptions (bool): Return the exceptions in the result list instead of raising the first one
+    Returns:
+        list: Results in the same order as the coroutines
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run_one(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run_one(c) for c in coroutines), return_exceptions=return_exceptions)
+
+
+def is_loop_running() -> bool:
+    """
+    Returns:
+        bool: If an event loop is running in this thread, the coroutines have to be awaited instead of run
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AsyncRestAPIUtil:
+    """
+    Asyncio counterpart of RestAPIUtil. The aiohttp sessions are created lazily, one per event loop, so one loop
+    can fan out calls to hundreds of clusters without a thread per call, and the instance can be shared by threads
+    that each run their own loop.
+    """
+
+    def __init__(self, ip_address: str, user: Optional[str], pwd: Optional[str], headers: dict = None,
+                 secured: bool = True, port: str = ""):
+        self.__IP_ADDRESS = ip_address
+        self.__SSL_ENABLED = bool(secured)
+        self.__PORT = f":{port}" if port else port
+        self.__headers = headers if headers is not None else {'content-type': 'application/json'}
+        self.__auth = aiohttp.BasicAuth(user, pwd) if user and pwd else None
+        # aiohttp sessions are bound to the loop they are created in, event loop -> ClientSession
+        self.__sessions = {}
+        self.__lock = threading.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the session of the running event loop
+        """
+        with self.__lock:
+            session = self.__sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run the coroutine on a new event loop, the session of that loop is closed before the loop ends.
+        Like asyncio.run, it can't be called from a running event loop, check is_loop_running first.
+
+        Args:
+            coroutine (Coroutine): Coroutine that makes the calls
+        Returns:
+            The result of the coroutine
+        """
+        async def run_and_close():
+            try:
+                return await coroutine
+            finally:
+                await self.close()
+
+        return asyncio.run(run_and_close())
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            # The sessions of the loops that ended without close() cannot be closed anymore, forget them
+            for stale_loop in [event_loop for event_loop in self.__sessions if event_loop.is_closed()]:
+                logger.debug("Dropping the async session of a closed event loop for %s", self.__IP_ADDRESS)
+                del self.__sessions[stale_loop]
+
+            session = self.__sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=connection_limit, limit_per_host=connection_limit_per_host)
+                session = aiohttp.ClientSession(auth=self.__auth, connector=connector)
+                self.__sessions[loop] = session
+        return session
+
+    @async_rest_api_call
+    async def post(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
+        headers = headers if headers is not None else self.__headers
+        data = {} if not data else data
+        url = self.prepare_url(uri)
+
+        logger.debug("POST request for the URL: %s", url)
+        data = json.dumps(data) if jsonify else data
+
+        if data:
+            logger.debug("POST payload: %s", data)
+        return await self._request("POST", url, headers=headers, data=data, verify=verify, **kwargs)
+
+    @async_rest_api_call
+    async def put(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
+        headers = headers if headers is not None else self.__headers
+        data = {} if not data else data
+        url = self.prepare_url(uri)
+
+        logger.debug("PUT request for the URL: %s", url)
+        data = json.dumps(data) if jsonify else data
+
+        if data:
+            logger.debug("PUT payload: %s", data)
+        return await self._request("PUT", url, headers=headers, data=data, verify=verify, **kwargs)
+
+    @async_rest_api_call
+    async def get(self, uri: str, headers: dict = None, data: dict = None, verify=False, **kwargs):
+        headers = headers if headers is not None else self.__headers
+        url = self.prepare_url(uri)
+        headers = {} if not headers else headers
+
+        logger.debug("GET request for the URL: %s", url)
+        if data:
+            logger.debug("GET payload: %s", data)
+            return await self._request("GET", url, headers=headers, data=json.dumps(data), verify=False, **kwargs)
+        return await self._request("GET", url, headers=headers, verify=verify, **kwargs)
+
+    @async_rest_api_call
+    async def delete(self, uri: str, headers: dict = None, verify=False, **kwargs):
+        headers = headers if headers is not None else self.__headers
+        url = self.prepare_url(uri)
+        headers = {} if not headers else headers
+
+        logger.debug("DELETE request for the URL: %s", url)
+        return await self._request("DELETE", url, headers=headers, verify=verify, **kwargs)
+
+    @async_rest_api_call
+    async def patch(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
+        headers = headers if headers is not None else self.__headers
+        data = {} if not data else data
+        url = self.prepare_url(uri)
+
+        logger.debug("PATCH request for the URL: %s", url)
+        data = json.dumps(data) if jsonify else data
+
+        if data:
+            logger.debug("PATCH payload: %s", data)
+            return await self._request("PATCH", url, headers=headers, data=data, verify=verify, **kwargs)
+        return await self._request("PATCH", url, headers=headers, verify=verify, **kwargs)
+
+    async def _request(self, method: str, url: str, verify: Union[bool, str] = False,
+                       timeout: Optional[Union[int, float, Tuple]] = None, files: Optional[dict] = None,
+                       cert: Optional[Tuple[str, str]] = None, **kwargs) -> AsyncResponse:
+        """
+        Make the call, retrying on connection errors and RETRY_STATUS_FORCELIST status codes with exponential
+        backoff, like the Retry strategy of RestAPIUtil. Like raise_on_status=False, the last response is returned
+        once the retries are exhausted.
+        """
+        session = self._get_session()
+        kwargs["timeout"] = self.build_timeout(timeout)
+        kwargs["ssl"] = self.build_ssl(verify, cert)
+        if files:
+            kwargs["data"] = self.build_form_data(kwargs.get("data"), files)
+            # Let aiohttp set the multipart boundary
+            kwargs["headers"] = {k: v for k, v in (kwargs.get("headers") or {}).items()
+                                 if k.lower() != "content-type"}
+
+        start_time = time.perf_counter()
+        for attempt in range(RETRY_TOTAL + 1):
+            retries_left = attempt < RETRY_TOTAL
+            try:
+                async with session.request(method, url, **kwargs) as resp:
+                    content = await resp.read()
+                    response = AsyncResponse(resp.status, dict(resp.headers), content, resp.reason or "",
+                                             str(resp.url))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not retries_left:
+                    emit_http_event(method, url, start_time, retries=attempt, error=e)
+                    raise
+                logger.debug("%s %s failed with %s, retrying...", method, url, type(e).__name__)
+            else:
+                if response.status_code not in RETRY_STATUS_FORCELIST or not retries_left:
+                    emit_http_event(method, url, start_time, status=response.status_code, retries=attempt)
+                    return response
+                logger.debug("%s %s returned %s, retrying...", method, url, response.status_code)
+            await asyncio.sleep(self.get_backoff_time(attempt))
+
+    @staticmethod
+    def get_backoff_time(attempt: int) -> float:
+        # urllib3 Retry doesn't sleep before the first retry
+        if attempt < 1:
+            return 0
+        return RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1))
+
+    @staticmethod
+    def build_timeout(timeout: Optional[Union[int, float, Tuple]]) -> aiohttp.ClientTimeout:
+        timeout = timeout or DEFAULT_TIMEOUT
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+
+    @staticmethod
+    def build_ssl(verify: Union[bool, str], cert: Optional[Tuple[str, str]] = None) -> Union[bool, ssl.SSLContext]:
+        if not verify and not cert:
+            return False
+        context = ssl.create_default_context(cafile=verify if isinstance(verify, str) else None)
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if cert:
+            context.load_cert_chain(*cert)
+        return context
+
+    @staticmethod
+    def build_form_data(data: Optional[Union[dict, str]], files: dict) -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        if isinstance(data, dict):
+            for name, value in data.items():
+                form.add_field(name, str(value))
+        for name, value in files.items():
+            if isinstance(value, (tuple, list)):
+                filename, file_obj = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+                form.add_field(name, file_obj, filename=filename, content_type=content_type)
+            else:
+                form.add_field(name, value)
+        return form
+
+    def prepare_url(self, uri):
+        return f"{self.get_protocol()}://{self.__IP_ADDRESS}{self.__PORT}/{uri}"
+
+    def get_protocol(self):
+        if self.__SSL_ENABLED <= 0:
+            return 'http'
+        return 'https'
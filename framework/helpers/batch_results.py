@@ -0,0 +1,124 @@
+import contextvars
+import json
+from contextlib import contextmanager
+from typing import List, Optional, Dict
+
+# Failed requests of a batch with these statuses were not applied & are resubmitted
+RETRYABLE_STATUS_CODES = ("429", "503")
+# The gateway gave up on the requests with these statuses, they may have been applied. They are resubmitted unless
+# they are creates, a create that was applied would be created twice
+GATEWAY_STATUS_CODES = ("502", "504")
+
+# BatchResults of the batch calls made by the running script, see collect_batch_results
+_batch_results: contextvars.ContextVar[Optional[List["BatchResult"]]] = contextvars.ContextVar("batch_results",
+                                                                                              default=None)
+
+
+class BatchResult:
+    """
+    Outcome of the requests of a batch call. "succeeded" & "failed" are in the order of the requests.
+    """
+
+    def __init__(self):
+        # [{"index": 0, "task_uuid": "..", "response": {..}}, ..]
+        self.succeeded = []
+        # [{"index": 1, "request": {..}, "status": "503", "body": .., "retryable": True}, ..]
+        self.failed = []
+        self.attempts = 0
+
+    @property
+    def task_uuid_list(self) -> List:
+        return [response["task_uuid"] for response in self.succeeded if response["task_uuid"]]
+
+    @property
+    def retryable(self) -> List:
+        return [failure for failure in self.failed if failure["retryable"]]
+
+    @property
+    def permanent(self) -> List:
+        return [failure for failure in self.failed if not failure["retryable"]]
+
+    @staticmethod
+    def is_retryable(response: Optional[dict], request: Optional[dict] = None) -> bool:
+        status = str(response.get("status", "")) if response else ""
+        if status in RETRYABLE_STATUS_CODES:
+            return True
+        return status in GATEWAY_STATUS_CODES and (request or {}).get("operation") != "POST"
+
+    def add(self, index: int, request: dict, response: Optional[dict]):
+        status = str(response.get("status", "")) if response else ""
+        if response and (not status or status.startswith("2")):
+            self.succeeded.append({"index": index, "task_uuid": get_task_uuid(response), "response": response})
+        else:
+            self.failed.append({
+                "index": index,
+                "request": request,
+                "status": status or None,
+                "body": response.get("api_response") if response else None,
+                "retryable": self.is_retryable(response, request)
+            })
+
+    def sort(self):
+        self.succeeded.sort(key=lambda response: response["index"])
+        self.failed.sort(key=lambda failure: failure["index"])
+
+    def to_dict(self) -> Dict:
+        return {
+            "succeeded": len(self.succeeded),
+            "failed": [{"status": failure["status"], "body": failure["body"], "retryable": failure["retryable"]}
+                       for failure in self.failed],
+            "attempts": self.attempts
+        }
+
+
+@contextmanager
+def collect_batch_results():
+    """
+    Collect the BatchResults of the batch calls made in the block, so the failed requests can be reported by the
+    script that made them
+
+    Yields:
+        list: BatchResults, in the order of the batch calls
+    """
+    results = []
+    token = _batch_results.set(results)
+    try:
+        yield results
+    finally:
+        _batch_results.reset(token)
+
+
+def record_batch_result(result: BatchResult):
+    """
+    Add the result of a batch call to the results collected by collect_batch_results, if they are collected
+    """
+    collected_results = _batch_results.get()
+    if collected_results is not None:
+        collected_results.append(result)
+
+
+def get_task_uuid(response: dict) -> Optional[str]:
+    """
+    Parse a response of the batch api response list to get the Task uuid
+    Args:
+      response(dict): Response of a request of the batch
+    Returns:
+      str : Task uuid, None if the response has no task
+    """
+    api_response = response.get("api_response", {})
+
+    # todo bug
+    # sometimes api_response in str
+    if isinstance(api_response, str):
+        try:
+            api_response = json.loads(api_response)
+        except Exception as e:
+            raise (Exception(f"Cannot get task list to monitor for the batch call!: {e}")
+                   .with_traceback(e.__traceback__))
+
+    if api_response and api_response.get('status', {}).get('execution_context', {}).get('task_uuid'):
+        return api_response['status']['execution_context']['task_uuid']
+    # In some cases only task_uuid is returned in response
+    elif api_response and api_response.get('task_uuid', {}):
+        return api_response["task_uuid"]
+    return None
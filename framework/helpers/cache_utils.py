@@ -0,0 +1,280 @@
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import deepcopy
+from typing import Optional, Dict, Any, Tuple, List, Callable
+from .log_utils import get_logger
+from .run_stats import record_run_stats
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_TTL_IN_SEC = 60
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_NAME_INDEX_TTL_IN_SEC = 300
+
+_local = threading.local()
+_caches = weakref.WeakSet()
+# session -> {kind: NameIndex}
+_name_indexes = weakref.WeakKeyDictionary()
+_name_indexes_lock = threading.Lock()
+
+
+@contextmanager
+def fresh_reads():
+    """
+    Bypass the cached responses for the reads made in the current thread, the fresh responses are still cached.
+    Used by the verifications that have to see the entities that were just created and the state monitors.
+    """
+    previous = getattr(_local, "fresh_reads", False)
+    _local.fresh_reads = True
+    try:
+        yield
+    finally:
+        _local.fresh_reads = previous
+
+
+def is_fresh_read() -> bool:
+    return getattr(_local, "fresh_reads", False)
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of read responses, with TTL per resource type. Entries are keyed on the uri and the
+    normalized payload, and all the entries of a resource type are invalidated when the resource is modified.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, default_ttl: int = DEFAULT_CACHE_TTL_IN_SEC,
+                 resource_ttls: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            max_entries (int, optional): Max entries to keep, least recently used entries are evicted first
+            default_ttl (int, optional): TTL of the entries in seconds
+            resource_ttls (dict, optional): TTL per resource type, eg {"clusters": 300, "tasks": 0}
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.resource_ttls = resource_ttls or {}
+        self._entries: OrderedDict[Tuple, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        _caches.add(self)
+
+    @staticmethod
+    def get_resource_type(resource: str) -> str:
+        # "api/nutanix/v3/clusters" -> "clusters"
+        return resource.strip("/").split("/")[-1]
+
+    def get_ttl(self, resource: str) -> int:
+        return self.resource_ttls.get(self.get_resource_type(resource), self.default_ttl)
+
+    @staticmethod
+    def build_key(resource: str, uri: str, payload: Any = None) -> Tuple:
+        return resource, uri, json.dumps(payload, sort_keys=True, default=str) if payload else ""
+
+    def get(self, resource: str, uri: str, payload: Any = None) -> Tuple[bool, Any]:
+        """
+        Returns:
+            (bool, Any): If it was a hit and the cached response
+        """
+        if is_fresh_read():
+            return False, None
+
+        key = self.build_key(resource, uri, payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_run_stats("response_cache", "reads", hits=1)
+                # Callers modify the responses, never hand out the cached object
+                return True, deepcopy(entry[1])
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+        record_run_stats("response_cache", "reads", misses=1)
+        return False, None
+
+    def set(self, resource: str, uri: str, payload: Any, response: Any):
+        ttl = self.get_ttl(resource)
+        if ttl <= 0:
+            return
+
+        key = self.build_key(resource, uri, payload)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, deepcopy(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, resource: str):
+        """
+        Drop all the entries of the resource type of "resource"
+        """
+        resource_type = self.get_resource_type(resource)
+        with self._lock:
+            keys = [key for key in self._entries if self.get_resource_type(key[0]) == resource_type]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += 1
+        record_run_stats("response_cache", "reads", invalidations=1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "entries": len(self._entries)}
+
+
+class NameIndex:
+    """
+    Name to entities index of an entity kind, built from one bulk list call and shared by the threads using the
+    same session. The index is rebuilt once the TTL expires or after it is invalidated.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_NAME_INDEX_TTL_IN_SEC, resource: Optional[str] = None):
+        """
+        Args:
+            ttl (int, optional): TTL of the index in seconds
+            resource (str, optional): Resource the entities are written to, eg "api/nutanix/v3/subnets". The writes
+                made with the session to the resource invalidate the index
+        """
+        self.ttl = ttl
+        self.resource = resource.strip("/") if resource else None
+        self._entities: Optional[Dict[str, List[Dict]]] = None
+        self._expiry = 0.0
+        # Held while the index is built, so that concurrent lookups wait for one bulk list instead of each listing
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    def get(self, name: str, build: Callable[[], Dict[str, List[Dict]]]) -> List[Dict]:
+        """
+        Args:
+            name (str): Name of the entity
+            build (callable): Returns the name to entities map, called if the index is not built or expired
+        Returns:
+            list: Copy of the entities with the name, empty list if there are none
+        """
+        with self._lock:
+            if self._entities is None or self._expiry <= time.monotonic():
+                self._entities = build()
+                self._expiry = time.monotonic() + self.ttl
+                self.builds += 1
+            entities = self._entities.get(name)
+            if entities:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return deepcopy(entities or [])
+
+    def snapshot(self, build: Callable[[], Dict[str, List[Dict]]]) -> Dict[str, List[Dict]]:
+        """
+        Args:
+            build (callable): Returns the name to entities map, called if the index is not built or expired
+        Returns:
+            dict: Copy of the whole name to entities map
+        """
+        with self._lock:
+            if self._entities is None or self._expiry <= time.monotonic():
+                self._entities = build()
+                self._expiry = time.monotonic() + self.ttl
+                self.builds += 1
+            self.hits += 1
+            return deepcopy(self._entities)
+
+    def add(self, name: str, entity: Dict):
+        """
+        Add an entity found outside the bulk list, eg. by a filtered list call
+        """
+        with self._lock:
+            if self._entities is not None:
+                self._entities.setdefault(name, []).append(deepcopy(entity))
+
+    def invalidate(self):
+        with self._lock:
+            self._entities = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "builds": self.builds}
+
+
+def get_name_index(session: Any, kind: str, ttl: int = DEFAULT_NAME_INDEX_TTL_IN_SEC,
+                   resource: Optional[str] = None) -> NameIndex:
+    """
+    Get the name index of the kind for the session, create one if it doesn't exist
+    """
+    with _name_indexes_lock:
+        indexes = _name_indexes.setdefault(session, {})
+        if kind not in indexes:
+            indexes[kind] = NameIndex(ttl, resource)
+        return indexes[kind]
+
+
+def invalidate_name_index(session: Any, kind: str):
+    """
+    Drop the name index of the kind for the session, used after the entities of the kind are modified
+    """
+    with _name_indexes_lock:
+        index = _name_indexes.get(session, {}).get(kind)
+    if index:
+        index.invalidate()
+
+
+def invalidate_written_name_indexes(session: Any, uri: str):
+    """
+    Drop the name indexes of the session the write to the uri makes stale, used by the writes made with the session
+    directly, eg. session.post("api/nutanix/v3/subnets", ...)
+    """
+    uri = uri.strip("/")
+    if uri.endswith("/list"):
+        return
+    with _name_indexes_lock:
+        indexes = list(_name_indexes.get(session, {}).values())
+    for index in indexes:
+        if index.resource and (uri == index.resource or uri.startswith(index.resource + "/")):
+            index.invalidate()
+
+
+def invalidate_name_indexes(kinds: Optional[List[str]] = None):
+    """
+    Drop the name indexes of the kinds for all the sessions, all the kinds if not set. Used after the writes that
+    don't go through a session, eg. the batches of the v4 SDK
+    """
+    with _name_indexes_lock:
+        indexes = [index for session_indexes in list(_name_indexes.values())
+                   for kind, index in session_indexes.items() if kinds is None or kind in kinds]
+    for index in indexes:
+        index.invalidate()
+
+
+def get_cache_stats() -> Dict:
+    """
+    Returns:
+        dict: Aggregated stats of all the response caches in the process
+    """
+    stats = {"hits": 0, "misses": 0, "invalidations": 0, "entries": 0}
+    for cache in list(_caches):
+        for key, value in cache.get_stats().items():
+            stats[key] += value
+    return stats
+
+
+def log_cache_stats(stats: Optional[Dict] = None):
+    """
+    Args:
+        stats (dict, optional): Counters to log, eg. the response cache stats of a run, all the caches if not set
+    """
+    stats = {"hits": 0, "misses": 0, "invalidations": 0, **(stats if stats is not None else get_cache_stats())}
+    if stats["hits"] or stats["misses"]:
+        logger.info(f"Response cache: {stats['hits']} hits, {stats['misses']} misses, "
+                    f"{stats['invalidations']} invalidations")
@@ -0,0 +1,321 @@
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Tuple
+from .log_utils import get_logger
+from .reconcile_utils import get_plan
+
+logger = get_logger(__name__)
+
+RUNS = "runs"
+CHECKPOINTS_DIRECTORY = "checkpoints"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Keys added to the data while the workflow runs, they are not inputs of the steps
+RUNTIME_KEYS = {"json_output", "pc_version", "vaults", "vault_to_use", "project_root", "input_files", "schema",
+                "run_id", "resume"}
+# Statuses the verifications set in the results, a step with one of them didn't succeed
+VERIFICATION_FAILURES = {"FAIL", "CAN'T VERIFY"}
+
+_local = threading.local()
+# Journal of the run, per context so that the runs of a long-running process each have their own
+_checkpoint_journal: contextvars.ContextVar[Optional["CheckpointJournal"]] = contextvars.ContextVar(
+    "checkpoint_journal", default=None)
+
+
+def _stable_value(obj: Any) -> str:
+    # Sessions & api clients are recreated on every run, only their type is an input
+    return type(obj).__name__
+
+
+def hash_inputs(inputs: Any) -> str:
+    """
+    Hash of the inputs of a step, stable across runs
+
+    Args:
+        inputs (Any): Inputs of the step, the runtime keys of the dicts are ignored
+    Returns:
+        str: sha256 of the inputs
+    """
+    if isinstance(inputs, dict):
+        inputs = {key: value for key, value in inputs.items() if key not in RUNTIME_KEYS}
+    payload = json.dumps(inputs, sort_keys=True, default=_stable_value)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def to_json(obj: Any) -> Any:
+    # Results are stored in the journal, anything that is not json is stored as its string
+    return json.loads(json.dumps(obj, default=str))
+
+
+def has_failed_verification(results: Any) -> bool:
+    if isinstance(results, dict):
+        return any(has_failed_verification(value) for value in results.values())
+    if isinstance(results, list):
+        return any(has_failed_verification(value) for value in results)
+    return isinstance(results, str) and results in VERIFICATION_FAILURES
+
+
+@contextmanager
+def checkpoint_target(target: str):
+    """
+    Mark the exceptions the current thread adds to a TargetExceptions as the exceptions of the target
+    """
+    previous = getattr(_local, "target", None)
+    _local.target = target
+    try:
+        yield
+    finally:
+        _local.target = previous
+
+
+class TargetExceptions(list):
+    """
+    Exceptions of a script, that also counts the exceptions of each target, eg. of each cluster of a ClusterScript.
+    The target is the one the thread adding the exception runs, see checkpoint_target.
+    """
+
+    def __init__(self, *args):
+        super(TargetExceptions, self).__init__(*args)
+        self.targets = Counter()
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        super(TargetExceptions, self).append(item)
+        target = getattr(_local, "target", None)
+        if target is not None:
+            with self._lock:
+                self.targets[target] += 1
+
+    def has_failed(self, target: str) -> bool:
+        return bool(self.targets.get(target))
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of the steps of a run, one json line per step with the script, the target, the hash of the
+    inputs and the outcome. When a run is resumed, the steps the journal has as succeeded for unchanged inputs are
+    skipped and their results are restored from the journal.
+    """
+
+    def __init__(self, file_path: str, run_id: str, resume: bool = False):
+        """
+        Args:
+            file_path (str): Path of the journal
+            run_id (str): uuid of the run
+            resume (bool, optional): Load the steps of the journal, it has to exist
+        """
+        self.file_path = file_path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        # (script, target) -> latest entry
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+        if resume:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"No checkpoint journal found for the run {run_id!r} in {file_path}")
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            # A new run with the same uuid starts from scratch
+            open(file_path, "w").close()
+
+    def _load(self):
+        with open(self.file_path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line is incomplete if the run was killed while writing it
+                    logger.warning(f"Ignoring the invalid line {line_number} of {self.file_path}")
+                    continue
+                self._entries[(entry["script"], entry["target"])] = entry
+        logger.info(f"Loaded {len(self._entries)} steps from the checkpoint journal {self.file_path}")
+
+    def get_succeeded(self, script: str, target: str, input_hash: str) -> Optional[Dict]:
+        """
+        Returns:
+            dict: The entry of the step if it succeeded for the same inputs, else None
+        """
+        with self._lock:
+            entry = self._entries.get((script, target))
+        if entry and entry["status"] == SUCCEEDED and entry["input_hash"] == input_hash:
+            return entry
+        return None
+
+    def record(self, script: str, target: str, input_hash: str, succeeded: bool, results: Any = None,
+               error: Optional[str] = None):
+        """
+        Append the outcome of a step to the journal
+        """
+        entry = {"time": time.time(), "script": script, "target": target, "input_hash": input_hash,
+                 "status": SUCCEEDED if succeeded else FAILED, "results": to_json(results), "error": error}
+        line = json.dumps(entry)
+        with self._lock:
+            self._entries[(script, target)] = entry
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            # Flushed line by line, so the journal survives the process being killed
+            with open(self.file_path, "a") as f:
+                f.write(line + "\n")
+
+    def skip(self, script: str, target: str):
+        with self._lock:
+            self.skipped += 1
+        logger.info(f"Skipping {script!r} for {target or 'the run'!r}, it succeeded in the run {self.run_id!r} "
+                    f"with the same inputs")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"run_id": self.run_id, "journal": self.file_path, "succeeded": self.succeeded,
+                    "failed": self.failed, "skipped": self.skipped}
+
+
+class TargetCheckpoints:
+    """
+    Checkpoints of the targets of one script, eg. the clusters of a ClusterScript. Targets that succeeded in the
+    run being resumed are left out of the pending targets and their results are restored.
+    """
+
+    def __init__(self, script_name: str, targets: Dict[str, Any]):
+        """
+        Args:
+            script_name (str): Name of the script
+            targets (dict): Target to the inputs of the target, eg. cluster_ip to cluster_details
+        """
+        self.script_name = script_name
+        self.journal = get_checkpoint_journal()
+        self.hashes = {target: hash_inputs(inputs) for target, inputs in targets.items()} if self.journal else {}
+        # Target to the results restored from the journal
+        self.restored: Dict[str, Any] = {}
+        self.pending = dict(targets)
+        # Target to the exception the target raised, for the targets that ran
+        self.errors: Dict[str, Optional[Exception]] = {}
+        self._lock = threading.Lock()
+        if not self.journal:
+            return
+
+        for target in targets:
+            entry = self.journal.get_succeeded(script_name, str(target), self.hashes[target])
+            if entry:
+                self.journal.skip(script_name, str(target))
+                if entry["results"] is not None:
+                    self.restored[target] = entry["results"]
+                self.pending.pop(target)
+
+    def run(self, target: str, fn: Callable, *args):
+        """
+        Call the function for the target, the exceptions it adds to a TargetExceptions are counted for the target
+        """
+        with self._lock:
+            self.errors.setdefault(target, None)
+        with checkpoint_target(target):
+            try:
+                return fn(*args)
+            except Exception as e:
+                with self._lock:
+                    self.errors[target] = e
+                raise
+
+    def record(self, exceptions: list, results: Dict[str, Any]):
+        """
+        Record the outcome of the targets that ran. A target failed if it raised, added exceptions or its
+        verification failed
+
+        Args:
+            exceptions (list): Exceptions of the script, only the targets that added exceptions failed if it is a
+              TargetExceptions, else all the targets failed if there are any
+            results (dict): Target to the results of the target
+        """
+        if not self.journal:
+            return
+        for target in self.pending:
+            if target not in self.errors:
+                continue
+            error = self.errors[target]
+            if isinstance(exceptions, TargetExceptions):
+                failed = exceptions.has_failed(target)
+            else:
+                failed = bool(exceptions)
+            failed = failed or error is not None or has_failed_verification(results.get(target))
+            self.journal.record(self.script_name, str(target), self.hashes[target], succeeded=not failed,
+                                results=results.get(target), error=str(error) if error else None)
+
+
+def run_checkpointed(script, **kwargs):
+    """
+    Run the script, or restore its results if it succeeded in the run being resumed for the same inputs. Only
+    the scripts with CHECKPOINT_ENABLED are checkpointed as a whole, the other ones run as usual. In plan mode
+    the script is planned instead.
+
+    Args:
+        script (Script): Script to run
+    Returns:
+        Results of the script
+    """
+    current_plan = get_plan()
+    if current_plan:
+        return current_plan.run(script)
+
+    journal = get_checkpoint_journal()
+    if not journal or not getattr(script, "CHECKPOINT_ENABLED", False):
+        return script.run(**kwargs)
+
+    name = type(script).__name__
+    target = str(script.get_checkpoint_target() or "")
+    input_hash = hash_inputs(script.get_checkpoint_inputs())
+    entry = journal.get_succeeded(name, target, input_hash)
+    if entry:
+        journal.skip(name, target)
+        script.results = entry["results"] or {}
+        return script.results
+
+    try:
+        results = script.run(**kwargs)
+    except Exception as e:
+        journal.record(name, target, input_hash, succeeded=False, error=str(e))
+        raise
+    error = "; ".join(str(exception) for exception in script.exceptions) if script.exceptions else None
+    succeeded = not script.exceptions and not has_failed_verification(results)
+    journal.record(name, target, input_hash, succeeded=succeeded, results=results, error=error)
+    return results
+
+
+def get_journal_path(project_root: str, run_id: str) -> str:
+    return os.path.join(project_root, RUNS, CHECKPOINTS_DIRECTORY, f"{run_id}.jsonl")
+
+
+def configure_checkpoints(project_root: str, run_id: str, resume: bool = False) -> CheckpointJournal:
+    """
+    Start the checkpoint journal of the run, under runs/checkpoints
+
+    Args:
+        project_root (str): Root of the project
+        run_id (str): uuid of the run
+        resume (bool, optional): Resume the run, the steps that succeeded in it are skipped
+    Returns:
+        CheckpointJournal
+    """
+    journal = CheckpointJournal(get_journal_path(project_root, run_id), run_id, resume=resume)
+    _checkpoint_journal.set(journal)
+    return journal
+
+
+def get_checkpoint_journal() -> Optional[CheckpointJournal]:
+    return _checkpoint_journal.get()
+
+
+def disable_checkpoints():
+    _checkpoint_journal.set(None)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional, Dict, List, Tuple, Callable, Any
+from .log_utils import get_logger
+
+logger = get_logger(__name__)
+
+CONFIG_CACHE_DIRECTORY = "config-cache"
+# Bump when the parsers change what they return, the entries of the older parsers are then ignored
+CACHE_FORMAT = 2
+
+
+def hash_content(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ConfigCache:
+    """
+    On-disk cache of the parsed config files. An entry is keyed by the path & the content of the file, and records
+    the content hash of every file it includes, so a changed include invalidates the entry as well. Unchanged
+    configs are loaded from JSON instead of parsed, JSON can be loaded from a directory others can write to without
+    running any code. Configs JSON can't represent as is, eg. with dates or non-string keys, aren't cached.
+    Disabled until a directory is configured.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def configure(self, directory: Optional[str]):
+        """
+        Args:
+            directory (str, optional): Directory of the entries, None disables the cache
+        """
+        self.directory = str(directory) if directory else None
+
+    def load(self, file: str, content: str, parse: Callable[[str, str], Tuple[Any, List[str]]]) -> Any:
+        """
+        Get the parsed config from the cache, or parse it & cache it
+
+        Args:
+            file (str): Path of the config file
+            content (str): Content of the file
+            parse (callable): parse(file, content) -> (config, paths of the files the config includes)
+        Returns:
+            The parsed config, a new copy on every call
+        """
+        if not self.directory:
+            return parse(file, content)[0]
+
+        key = hash_content(f"{CACHE_FORMAT}\0{os.path.abspath(file)}\0{content}")
+        entry_file = os.path.join(self.directory, f"{key}.json")
+        entry = self._read(entry_file)
+        if entry and all(self._hash_file(path) == content_hash for path, content_hash in entry["includes"].items()):
+            self._count("hits")
+            logger.debug(f"Loaded the parsed {file} from the config cache")
+            return entry["config"]
+
+        self._count("misses")
+        config, includes = parse(file, content)
+        self._write(entry_file, {
+            "format": CACHE_FORMAT,
+            "includes": {path: self._hash_file(path) for path in includes},
+            "config": config
+        })
+        return config
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"directory": self.directory, **self._stats}
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    @staticmethod
+    def _hash_file(path: str) -> Optional[str]:
+        try:
+            with open(path, 'r') as f:
+                return hash_content(f.read())
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read(entry_file: str) -> Optional[Dict]:
+        try:
+            with open(entry_file) as f:
+                entry = json.load(f)
+            return entry if isinstance(entry, dict) and entry.get("format") == CACHE_FORMAT else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring the config cache entry {entry_file}: {e}")
+            return None
+
+    def _write(self, entry_file: str, entry: Dict):
+        # Written to a temporary file first, concurrent runs never read a partial entry
+        temp_file = None
+        try:
+            content = json.dumps(entry)
+            # JSON turns the non-string keys into strings, the entry would load as a different config
+            if json.loads(content) != entry:
+                logger.debug(f"Not caching {entry_file}, the config can't be stored as JSON as is")
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(temp_file, entry_file)
+        except TypeError as e:
+            # eg. the dates of a yml
+            logger.debug(f"Not caching {entry_file}, the config can't be stored as JSON: {e}")
+        except Exception as e:
+            logger.warning(f"Couldn't write the config cache entry {entry_file}: {e}")
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+config_cache = ConfigCache()
+
+
+def configure_config_cache(directory: Optional[str]):
+    """
+    Cache the parsed config files in the directory, None disables the cache
+    """
+    config_cache.configure(directory)
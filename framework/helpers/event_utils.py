@@ -0,0 +1,326 @@
+"""
+Structured events of a run, one json line per event in runs/events/<run uuid>.jsonl, alongside the logs. Each event
+carries the uuid of the run and the correlation fields of the context it's emitted in, ie. the pod block, the site,
+the script and the target, so the API calls & the monitors can be traced back to the scripts that made them.
+
+    script   a script ran: duration, status, exceptions
+    target   a script ran for one target, eg. a cluster of a ClusterScript: duration, status
+    http     an API call: method, host, uri, status, latency, retries, error
+    monitor  a monitor finished: monitor, status, checks, elapsed, waiting
+
+Aggregate them with
+    python -m framework.helpers.event_utils runs/events/<run uuid>.jsonl [--top 10] [--json]
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Iterable
+from urllib.parse import urlsplit
+from .log_utils import get_logger, log_writer
+
+logger = get_logger(__name__)
+
+RUNS = "runs"
+EVENTS_DIRECTORY = "events"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Correlation fields, in the order they're written
+CONTEXT_FIELDS = ("pod_block", "site", "script", "target")
+# Ids in the URIs, the calls of an endpoint are grouped whatever the entity they're made for
+URI_IDS = [(re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "{uuid}"),
+           (re.compile(r"(?<=/)\d+(?=/|$)"), "{id}")]
+
+# Event log of the run & the correlation fields, per context so that the runs of a long-running process each have
+# their own. The worker pool runs its items in the context of the submitter, so the fields follow the items
+_event_log: contextvars.ContextVar[Optional["EventLog"]] = contextvars.ContextVar("event_log", default=None)
+_event_context: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("event_context", default={})
+
+
+class EventLog:
+    """
+    Append-only JSONL log of the events of a run. The lines are written by the writer thread of the logs, the
+    threads emitting events don't wait on the file.
+    """
+
+    def __init__(self, file_path: str, run_id: str):
+        """
+        Args:
+            file_path (str): Path of the event log, a resumed run appends to the events of the run
+            run_id (str): uuid of the run
+        """
+        self.file_path = file_path
+        self.run_id = run_id
+        self.events = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        self._handler = logging.FileHandler(file_path, mode="a")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._closed = False
+
+    def emit(self, event: str, **fields):
+        """
+        Append an event, with the correlation fields of the current context
+
+        Args:
+            event (str): Type of the event, eg. http
+            fields: Fields of the event, the ones that are None are left out
+        """
+        entry = {"time": round(time.time(), 3), "run_id": self.run_id, "event": event}
+        entry.update(_event_context.get())
+        entry.update((key, value) for key, value in fields.items() if value is not None)
+        entry["thread"] = threading.current_thread().name
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            if self._closed:
+                return
+            self.events += 1
+        log_writer.put([self._handler], logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # The events queued so far are written before the file is closed
+        log_writer.flush()
+        self._handler.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"run_id": self.run_id, "event_log": self.file_path, "events": self.events}
+
+
+def get_event_log_path(project_root: str, run_id: str) -> str:
+    return os.path.join(project_root, RUNS, EVENTS_DIRECTORY, f"{run_id}.jsonl")
+
+
+def configure_event_log(project_root: str, run_id: str) -> EventLog:
+    """
+    Start the event log of the run, under runs/events
+
+    Args:
+        project_root (str): Root of the project
+        run_id (str): uuid of the run
+    Returns:
+        EventLog
+    """
+    event_log = EventLog(get_event_log_path(project_root, run_id), run_id)
+    _event_log.set(event_log)
+    return event_log
+
+
+def get_event_log() -> Optional[EventLog]:
+    return _event_log.get()
+
+
+def stop_event_log():
+    event_log = _event_log.get()
+    if event_log:
+        event_log.close()
+        _event_log.set(None)
+
+
+def emit_event(event: str, **fields):
+    """
+    Append an event to the event log of the run, if the run has one
+    """
+    event_log = _event_log.get()
+    if event_log:
+        event_log.emit(event, **fields)
+
+
+@contextmanager
+def event_context(**fields):
+    """
+    Add the correlation fields to the events emitted in the block, eg. event_context(pod_block="block-1")
+    """
+    token = _event_context.set({**_event_context.get(), **{key: str(value) for key, value in fields.items()
+                                                          if value is not None}})
+    try:
+        yield
+    finally:
+        _event_context.reset(token)
+
+
+@contextmanager
+def timed_event(event: str, **fields):
+    """
+    Run the block with the fields as correlation fields, and emit the event with the duration & the status of the
+    block once it's done. The block can add fields to the event through the dict it gets.
+    """
+    if not _event_log.get():
+        yield {}
+        return
+
+    extra_fields = {}
+    start_time = time.perf_counter()
+    with event_context(**fields):
+        try:
+            yield extra_fields
+        except Exception as e:
+            emit_event(event, duration=round(time.perf_counter() - start_time, 3), status=FAILED,
+                       error=f"{type(e).__name__}: {e}", **extra_fields)
+            raise
+        extra_fields.setdefault("status", SUCCEEDED)
+        emit_event(event, duration=round(time.perf_counter() - start_time, 3), **extra_fields)
+
+
+def emit_http_event(method: str, url: str, start_time: float, status: Optional[int] = None,
+                    retries: Optional[int] = None, error: Optional[Exception] = None):
+    """
+    Emit the event of an API call
+
+    Args:
+        method (str): HTTP method
+        url (str): URL of the call
+        start_time (float): time.perf_counter() when the call was made, retries included
+        status (int, optional): Status code of the last response
+        retries (int, optional): Retries made, eg. on a 503
+        error (Exception, optional): Exception the call failed with
+    """
+    if not _event_log.get():
+        return
+    parts = urlsplit(url or "")
+    emit_event("http", method=(method or "").upper(), host=parts.hostname, uri=parts.path, status=status,
+               latency=round(time.perf_counter() - start_time, 3), retries=retries,
+               error=f"{type(error).__name__}: {error}" if error else None)
+
+
+def read_events(files: Iterable[str]) -> List[Dict]:
+    """
+    Read the events of the event logs, the invalid lines are skipped
+    """
+    events = []
+    for file in files:
+        with open(file) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # The last line is incomplete if the run was killed while writing it
+                    logger.warning(f"Ignoring the invalid line {line_number} of {file}")
+    return events
+
+
+def normalize_uri(uri: str) -> str:
+    for pattern, replacement in URI_IDS:
+        uri = pattern.sub(replacement, uri)
+    return uri
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def summarize_events(events: List[Dict], top: int = 10) -> Dict[str, Any]:
+    """
+    Aggregate the events of one or more runs
+
+    Args:
+        events (list): Events, see read_events
+        top (int, optional): Rows of the slowest scripts & endpoints
+    Returns:
+        dict: runs, slowest_scripts, slowest_endpoints, hosts & monitors
+    """
+    scripts = [event for event in events if event.get("event") in ("script", "target")]
+    slowest_scripts = [
+        {key: event.get(key) for key in ("event", *CONTEXT_FIELDS, "duration", "status")}
+        for event in sorted(scripts, key=lambda event: event.get("duration", 0), reverse=True)[:top]
+    ]
+
+    endpoints = defaultdict(list)
+    hosts = defaultdict(lambda: {"calls": 0, "retries": 0, "errors": 0, "latency": 0.0})
+    for event in events:
+        if event.get("event") != "http":
+            continue
+        endpoints[(event.get("method"), normalize_uri(event.get("uri", "")))].append(event.get("latency", 0))
+        host = hosts[event.get("host")]
+        host["calls"] += 1
+        host["retries"] += event.get("retries") or 0
+        host["errors"] += 1 if event.get("error") or (event.get("status") or 0) >= 400 else 0
+        host["latency"] = round(host["latency"] + event.get("latency", 0), 3)
+    slowest_endpoints = sorted(
+        ({"method": method, "uri": uri, "calls": len(latencies), "total": round(sum(latencies), 3),
+          "p95": percentile(latencies, 0.95), "max": max(latencies)}
+         for (method, uri), latencies in endpoints.items()),
+        key=lambda endpoint: endpoint["total"], reverse=True)[:top]
+
+    monitors = defaultdict(lambda: {"runs": 0, "timeouts": 0, "checks": 0, "waiting": 0.0})
+    for event in events:
+        if event.get("event") != "monitor":
+            continue
+        monitor = monitors[event.get("monitor")]
+        monitor["runs"] += 1
+        monitor["timeouts"] += 1 if event.get("status") != SUCCEEDED else 0
+        monitor["checks"] += event.get("checks", 0)
+        monitor["waiting"] = round(monitor["waiting"] + event.get("waiting", 0), 3)
+
+    return {
+        "runs": sorted({event.get("run_id") for event in events if event.get("run_id")}),
+        "slowest_scripts": slowest_scripts,
+        "slowest_endpoints": slowest_endpoints,
+        "hosts": dict(sorted(hosts.items(), key=lambda item: item[1]["retries"], reverse=True)),
+        "monitors": dict(sorted(monitors.items(), key=lambda item: item[1]["waiting"], reverse=True))
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> List[str]:
+    """
+    Lines of the summary, one table per aggregate
+    """
+    lines = [f"Runs: {', '.join(summary['runs'])}", "", "Slowest scripts"]
+    lines.append(f"  {'duration':>10}  {'status':<9} {'script':<36} {'target':<24} {'pod block / site'}")
+    for script in summary["slowest_scripts"]:
+        location = " / ".join(filter(None, [script["pod_block"], script["site"]]))
+        lines.append(f"  {script['duration']:>9.2f}s  {script['status'] or '':<9} {script['script'] or '':<36} "
+                     f"{script['target'] or '':<24} {location}")
+
+    lines += ["", "Slowest endpoints"]
+    lines.append(f"  {'total':>10} {'calls':>6} {'p95':>8} {'max':>8}  endpoint")
+    for endpoint in summary["slowest_endpoints"]:
+        lines.append(f"  {endpoint['total']:>9.2f}s {endpoint['calls']:>6} {endpoint['p95']:>7.2f}s "
+                     f"{endpoint['max']:>7.2f}s  {endpoint['method']} {endpoint['uri']}")
+
+    lines += ["", "Retries per host"]
+    lines.append(f"  {'host':<24} {'calls':>6} {'retries':>8} {'errors':>7} {'latency':>10}")
+    for host, stats in summary["hosts"].items():
+        lines.append(f"  {host or '':<24} {stats['calls']:>6} {stats['retries']:>8} {stats['errors']:>7} "
+                     f"{stats['latency']:>9.2f}s")
+
+    if summary["monitors"]:
+        lines += ["", "Monitors"]
+        lines.append(f"  {'monitor':<32} {'runs':>5} {'timeouts':>9} {'checks':>7} {'waiting':>10}")
+        for monitor, stats in summary["monitors"].items():
+            lines.append(f"  {monitor or '':<32} {stats['runs']:>5} {stats['timeouts']:>9} {stats['checks']:>7} "
+                         f"{stats['waiting']:>9.2f}s")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Aggregate the event logs of the runs: the slowest scripts & "
+                                                 "endpoints, the retries per host and the monitor waits")
+    parser.add_argument("files", nargs="+", help="event logs, eg. runs/events/<run uuid>.jsonl")
+    parser.add_argument("--top", type=int, default=10, help="rows of the slowest scripts & endpoints")
+    parser.add_argument("--json", action="store_true", help="print the aggregates as json")
+    args = parser.parse_args(argv)
+
+    summary = summarize_events(read_events(args.files), top=args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("\n".join(format_summary(summary)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,21 +2,24 @@ from __future__ import annotations
 from email.mime.base import MIMEBase
 from email import encoders
 from pathlib import Path
+import json
 import json5
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import re
 import os
-import cerberus
 import yaml
 import glob
 from datetime import datetime
 from netaddr import IPNetwork
-from typing import List, Type, Iterable, Any, IO, Dict, Callable
+from typing import List, Type, Iterable, Any, IO, Dict, Callable, Tuple
 from distutils.file_util import copy_file
 from functools import wraps
-from .log_utils import get_logger
+from .checkpoint_utils import run_checkpointed
+from .config_cache import config_cache
+from .schema_validator import schema_validator
+from .log_utils import get_logger, flush_logs
 from .exception_utils import JsonError, YamlError
 from typing import TYPE_CHECKING
 
@@ -25,17 +28,28 @@ if TYPE_CHECKING:
 
 logger = get_logger(__name__)
 
+# Compiled once, the validators are called for every IP of the input
+IP_PATTERN = re.compile(r"^((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)(\.(?!$)|$)){4}$")
+SUBNET_PATTERN = re.compile(
+    r'(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?/\d{1,2})')
+NETMASK_PATTERN = re.compile(r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$')
+DOMAIN_PATTERN = re.compile(r'^((?!-)[A-Za-z0-9-]{1,63}(?<!-)\.)+[A-Za-z]{2,6}$')
 
-class Loader(yaml.SafeLoader):
-    """YAML Loader with `!include` constructor."""
 
-    def __init__(self, stream: IO) -> None:
+class Loader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+    """YAML Loader with `!include` constructor, the C-accelerated one of libyaml if PyYAML was built with it."""
+
+    def __init__(self, stream: IO | str, root: str = None) -> None:
         """Initialise Loader."""
 
-        try:
-            self._root = os.path.split(stream.name)[0]
-        except AttributeError:
-            self._root = os.path.curdir
+        if root is None:
+            try:
+                root = os.path.split(stream.name)[0]
+            except AttributeError:
+                root = os.path.curdir
+        self._root = root
+        # Files included by the document, with the ones they include
+        self.included_files: List[str] = []
 
         super().__init__(stream)
 
@@ -47,17 +61,45 @@ def construct_include(loader: Loader, node: yaml.Node) -> Any:
     extension = os.path.splitext(filename)[1].lstrip('.')
 
     with open(filename, 'r') as f:
-        if extension in ('yaml', 'yml'):
-            return yaml.load(f, Loader)
-        elif extension in ('json',):
-            return json5.load(f)
-        else:
-            return ''.join(f.readlines())
+        content = f.read()
+    loader.included_files.append(filename)
+    if extension in ('yaml', 'yml'):
+        config, included_files = parse_yml(filename, content)
+        loader.included_files.extend(included_files)
+        return config
+    elif extension in ('json',):
+        return parse_json(content)
+    else:
+        return content
 
 
 yaml.add_constructor('!include', construct_include, Loader)
 
 
+def parse_yml(file: str, content: str) -> Tuple[Any, List[str]]:
+    """
+    Parse the YAML content of the file
+
+    Returns:
+        tuple: The parsed content, and the files it includes
+    """
+    loader = Loader(content, root=os.path.dirname(file))
+    try:
+        return loader.get_single_data(), loader.included_files
+    finally:
+        loader.dispose()
+
+
+def parse_json(content: str) -> Any:
+    """
+    Parse the JSON content, with the C-accelerated json module unless it uses the JSON5 extensions
+    """
+    try:
+        return json.loads(content)
+    except ValueError:
+        return json5.loads(content)
+
+
 def get_json_file_contents(file: str) -> dict:
     """
     Read contents of the json file, "file" and return the data.
@@ -70,10 +112,11 @@ def get_json_file_contents(file: str) -> dict:
     """
     logger.info(f"Reading contents of the file: [{file}]")
     with open(file, 'r') as f:
-        try:
-            return json5.load(f)
-        except Exception as e:
-            raise JsonError(str(e))
+        content = f.read()
+    try:
+        return config_cache.load(file, content, lambda _, text: (parse_json(text), []))
+    except Exception as e:
+        raise JsonError(str(e))
 
 
 def get_yml_file_contents(file: str) -> dict:
@@ -88,10 +131,11 @@ def get_yml_file_contents(file: str) -> dict:
     """
     logger.info(f"Reading contents of the file: [{file}]")
     with open(file, 'r') as f:
-        try:
-            return yaml.load(f, Loader=Loader)
-        except Exception as e:
-            raise YamlError(str(e))
+        content = f.read()
+    try:
+        return config_cache.load(file, content, parse_yml)
+    except Exception as e:
+        raise YamlError(str(e))
 
 
 def validate_ip(field: str, value: str, error: Callable[[str, str], None]) -> bool:
@@ -106,8 +150,7 @@ def validate_ip(field: str, value: str, error: Callable[[str, str], None]) -> bo
     Returns:
         bool: True if valid, False otherwise.
     """
-    pattern = re.compile(r"^((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)(\.(?!$)|$)){4}$")
-    if not pattern.match(value, ):
+    if not IP_PATTERN.match(value):
         error(field, f'"{value}" must be a valid IP address')
         return False
     return True
@@ -142,8 +185,7 @@ def validate_subnet(field: str, value: str, error: Callable[[str, str], None]) -
     Returns:
         bool: True if valid, False otherwise.
     """
-    pattern = re.compile(r'(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?/\d{1,2})')
-    if not pattern.match(value):
+    if not SUBNET_PATTERN.match(value):
         error(field, f'"{value}" must be a valid Subnet')
         return False
     return True
@@ -161,8 +203,7 @@ def validate_netmask(field: str, value: str, error: Callable[[str, str], None])
     Returns:
         bool: True if valid, False otherwise.
     """
-    pattern = re.compile(r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$')
-    if not pattern.match(value):
+    if not NETMASK_PATTERN.match(value):
         error(field, f'"{value}" must be a valid Netmask')
         return False
     return True
@@ -177,9 +218,8 @@ def validate_ip_list(field: str, value: List[str], error: Callable[[str, str], N
         value (List[str]): The list of IPs to validate.
         error (Callable[[str, str], None]): The error function to call if validation fails.
     """
-    pattern = re.compile(r"^((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)(\.(?!$)|$)){4}$")
     for ip in value:
-        if not pattern.match(ip):
+        if not IP_PATTERN.match(ip):
             error(field, f'"{ip}" must be a valid IP address')
 
 
@@ -205,13 +245,12 @@ def validate_domain(field: str, value: str | List[str], error: Callable[[str, st
         value (str | List[str]): The value or list of values to validate.
         error (Callable[[str, str], None]): The error function to call if validation fails.
     """
-    pattern = re.compile(r'^((?!-)[A-Za-z0-9-]{1,63}(?<!-)\.)+[A-Za-z]{2,6}$')
     if not isinstance(value, list):
-        if not pattern.match(value):
+        if not DOMAIN_PATTERN.match(value):
             error(field, f'"{value}" must be a valid domain')
     else:
         for domain in value:
-            if not pattern.match(domain):
+            if not DOMAIN_PATTERN.match(domain):
                 error(field, f'"{domain}" must be a valid domain')
 
 
@@ -227,10 +266,11 @@ def validate_schema(schema: dict, data: dict) -> bool:
         bool: True if valid, False otherwise.
     """
     validated = False  # reflect whether the overall process succeeded
-    validator = cerberus.Validator(schema, allow_unknown=True)
+    # Compiled once per schema, see SchemaValidator
+    valid, errors = schema_validator.validate(schema, data)
 
-    if not validator.validate(data):
-        logger.error(validator.errors)
+    if not valid:
+        logger.error(errors)
     else:
         logger.info("Validated the schema successfully!")
         validated = True
@@ -295,7 +335,7 @@ def run_script(scripts: List[Type[Script]], data: Dict) -> None:
     for script in scripts:
         script_obj = script(data=data)
         try:
-            script_obj.run()
+            run_checkpointed(script_obj)
         except Exception as e:
             logger.exception(e)
             continue
@@ -396,7 +436,8 @@ def create_log_dir_push_logs(dir_to_create: str, data: Dict) -> None:
     logs_directory = os.path.join(dir_to_create, "logs")
     create_new_directory(logs_directory)
 
-    # push logs to the branch
+    # push logs to the branch, once the queued records are written
+    flush_logs()
     source = data['project_root']
     log_files = glob.glob(os.path.join(source, "*.log"))
     html_files = glob.glob(os.path.join(source, "*.html"))
@@ -1,16 +1,21 @@
 import os
 import pathlib
 import sys
+import threading
+from copy import deepcopy
 from time import sleep
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from .general_utils import validate_schema, get_json_file_contents, copy_file_util, enforce_data_arg, \
     get_yml_file_contents, create_log_dir_push_logs
-from .rest_utils import RestAPIUtil
+from .session_registry import session_registry
+from .worker_pool import configure_worker_pool
+from .schema_validator import configure_schema_validation
 from framework.scripts.python.helpers.ipam.ipam import IPAM
+from framework.scripts.python.helpers.pc_batch_op import configure_batch_ops
+from framework.scripts.python.helpers.state_monitor.state_monitor import configure_state_monitors
 from .log_utils import get_logger
 from json2table import convert
-from framework.helpers.vault_utils import CyberArk
-from .v4_api_client import ApiClientV4
+from framework.helpers.vault_utils import CyberArk, credential_cache, configure_credential_cache
 
 logger = get_logger(__name__)
 
@@ -23,6 +28,17 @@ CONFIG_DIRECTORY = "config"
 DEFAULT_PRISM_USERNAME = "admin"
 DEFAULT_PRISM_PASSWORD = "Nutanix/4u"
 
+# Parsed global config by path, with the modification time & size it was parsed at. A long-running process
+# parses global.yml once and again only when it changes
+_global_configs: Dict[str, Tuple[Tuple, Dict]] = {}
+_global_configs_lock = threading.Lock()
+# Keys of global.yml that configure the state shared by all the runs of the process, eg. the jobs of the API server.
+# They are applied once per process & ignored in the input files of the runs
+PROCESS_CONFIG_KEYS = ("connection_pools", "response_cache", "batch_ops", "state_monitors", "worker_pool",
+                       "credential_cache", "schema_validation")
+_process_configured = False
+_process_config_lock = threading.Lock()
+
 """
 These are the functions that are part of pre_run_actions and post_run_actions in main.py
 
@@ -94,22 +110,87 @@ def get_creds_from_vault(data: dict):
         if not data.get('vaults').get('cyberark').get('credentials'):
             raise Exception("Credential details cannot be empty. Kindly add the required details.")
 
+        fetched = False
         for user_type, user_info in data.get('vaults').get('cyberark').get('credentials').items():
-            try:
-                username, user_pwd = fetch_pwd.fetch_creds(user_info['username'],
-                                                           cark_data.get('appId'), cark_data.get('safe'),
-                                                           user_info.get('address'),
-                                                           cark_data.get('endpoint') or "AIMWebService")
-            except Exception as e:
-                logger.warning(e)
-                continue
+            endpoint = cark_data.get('endpoint') or "AIMWebService"
+            cache_key = (cark_data.get('host'), cark_data.get("port", ""), endpoint, cark_data.get('appId'),
+                         cark_data.get('safe'), user_info['username'], user_info.get('address'))
+            credentials = credential_cache.get(cache_key)
+            if not credentials:
+                try:
+                    credentials = fetch_pwd.fetch_creds(user_info['username'],
+                                                        cark_data.get('appId'), cark_data.get('safe'),
+                                                        user_info.get('address'), endpoint)
+                except Exception as e:
+                    logger.warning(e)
+                    continue
+                credential_cache.set(cache_key, credentials)
+                fetched = True
+            username, user_pwd = credentials
             data.get('vaults').get('cyberark').get('credentials').get(user_type).update({
                 'username': username,
                 'password': user_pwd
             })
 
-        # sleep for 5 seconds to avoid any issues
-        sleep(5)
+        # sleep for 5 seconds to avoid any issues, if the vault was called
+        if fetched:
+            sleep(5)
+
+
+def read_global_config(file_path: str) -> Dict:
+    """
+    Read global.yml/ global.json, the parsed config is reused until the file changes
+
+    Returns:
+        dict: Copy of the parsed config, the workflows update their data in place
+    """
+    stat = os.stat(file_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _global_configs_lock:
+        cached = _global_configs.get(file_path)
+    if not cached or cached[0] != version:
+        if pathlib.Path(file_path).suffix == ".json":
+            config = get_json_file_contents(file_path)
+        else:
+            config = get_yml_file_contents(file_path)
+        cached = (version, config)
+        with _global_configs_lock:
+            _global_configs[file_path] = cached
+    return deepcopy(cached[1])
+
+
+def configure_process(global_config: Dict):
+    """
+    Configure the state shared by all the runs of the process from global.yml, see PROCESS_CONFIG_KEYS. Only the
+    first call configures it, so a run of a long-running process can't reconfigure the runs already running
+    """
+    global _process_configured
+    with _process_config_lock:
+        if _process_configured:
+            return
+        _process_configured = True
+
+    # Per-host connection pool sizing for the shared sessions
+    if global_config.get("connection_pools"):
+        session_registry.configure(**global_config["connection_pools"])
+    # In-process read cache for the shared sessions
+    if global_config.get("response_cache"):
+        session_registry.configure(response_cache=global_config["response_cache"])
+    # Concurrency of the v3 batch calls
+    if global_config.get("batch_ops"):
+        configure_batch_ops(**global_config["batch_ops"])
+    # Polling of the state monitors
+    if global_config.get("state_monitors"):
+        configure_state_monitors(**global_config["state_monitors"])
+    # Budgets of the shared worker pool
+    if global_config.get("worker_pool"):
+        configure_worker_pool(**global_config["worker_pool"])
+    # Reuse of the credentials fetched from the vault
+    if global_config.get("credential_cache"):
+        configure_credential_cache(**global_config["credential_cache"])
+    # Processes validating the pod blocks of large configs
+    if global_config.get("schema_validation"):
+        configure_schema_validation(**global_config["schema_validation"])
 
 
 @enforce_data_arg
@@ -119,11 +200,9 @@ def get_input_data(data: dict) -> None:
     """
     try:
         global_config_file = os.path.join(data['project_root'], CONFIG_DIRECTORY, GLOBAL_CONFIG_NAME)
-        file_ext = pathlib.Path(global_config_file).suffix
-        if file_ext == ".json":
-            data.update(get_json_file_contents(global_config_file))
-        else:
-            data.update(get_yml_file_contents(global_config_file))
+        global_config = read_global_config(global_config_file)
+        configure_process(global_config)
+        data.update(global_config)
         files = data["input_files"]
 
         for file in files:
@@ -131,9 +210,14 @@ def get_input_data(data: dict) -> None:
             # todo any better way to just read it in one shot? as yml is superset of json
             file_ext = pathlib.Path(file).suffix
             if file_ext == ".json":
-                data.update(get_json_file_contents(file))
+                file_data = get_json_file_contents(file)
             else:
-                data.update(get_yml_file_contents(file))
+                file_data = get_yml_file_contents(file)
+            ignored = [key for key in PROCESS_CONFIG_KEYS if key in file_data]
+            if ignored:
+                logger.warning(f"Ignoring {ignored} in {file}, they can only be set in {GLOBAL_CONFIG_NAME}")
+                file_data = {key: value for key, value in file_data.items() if key not in ignored}
+            data.update(file_data)
     except Exception as e:
         logger.error(e)
         sys.exit(1)
@@ -304,20 +388,20 @@ def create_pc_objects(data: dict, global_data: Optional[Dict] = None):
         if not cred_details.get(pc_user, {}).get('username') or not cred_details.get(pc_user, {}).get('password'):
             raise Exception(f"PC credentials not specified for the user {pc_user!r} in 'global.yml'")
 
-        data["pc_session"] = RestAPIUtil(data["pc_ip"],
-                                         user=cred_details[pc_user]['username'],
-                                         pwd=cred_details[pc_user]['password'],
-                                         port="9440", secured=True)
-        data["v4_api_util"] = ApiClientV4(
+        data["pc_session"] = session_registry.get_session(data["pc_ip"],
+                                                          user=cred_details[pc_user]['username'],
+                                                          pwd=cred_details[pc_user]['password'],
+                                                          port="9440", secured=True)
+        data["v4_api_util"] = session_registry.get_v4_api_util(
             data["pc_ip"], "9440", cred_details[pc_user]['username'], cred_details[pc_user]['password']
             )
     else:
         logger.warning(f"Using default PC credentials for {data['pc_ip']}!")
         default_pc_password = data.get('default_pc_password')
-        data["pc_session"] = RestAPIUtil(data['pc_ip'], user=DEFAULT_PRISM_USERNAME,
-                                         pwd=default_pc_password or DEFAULT_PRISM_PASSWORD,
-                                         port="9440", secured=True)
-        data["v4_api_util"] = ApiClientV4(
+        data["pc_session"] = session_registry.get_session(data['pc_ip'], user=DEFAULT_PRISM_USERNAME,
+                                                          pwd=default_pc_password or DEFAULT_PRISM_PASSWORD,
+                                                          port="9440", secured=True)
+        data["v4_api_util"] = session_registry.get_v4_api_util(
             data["pc_ip"], "9440", DEFAULT_PRISM_USERNAME, default_pc_password or DEFAULT_PRISM_PASSWORD
             )
 
@@ -381,16 +465,16 @@ def create_ndb_objects(data: dict, global_data: Optional[Dict] = None):
         if not cred_details.get(ndb_user, {}).get('username') or not cred_details.get(ndb_user, {}).get('password'):
             raise Exception(f"Ndb credentials not specified for the user {ndb_user!r} in 'global.yml'")
 
-        data["ndb_session"] = RestAPIUtil(data["ndb_ip"],
-                                          user=cred_details[ndb_user]['username'],
-                                          pwd=cred_details[ndb_user]['password'],
-                                          secured=True)
+        data["ndb_session"] = session_registry.get_session(data["ndb_ip"],
+                                                           user=cred_details[ndb_user]['username'],
+                                                           pwd=cred_details[ndb_user]['password'],
+                                                           secured=True)
     else:
         logger.warning(f"Using default Ndb credentials for {data['ndb_ip']}!")
         default_ndb_password = data.get('default_ndb_password')
-        data["ndb_session"] = RestAPIUtil(data['ndb_ip'], user=DEFAULT_PRISM_USERNAME,
-                                          pwd=default_ndb_password or DEFAULT_PRISM_PASSWORD,
-                                          secured=True)
+        data["ndb_session"] = session_registry.get_session(data['ndb_ip'], user=DEFAULT_PRISM_USERNAME,
+                                                           pwd=default_ndb_password or DEFAULT_PRISM_PASSWORD,
+                                                           secured=True)
 
 
 @enforce_data_arg
@@ -468,18 +552,18 @@ def create_pe_objects(data: dict, global_data: Optional[Dict] = None):
             if not cred_details.get(pe_cred, {}).get('username') or not cred_details.get(pe_cred, {}).get('password'):
                 raise Exception(f"PE credentials not specified for the user {pe_cred!r} in 'global.yml'")
 
-            pe_session = RestAPIUtil(cluster_ip,
-                                     user=cred_details[pe_cred]['username'],
-                                     pwd=cred_details[pe_cred]['password'],
-                                     port="9440", secured=True)
+            pe_session = session_registry.get_session(cluster_ip,
+                                                      user=cred_details[pe_cred]['username'],
+                                                      pwd=cred_details[pe_cred]['password'],
+                                                      port="9440", secured=True)
         else:
             # use default session
             logger.warning(f"Using default PE credentials for {cluster_ip}!")
             default_pe_password = data.get('default_pe_password')
-            pe_session = RestAPIUtil(cluster_ip,
-                                     user=DEFAULT_PRISM_USERNAME,
-                                     pwd=default_pe_password or DEFAULT_PRISM_PASSWORD,
-                                     port="9440", secured=True)
+            pe_session = session_registry.get_session(cluster_ip,
+                                                      user=DEFAULT_PRISM_USERNAME,
+                                                      pwd=default_pe_password or DEFAULT_PRISM_PASSWORD,
+                                                      port="9440", secured=True)
         # cluster_op = PeCluster(pe_session)
         # try:
         #     cluster_op.get_cluster_info()
@@ -1,9 +1,23 @@
+import atexit
+import contextvars
 import logging
+import os
+import queue
+import threading
 import time
 import sys
-from typing import Optional
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict, List
 from rainbow_logging_handler import RainbowLoggingHandler
 
+# Max time to wait for the writer thread to write the queued records
+FLUSH_TIMEOUT_IN_SEC = 10
+
+# Id of the run the current context belongs to, eg. a job of the API server. The worker pool runs its items in
+# the context of the submitter, so the records of the run are tagged even when they are logged by the pool
+_log_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("log_context", default=None)
+
 
 class ConfigureRootLogger:
     """
@@ -21,19 +35,17 @@ class ConfigureRootLogger:
         # create console handler
         self._ch = RainbowLoggingHandler(sys.stderr, color_message_info=('green', None, False))
 
-        # create file handler
-        self._fh = logging.FileHandler(file_name, mode='w')
+        # create file handler, formatted by the pool
+        self._fh = acquire_file_handler(file_name)
 
         # add formatter to console handler
         self.__add_console_formatter(self._ch)
 
-        # add formatter to file handler
-        add_file_formatter(self._fh)
-
+        # The threads logging only enqueue the records, the writer thread writes them to the console & the file
         level = logging.DEBUG if debug else logging.INFO
         logging.basicConfig(
             level=level,
-            handlers=[self._ch, self._fh]
+            handlers=[QueuedHandler([self._ch, self._fh])]
         )
 
     @staticmethod
@@ -78,6 +90,121 @@ def add_file_formatter(fh: logging.FileHandler) -> None:
     fh.setFormatter(formatter)
 
 
+class LogWriter(QueueListener):
+    """
+    The single thread that writes the records of every QueuedHandler, so the threads logging don't contend on the
+    console & the files. Started with the first record, and stopped at exit once the queued records are written.
+    """
+
+    def __init__(self):
+        super(LogWriter, self).__init__(queue.SimpleQueue(), respect_handler_level=True)
+        self._lock = threading.Lock()
+
+    def put(self, handlers: List[logging.Handler], record: logging.LogRecord):
+        if self._thread is None:
+            self.start()
+        self.queue.put_nowait((handlers, record))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                super(LogWriter, self).start()
+                self._thread.name = "LogWriter"
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None:
+                super(LogWriter, self).stop()
+
+    def flush(self, timeout: Optional[float] = FLUSH_TIMEOUT_IN_SEC):
+        """
+        Wait for the records queued so far to be written
+        """
+        if self._thread is None or self._thread is threading.current_thread():
+            return
+        written = threading.Event()
+        self.queue.put_nowait((written, None))
+        written.wait(timeout)
+
+    def handle(self, item):
+        handlers, record = item
+        if record is None:
+            # flush() marker, the records before it are written
+            handlers.set()
+            return
+        for handler in handlers:
+            if not self.respect_handler_level or record.levelno >= handler.level:
+                handler.handle(record)
+
+
+log_writer = LogWriter()
+# Registered after logging's own shutdown hook, so it runs first: the queue is drained before the handlers are closed
+atexit.register(log_writer.stop)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Queues the records for the writer thread to write to the handlers. The filters of a QueuedHandler run in the
+    thread logging, eg. LogContextFilter, the filters of the handlers in the writer thread.
+    """
+
+    def __init__(self, handlers: List[logging.Handler]):
+        super(QueuedHandler, self).__init__(log_writer.queue)
+        self.handlers = handlers
+        # Only the message & the traceback are formatted here, the handlers format the rest of the record
+        self.setFormatter(logging.Formatter("%(message)s"))
+
+    def enqueue(self, record: logging.LogRecord):
+        log_writer.put(self.handlers, record)
+
+
+# Absolute path of the log file to [FileHandler, the QueuedHandler the loggers share, number of users]. A file is
+# opened & truncated once, however many scripts & runs log to it
+_file_handlers: Dict[str, list] = {}
+_file_handlers_lock = threading.Lock()
+
+
+def acquire_file_handler(file_name: str) -> logging.FileHandler:
+    """
+    Returns the pooled file handler of the file, opened on the first call. Each call is released with
+    release_file_handler.
+
+    Args:
+        file_name (str): Name of the log file.
+    """
+    with _file_handlers_lock:
+        return _acquire(file_name)[0]
+
+
+def release_file_handler(file_name: str) -> None:
+    """
+    Release the file handler of the file, closed once it's released by all its users and its records are written.
+    """
+    path = os.path.abspath(file_name)
+    with _file_handlers_lock:
+        pooled = _file_handlers.get(path)
+        if not pooled:
+            return
+        pooled[2] -= 1
+        if pooled[2] > 0:
+            return
+        del _file_handlers[path]
+    log_writer.flush()
+    pooled[0].close()
+
+
+def _acquire(file_name: str) -> list:
+    # Called with _file_handlers_lock held
+    path = os.path.abspath(file_name)
+    pooled = _file_handlers.get(path)
+    if not pooled:
+        fh = logging.FileHandler(file_name, mode='w')
+        add_file_formatter(fh)
+        pooled = _file_handlers[path] = [fh, QueuedHandler([fh]), 0]
+    pooled[2] += 1
+    return pooled
+
+
 def get_logger(name: str, file_name: Optional[str] = None) -> logging.Logger:
     """
     Returns a new logger.
@@ -90,13 +217,63 @@ def get_logger(name: str, file_name: Optional[str] = None) -> logging.Logger:
         logging.Logger: Configured logger.
     """
     logging_handle = logging.getLogger(name)
-    # We are taking file_name as optional parameter. If file_name is passed, we'll create a new Filehandler and add
-    # this filename to the handler. By doing this, the logger will write to the new file along with the
-    # pre-configured root logger file i.e. zero_touch.log
+    # We are taking file_name as optional parameter. If file_name is passed, the pooled handler of the file is added
+    # to the logger, once however many times the logger is requested. By doing this, the logger will write to the
+    # file along with the pre-configured root logger file i.e. zero_touch.log
     if file_name:
-        fh = logging.FileHandler(file_name, mode='w')
-        add_file_formatter(fh)
-        if fh not in logging_handle.handlers:
-            logging_handle.addHandler(fh)
+        with _file_handlers_lock:
+            pooled = _file_handlers.get(os.path.abspath(file_name))
+            if not pooled or pooled[1] not in logging_handle.handlers:
+                logging_handle.addHandler(_acquire(file_name)[1])
 
     return logging_handle
+
+
+class LogContextFilter(logging.Filter):
+    """
+    Passes only the records logged in the context of one run
+    """
+
+    def __init__(self, context_id: str):
+        super(LogContextFilter, self).__init__()
+        self.context_id = context_id
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return _log_context.get() == self.context_id
+
+
+def flush_logs() -> None:
+    """
+    Wait for the queued records to be written, eg. before the log files are copied
+    """
+    log_writer.flush()
+
+
+def get_log_context() -> Optional[str]:
+    return _log_context.get()
+
+
+@contextmanager
+def log_context(context_id: str, file_name: Optional[str] = None):
+    """
+    Run the block as the run context_id. If file_name is specified, the records the run logs are written to the
+    file as well, along with the pre-configured root logger file.
+
+    Args:
+        context_id (str): Id of the run
+        file_name (Optional[str]): Log file of the run
+    """
+    token = _log_context.set(context_id)
+    handler = None
+    if file_name:
+        # The filter reads the context of the thread logging, so it's on the QueuedHandler, not the file handler
+        handler = QueuedHandler([acquire_file_handler(file_name)])
+        handler.addFilter(LogContextFilter(context_id))
+        logging.getLogger().addHandler(handler)
+    try:
+        yield
+    finally:
+        if handler:
+            logging.getLogger().removeHandler(handler)
+            release_file_handler(file_name)
+        _log_context.reset(token)
@@ -0,0 +1,251 @@
+import contextvars
+import threading
+from typing import Optional, Dict, List, Any, Callable, Iterable
+from .cache_utils import get_name_index, invalidate_name_index
+from .log_utils import get_logger
+
+logger = get_logger(__name__)
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+UNCHANGED = "unchanged"
+UNPLANNED = "unplanned"
+ACTION_SYMBOLS = {CREATE: "+", UPDATE: "~", DELETE: "-", UNPLANNED: "?"}
+# Inventories share the name indexes of the sessions, under their own kinds
+INVENTORY_KIND_PREFIX = "inventory:"
+DEFAULT_INVENTORY_TTL_IN_SEC = 300
+
+# Plan of the run, per context so that the runs of a long-running process are planned separately
+_plan: contextvars.ContextVar[Optional["Plan"]] = contextvars.ContextVar("plan", default=None)
+
+
+class PlanItem:
+    """
+    One change of a plan, eg. a container to create in a cluster
+    """
+
+    def __init__(self, action: str, kind: str, name: str, target: str = "", spec: Any = None,
+                 changes: Optional[Dict] = None, api_calls: int = 1):
+        """
+        Args:
+            action (str): create, update, delete or unchanged
+            kind (str): Kind of the entity, eg. "container"
+            name (str): Name of the entity
+            target (str, optional): PC/ PE the entity is in
+            spec (Any, optional): Desired spec of the entity from the config, the existing entity for the deletes
+            changes (dict, optional): Attributes to change, for the updates
+            api_calls (int, optional): Write calls needed to apply the change
+        """
+        self.action = action
+        self.kind = kind
+        self.name = name
+        self.target = target
+        self.spec = spec
+        self.changes = changes
+        self.api_calls = api_calls if action != UNCHANGED else 0
+
+    def to_dict(self) -> Dict:
+        item = {"action": self.action, "kind": self.kind, "name": self.name, "target": self.target}
+        if self.changes:
+            item["changes"] = self.changes
+        return item
+
+    def __repr__(self):
+        return f"PlanItem({self.action}, {self.kind}, {self.name!r}, {self.target!r})"
+
+
+def diff(desired: Iterable[Dict], existing: Dict[str, List[Dict]], kind: str, target: str = "", key: str = "name",
+         get_changes: Optional[Callable[[Dict, Any], Optional[Dict]]] = None,
+         delete: Iterable[str] = ()) -> List[PlanItem]:
+    """
+    Diff the desired entities of the config against the existing ones
+
+    Args:
+        desired (iterable): Entities in the config
+        existing (dict): Name to the existing entities with the name, eg. an inventory
+        kind (str): Kind of the entities
+        target (str, optional): PC/ PE the entities are in
+        key (str, optional): Attribute of the desired entities that is their name
+        get_changes (callable, optional): Returns the attributes to update from the desired & the existing
+          entities, entities that exist are unchanged if not specified
+        delete (iterable, optional): Names of the entities to delete, the existing entity is the spec of the delete
+    Returns:
+        list: Plan items, in the order of the config
+    """
+    items = []
+    for spec in desired or []:
+        name = spec[key]
+        if name not in existing:
+            items.append(PlanItem(CREATE, kind, name, target, spec=spec))
+            continue
+        changes = get_changes(spec, existing[name]) if get_changes else None
+        if changes:
+            items.append(PlanItem(UPDATE, kind, name, target, spec=spec, changes=changes))
+        else:
+            items.append(PlanItem(UNCHANGED, kind, name, target, spec=spec))
+    for name in delete or []:
+        if name in existing:
+            items.append(PlanItem(DELETE, kind, name, target, spec=existing[name][0] if existing[name] else None))
+        else:
+            items.append(PlanItem(UNCHANGED, kind, name, target))
+    return items
+
+
+def batch_api_calls(items: List[PlanItem], batch_size: Optional[int] = None) -> List[PlanItem]:
+    """
+    Count the changes that are submitted together as batch calls, instead of one call per change
+
+    Args:
+        items (list): Plan items submitted in the same batch
+        batch_size (int, optional): Max changes per batch call, all of them in one call if not specified
+    Returns:
+        list: The items
+    """
+    changes = [item for item in items if item.action != UNCHANGED]
+    batch_size = batch_size or len(changes)
+    for index, item in enumerate(changes):
+        item.api_calls = 1 if index % batch_size == 0 else 0
+    return items
+
+
+def get_inventory(session: Any, kind: str, build: Callable[[], Dict[str, List[Dict]]],
+                  ttl: int = DEFAULT_INVENTORY_TTL_IN_SEC) -> Dict[str, List[Dict]]:
+    """
+    Snapshot of the entities of a kind in the PC/ PE of the session, listed once and shared by the scripts using
+    the same session, for both planning & executing the changes
+
+    Args:
+        session (Any): Session of the PC/ PE
+        kind (str): Kind of the entities
+        build (callable): Lists the entities, returns the name to entities map
+        ttl (int, optional): Time after which the snapshot is listed again
+    Returns:
+        dict: Copy of the name to entities map
+    """
+    def list_entities():
+        current_plan = get_plan()
+        if current_plan:
+            current_plan.count_inventory_read()
+        return build()
+
+    return get_name_index(session, INVENTORY_KIND_PREFIX + kind, ttl).snapshot(list_entities)
+
+
+def invalidate_inventory(session: Any, kind: str):
+    """
+    Drop the snapshot of the kind, after the entities of the kind are modified
+    """
+    invalidate_name_index(session, INVENTORY_KIND_PREFIX + kind)
+
+
+def group_by_name(entities: Iterable[Dict], key: str = "name") -> Dict[str, List[Dict]]:
+    inventory = {}
+    for entity in entities or []:
+        if entity.get(key):
+            inventory.setdefault(entity[key], []).append(entity)
+    return inventory
+
+
+class Plan:
+    """
+    Changes the scripts of a workflow would make, collected in plan mode instead of executing the scripts. Scripts
+    that can plan their changes implement plan(), the other ones are listed as running as a whole.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {"script", "target", "items"} in the order the scripts were planned
+        self.steps: List[Dict] = []
+        self.inventory_reads = 0
+
+    def run(self, script) -> Dict:
+        """
+        Plan the script instead of running it. Composite scripts run, so that their own scripts are planned
+
+        Args:
+            script (Script): Script to plan
+        Returns:
+            dict: Results of the composite scripts, empty for the planned ones
+        """
+        if getattr(script, "COMPOSITE", False):
+            return script.run()
+
+        name = type(script).__name__
+        target = script.get_checkpoint_target() if hasattr(script, "get_checkpoint_target") else ""
+        try:
+            items = script.plan() if hasattr(script, "plan") else None
+        except Exception as e:
+            logger.error(f"Could not plan {name!r}: {e}")
+            items = None
+        with self._lock:
+            self.steps.append({"script": name, "target": target, "items": items})
+        return {}
+
+    def count_inventory_read(self):
+        with self._lock:
+            self.inventory_reads += 1
+
+    def get_items(self) -> List[Dict]:
+        with self._lock:
+            steps = list(self.steps)
+        items = []
+        for step in steps:
+            if step["items"] is None:
+                items.append({"action": UNPLANNED, "script": step["script"], "target": step["target"]})
+                continue
+            items.extend({"script": step["script"], **item.to_dict()} for item in step["items"]
+                         if item.action != UNCHANGED)
+        return items
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            steps = list(self.steps)
+            stats = {CREATE: 0, UPDATE: 0, DELETE: 0, UNCHANGED: 0, UNPLANNED: 0, "api_calls": 0,
+                     "inventory_reads": self.inventory_reads}
+        for step in steps:
+            if step["items"] is None:
+                stats[UNPLANNED] += 1
+                continue
+            for item in step["items"]:
+                stats[item.action] += 1
+                stats["api_calls"] += item.api_calls
+        return stats
+
+    def format(self) -> List[str]:
+        """
+        Returns:
+            list: Summary line followed by one line per change
+        """
+        stats = self.get_stats()
+        lines = [f"Plan: {stats[CREATE]} to create, {stats[UPDATE]} to update, {stats[DELETE]} to delete, "
+                 f"{stats[UNCHANGED]} unchanged, {stats[UNPLANNED]} scripts not planned, {stats['api_calls']} "
+                 f"write API calls, {stats['inventory_reads']} inventory reads"]
+        for item in self.get_items():
+            if item["action"] == UNPLANNED:
+                lines.append(f"  {ACTION_SYMBOLS[UNPLANNED]} {item['script']} {item['target']}: runs as a whole")
+                continue
+            changes = f" {item['changes']}" if item.get("changes") else ""
+            lines.append(f"  {ACTION_SYMBOLS[item['action']]} {item['script']} {item['target']}: "
+                         f"{item['kind']} {item['name']!r}{changes}")
+        return lines
+
+    def to_dict(self) -> Dict:
+        return {"stats": self.get_stats(), "changes": self.get_items()}
+
+
+def start_plan() -> Plan:
+    """
+    Switch to plan mode, the scripts run through run_checkpointed are planned instead of executed
+    """
+    plan = Plan()
+    _plan.set(plan)
+    return plan
+
+
+def get_plan() -> Optional[Plan]:
+    return _plan.get()
+
+
+def stop_plan():
+    _plan.set(None)
@@ -0,0 +1,169 @@
+import importlib
+from typing import Dict, Callable, Union, Type, Optional, List
+from .log_utils import get_logger
+
+logger = get_logger(__name__)
+
+SCRIPTS_PACKAGE = "framework.scripts.python"
+SCHEMA_MODULE = "framework.helpers.schema"
+HELPER_FUNCTIONS_MODULE = "framework.helpers.helper_functions"
+
+DEFAULT_PRE_RUN_ACTIONS = ["get_input_data", "get_creds_from_vault", "validate_input_data"]
+DEFAULT_POST_RUN_ACTIONS = ["save_logs"]
+# Scripts run on their own need the objects the workflows create in their pre_run_actions
+SCRIPT_PRE_RUN_ACTIONS = ["create_pe_objects", "create_pc_objects", "create_ipam_object"]
+
+"""
+Workflows refer to their schema, actions & scripts by name, the names are resolved to the objects only for the
+workflow that runs, so that the modules of the other workflows are never imported.
+    eg: {
+        "schema": "IMAGING_SCHEMA",                 -> attribute of framework.helpers.schema
+        "pre_run_actions": ["create_ipam_object"],  -> function of framework.helpers.helper_functions, run after
+                                                       the DEFAULT_PRE_RUN_ACTIONS
+        "post_run_actions": ["save_pod_logs"],      -> replace the DEFAULT_POST_RUN_ACTIONS
+        "scripts": ["FoundationScript"]             -> script of framework.scripts.python, or a helper function
+    }
+"""
+WORKFLOW_CONFIG = {
+    "imaging": {
+        "schema": "IMAGING_SCHEMA",
+        "pre_run_actions": ["create_ipam_object"],
+        "post_run_actions": ["generate_html_from_json", "save_pod_logs"],
+        "scripts": ["FoundationScript"]
+    },
+    "config-cluster": {
+        "schema": "CLUSTER_SCHEMA",
+        "pre_run_actions": ["create_pe_objects", "create_pc_objects"],
+        "post_run_actions": ["generate_html_from_json", "save_logs"],
+        "scripts": ["ClusterConfig"]
+    },
+    "deploy-pc": {
+        "schema": "DEPLOY_PC_CONFIG_SCHEMA",
+        "pre_run_actions": ["create_pe_objects"],
+        "post_run_actions": ["generate_html_from_json", "save_logs"],
+        "scripts": ["DeployPC"]
+    },
+    "config-pc": {
+        "schema": "PC_SCHEMA",
+        "pre_run_actions": ["create_pc_objects"],
+        "post_run_actions": ["generate_html_from_json", "save_logs"],
+        "scripts": ["PcConfig"]
+    },
+    "calm-vm-workloads": {
+        "schema": "CREATE_VM_WORKLOAD_SCHEMA",
+        "scripts": ["InitCalmDsl", "CreateAppFromDsl", "save_logs"]
+    },
+    "calm-edgeai-vm-workload": {
+        "schema": "CREATE_AI_WORKLOAD_SCHEMA",
+        "scripts": ["InitCalmDsl", "UpdateCalmProject", "CreateBp", "LaunchBp"]
+    },
+    "pod-config": {
+        "schema": "POD_CONFIG_SCHEMA",
+        "pre_run_actions": ["create_ipam_object"],
+        "post_run_actions": ["generate_html_from_json", "save_pod_logs"],
+        "scripts": ["PodConfig"]
+    },
+    "deploy-management-pc": {
+        "schema": "POD_MANAGEMENT_DEPLOY_SCHEMA",
+        "post_run_actions": ["generate_html_from_json", "save_pod_logs"],
+        "scripts": ["DeployManagementPlane"]
+    },
+    "config-management-pc": {
+        "schema": "POD_MANAGEMENT_CONFIG_SCHEMA",
+        "post_run_actions": ["generate_html_from_json", "save_pod_logs"],
+        "scripts": ["ConfigManagementPlane"]
+    },
+    "ndb": {
+        "schema": "NDB_SCHEMA",
+        "post_run_actions": ["generate_html_from_json", "save_logs"],
+        "scripts": ["NdbConfig"]
+    }
+}
+
+
+def import_object(dotted_path: str):
+    """
+    Import an object from its dotted path, eg. "framework.helpers.schema.IMAGING_SCHEMA"
+    """
+    module_path, _, name = dotted_path.rpartition(".")
+    if not module_path:
+        raise ValueError(f"{dotted_path!r} is not a dotted path")
+    return getattr(importlib.import_module(module_path), name)
+
+
+def get_script(name: str) -> Union[Type, Callable]:
+    """
+    Get the script from its name, helper functions can also be run as scripts
+
+    Args:
+        name (str): Name of the script, eg. "PodConfig"
+    Returns:
+        The Script class, or the helper function
+    Raises:
+        ValueError: If there is no script with the name
+    """
+    scripts = importlib.import_module(SCRIPTS_PACKAGE)
+    if name in scripts.SCRIPTS:
+        return getattr(scripts, name)
+    try:
+        return get_action(name)
+    except ValueError:
+        raise ValueError(f"Unknown script {name!r}") from None
+
+
+def get_action(name: str) -> Callable:
+    """
+    Get the helper function from its name, for the pre_run_actions & post_run_actions
+    """
+    action = getattr(importlib.import_module(HELPER_FUNCTIONS_MODULE), name, None)
+    if not callable(action):
+        raise ValueError(f"Unknown action {name!r}")
+    return action
+
+
+def get_schema(name: str) -> Dict:
+    """
+    Get the schema from its name, eg. "POD_CONFIG_SCHEMA"
+    """
+    schema = getattr(importlib.import_module(SCHEMA_MODULE), name, None)
+    if not isinstance(schema, dict):
+        raise ValueError(f"Unknown schema {name!r}")
+    return schema
+
+
+def get_run_config(workflow: Optional[str] = None, scripts: Optional[List[str]] = None,
+                   schema: Optional[str] = None) -> Dict:
+    """
+    Resolve the schema, actions & scripts of a run, either of a workflow or of scripts run on their own
+
+    Args:
+        workflow (str, optional): Name of the workflow, eg. "pod-config"
+        scripts (list, optional): Names of the scripts to run, if no workflow is specified
+        schema (str, optional): Name of the schema to validate the input of the scripts with
+    Returns:
+        dict: "schema", "pre_run_actions", "post_run_actions" & "scripts" of the run
+    Raises:
+        ValueError: If the workflow, a script, an action or the schema is unknown
+    """
+    if workflow:
+        if workflow not in WORKFLOW_CONFIG:
+            raise ValueError(f"Unknown workflow {workflow!r}")
+        config = WORKFLOW_CONFIG[workflow]
+        pre_run_actions = DEFAULT_PRE_RUN_ACTIONS + config.get("pre_run_actions", [])
+        post_run_actions = config.get("post_run_actions", DEFAULT_POST_RUN_ACTIONS)
+        schema = config.get("schema")
+        scripts = config.get("scripts", [])
+    elif scripts:
+        pre_run_actions = DEFAULT_PRE_RUN_ACTIONS + SCRIPT_PRE_RUN_ACTIONS
+        if not schema:
+            pre_run_actions.remove("validate_input_data")
+        post_run_actions = DEFAULT_POST_RUN_ACTIONS
+    else:
+        raise ValueError("Select either pre-configured workflow or script to run the framework.")
+
+    return {
+        "schema": get_schema(schema.strip()) if schema else {},
+        "pre_run_actions": [get_action(name) for name in pre_run_actions],
+        "post_run_actions": [get_action(name) for name in post_run_actions],
+        "scripts": [get_script(name.strip()) for name in scripts]
+    }
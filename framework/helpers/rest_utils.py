@@ -1,16 +1,23 @@
+import functools
 import json
+import logging
+import threading
+import time
 import traceback
 import requests
-import requests_cache
 import urllib3
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from .log_utils import get_logger
 from requests.exceptions import Timeout, ConnectionError, HTTPError, RequestException
 from requests.packages.urllib3.util.retry import Retry
 from requests.exceptions import ConnectTimeout
 from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
-from typing import Optional
+from typing import Optional, Dict, Union
+from .cache_utils import ResponseCache, invalidate_written_name_indexes
+from .event_utils import emit_http_event, get_event_log
 from .exception_utils import RestError, ResponseError
+from .run_stats import record_run_stats
 
 logger = get_logger(__name__)
 pool_maxsize = 20
@@ -18,10 +25,76 @@ pool_connections = 20
 pool_block = True
 
 
+class PoolStats:
+    """
+    Process-wide connection pool counters per (scheme, host, port), also added to the stats of the current run
+      hits: a pooled connection was reused
+      misses: a new connection had to be opened (new TCP connection & TLS handshake)
+      blocked_waits: the pool was exhausted and the request had to wait for a connection
+    """
+    _lock = threading.Lock()
+    _stats = {}
+
+    @classmethod
+    def record(cls, scheme: str, host: str, port: int, counter: str):
+        pool = f"{scheme}://{host}:{port}"
+        with cls._lock:
+            stats = cls._stats.setdefault(pool, {"hits": 0, "misses": 0, "blocked_waits": 0})
+            stats[counter] += 1
+        record_run_stats("connection_pools", pool, **{counter: 1})
+
+    @classmethod
+    def get_stats(cls) -> Dict:
+        with cls._lock:
+            return {pool: dict(stats) for pool, stats in cls._stats.items()}
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._stats = {}
+
+
+class CountingPoolMixin:
+    """
+    Record the PoolStats counters when a connection is taken from the pool
+    """
+
+    def _get_conn(self, timeout=None):
+        if self.block and self.pool is not None and self.pool.empty():
+            PoolStats.record(self.scheme, self.host, self.port, "blocked_waits")
+        conn = super()._get_conn(timeout=timeout)
+        if getattr(conn, "_pool_stats_new", False):
+            conn._pool_stats_new = False
+            PoolStats.record(self.scheme, self.host, self.port, "misses")
+        else:
+            PoolStats.record(self.scheme, self.host, self.port, "hits")
+        return conn
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn._pool_stats_new = True
+        return conn
+
+
+class CountingHTTPConnectionPool(CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
 class TimeoutHTTPAdapter(HTTPAdapter):
     def __init__(self, *args, **kwargs):
         super(TimeoutHTTPAdapter, self).__init__(*args, **kwargs)
 
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
     def send(self, request, **kwargs):
         # todo can we read this timeout from global.json?
         if not kwargs.get("timeout"):
@@ -29,6 +102,112 @@ class TimeoutHTTPAdapter(HTTPAdapter):
         return super().send(request, **kwargs)
 
 
+def parse_response(r):
+    """
+    Parse the body of the response "r", json if possible, else the decoded content
+
+    Args:
+        r: Response object, anything that exposes headers, json() and content
+    Returns:
+        The parsed response
+    """
+    if r.headers.get('Content-Type') == 'application/json':
+        try:
+            response = r.json()
+        except Exception as e:
+            # In Case of No or Empty Data .json() gives Exception
+
+            # Added this logic to avoid
+            if str(r) in ['<Response [200]>', '<Response [204]>']:
+                response = r
+            else:
+                raise e
+    else:
+        response = r.content
+        response = response.decode("utf-8")
+        # Sometimes json response is sent back as a string
+        try:
+            response = json.loads(response)
+        except Exception:
+            logger.debug("Cannot parse string response to json")
+
+    logger.debug("RESPONSE: %s", response)
+    return response
+
+
+def raise_rest_error(r, err: Exception):
+    """
+    Convert the exception "err" raised while making/ parsing the call into RestError
+
+    Args:
+        r: Response object if the call went through, else None
+        err (Exception): The exception that occurred
+    Raises:
+        RestError
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Got traceback\n{}".format(traceback.format_exc()))
+
+    status_code = r.status_code if hasattr(r, "status_code") else 500
+    error = {"code": status_code}
+
+    if str(status_code).startswith("5") or str(status_code).startswith("4"):
+        if r:
+            error["response"] = r
+
+    if str(status_code) == "401":
+        err_msg = "Unauthorized. Please check your credentials."
+    elif hasattr(r, "json") and callable(getattr(r, "json")):
+        try:
+            err_msg = r.json()
+        except Exception:
+            err_msg = f"{err}"
+    elif hasattr(r, "text"):
+        err_msg = r.text
+    else:
+        err_msg = f"{err}"
+
+    error["error"] = err_msg
+    raise RestError(message=str(error), error="HTTPError", status_code=status_code)
+
+
+def check_response(response):
+    """
+    Raise ResponseError if the parsed response itself is a failed response
+
+    Args:
+        response: The parsed response
+    Returns:
+        The response
+    """
+    if str(response) == '<Response [401]>':
+        raise ResponseError(message=str(response), error="LoginFailed")
+    elif str(response) == '<Response [502]>':
+        raise ResponseError(message=str(response), error="BadGateway")
+    return response
+
+
+def record_call(name: str, r, start_time: float, err: Optional[Exception] = None):
+    """
+    Emit the event of the call to the event log of the run, with the retries urllib3 made
+
+    Args:
+        name (str): Name of the function making the call, the method if the call didn't go through
+        r: Response object if the call went through, else None
+        start_time (float): time.perf_counter() when the call was made
+        err (Exception, optional): The exception that occurred
+    """
+    if not get_event_log():
+        return
+    # requests' exceptions keep the request when the call didn't go through
+    request = getattr(r, "request", None) or getattr(err, "request", None)
+    retries = getattr(getattr(r, "raw", None), "retries", None)
+    emit_http_event(getattr(request, "method", None) or name, getattr(request, "url", None) or getattr(r, "url", ""),
+                    start_time, status=getattr(r, "status_code", None),
+                    retries=len(retries.history) if getattr(retries, "history", None) is not None else None,
+                    error=err)
+
+
 def rest_api_call(func):
     """
     Decorator function to handle API calls and exceptions
@@ -41,78 +220,55 @@ def rest_api_call(func):
 
     def make_call(*args, **kwargs):
         r = None
+        start_time = time.perf_counter()
         try:
             r = func(*args, **kwargs)
-            if r.headers.get('Content-Type') == 'application/json':
-                try:
-                    response = r.json()
-                except Exception as e:
-                    # In Case of No or Empty Data .json() gives Exception
-
-                    # Added this logic to avoid
-                    if str(r) in ['<Response [200]>', '<Response [204]>']:
-                        response = r
-                    else:
-                        raise e
-            else:
-                response = r.content
-                response = response.decode("utf-8")
-                # Sometimes json response is sent back as a string
-                try:
-                    response = json.loads(response)
-                except Exception:
-                    logger.debug("Cannot parse string response to json")
-
-            logger.debug(f"RESPONSE: {response}")
+            response = parse_response(r)
             r.raise_for_status()
         # except ConnectionError as e:
         #     error = {"err_msg": e}
         #     raise RestError(message=str(error), error="ConnectionError")
         except Exception as err:
-            logger.debug("Got traceback\n{}".format(traceback.format_exc()))
-
-            status_code = r.status_code if hasattr(r, "status_code") else 500
-            error = {"code": status_code}
-
-            if str(status_code).startswith("5") or str(status_code).startswith("4"):
-                if r:
-                    error["response"] = r
-
-            if str(status_code) == "401":
-                err_msg = "Unauthorized. Please check your credentials."
-            elif hasattr(r, "json") and callable(getattr(r, "json")):
-                try:
-                    err_msg = r.json()
-                except Exception:
-                    err_msg = f"{err}"
-            elif hasattr(r, "text"):
-                err_msg = r.text
-            else:
-                err_msg = f"{err}"
+            record_call(func.__name__, r, start_time, err)
+            raise_rest_error(r, err)
 
-            error["error"] = err_msg
-            raise RestError(message=str(error), error="HTTPError")
+        record_call(func.__name__, r, start_time)
+        return check_response(response)
+
+    return make_call
 
-        if str(response) == '<Response [401]>':
-            raise ResponseError(message=str(response), error="LoginFailed")
-        elif str(response) == '<Response [502]>':
-            raise ResponseError(message=str(response), error="BadGateway")
-        return response
+
+def invalidates_name_indexes(func):
+    """
+    Decorator for the write calls, drops the name indexes of the session the call makes stale once it is made.
+    Also done when the call fails, the entity may still have been written.
+    """
+
+    @functools.wraps(func)
+    def make_call(self, uri: str, *args, **kwargs):
+        try:
+            return func(self, uri, *args, **kwargs)
+        finally:
+            invalidate_written_name_indexes(self, uri)
 
     return make_call
 
 
 class RestAPIUtil:
     def __init__(self, ip_address: str, user: Optional[str], pwd: Optional[str], headers: dict = None,
-                 secured: bool = True, port: str = "", cache: bool = False):
+                 secured: bool = True, port: str = "", cache: Union[bool, ResponseCache] = False,
+                 pool_maxsize: int = pool_maxsize):
         self.__IP_ADDRESS = ip_address
         self.__SSL_ENABLED = bool(secured)
         self.__PORT = f":{port}" if port else port
-        self.__session = requests.Session() if not cache else requests_cache.CachedSession(
-            expire_after=60,
-            backend='sqlite',
-            allowable_methods=('GET',),
-        )
+        self.__async_session = None
+        self.__async_session_lock = threading.Lock()
+        self.__session = requests.Session()
+        # In-process read cache used by the Entities of this session, see ResponseCache
+        if isinstance(cache, ResponseCache):
+            self.cache = cache
+        else:
+            self.cache = ResponseCache() if cache else None
         self.__headers = headers if headers is not None else {'content-type': 'application/json'}
         if user and pwd:
             self.__session.auth = HTTPBasicAuth(user, pwd)
@@ -146,31 +302,33 @@ class RestAPIUtil:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     @rest_api_call
+    @invalidates_name_indexes
     def post(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
         headers = headers if headers is not None else self.__headers
         data = {} if not data else data
         url = self.prepare_url(uri)
 
-        logger.debug("POST request for the URL: " + url)
+        logger.debug("POST request for the URL: %s", url)
         logger.debug(kwargs)
         data = json.dumps(data) if jsonify else data
 
         if data:
-            logger.debug(f"POST payload: {data}")
+            logger.debug("POST payload: %s", data)
         response = self.__session.post(url, headers=headers, data=data, verify=verify, **kwargs)
         return response
 
     @rest_api_call
+    @invalidates_name_indexes
     def put(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
         headers = headers if headers is not None else self.__headers
         data = {} if not data else data
         url = self.prepare_url(uri)
 
-        logger.debug("PUT request for the URL: " + url)
+        logger.debug("PUT request for the URL: %s", url)
         data = json.dumps(data) if jsonify else data
 
         if data:
-            logger.debug(f"PUT payload: {data}")
+            logger.debug("PUT payload: %s", data)
         response = self.__session.put(url, headers=headers, data=data, verify=verify, **kwargs)
         return response
 
@@ -181,40 +339,69 @@ class RestAPIUtil:
         url = self.prepare_url(uri)
         headers = {} if not headers else headers
 
-        logger.debug("GET request for the URL: " + url)
+        logger.debug("GET request for the URL: %s", url)
         if data:
-            logger.debug(f"GET payload: {data}")
+            logger.debug("GET payload: %s", data)
             response = self.__session.get(url, headers=headers, data=json.dumps(data), verify=False, **kwargs)
         else:
             response = self.__session.get(url, headers=headers, verify=verify, **kwargs)
         return response
 
     @rest_api_call
+    @invalidates_name_indexes
     def delete(self, uri: str, headers: dict = None, verify=False, **kwargs):
         headers = headers if headers is not None else self.__headers
         url = self.prepare_url(uri)
         headers = {} if not headers else headers
 
-        logger.debug("DELETE request for the URL: " + url)
+        logger.debug("DELETE request for the URL: %s", url)
         response = self.__session.delete(url, headers=headers, verify=verify, **kwargs)
         return response
 
     @rest_api_call
+    @invalidates_name_indexes
     def patch(self, uri: str, headers: dict = None, data: dict = None, jsonify=True, verify=False, **kwargs):
         headers = headers if headers is not None else self.__headers
         data = {} if not data else data
         url = self.prepare_url(uri)
 
-        logger.debug("PATCH request for the URL: " + url)
+        logger.debug("PATCH request for the URL: %s", url)
         data = json.dumps(data) if jsonify else data
 
         if data:
-            logger.debug(f"PATCH payload: {data}")
+            logger.debug("PATCH payload: %s", data)
             response = self.__session.patch(url, headers=headers, data=data, verify=verify, **kwargs)
         else:
             response = self.__session.patch(url, headers=headers, verify=verify, **kwargs)
         return response
 
+    def __deepcopy__(self, memo):
+        # Scripts deepcopy their input data, the session & its connection pool have to be shared, not copied
+        return self
+
+    def get_async_session(self):
+        """
+        Get the AsyncRestAPIUtil that talks to the same endpoint, with the same credentials and headers.
+        The async session is created once and reused for the lifetime of this session, by all the threads.
+
+        Returns:
+            AsyncRestAPIUtil
+        """
+        with self.__async_session_lock:
+            if not self.__async_session:
+                from .async_rest_utils import AsyncRestAPIUtil
+
+                auth = self.__session.auth
+                self.__async_session = AsyncRestAPIUtil(
+                    self.__IP_ADDRESS,
+                    user=auth.username if auth else None,
+                    pwd=auth.password if auth else None,
+                    headers=self.__headers,
+                    secured=self.__SSL_ENABLED,
+                    port=self.__PORT.lstrip(":")
+                )
+        return self.__async_session
+
     def prepare_url(self, uri):
         return f"{self.get_protocol()}://{self.__IP_ADDRESS}{self.__PORT}/{uri}"
 
@@ -0,0 +1,62 @@
+import contextvars
+import threading
+from typing import Optional, Dict, Any
+
+# Stats of the run, per context so that the concurrent runs of a long-running process, eg. the jobs of the API
+# server or the configs of a fleet, only report their own counters
+_run_stats: contextvars.ContextVar[Optional["RunStats"]] = contextvars.ContextVar("run_stats", default=None)
+
+
+class RunStats:
+    """
+    Counters of one run, grouped by section and name, eg. {"state_monitors": {"PcTaskMonitor": {"runs": 2}}}.
+    Numbers are added up, sets are merged.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def add(self, section: str, name: str, **counters):
+        with self._lock:
+            stats = self._sections.setdefault(section, {}).setdefault(name, {})
+            for key, value in counters.items():
+                if isinstance(value, (set, frozenset)):
+                    stats[key] = stats.get(key, set()) | value
+                else:
+                    stats[key] = round(stats.get(key, 0) + value, 2)
+
+    def get(self, section: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            dict: Name to a copy of its counters, the sets are returned as sorted lists
+        """
+        with self._lock:
+            return {name: {key: sorted(value) if isinstance(value, set) else value for key, value in stats.items()}
+                    for name, stats in self._sections.get(section, {}).items()}
+
+
+def start_run_stats() -> RunStats:
+    """
+    Collect the stats of the code running in the current context, and the contexts copied from it, in a new RunStats
+    """
+    stats = RunStats()
+    _run_stats.set(stats)
+    return stats
+
+
+def get_run_stats() -> Optional[RunStats]:
+    return _run_stats.get()
+
+
+def stop_run_stats():
+    _run_stats.set(None)
+
+
+def record_run_stats(section: str, name: str, **counters):
+    """
+    Add the counters to the stats of the current run, if they are collected
+    """
+    stats = _run_stats.get()
+    if stats is not None:
+        stats.add(section, name, **counters)
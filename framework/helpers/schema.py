@@ -1563,6 +1563,16 @@ POD_CONFIG_SCHEMA = {
                 'type': 'string',
                 'required': True
             },
+            'max_blocks_in_flight': {
+                'type': 'integer',
+                'required': False,
+                'min': 1
+            },
+            'max_blocks_per_pc': {
+                'type': 'integer',
+                'required': False,
+                'min': 1
+            },
             'pod_blocks': {
                 'type': 'list',
                 'required': True,
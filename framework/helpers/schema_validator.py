@@ -0,0 +1,234 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, List, Tuple, Any
+import cerberus
+from .log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Lists of independent blocks, each block is validated on its own and the blocks of large configs in parallel
+BLOCK_PATHS = [("pod", "pod_blocks")]
+# cerberus sorts the errors of a document as it adds them, the larger the document the slower. The blocks are
+# validated a few at a time, as each document has its schema copied & checked by cerberus
+BLOCKS_PER_DOCUMENT = 4
+# Fewer blocks are validated in the process, starting the workers costs more than it saves
+DEFAULT_MIN_PARALLEL_BLOCKS = 16
+DEFAULT_MAX_WORKERS = min(4, multiprocessing.cpu_count())
+
+
+class SchemaValidator:
+    """
+    Validates the inputs against the schemas of framework.helpers.schema. cerberus checks the definition of a schema
+    every time a Validator is created, so each schema is compiled once and its validator cached by the identity of
+    the schema, per thread as a validator holds the state of the document it validates.
+
+    The blocks of a pod, see BLOCK_PATHS, don't depend on each other. They're validated apart from the rest of the
+    document, a few at a time to keep the error trees cerberus sorts small, and in a pool of processes when there are
+    at least min_parallel_blocks of them. The errors are merged back in the layout of cerberus.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 min_parallel_blocks: int = DEFAULT_MIN_PARALLEL_BLOCKS):
+        self.max_workers = max_workers
+        self.min_parallel_blocks = min_parallel_blocks
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # id of the schema to (schema, schema without the blocks, path of the blocks & schema of the blocks)
+        self._split_schemas: Dict[int, Tuple[Dict, Dict, Optional[Tuple[str, ...]], Optional[Dict]]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def configure(self, max_workers: Optional[int] = None, min_parallel_blocks: Optional[int] = None):
+        """
+        Args:
+            max_workers (int, optional): Max processes validating the blocks, 1 validates them in the process
+            min_parallel_blocks (int, optional): Min blocks to validate in parallel
+        """
+        with self._lock:
+            if max_workers is not None and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                self._shutdown_executor()
+            if min_parallel_blocks is not None:
+                self.min_parallel_blocks = min_parallel_blocks
+
+    def validate(self, schema: Dict, data: Dict) -> Tuple[bool, Dict]:
+        """
+        Validate the data against the schema
+
+        Returns:
+            tuple: If the data is valid, and the errors in the layout of cerberus.Validator.errors
+        """
+        schema, parent_schema, block_path, blocks_schema = self._split(schema)
+        validator = self.get_validator(parent_schema)
+        validator.validate(data)
+        errors = validator.errors
+
+        blocks = get_path(data, block_path) if block_path else None
+        if isinstance(blocks, list) and blocks:
+            block_errors = self._validate_blocks(blocks_schema, blocks)
+            if any(block_errors):
+                errors = merge_block_errors(errors, block_path, block_errors)
+        return not errors, errors
+
+    def get_validator(self, schema: Dict) -> cerberus.Validator:
+        """
+        Returns:
+            cerberus.Validator: The compiled validator of the schema, of the calling thread
+        """
+        validators = getattr(self._local, "validators", None)
+        if validators is None:
+            validators = self._local.validators = {}
+        cached = validators.get(id(schema))
+        # The schema is kept with its validator, so its id isn't reused by another schema
+        if cached and cached[0] is schema:
+            return cached[1]
+        validator = cerberus.Validator(schema, allow_unknown=True)
+        validators[id(schema)] = (schema, validator)
+        return validator
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown_executor()
+
+    def _split(self, schema: Dict) -> Tuple[Dict, Dict, Optional[Tuple[str, ...]], Optional[Dict]]:
+        split = self._split_schemas.get(id(schema))
+        if split and split[0] is schema:
+            return split
+        split = (schema, schema, None, None)
+        for path in BLOCK_PATHS:
+            rules = get_rules(schema, path)
+            if rules and rules.get("type") == "list" and isinstance(rules.get("schema"), dict) \
+                    and rules["schema"].get("type") == "dict" and isinstance(rules["schema"].get("schema"), dict):
+                # The rules of the list itself stay in the parent, eg. 'required', the rules of a block don't
+                parent_schema = replace_rules(schema, path, {key: value for key, value in rules.items()
+                                                             if key != "schema"})
+                split = (schema, parent_schema, path, get_blocks_schema(rules["schema"]))
+                break
+        with self._lock:
+            self._split_schemas[id(schema)] = split
+        return split
+
+    def _validate_blocks(self, blocks_schema: Dict, blocks: List[Any]) -> List[Optional[List]]:
+        if self.max_workers > 1 and len(blocks) >= self.min_parallel_blocks:
+            try:
+                executor = self._get_executor()
+                # A chunk per worker, each worker compiles the schema of the blocks once
+                chunk_size = -(-len(blocks) // self.max_workers)
+                chunks = [blocks[i:i + chunk_size] for i in range(0, len(blocks), chunk_size)]
+                results = executor.map(validate_blocks_in_worker, [blocks_schema] * len(chunks), chunks)
+                return [block_error for chunk_errors in results for block_error in chunk_errors]
+            except Exception as e:
+                # eg. a schema with a validator that can't be pickled, the blocks are validated in the process
+                logger.warning(f"Couldn't validate the blocks in parallel, validating them in the process: {e}")
+        return validate_blocks(self.get_validator(blocks_schema), blocks)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, forking a process that runs threads can deadlock the children
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def get_path(data: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def get_rules(schema: Dict, path: Tuple[str, ...]) -> Optional[Dict]:
+    """
+    Rules of the field at the path, eg. ("pod", "pod_blocks") -> schema["pod"]["schema"]["pod_blocks"]
+    """
+    rules = {"schema": schema}
+    for key in path:
+        mapping = rules.get("schema")
+        if not isinstance(mapping, dict) or not isinstance(mapping.get(key), dict):
+            return None
+        rules = mapping[key]
+    return rules
+
+
+def replace_rules(schema: Dict, path: Tuple[str, ...], rules: Dict) -> Dict:
+    """
+    Copy of the schema with the rules of the field at the path replaced, the schema itself is not modified
+    """
+    key, rest = path[0], path[1:]
+    if not rest:
+        return {**schema, key: rules}
+    return {**schema, key: {**schema[key], "schema": replace_rules(schema[key]["schema"], rest, rules)}}
+
+
+def get_blocks_schema(block_rules: Dict) -> Dict:
+    """
+    Schema of the blocks, validated as the list of a document, eg. {"blocks": [block_1, block_2]}
+    """
+    return {"blocks": {"type": "list", "schema": block_rules}}
+
+
+def validate_blocks(validator: cerberus.Validator, blocks: List[Any]) -> List[Optional[List]]:
+    """
+    Validate the blocks, BLOCKS_PER_DOCUMENT at a time
+
+    Args:
+        validator (cerberus.Validator): Validator of the schema of the blocks, see get_blocks_schema
+        blocks (list): Blocks to validate
+    Returns:
+        list: Errors of each block as cerberus nests them in the errors of a list, None if the block is valid
+    """
+    block_errors = []
+    for start in range(0, len(blocks), BLOCKS_PER_DOCUMENT):
+        document_blocks = blocks[start:start + BLOCKS_PER_DOCUMENT]
+        errors = {} if validator.validate({"blocks": document_blocks}) else validator.errors["blocks"][0]
+        block_errors.extend(errors.get(i) for i in range(len(document_blocks)))
+    return block_errors
+
+
+def validate_blocks_in_worker(blocks_schema: Dict, blocks: List[Any]) -> List[Optional[List]]:
+    # Runs in the worker processes
+    return validate_blocks(cerberus.Validator(blocks_schema, allow_unknown=True), blocks)
+
+
+def merge_block_errors(errors: Dict, path: Tuple[str, ...], block_errors: List[Optional[List]]) -> Dict:
+    """
+    Add the errors of the blocks to the errors of the rest of the document, the way cerberus nests them
+        eg. {"pod": [{"pod_blocks": [{0: [{"pc_ip": ["..."]}]}]}]}
+    """
+    errors = dict(errors)
+    key, rest = path[0], path[1:]
+    if not rest:
+        field_errors = list(errors.get(key, []))
+        field_errors.append({i: block_error for i, block_error in enumerate(block_errors) if block_error})
+        errors[key] = field_errors
+        return errors
+
+    field_errors = list(errors.get(key, []))
+    nested = next((error for error in field_errors if isinstance(error, dict)), None)
+    if nested is None:
+        field_errors.append(merge_block_errors({}, rest, block_errors))
+    else:
+        field_errors[field_errors.index(nested)] = merge_block_errors(nested, rest, block_errors)
+    errors[key] = field_errors
+    return errors
+
+
+schema_validator = SchemaValidator()
+
+
+def get_schema_validator() -> SchemaValidator:
+    return schema_validator
+
+
+def configure_schema_validation(**kwargs):
+    """
+    Configure the shared schema validator, see SchemaValidator.configure
+    """
+    schema_validator.configure(**kwargs)
@@ -0,0 +1,131 @@
+import hashlib
+import threading
+from typing import Optional, Dict, Tuple
+from .log_utils import get_logger
+from .cache_utils import ResponseCache
+from .rest_utils import RestAPIUtil, PoolStats, pool_maxsize
+from .run_stats import record_run_stats
+from .v4_api_client import ApiClientV4
+
+logger = get_logger(__name__)
+
+
+class SessionRegistry:
+    """
+    Process-wide registry of sessions keyed by (host, port, scheme, credential). Scripts that talk to the same
+    Prism endpoint with the same credential share one RestAPIUtil, hence one connection pool, instead of
+    creating a new pool & TLS handshakes every time the sessions are created.
+    """
+
+    def __init__(self, default_pool_maxsize: int = pool_maxsize):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple, RestAPIUtil] = {}
+        self._v4_api_utils: Dict[Tuple, ApiClientV4] = {}
+        self.default_pool_maxsize = default_pool_maxsize
+        self.host_pool_maxsize: Dict[str, int] = {}
+        # ResponseCache arguments, sessions are created with a read cache if set
+        self.response_cache: Optional[Dict] = None
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, default_pool_maxsize: Optional[int] = None, host_pool_maxsize: Optional[Dict] = None,
+                  response_cache: Optional[Dict] = None):
+        """
+        Configure the pool sizing & read cache. Only sessions created after this call are affected.
+
+        Args:
+            default_pool_maxsize (int, optional): Max connections per host, if not overridden for the host
+            host_pool_maxsize (dict, optional): Host to max connections map, eg. {"10.1.1.1": 50}
+            response_cache (dict, optional): ResponseCache arguments, eg. {"default_ttl": 60,
+              "resource_ttls": {"clusters": 300}}. Sessions are created with a read cache if specified
+        """
+        with self._lock:
+            if default_pool_maxsize:
+                self.default_pool_maxsize = default_pool_maxsize
+            if host_pool_maxsize:
+                self.host_pool_maxsize.update({str(host): size for host, size in host_pool_maxsize.items()})
+            if response_cache is not None:
+                self.response_cache = response_cache
+
+    def get_pool_maxsize(self, host: str) -> int:
+        return self.host_pool_maxsize.get(host, self.default_pool_maxsize)
+
+    @staticmethod
+    def _build_key(host: str, port: str, secured: bool, user: Optional[str], pwd: Optional[str]) -> Tuple:
+        # Don't keep the password in the key
+        credential = hashlib.sha256(f"{user}:{pwd}".encode()).hexdigest() if user and pwd else None
+        return host, str(port), "https" if secured else "http", credential
+
+    def get_session(self, ip_address: str, user: Optional[str], pwd: Optional[str], port: str = "",
+                    secured: bool = True, headers: dict = None) -> RestAPIUtil:
+        """
+        Get the shared RestAPIUtil for the endpoint and credential, create one if it doesn't exist
+
+        Args:
+            ip_address (str): IP/ FQDN of the endpoint
+            user (str): Username
+            pwd (str): Password
+            port (str, optional): Port
+            secured (bool, optional): https if True, else http
+            headers (dict, optional): Default headers for the session, part of the key if specified
+        Returns:
+            RestAPIUtil
+        """
+        key = self._build_key(ip_address, port, secured, user, pwd)
+        if headers is not None:
+            key += (tuple(sorted(headers.items())),)
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session:
+                self.hits += 1
+                record_run_stats("sessions", "registry", hits=1)
+                return session
+            self.misses += 1
+            record_run_stats("sessions", "registry", misses=1)
+            cache = ResponseCache(**self.response_cache) if self.response_cache is not None else False
+            session = RestAPIUtil(ip_address, user=user, pwd=pwd, headers=headers, secured=secured, port=port,
+                                  pool_maxsize=self.get_pool_maxsize(ip_address), cache=cache)
+            self._sessions[key] = session
+            return session
+
+    def get_v4_api_util(self, ip_address: str, port: str, user: str, pwd: str) -> ApiClientV4:
+        """
+        Get the shared ApiClientV4 for the endpoint and credential, create one if it doesn't exist
+        """
+        key = self._build_key(ip_address, port, True, user, pwd)
+        with self._lock:
+            if key not in self._v4_api_utils:
+                self._v4_api_utils[key] = ApiClientV4(ip_address, port, user, pwd)
+            return self._v4_api_utils[key]
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Session hits & misses of the registry and the connection pool counters per host
+        """
+        with self._lock:
+            sessions = {"hits": self.hits, "misses": self.misses, "active": len(self._sessions)}
+        return {"sessions": sessions, "pools": PoolStats.get_stats()}
+
+    def log_stats(self, stats: Optional[Dict] = None):
+        """
+        Args:
+            stats (dict, optional): Stats to log in the format of get_stats, eg. the ones of a run, the process-wide
+              stats if not set
+        """
+        stats = stats if stats is not None else self.get_stats()
+        logger.info(f"Sessions: {stats['sessions']}")
+        for pool, pool_stats in stats["pools"].items():
+            logger.info(f"Connection pool {pool}: {pool_stats}")
+
+    def clear(self):
+        with self._lock:
+            self._sessions = {}
+            self._v4_api_utils = {}
+            self.hits = 0
+            self.misses = 0
+            self.response_cache = None
+
+
+session_registry = SessionRegistry()
@@ -1,11 +1,10 @@
-import ntnx_microseg_py_client
-import ntnx_networking_py_client
-import ntnx_prism_py_client
+import importlib
 
+# The SDKs are imported when their first client is created, they are slow to import
 CLIENT_MAPPER = {
-    'microseg': ntnx_microseg_py_client,
-    'network': ntnx_networking_py_client,
-    'prism': ntnx_prism_py_client
+    'microseg': 'ntnx_microseg_py_client',
+    'network': 'ntnx_networking_py_client',
+    'prism': 'ntnx_prism_py_client'
 }
 
 class ApiClientV4:
@@ -16,6 +15,10 @@ class ApiClientV4:
         self.pwd = pwd
         self.cache = {}
 
+    def __deepcopy__(self, memo):
+        # Share the cached clients & their connection pools across the deep copies of the input data
+        return self
+
     def get_api_client(self, client_type, max_retry_attempts=3, backoff_factor=3, verify_ssl=False):
         """
         Get the cached client or create a new one if not cached.
@@ -54,7 +57,8 @@ class ApiClientV4:
         if client_type not in CLIENT_MAPPER:
             raise ValueError(f"Invalid client_type: {client_type}")
 
-        config = CLIENT_MAPPER[client_type].Configuration()
+        client_module = importlib.import_module(CLIENT_MAPPER[client_type])
+        config = client_module.Configuration()
 
         config.host = self.ip_address
         config.port = self.port
@@ -64,4 +68,4 @@ class ApiClientV4:
         config.password = self.pwd
         config.verify_ssl = verify_ssl
 
-        return CLIENT_MAPPER[client_type].ApiClient(configuration=config)
+        return client_module.ApiClient(configuration=config)
@@ -1,6 +1,9 @@
 """
 Function to authenticate with the cyber ark instance using certificate and key
 """
+import threading
+import time
+from typing import Optional, Dict, Tuple
 from framework.helpers.log_utils import get_logger
 from framework.helpers.rest_utils import RestAPIUtil
 
@@ -30,3 +33,69 @@ class CyberArk:
             return user_pwd_details.get("UserName"), user_pwd_details.get("Content")
         except Exception as e:
             raise Exception(f"Failed to fetch password for user: {username!r}. Error is: {e}").with_traceback(e.__traceback__)
+
+
+class CredentialCache:
+    """
+    Cache of the credentials fetched from the vault, so that a long-running process running many workflows
+    doesn't fetch the same credentials for every workflow. Disabled, i.e. ttl 0, unless configured.
+    """
+
+    def __init__(self, ttl: int = 0):
+        """
+        Args:
+            ttl (int, optional): Time the fetched credentials are reused for, in seconds
+        """
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        # key -> (expiry, (username, password))
+        self._credentials: Dict[Tuple, Tuple[float, Tuple[str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl: int):
+        with self._lock:
+            self.ttl = ttl
+            if not ttl:
+                self._credentials = {}
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, str]]:
+        """
+        Returns:
+            tuple: username, password of the key if they were fetched less than ttl ago, else None
+        """
+        with self._lock:
+            if not self.ttl:
+                return None
+            expiry, credentials = self._credentials.get(key, (0, None))
+            if expiry < time.monotonic():
+                self._credentials.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return credentials
+
+    def set(self, key: Tuple, credentials: Tuple[str, str]):
+        with self._lock:
+            if self.ttl:
+                self._credentials[key] = (time.monotonic() + self.ttl, credentials)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"ttl": self.ttl, "entries": len(self._credentials), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._credentials = {}
+            self.hits = 0
+            self.misses = 0
+
+
+credential_cache = CredentialCache()
+
+
+def configure_credential_cache(ttl: int):
+    """
+    Reuse the credentials fetched from the vault for ttl seconds, 0 disables the cache
+    """
+    credential_cache.configure(ttl)
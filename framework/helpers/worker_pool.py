@@ -0,0 +1,312 @@
+import contextvars
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, List, Callable, Iterable, Any, Deque
+from .log_utils import get_logger
+from .run_stats import get_run_stats
+
+logger = get_logger(__name__)
+
+# Budgets of the pooled workers, the thread waiting for a job always runs its items as well
+DEFAULT_MAX_WORKERS = 4 * (multiprocessing.cpu_count() + 4)
+DEFAULT_MAX_WORKERS_PER_HOST = 16
+DEFAULT_MAX_WORKERS_PER_CLASS = 2 * (multiprocessing.cpu_count() + 4)
+
+
+class _WorkItem:
+    def __init__(self, fn: Callable, args: tuple, host: Optional[str], script_class: Optional[str]):
+        self.fn = fn
+        self.args = args
+        self.host = host
+        self.script_class = script_class
+        self.future = Future()
+        # Items run in the context of the submitter, so the context variables, eg. the job a log record belongs
+        # to, follow the items to the pooled workers
+        self.context = contextvars.copy_context()
+        # Items are counted in the stats of the run that submitted them, not only in the pool-wide counters
+        self.run_stats = get_run_stats()
+        self.submit_time = time.monotonic()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that runs the calls in a copy of the context of the submitter, like the items of the
+    WorkerPool, so the context variables, eg. the journal, the plan & the stats of the run, follow the calls
+    """
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class WorkerJob:
+    """
+    Group of work items submitted by one caller, eg. the scripts of a BatchScript or the clusters of a
+    ClusterScript. The items run on the pooled workers as the budgets allow, and the thread that waits for the job
+    runs the items no worker picked up. So nested jobs always make progress, even if all the pooled workers are
+    busy waiting for their own nested jobs.
+    """
+
+    def __init__(self, pool: "WorkerPool", max_in_flight: Optional[int] = None):
+        self.pool = pool
+        # Max items of the job running at a time, on the pooled workers and the waiting thread
+        self.max_in_flight = max_in_flight
+        self.pending: Deque[_WorkItem] = deque()
+        self.running = 0
+
+    def submit(self, fn: Callable, *args, host: Optional[str] = None, script_class: Optional[str] = None) -> Future:
+        """
+        Add an item to the job, can be called while the job is being waited for
+
+        Args:
+            fn (callable): Function to call
+            args: Arguments of the function
+            host (str, optional): Host the item targets, for the per host budget
+            script_class (str, optional): Script class the item runs, for the per class budget
+        Returns:
+            Future: Result of the item
+        """
+        item = _WorkItem(fn, args, host, script_class)
+        with self.pool._condition:
+            self.pending.append(item)
+            self.pool._enqueue(self)
+            self.pool._dispatch()
+        return item.future
+
+    def wait(self):
+        """
+        Run the items that aren't picked up by the pooled workers in the current thread, until all the items
+        of the job are done
+        """
+        condition = self.pool._condition
+        while True:
+            with condition:
+                if self.pending and not self.is_capped():
+                    item = self.pending.popleft()
+                    self.running += 1
+                    self.pool.inline_workers += 1
+                    self.pool._update_queue_depth(-1)
+                elif self.running:
+                    condition.wait()
+                    continue
+                else:
+                    self.pool._remove_job(self)
+                    return
+
+            # Scripts rename the thread they run in, keep the name of the waiting thread
+            current_thread = threading.current_thread()
+            thread_name = current_thread.name
+            try:
+                self.pool._run_item(item, inline=True)
+            finally:
+                current_thread.name = thread_name
+                with condition:
+                    self.running -= 1
+                    self.pool.inline_workers -= 1
+                    condition.notify_all()
+
+    def is_capped(self) -> bool:
+        return bool(self.max_in_flight) and self.running >= self.max_in_flight
+
+
+class WorkerPool:
+    """
+    Process-wide pool of worker threads shared by the nested batches, instead of a ThreadPoolExecutor per level.
+    The pooled workers are bounded globally, per target host and per script class.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_workers_per_host: int = DEFAULT_MAX_WORKERS_PER_HOST,
+                 max_workers_per_class: int = DEFAULT_MAX_WORKERS_PER_CLASS):
+        self.max_workers = max_workers
+        self.max_workers_per_host = max_workers_per_host
+        self.max_workers_per_class = max_workers_per_class
+        self.host_limits: Dict[str, int] = {}
+        self.class_limits: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: List[WorkerJob] = []
+        self._host_workers: Dict[str, int] = {}
+        self._class_workers: Dict[str, int] = {}
+        self.active_workers = 0
+        self.inline_workers = 0
+        self.queue_depth = 0
+        self.max_active_workers = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+
+    def configure(self, max_workers: Optional[int] = None, max_workers_per_host: Optional[int] = None,
+                  max_workers_per_class: Optional[int] = None, host_limits: Optional[Dict[str, int]] = None,
+                  class_limits: Optional[Dict[str, int]] = None):
+        """
+        Configure the budgets of the pooled workers
+
+        Args:
+            max_workers (int, optional): Max pooled workers in the process
+            max_workers_per_host (int, optional): Max pooled workers working against the same host
+            max_workers_per_class (int, optional): Max pooled workers running the same script class
+            host_limits (dict, optional): Host to max workers map, eg. {"10.1.1.1": 4}
+            class_limits (dict, optional): Script class to max workers map, eg. {"CreateContainerPe": 8}
+        """
+        with self._condition:
+            if max_workers and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                # The running workers finish on the old executor, the new workers start on a new one
+                if self._executor:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            if max_workers_per_host:
+                self.max_workers_per_host = max_workers_per_host
+            if max_workers_per_class:
+                self.max_workers_per_class = max_workers_per_class
+            if host_limits:
+                self.host_limits.update({str(host): limit for host, limit in host_limits.items()})
+            if class_limits:
+                self.class_limits.update(class_limits)
+
+    def job(self, max_in_flight: Optional[int] = None) -> WorkerJob:
+        return WorkerJob(self, max_in_flight)
+
+    def map(self, fn: Callable, *iterables: Iterable, hosts: Optional[Iterable[Optional[str]]] = None,
+            script_class: Optional[str] = None, max_in_flight: Optional[int] = None,
+            return_exceptions: bool = False) -> List[Any]:
+        """
+        Call the function for the items of the iterables on the pool, like Executor.map, and wait for all of them
+
+        Args:
+            fn (callable): Function to call
+            iterables: Arguments of the calls
+            hosts (iterable, optional): Host each call targets
+            script_class (str, optional): Script class the calls run
+            max_in_flight (int, optional): Max calls running at a time
+            return_exceptions (bool, optional): Return the exceptions in the results instead of raising the first one
+        Returns:
+            list: Results in the same order as the arguments
+        """
+        arguments = list(zip(*iterables))
+        hosts = list(hosts) if hosts is not None else [None] * len(arguments)
+        job = self.job(max_in_flight)
+        futures = [job.submit(fn, *args, host=host, script_class=script_class)
+                   for args, host in zip(arguments, hosts)]
+        job.wait()
+
+        results = []
+        for future in futures:
+            exception = future.exception()
+            if exception is not None and not return_exceptions:
+                raise exception
+            results.append(exception if exception is not None else future.result())
+        return results
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Active pooled & inline workers, queue depth & their peaks, workers per host & per class
+        """
+        with self._condition:
+            return {"max_workers": self.max_workers, "active_workers": self.active_workers,
+                    "inline_workers": self.inline_workers, "queue_depth": self.queue_depth,
+                    "max_active_workers": self.max_active_workers, "max_queue_depth": self.max_queue_depth,
+                    "completed": self.completed,
+                    "hosts": {host: count for host, count in self._host_workers.items() if count},
+                    "classes": {name: count for name, count in self._class_workers.items() if count}}
+
+    def _enqueue(self, job: WorkerJob):
+        if job not in self._jobs:
+            self._jobs.append(job)
+        self._update_queue_depth(1)
+
+    def _remove_job(self, job: WorkerJob):
+        if job in self._jobs:
+            self._jobs.remove(job)
+
+    def _update_queue_depth(self, delta: int):
+        self.queue_depth += delta
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _has_budget(self, job: WorkerJob, item: _WorkItem) -> bool:
+        if job.is_capped():
+            return False
+        if item.host is not None:
+            limit = self.host_limits.get(str(item.host), self.max_workers_per_host)
+            if self._host_workers.get(item.host, 0) >= limit:
+                return False
+        if item.script_class is not None:
+            limit = self.class_limits.get(item.script_class, self.max_workers_per_class)
+            if self._class_workers.get(item.script_class, 0) >= limit:
+                return False
+        return True
+
+    def _dispatch(self):
+        """
+        Hand the pending items to the pooled workers, in the order the jobs were submitted, as long as the budgets
+        allow. Called with the condition held
+        """
+        for job in list(self._jobs):
+            if self.active_workers >= self.max_workers:
+                return
+            for item in list(job.pending):
+                if self.active_workers >= self.max_workers:
+                    return
+                if not self._has_budget(job, item):
+                    continue
+                job.pending.remove(item)
+                job.running += 1
+                self.active_workers += 1
+                self.max_active_workers = max(self.max_active_workers, self.active_workers)
+                self._update_queue_depth(-1)
+                if item.host is not None:
+                    self._host_workers[item.host] = self._host_workers.get(item.host, 0) + 1
+                if item.script_class is not None:
+                    self._class_workers[item.script_class] = self._class_workers.get(item.script_class, 0) + 1
+                self._get_executor().submit(self._run_pooled, job, item)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="WorkerPool")
+        return self._executor
+
+    def _run_pooled(self, job: WorkerJob, item: _WorkItem):
+        try:
+            self._run_item(item, inline=False)
+        finally:
+            with self._condition:
+                job.running -= 1
+                self.active_workers -= 1
+                if item.host is not None:
+                    self._host_workers[item.host] -= 1
+                if item.script_class is not None:
+                    self._class_workers[item.script_class] -= 1
+                self._dispatch()
+                self._condition.notify_all()
+
+    def _run_item(self, item: _WorkItem, inline: bool):
+        if not item.future.set_running_or_notify_cancel():
+            return
+        queue_wait = time.monotonic() - item.submit_time
+        try:
+            item.future.set_result(item.context.run(item.fn, *item.args))
+        except BaseException as e:
+            item.future.set_exception(e)
+        finally:
+            with self._condition:
+                self.completed += 1
+            if item.run_stats is not None:
+                item.run_stats.add("worker_pool", "items", completed=1, inline=int(inline), pooled=int(not inline),
+                                   queue_wait=queue_wait)
+
+
+worker_pool = WorkerPool()
+
+
+def get_worker_pool() -> WorkerPool:
+    return worker_pool
+
+
+def configure_worker_pool(**kwargs):
+    """
+    Configure the shared worker pool, see WorkerPool.configure
+    """
+    worker_pool.configure(**kwargs)
@@ -1,5 +1,12 @@
 from typing import Type, List, Callable
 from framework.scripts.python.script import Script
+from .cache_utils import log_cache_stats
+from .checkpoint_utils import configure_checkpoints, get_checkpoint_journal
+from .event_utils import configure_event_log, stop_event_log
+from .reconcile_utils import start_plan, stop_plan
+from .run_stats import start_run_stats, stop_run_stats
+from .session_registry import session_registry
+from .worker_pool import get_worker_pool
 from .general_utils import run_script
 from .log_utils import get_logger
 
@@ -45,8 +52,92 @@ class Workflow:
         """
         logger.info(f"Running the {type(self).__name__}...")
 
+        # Plan mode, the changes are listed instead of made
+        if self.data.get("plan"):
+            self.plan_scripts(scripts)
+            return
+
+        # Journal of the steps of the run, the steps that succeeded are skipped if the run is resumed
+        if self.data.get("run_id"):
+            journal = configure_checkpoints(self.data["project_root"], self.data["run_id"],
+                                            resume=self.data.get("resume", False))
+            logger.info(f"Checkpoint journal: {journal.file_path}, rerun with '--resume {journal.run_id}' to skip "
+                        f"the steps that succeeded")
+
+            # Structured events of the scripts, the API calls & the monitors of the run
+            event_log = configure_event_log(self.data["project_root"], self.data["run_id"])
+            logger.info(f"Event log: {event_log.file_path}, aggregate it with "
+                        f"'python -m framework.helpers.event_utils {event_log.file_path}'")
+
+        # Stats of this run only, the process may be running other jobs or configs at the same time
+        run_stats = start_run_stats()
+
         # run the scripts
-        run_script(scripts, self.data)
+        try:
+            run_script(scripts, self.data)
+        finally:
+            stop_event_log()
+            stop_run_stats()
+        log_cache_stats(run_stats.get("response_cache").get("reads", {}))
+        # Connection pool reuse of the shared sessions
+        session_registry.log_stats({"sessions": run_stats.get("sessions").get("registry", {}),
+                                    "pools": run_stats.get("connection_pools")})
+
+        journal = get_checkpoint_journal()
+        if journal:
+            checkpoints = journal.get_stats()
+            logger.info(f"Checkpoints: {checkpoints}")
+            if isinstance(self.data.get("json_output"), dict):
+                self.data["json_output"]["checkpoints"] = checkpoints
+
+        # Chunk sizes chosen for the batch calls
+        batch_sizing = {name: {"chunks": stats["chunks"], "errors": stats["errors"],
+                               "avg_latency": round(stats["total_latency"] / stats["chunks"], 2),
+                               "sizes_used": stats["sizes_used"]}
+                        for name, stats in run_stats.get("batch_sizing").items()}
+        if batch_sizing:
+            logger.info(f"Batch sizing: {batch_sizing}")
+            if isinstance(self.data.get("json_output"), dict):
+                self.data["json_output"]["batch_sizing"] = batch_sizing
+
+        # Time the monitors spent waiting vs when the operations completed
+        polling = run_stats.get("state_monitors")
+        if polling:
+            for name, stats in polling.items():
+                logger.info(f"{name}: {stats['runs']} runs, {stats['checks']} checks, waited {stats['waiting']}s, "
+                            f"completed after {stats['completed_after']}-{stats['elapsed']}s")
+            if isinstance(self.data.get("json_output"), dict):
+                self.data["json_output"]["state_monitors"] = polling
+
+        # Items of this run on the shared worker pool, run inline by the waiting threads or by the pooled workers
+        worker_pool = run_stats.get("worker_pool").get("items")
+        if worker_pool:
+            worker_pool = {"max_workers": get_worker_pool().max_workers, **worker_pool}
+            logger.info(f"Worker pool: {worker_pool}")
+            if isinstance(self.data.get("json_output"), dict):
+                self.data["json_output"]["worker_pool"] = worker_pool
+
+    def plan_scripts(self, scripts: List[Type[Script]]):
+        """
+        Plans the provided scripts, the changes they would make and the API calls are logged, nothing is changed.
+
+        Parameters:
+        ----------
+        scripts : List[Type[Script]]
+            A list of script classes to be planned.
+        """
+        plan = start_plan()
+        try:
+            run_script(scripts, self.data)
+        finally:
+            stop_plan()
+
+        for line in plan.format():
+            logger.info(line)
+        if isinstance(self.data.get("json_output"), dict):
+            self.data["json_output"]["plan"] = plan.to_dict()
+        else:
+            self.data["json_output"] = {"plan": plan.to_dict()}
 
     def run_functions(self, functions: List[Callable]):
         """
@@ -1,98 +1,103 @@
-from .configure_pod import PodConfig
-from .ncm.bps.create_bp_calm import CreateBp
-from .ncm.apps.create_calm_application_from_dsl import CreateAppFromDsl
-from .ncm.project.create_calm_project import CreateNcmProject
-from .ndb.configure_ndb import NdbConfig
-from .ndb.register_initial_cluster import RegisterInitClusterNdb
-from .ndb.update_password_ndb import UpdatePasswordNdb
-from .objects.configure_objects import OssConfig
-from .pc.configure_pc import PcConfig
-from .pc.create.create_identity_provider import CreateIdp
-from .pc.upload.pc_image_upload import PcImageUpload
-from .pc.upload.pc_ova_upload import PcOVAUpload
-from .pe.configure_cluster import ClusterConfig
-from .pe.create.create_container_pe import CreateContainerPe
-from .nke.create_nke_clusters import CreateKarbonClusterPc
-from .objects.buckets.create_bucket import CreateBucket
-from .objects.directory.add_directory_service_oss import AddDirectoryServiceOss
-from .objects.objectstore.create_objectstore import CreateObjectStore
-from .pc.create.create_recovery_plan import CreateRecoveryPlan
-from .ncm.project.create_calm_user import CreateNcmUser
-from .ncm.account.create_calm_account import CreateNcmAccount
-from .pc.fc.foundation_script import FoundationScript
-from .ncm.init_calm_dsl import InitCalmDsl
-from .ncm.bps.launch_calm_bp import LaunchBp
-from .pc.create.add_ad_server_pc import AddAdServerPc
-from .pc.create.add_name_server_pc import AddNameServersPc
-from .pc.create.add_ntp_server_pc import AddNtpServersPc
-from .pc.create.connect_to_az_pc import ConnectToAz
-from .pc.create.create_address_groups_pc import CreateAddressGroups
-from .pc.create.create_pc_categories import CreateCategoryPc
-from .pc.create.create_pc_subnets import CreateSubnetsPc
-from .pc.create.create_protection_policy_pc import CreateProtectionPolicy
-from .pc.create.create_rolemapping_pc import CreateRoleMappingPc
-from .pc.create.create_security_policy_pc import CreateNetworkSecurityPolicy
-from .pc.create.create_service_groups_pc import CreateServiceGroups
-from .pc.delete.delete_ad_server_pc import DeleteAdServerPc
-from .pc.delete.delete_address_groups_pc import DeleteAddressGroups
-from .pc.delete.delete_name_server_pc import DeleteNameServersPc
-from .pc.delete.delete_ntp_server_pc import DeleteNtpServersPc
-from .pc.delete.delete_pc_categories import DeleteCategoryPc
-from .pc.delete.delete_protection_policy_pc import DeleteProtectionPolicy
-from .pc.delete.delete_recovery_plan import DeleteRecoveryPlan
-from .pc.delete.delete_rolemapping_pc import DeleteRoleMappingPc
-from .pc.delete.delete_security_policy_pc import DeleteNetworkSecurityPolicy
-from .pc.delete.delete_service_groups_pc import DeleteServiceGroups
-from .pc.delete.delete_vm_pc import DeleteVmPc
-from .pc.delete.delete_pc_subnets import DeleteSubnetsPc
-from .pc.delete.disconnect_az_pc import DisconnectAz
-from .pc.delete.pc_image_delete import PcImageDelete
-from .pc.delete.pc_ova_delete import PcOVADelete
-from .pc.enable.enable_dr_pc import EnableDR
-from .pc.enable.enable_flow_pc import EnableMicrosegmentation
-from .pc.enable.enable_nke_pc import EnableNke
-from .pc.enable.enable_objects import EnableObjects
-from .pc.enable.enable_network_controller import EnableNetworkController
-from .pc.other_ops.accept_eula import AcceptEulaPc
-from .pc.other_ops.change_default_system_password import ChangeDefaultAdminPasswordPc
-from .pc.other_ops.power_on_vm_pc import PowerOnVmPc
-from .pc.other_ops.update_pulse_pc import UpdatePulsePc
-from .pc.disable.disable_microsegmentation import DisableMicrosegmentation
-from .pc.disable.disable_network_controller import DisableNetworkController
-from .pe.create.create_vm_pe import CreateVmPe
-from .pe.upload.upload_image import UploadImagePe
-from .pe.deploy_pc import DeployPC
-from .pe.other_ops.accept_eula import AcceptEulaPe
-from .pe.other_ops.change_system_password import ChangeDefaultAdminPasswordPe
-from .pe.other_ops.power_transition_vm_pe import PowerTransitionVmPe
-from .pe.other_ops.register_pe_to_pc import RegisterToPc
-from .pe.create.add_ad_server_pe import AddAdServerPe
-from .pe.create.add_ntp_server_pe import AddNtpServersPe
-from .pe.create.create_pe_subnets import CreateSubnetPe
-from .pe.create.create_rolemapping_pe import CreateRoleMappingPe
-from .pe.delete.delete_ad_server_pe import DeleteAdServerPe
-from .pe.delete.delete_container_pe import DeleteContainerPe
-from .pe.delete.delete_name_server_pe import DeleteNameServersPe
-from .pe.delete.delete_ntp_server_pe import DeleteNtpServersPe
-from .pe.delete.delete_vm_pe import DeleteVmPe
-from .pe.delete.delete_pe_subnets import DeleteSubnetsPe
-from .pe.other_ops.update_dsip_pe import UpdateDsip
-from .ncm.project.update_calm_project import UpdateCalmProject
-from .configure_management_plane import ConfigManagementPlane
-from .deploy_management_plane import DeployManagementPlane
-from .pe.create.add_name_server_pe import AddNameServersPe
-from .objects.directory.add_ad_users_oss import AddAdUsersOss
-from .objects.buckets.share_bucket import ShareBucket
-from .pe.other_ops.update_pulse import UpdatePulsePe
-from .pe.update.ha_reservation import HaReservation
-from .pe.update.rebuild_capacity_reservation import RebuildCapacityReservation
-from .pe.delete.delete_rolemapping_pe import DeleteRoleMappingPe
-from .objects.objectstore.delete_objectstore import DeleteObjectStore
-from .cvm.update_cvm_foundation import UpdateCvmFoundation
-from .pc.create.create_vpc_pc import CreateVPC
-from .pc.delete.delete_vpc_pc import DeleteVPC
-from .pc.update.update_vpc_pc import UpdateVPC
+import importlib
 
+# Script name to the module defining it, relative to this package. The modules are imported on first use, so
+# that running one workflow doesn't import the dependencies of all the scripts, eg. calm.dsl or the v4 SDKs
+SCRIPTS = {
+    "PodConfig": ".configure_pod",
+    "CreateBp": ".ncm.bps.create_bp_calm",
+    "CreateAppFromDsl": ".ncm.apps.create_calm_application_from_dsl",
+    "CreateNcmProject": ".ncm.project.create_calm_project",
+    "NdbConfig": ".ndb.configure_ndb",
+    "RegisterInitClusterNdb": ".ndb.register_initial_cluster",
+    "UpdatePasswordNdb": ".ndb.update_password_ndb",
+    "OssConfig": ".objects.configure_objects",
+    "PcConfig": ".pc.configure_pc",
+    "CreateIdp": ".pc.create.create_identity_provider",
+    "PcImageUpload": ".pc.upload.pc_image_upload",
+    "PcOVAUpload": ".pc.upload.pc_ova_upload",
+    "ClusterConfig": ".pe.configure_cluster",
+    "CreateContainerPe": ".pe.create.create_container_pe",
+    "CreateKarbonClusterPc": ".nke.create_nke_clusters",
+    "CreateBucket": ".objects.buckets.create_bucket",
+    "AddDirectoryServiceOss": ".objects.directory.add_directory_service_oss",
+    "CreateObjectStore": ".objects.objectstore.create_objectstore",
+    "CreateRecoveryPlan": ".pc.create.create_recovery_plan",
+    "CreateNcmUser": ".ncm.project.create_calm_user",
+    "CreateNcmAccount": ".ncm.account.create_calm_account",
+    "FoundationScript": ".pc.fc.foundation_script",
+    "InitCalmDsl": ".ncm.init_calm_dsl",
+    "LaunchBp": ".ncm.bps.launch_calm_bp",
+    "AddAdServerPc": ".pc.create.add_ad_server_pc",
+    "AddNameServersPc": ".pc.create.add_name_server_pc",
+    "AddNtpServersPc": ".pc.create.add_ntp_server_pc",
+    "ConnectToAz": ".pc.create.connect_to_az_pc",
+    "CreateAddressGroups": ".pc.create.create_address_groups_pc",
+    "CreateCategoryPc": ".pc.create.create_pc_categories",
+    "CreateSubnetsPc": ".pc.create.create_pc_subnets",
+    "CreateProtectionPolicy": ".pc.create.create_protection_policy_pc",
+    "CreateRoleMappingPc": ".pc.create.create_rolemapping_pc",
+    "CreateNetworkSecurityPolicy": ".pc.create.create_security_policy_pc",
+    "CreateServiceGroups": ".pc.create.create_service_groups_pc",
+    "DeleteAdServerPc": ".pc.delete.delete_ad_server_pc",
+    "DeleteAddressGroups": ".pc.delete.delete_address_groups_pc",
+    "DeleteNameServersPc": ".pc.delete.delete_name_server_pc",
+    "DeleteNtpServersPc": ".pc.delete.delete_ntp_server_pc",
+    "DeleteCategoryPc": ".pc.delete.delete_pc_categories",
+    "DeleteProtectionPolicy": ".pc.delete.delete_protection_policy_pc",
+    "DeleteRecoveryPlan": ".pc.delete.delete_recovery_plan",
+    "DeleteRoleMappingPc": ".pc.delete.delete_rolemapping_pc",
+    "DeleteNetworkSecurityPolicy": ".pc.delete.delete_security_policy_pc",
+    "DeleteServiceGroups": ".pc.delete.delete_service_groups_pc",
+    "DeleteVmPc": ".pc.delete.delete_vm_pc",
+    "DeleteSubnetsPc": ".pc.delete.delete_pc_subnets",
+    "DisconnectAz": ".pc.delete.disconnect_az_pc",
+    "PcImageDelete": ".pc.delete.pc_image_delete",
+    "PcOVADelete": ".pc.delete.pc_ova_delete",
+    "EnableDR": ".pc.enable.enable_dr_pc",
+    "EnableMicrosegmentation": ".pc.enable.enable_flow_pc",
+    "EnableNke": ".pc.enable.enable_nke_pc",
+    "EnableObjects": ".pc.enable.enable_objects",
+    "EnableNetworkController": ".pc.enable.enable_network_controller",
+    "AcceptEulaPc": ".pc.other_ops.accept_eula",
+    "ChangeDefaultAdminPasswordPc": ".pc.other_ops.change_default_system_password",
+    "PowerOnVmPc": ".pc.other_ops.power_on_vm_pc",
+    "UpdatePulsePc": ".pc.other_ops.update_pulse_pc",
+    "DisableMicrosegmentation": ".pc.disable.disable_microsegmentation",
+    "DisableNetworkController": ".pc.disable.disable_network_controller",
+    "CreateVmPe": ".pe.create.create_vm_pe",
+    "UploadImagePe": ".pe.upload.upload_image",
+    "DeployPC": ".pe.deploy_pc",
+    "AcceptEulaPe": ".pe.other_ops.accept_eula",
+    "ChangeDefaultAdminPasswordPe": ".pe.other_ops.change_system_password",
+    "PowerTransitionVmPe": ".pe.other_ops.power_transition_vm_pe",
+    "RegisterToPc": ".pe.other_ops.register_pe_to_pc",
+    "AddAdServerPe": ".pe.create.add_ad_server_pe",
+    "AddNtpServersPe": ".pe.create.add_ntp_server_pe",
+    "CreateSubnetPe": ".pe.create.create_pe_subnets",
+    "CreateRoleMappingPe": ".pe.create.create_rolemapping_pe",
+    "DeleteAdServerPe": ".pe.delete.delete_ad_server_pe",
+    "DeleteContainerPe": ".pe.delete.delete_container_pe",
+    "DeleteNameServersPe": ".pe.delete.delete_name_server_pe",
+    "DeleteNtpServersPe": ".pe.delete.delete_ntp_server_pe",
+    "DeleteVmPe": ".pe.delete.delete_vm_pe",
+    "DeleteSubnetsPe": ".pe.delete.delete_pe_subnets",
+    "UpdateDsip": ".pe.other_ops.update_dsip_pe",
+    "UpdateCalmProject": ".ncm.project.update_calm_project",
+    "ConfigManagementPlane": ".configure_management_plane",
+    "DeployManagementPlane": ".deploy_management_plane",
+    "AddNameServersPe": ".pe.create.add_name_server_pe",
+    "AddAdUsersOss": ".objects.directory.add_ad_users_oss",
+    "ShareBucket": ".objects.buckets.share_bucket",
+    "UpdatePulsePe": ".pe.other_ops.update_pulse",
+    "HaReservation": ".pe.update.ha_reservation",
+    "RebuildCapacityReservation": ".pe.update.rebuild_capacity_reservation",
+    "DeleteRoleMappingPe": ".pe.delete.delete_rolemapping_pe",
+    "DeleteObjectStore": ".objects.objectstore.delete_objectstore",
+    "UpdateCvmFoundation": ".cvm.update_cvm_foundation",
+    "CreateVPC": ".pc.create.create_vpc_pc",
+    "DeleteVPC": ".pc.delete.delete_vpc_pc",
+    "UpdateVPC": ".pc.update.update_vpc_pc"
+}
 
 __all__ = ["AddAdServerPe", "PodConfig", "ConnectToAz", "CreateBp", "CreateCategoryPc",
            "CreateContainerPe", "CreateServiceGroups", "CreateRoleMappingPe", "CreateNetworkSecurityPolicy",
@@ -116,3 +121,14 @@ __all__ = ["AddAdServerPe", "PodConfig", "ConnectToAz", "CreateBp", "CreateCateg
            "PcImageUpload", "PcOVAUpload", "CreateIdp", "UpdateCvmFoundation", "UploadImagePe",
            "CreateVmPe", "PowerTransitionVmPe", "NdbConfig", "UpdatePasswordNdb", "RegisterInitClusterNdb"]
 
+
+def __getattr__(name: str):
+    if name not in SCRIPTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    script = getattr(importlib.import_module(SCRIPTS[name], __name__), name)
+    globals()[name] = script
+    return script
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SCRIPTS))
@@ -18,6 +18,7 @@ class ConfigManagementPlane(Script):
     """
     Configure Management Plane with below configs
     """
+    COMPOSITE = True
 
     def __init__(self, data: Dict, **kwargs):
         self.results = {}
@@ -1,8 +1,9 @@
 import copy
 import json
+import threading
 import time
 from copy import deepcopy
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from framework.scripts.python.ncm.configure_calm import CalmConfig
 from framework.scripts.python.pe.configure_cluster import ClusterConfig
 from framework.scripts.python.objects.configure_objects import OssConfig
@@ -12,26 +13,35 @@ from framework.scripts.python.ncm.project.create_calm_user import CreateNcmUser
 from framework.scripts.python.ncm.project.create_calm_project import CreateNcmProject
 from framework.scripts.python.nke.create_nke_clusters import CreateKarbonClusterPc
 from .helpers.batch_script import BatchScript
+from .helpers.dag_script import DagScript
 from framework.scripts.python.ncm.init_calm_dsl import InitCalmDsl
 from .script import Script
+from framework.helpers.event_utils import event_context
 from framework.helpers.log_utils import get_logger
 from framework.helpers.helper_functions import create_pc_objects
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
 
 logger = get_logger(__name__)
 
+# Blocks are run one after another unless the pod config sets max_blocks_in_flight
+DEFAULT_MAX_BLOCKS_IN_FLIGHT = 1
+DEFAULT_MAX_BLOCKS_PER_PC = 1
+
 
 class PodConfig(Script):
     """
     Configure Pod with below configs
     """
+    COMPOSITE = True
 
     def __init__(self, data: Dict, **kwargs):
-        self.ncm_projects = {}
-        self.nke_scripts = None
         self.block_batch_scripts = {}
         self.data = data
         self.pod = self.data["pod"]
         self.blocks = self.pod.get("pod_blocks", {})
+        # Max blocks running at the same time, and max blocks running against the same PC
+        self.max_blocks_in_flight = self.pod.get("max_blocks_in_flight") or DEFAULT_MAX_BLOCKS_IN_FLIGHT
+        self.max_blocks_per_pc = self.pod.get("max_blocks_per_pc") or DEFAULT_MAX_BLOCKS_PER_PC
         super(PodConfig, self).__init__(**kwargs)
         self.logger = self.logger or logger
 
@@ -41,7 +51,10 @@ class PodConfig(Script):
 
         for block in self.blocks:
             block_name = block.get("pod_block_name").replace(" ", "")
-            self.block_batch_scripts[block_name] = BatchScript(results_key=block_name)
+            self.block_batch_scripts[block_name] = DagScript(results_key=block_name)
+            # NCM projects & NKE clusters of this block only, the blocks may run concurrently
+            ncm_projects = {}
+            nke_scripts = None
             # Get PC session
             create_pc_objects(block, global_data=self.data)
             if block.get("edge_sites", []):
@@ -56,12 +69,14 @@ class PodConfig(Script):
                         edge_site["pc_session"] = block.get("pc_session")
                         self.block_batch_scripts[block_name].add(
                             ClusterConfig(data=deepcopy(edge_site), global_data=self.data, results_key=site_name,
-                                          log_file=f"{block_name}_{site_name}_pe_ops.log"))
+                                          log_file=f"{block_name}_{site_name}_pe_ops.log",
+                                          event_fields={"pod_block": block_name, "site": site_name}),
+                            name=f"ClusterConfig-{site_name}", produces=["clusters"])
 
                         # If ncm subnets are specified, we'll create projects in ncm per cluster
                         for cluster in edge_site["clusters"].values():
                             if cluster.get("ncm_subnets") and cluster.get("ncm_users"):
-                                self.ncm_projects[cluster["name"]] = {
+                                ncm_projects[cluster["name"]] = {
                                     "subnets": cluster["ncm_subnets"],
                                     "users": cluster["ncm_users"]
                                 }
@@ -69,44 +84,54 @@ class PodConfig(Script):
                     # If nke clusters are specified add it to a variable
                     if edge_site.get("nke_clusters", []):
                         edge_site["pc_session"] = block["pc_session"]
-                        self.nke_scripts = self.nke_scripts or BatchScript(parallel=True)
-                        self.nke_scripts.add(CreateKarbonClusterPc(edge_site, global_data=self.data,
-                                                                   log_file=f"{block_name}_pc_ops.log"))
+                        nke_scripts = nke_scripts or BatchScript(parallel=True)
+                        nke_scripts.add(CreateKarbonClusterPc(edge_site, global_data=self.data,
+                                                                   log_file=f"{block_name}_pc_ops.log",
+                                                                   event_fields={"pod_block": block_name,
+                                                                                 "site": site_name}))
 
-            # configure PC services/ entities
+            # configure PC services/ entities -> needs the clusters of all the edge sites
             self.block_batch_scripts[block_name].add(PcConfig(data=deepcopy(block), global_data=self.data,
-                                                              results_key='pc', log_file=f"{block_name}_pc_ops.log"))
-
-            calm_objects_nke = BatchScript(parallel=True)
+                                                              results_key='pc', log_file=f"{block_name}_pc_ops.log"),
+                                                     depends=["clusters"])
 
-            # create project for every cluster
-            if self.ncm_projects:
+            # create project for every cluster -> needs PcConfig
+            if ncm_projects:
                 calm_batch_scripts = BatchScript(results_key='ncm')
                 calm_batch_scripts.add(CalmConfig(data=deepcopy(block), global_data=self.data,
                                                   log_file=f"{block_name}_calm_ops.log"))
-                calm_batch_scripts.add(self.create_ncm_projects(self.ncm_projects, global_data=self.data,
+                calm_batch_scripts.add(self.create_ncm_projects(ncm_projects, global_data=self.data,
                                                                 block_config=block,
                                                                 log_file=f"{block_name}_calm_ops.log"))
-                calm_objects_nke.add(calm_batch_scripts)
+                self.block_batch_scripts[block_name].add(calm_batch_scripts, name="CalmConfig",
+                                                         depends=["PcConfig"])
 
-            # configure nke_clusters and objects in parallel in the end
-            if self.nke_scripts or block.get("objects", {}).get("objectstores"):
+            # configure nke_clusters and objects in parallel in the end -> needs PcConfig
+            if nke_scripts or block.get("objects", {}).get("objectstores"):
                 nke_objects_batch_scripts = BatchScript(parallel=True, results_key='pc')
-                if self.nke_scripts:
-                    nke_objects_batch_scripts.add(self.nke_scripts)
+                if nke_scripts:
+                    nke_objects_batch_scripts.add(nke_scripts)
 
                 # Create objects
                 if block.get("objects", {}).get("objectstores"):
                     nke_objects_batch_scripts.add(OssConfig(data=deepcopy(block), global_data=self.data,
                                                             results_key='objects',
                                                             log_file=f"{block_name}_objects_ops.log"))
-                calm_objects_nke.add(nke_objects_batch_scripts)
-
-            self.block_batch_scripts[block_name].add(calm_objects_nke)
-
-        for block in self.blocks:
-            block_name = block.get("pod_block_name")
-            result = self.block_batch_scripts[block_name].run()
+                self.block_batch_scripts[block_name].add(nke_objects_batch_scripts, name="NkeObjects",
+                                                         depends=["PcConfig"])
+
+        block_names = [block.get("pod_block_name").replace(" ", "") for block in self.blocks]
+        if self.max_blocks_in_flight > 1 and len(self.blocks) > 1:
+            block_results = self.run_blocks_in_parallel(block_names)
+        else:
+            block_results = []
+            for block_name in block_names:
+                # The events of the scripts of the block carry the block
+                with event_context(pod_block=block_name):
+                    block_results.append(self.block_batch_scripts[block_name].run())
+
+        # Merge in the order of the blocks in the config, irrespective of the order they completed in
+        for result in block_results:
             self.results.update(result)
             self.logger.info(json.dumps(result, indent=4))
 
@@ -114,6 +139,49 @@ class PodConfig(Script):
         self.logger.info(f"Total time: {total_time:.2f} seconds")
         self.data["json_output"] = self.results
 
+    def run_blocks_in_parallel(self, block_names: List[str]) -> List[Dict]:
+        """
+        Run the blocks concurrently, at most max_blocks_in_flight at a time and at most max_blocks_per_pc of them
+        against the same PC
+
+        Args:
+            block_names (list): Names of the blocks, in the order of the blocks
+        Returns:
+            list: Results of the blocks, in the same order. The result of a block that failed is
+              {block_name: {"error": ..}}
+        """
+        pc_semaphores = {}
+        for block in self.blocks:
+            pc_semaphores.setdefault(block.get("pc_ip"), threading.BoundedSemaphore(self.max_blocks_per_pc))
+
+        def run_block(block: Dict, block_name: str) -> Dict:
+            with pc_semaphores[block.get("pc_ip")]:
+                self.logger.info(f"Running the block {block_name!r} against the PC {block.get('pc_ip')}")
+                with event_context(pod_block=block_name):
+                    return self.block_batch_scripts[block_name].run()
+
+        # Interleave the blocks of the PCs, so that the workers don't all wait on the same PC
+        pc_block_count = {}
+        rounds = []
+        for block in self.blocks:
+            pc_ip = block.get("pc_ip")
+            rounds.append(pc_block_count.get(pc_ip, 0))
+            pc_block_count[pc_ip] = rounds[-1] + 1
+        order = sorted(range(len(self.blocks)), key=lambda i: rounds[i])
+        results = [None] * len(self.blocks)
+        # The blocks run in the context of the pod, eg. its event log, checkpoint journal & plan
+        with ContextThreadPoolExecutor(max_workers=self.max_blocks_in_flight) as executor:
+            futures = {i: executor.submit(run_block, self.blocks[i], block_names[i]) for i in order}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # The results of the other blocks are still returned
+                    self.logger.error(f"Block {block_names[i]!r} failed: {e}")
+                    self.exceptions.append(f"Block {block_names[i]!r} failed: {e}")
+                    results[i] = {block_names[i]: {"error": str(e)}}
+        return results
+
     @staticmethod
     def create_ncm_projects(projects_map: Dict, block_config: Dict, global_data: Dict,
                             results_key: Optional[str] = None, log_file: Optional[str] = None) -> BatchScript:
@@ -1,9 +1,10 @@
 import threading
 import multiprocessing
-import concurrent.futures
 from abc import abstractmethod
 from typing import Dict
+from framework.helpers.checkpoint_utils import TargetCheckpoints, TargetExceptions
 from framework.helpers.log_utils import get_logger
+from framework.helpers.worker_pool import get_worker_pool
 from framework.scripts.python.script import Script
 
 logger = get_logger(__name__)
@@ -16,34 +17,51 @@ class CvmScript(Script):
         self.parallel = parallel
         super(CvmScript, self).__init__(**kwargs)
         self.results["cvms"] = {}
+        # Exceptions are counted per cvm, for the checkpoints
+        self.exceptions = TargetExceptions()
+        self.checkpoints = None
         # Set the value of max_workers based on the number of CPU cores
         self.max_workers = multiprocessing.cpu_count() + 4
 
     def execute(self, **kwargs):
+        # The cvms that succeeded in the run being resumed are skipped, their results are restored
+        self.checkpoints = TargetCheckpoints(type(self).__name__, self.cvms)
+        self.results["cvms"].update(self.checkpoints.restored)
+        cvms = self.checkpoints.pending
+
         if self.parallel:
             try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    executor.map(self.execute_single_cvm, self.cvms.keys(), self.cvms.values())
+                get_worker_pool().map(self._execute_single_cvm, cvms.keys(), cvms.values(),
+                                      hosts=cvms.keys(), script_class=type(self).__name__,
+                                      max_in_flight=self.max_workers, return_exceptions=True)
             except Exception as e:
                 self.exceptions.append(e)
         else:
             try:
-                for cvm_ip, cvm_details in self.cvms.items():
-                    self.execute_single_cvm(cvm_ip, cvm_details)
+                for cvm_ip, cvm_details in cvms.items():
+                    self._execute_single_cvm(cvm_ip, cvm_details)
             except Exception as e:
                 self.exceptions.append(e)
 
     def verify(self, **kwargs):
+        cvms = self.checkpoints.pending if self.checkpoints else self.cvms
         if self.parallel:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                executor.map(self.verify_single_cvm, self.cvms.keys(), self.cvms.values())
+            get_worker_pool().map(self.verify_single_cvm, cvms.keys(), cvms.values(),
+                                  hosts=cvms.keys(), script_class=type(self).__name__,
+                                  max_in_flight=self.max_workers, return_exceptions=True)
         else:
             try:
-                for cvm_ip, cvm_details in self.cvms.items():
+                for cvm_ip, cvm_details in cvms.items():
                     self.verify_single_cvm(cvm_ip, cvm_details)
             except Exception as e:
                 self.exceptions.append(e)
 
+        if self.checkpoints:
+            self.checkpoints.record(self.exceptions, self.results["cvms"])
+
+    def _execute_single_cvm(self, cvm_ip: str, cvm_details: Dict):
+        self.checkpoints.run(cvm_ip, self.execute_single_cvm, cvm_ip, cvm_details)
+
     @abstractmethod
     def execute_single_cvm(self, cvm_ip: str, cvm_details: Dict):
         pass
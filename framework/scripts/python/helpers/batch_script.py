@@ -1,7 +1,8 @@
-import concurrent.futures
 import multiprocessing
 from typing import Dict
+from framework.helpers.checkpoint_utils import run_checkpointed
 from framework.helpers.log_utils import get_logger
+from framework.helpers.worker_pool import get_worker_pool
 from ..script import Script
 
 logger = get_logger(__name__)
@@ -11,6 +12,7 @@ class BatchScript(Script):
     """
     We can group scripts together and execute them in serial or parallel
     """
+    COMPOSITE = True
 
     def __init__(self, results_key: str = "", parallel: bool = False, **kwargs):
         """
@@ -26,7 +28,7 @@ class BatchScript(Script):
         # is passed the return value of the run function would be {"results_key": self._results}, which would be
         # consolidated into results, by results setter in parent BatchScript.
         self.results_key = results_key
-        # Set max_workers that can run in parallel
+        # Set max_workers that can run in parallel, the workers are taken from the shared worker pool
         self.max_workers = kwargs.get("max_workers") or multiprocessing.cpu_count() + 4
         # If we can run scripts in parallel
         self._parallel = parallel
@@ -120,24 +122,27 @@ class BatchScript(Script):
         """
         for script in self.script_list:
             try:
-                result = script.run()
+                result = run_checkpointed(script)
                 self.results = result
             except Exception as e:
                 logger.error(e)
 
     def _parallel_execute(self):
         """
-        Execute all the scripts in parallel.
+        Execute all the scripts in parallel, on the shared worker pool.
 
         Returns:
           None
         """
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            for result in executor.map(lambda script: script.run(), self.script_list):
-                try:
-                    self.results = result
-                except Exception as e:
-                    logger.error(e)
+        job = get_worker_pool().job(max_in_flight=self.max_workers)
+        futures = [job.submit(run_checkpointed, script, script_class=type(script).__name__)
+                   for script in self.script_list]
+        job.wait()
+        for future in futures:
+            try:
+                self.results = future.result()
+            except Exception as e:
+                logger.error(e)
 
     def execute(self):
         pass
@@ -0,0 +1,178 @@
+import json
+import threading
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+from framework.helpers.log_utils import get_logger
+from framework.helpers.run_stats import record_run_stats
+
+logger = get_logger(__name__)
+
+# Chunks taking longer than this are shrunk, chunks taking less than half of this are grown
+DEFAULT_TARGET_LATENCY_IN_SEC = 30
+# Max size of the body of a chunk
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+# Chunks are shrunk if more than this fraction of the recent chunks failed with 5xx/ timeouts
+DEFAULT_MAX_ERROR_RATE = 0.1
+ERROR_WINDOW = 20
+
+# Sizing bounds per batch API, "size" is the requests per chunk for v3 and the chunk_size of the BatchSpec for v4
+sizing_config = {
+    # v3 batch API takes at most 60 requests
+    "v3": {"initial_size": 60, "min_size": 1, "max_size": 60, "max_body_bytes": DEFAULT_MAX_BODY_BYTES,
+           "target_latency": DEFAULT_TARGET_LATENCY_IN_SEC},
+    # v4 chunk_size is the number of payloads the PC processes concurrently, not a body size, and the sizer only sees
+    # the latency of the submit, not the outcome of the tasks. It stays at 1 unless max_size is configured
+    "v4": {"initial_size": 1, "min_size": 1, "max_size": 1, "max_body_bytes": 0,
+           "target_latency": DEFAULT_TARGET_LATENCY_IN_SEC},
+}
+
+# session -> {(api, resource): AdaptiveBatchSizer}
+_sizers = weakref.WeakKeyDictionary()
+_sizers_lock = threading.Lock()
+
+
+def configure_batch_sizing(v3: Optional[Dict] = None, v4: Optional[Dict] = None):
+    """
+    Configure the sizing bounds of the batch APIs. Only the sizers created after this call are affected.
+
+    Args:
+        v3 (dict, optional): eg. {"min_size": 10, "max_size": 60, "max_body_bytes": 1048576, "target_latency": 30}
+        v4 (dict, optional): Same keys as v3, for the chunk_size of the v4 batches
+    """
+    for api, config in (("v3", v3), ("v4", v4)):
+        if config:
+            sizing_config[api].update(config)
+
+
+def is_server_error(e: Exception) -> bool:
+    """
+    5xx responses & timeouts count as errors for the sizing, 4xx are caused by the payloads themselves
+    """
+    status_code = getattr(e, "status_code", None) or getattr(e, "status", None)
+    if isinstance(status_code, int) and status_code >= 500:
+        return True
+    return isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses the size of the batch chunks from the observed body sizes, latencies & server errors: halves the size
+    on a 5xx/ timeout, shrinks it when the chunks are slow or fail often and grows it back when they are fast.
+    """
+
+    def __init__(self, name: str, initial_size: int, min_size: int, max_size: int,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 target_latency: float = DEFAULT_TARGET_LATENCY_IN_SEC,
+                 max_error_rate: float = DEFAULT_MAX_ERROR_RATE):
+        self.name = name
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.size = min(max(initial_size, self.min_size), self.max_size)
+        self.max_body_bytes = max_body_bytes
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self._errors = deque(maxlen=ERROR_WINDOW)
+        self._lock = threading.Lock()
+        self.chunks = 0
+        self.error_count = 0
+        self.total_latency = 0.0
+        self.sizes_used = []
+
+    @staticmethod
+    def get_body_size(payload: Any) -> int:
+        # v4 payloads are SDK models
+        if hasattr(payload, "to_dict"):
+            payload = payload.to_dict()
+        return len(json.dumps(payload, default=str))
+
+    def get_size(self, pending_requests: Optional[Sequence] = None) -> int:
+        """
+        Args:
+            pending_requests (list, optional): Requests yet to be sent, the size is capped so that the body of the
+              next chunk stays under max_body_bytes
+        Returns:
+            int: Size of the next chunk
+        """
+        with self._lock:
+            size = self.size
+        if pending_requests and self.max_body_bytes:
+            sample = pending_requests[:size]
+            average_bytes = sum(self.get_body_size(request) for request in sample) / len(sample)
+            size = min(size, max(1, int(self.max_body_bytes // max(average_bytes, 1))))
+        return max(self.min_size, size)
+
+    def record(self, size: int, latency: float, error: bool = False):
+        """
+        Record the outcome of a chunk and adjust the size for the next chunks
+        """
+        record_run_stats("batch_sizing", self.name, chunks=1, errors=int(error), total_latency=latency,
+                         sizes_used={size})
+        with self._lock:
+            self.chunks += 1
+            self.total_latency += latency
+            self.sizes_used.append(size)
+            self._errors.append(error)
+            error_rate = sum(self._errors) / len(self._errors)
+            previous = self.size
+
+            if error:
+                self.error_count += 1
+                self.size = max(self.min_size, self.size // 2)
+            elif error_rate > self.max_error_rate or latency > self.target_latency:
+                self.size = max(self.min_size, self.size - max(1, self.size // 4))
+            elif latency < self.target_latency / 2 and size >= self.size:
+                self.size = min(self.max_size, self.size + max(1, self.size // 4))
+
+            if self.size != previous:
+                logger.debug(f"Batch size of {self.name} changed from {previous} to {self.size} "
+                             f"(latency {latency:.2f}s, error rate {error_rate:.2f})")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "chunks": self.chunks,
+                "errors": self.error_count,
+                "avg_latency": round(self.total_latency / self.chunks, 2) if self.chunks else 0,
+                "sizes_used": sorted(set(self.sizes_used))
+            }
+
+
+def get_batch_sizer(session: Any, api: str, resource: str) -> AdaptiveBatchSizer:
+    """
+    Get the sizer of the resource for the session, shared by the batch operations on the same endpoint, so that
+    what is learnt from one batch call is used by the next ones.
+
+    Args:
+        session: RestAPIUtil for v3, ApiClientV4 for v4
+        api (str): "v3" or "v4"
+        resource (str): Resource type or kind of the entities
+    """
+    with _sizers_lock:
+        sizers = _sizers.setdefault(session, {})
+        if (api, resource) not in sizers:
+            sizers[(api, resource)] = AdaptiveBatchSizer(f"{api} {resource}", **sizing_config[api])
+        return sizers[(api, resource)]
+
+
+def get_batch_sizing_stats() -> Dict:
+    """
+    Returns:
+        dict: Stats of the sizers that were used, eg. {"v3 vm": {"size": 45, ...}}
+    """
+    with _sizers_lock:
+        sizers = [sizer for session_sizers in list(_sizers.values()) for sizer in session_sizers.values()]
+    stats = {}
+    for sizer in sizers:
+        if not sizer.chunks:
+            continue
+        # Same resource on different endpoints
+        name, count = sizer.name, 1
+        while name in stats:
+            count += 1
+            name = f"{sizer.name} #{count}"
+        stats[name] = sizer.get_stats()
+    return stats
@@ -0,0 +1,196 @@
+import threading
+import time
+from typing import Dict, List, Optional, Iterable
+from framework.helpers.checkpoint_utils import run_checkpointed
+from framework.helpers.log_utils import get_logger
+from framework.helpers.worker_pool import get_worker_pool
+from .batch_script import BatchScript
+
+logger = get_logger(__name__)
+
+
+class _Node:
+    def __init__(self, name: str, script, depends: Iterable[str], produces: Iterable[str]):
+        self.name = name
+        self.script = script
+        self.depends = list(depends or [])
+        # A script always produces its own name, so that others can depend on it by name
+        self.produces = [name] + list(produces or [])
+        self.prerequisites: List["_Node"] = []
+        self.dependants: List["_Node"] = []
+        self.result = None
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time - self.start_time) if self.start_time and self.end_time else 0
+
+
+class DagScript(BatchScript):
+    """
+    Run scripts as a dependency graph. Each script declares what it depends on & what it produces, and is started
+    as soon as its own prerequisites finish, instead of waiting for a whole stage of a BatchScript. At most
+    max_workers scripts run at a time. The critical path is logged at the end.
+    """
+
+    def __init__(self, results_key: str = "", **kwargs):
+        """
+        Constructor for DagScript.
+        Args:
+           results_key(str, optional): Results are returned as {results_key: results} if specified
+           kwargs(dict):
+            max_workers(int, optional): Max scripts running at the same time
+        """
+        super(DagScript, self).__init__(results_key=results_key, parallel=True, **kwargs)
+        self.nodes: List[_Node] = []
+        self.critical_path: List[_Node] = []
+
+    def add(self, script, depends: Optional[Iterable[str]] = None, produces: Optional[Iterable[str]] = None,
+            name: Optional[str] = None):
+        """
+        Add one script
+
+        Args:
+          script(Script): The script object to be added to the graph.
+          depends(list, optional): Names of the scripts or the outputs the script needs. Dependencies that no script
+            in the graph produces are ignored, as the scripts are added depending on the config
+          produces(list, optional): Outputs of the script, eg. "address_groups"
+          name(str, optional): Name of the node, defaults to the name of the script
+
+        Returns:
+          None
+        """
+        if not script:
+            logger.error("Script is none, returning.")
+            return
+        name = name or getattr(script, "name", None) or type(script).__name__
+        existing_names = {node.name for node in self.nodes}
+        if name in existing_names:
+            index = 2
+            while f"{name}#{index}" in existing_names:
+                index += 1
+            name = f"{name}#{index}"
+
+        self.script_list.append(script)
+        self.nodes.append(_Node(name, script, depends, produces))
+
+    def add_all(self, script_list, depends: Optional[Iterable[str]] = None, produces: Optional[Iterable[str]] = None):
+        """
+        Add a list of scripts, with the same dependencies & outputs
+        """
+        if script_list:
+            for script in script_list:
+                self.add(script, depends=depends, produces=produces)
+
+    def run(self):
+        """
+        Execute the scripts in the dependency order
+
+        Returns:
+          dict: Results
+        """
+        self._build_graph()
+        self._dag_execute()
+
+        # Consolidate in the order the scripts were added, so the results don't depend on the timing
+        for node in self.nodes:
+            try:
+                self.results = node.result
+            except Exception as e:
+                logger.error(e)
+
+        self.critical_path = self.get_critical_path()
+        if self.critical_path:
+            path = " -> ".join(f"{node.name} ({node.duration:.2f}s)" for node in self.critical_path)
+            total = self.critical_path[-1].end_time - self.critical_path[0].start_time
+            self.logger.info(f"Critical path: {path}, total {total:.2f}s")
+
+        return {self.results_key: self.results} if self.results_key else self.results
+
+    def _build_graph(self):
+        producers: Dict[str, List[_Node]] = {}
+        for node in self.nodes:
+            for output in node.produces:
+                producers.setdefault(output, []).append(node)
+
+        for node in self.nodes:
+            node.prerequisites = []
+            node.dependants = []
+        for node in self.nodes:
+            for dependency in node.depends:
+                if dependency not in producers:
+                    logger.debug(f"{node.name}: no script produces {dependency!r}, ignoring the dependency")
+                for prerequisite in producers.get(dependency, []):
+                    if prerequisite is not node and prerequisite not in node.prerequisites:
+                        node.prerequisites.append(prerequisite)
+                        prerequisite.dependants.append(node)
+
+        self._check_cycles()
+
+    def _check_cycles(self):
+        # Kahn's algorithm, the nodes left over are in a cycle
+        pending = {node.name: len(node.prerequisites) for node in self.nodes}
+        ready = [node for node in self.nodes if not node.prerequisites]
+        while ready:
+            node = ready.pop()
+            del pending[node.name]
+            for dependant in node.dependants:
+                pending[dependant.name] -= 1
+                if not pending[dependant.name]:
+                    ready.append(dependant)
+        if pending:
+            raise ValueError(f"Dependency cycle between the scripts {sorted(pending)}")
+
+    def _dag_execute(self):
+        """
+        Start every script as soon as its prerequisites finish, a script still runs if one of its prerequisites
+        failed, like the next stages of a BatchScript do
+        """
+        if not self.nodes:
+            return
+
+        lock = threading.Lock()
+        remaining = {node.name: len(node.prerequisites) for node in self.nodes}
+        # The scripts run on the shared worker pool, the current thread runs the ones no worker picks up
+        job = get_worker_pool().job(max_in_flight=self.max_workers)
+
+        def run_node(node: _Node):
+            node.start_time = time.time()
+            try:
+                node.result = run_checkpointed(node.script)
+            except Exception as e:
+                logger.error(e)
+            node.end_time = time.time()
+
+            with lock:
+                ready = []
+                for dependant in node.dependants:
+                    remaining[dependant.name] -= 1
+                    if not remaining[dependant.name]:
+                        ready.append(dependant)
+            # Submitted before this node is done, so the job isn't finished in between
+            for dependant in ready:
+                job.submit(run_node, dependant, script_class=type(dependant.script).__name__)
+
+        for node in self.nodes:
+            if not node.prerequisites:
+                job.submit(run_node, node, script_class=type(node.script).__name__)
+        job.wait()
+
+    def get_critical_path(self) -> List[_Node]:
+        """
+        The chain of scripts that determined the total time. Starting from the script that finished last, walk back
+        through the prerequisite that finished last
+
+        Returns:
+          list: Scripts in the critical path, in the execution order
+        """
+        finished = [node for node in self.nodes if node.end_time]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda n: n.end_time)]
+        while path[-1].prerequisites:
+            path.append(max(path[-1].prerequisites, key=lambda n: n.end_time or 0))
+        return path[::-1]
@@ -3,6 +3,7 @@ from base64 import b64encode
 from typing import Union, List, Dict, Optional
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.cache_utils import ResponseCache
 from framework.helpers.general_utils import intersection
 from framework.helpers.log_utils import get_logger
 
@@ -22,14 +23,23 @@ class Entity:
         resource_type=None,
         session=None,
         headers=None,
-        scheme="https"
+        scheme="https",
+        async_session=None
     ):
         self.build_spec_methods = {}
         secured = True if scheme == "https" else False
         self.session = session if session else RestAPIUtil(
             ip, user=username, pwd=password, port=self.port, headers=headers, secured=secured)
+        self._async_session = async_session
         self.resource = resource_type
 
+    @property
+    def async_session(self):
+        # Async counterpart of the session, talking to the same endpoint
+        if not self._async_session:
+            self._async_session = self.session.get_async_session()
+        return self._async_session
+
     def get_response(self, uri: str, method="GET", **kwargs):
         if method == "GET":
             return self.session.get(uri, **kwargs)
@@ -44,6 +54,24 @@ class Entity:
         else:
             raise "Invalid method"
 
+    async def async_get_response(self, uri: str, method="GET", **kwargs):
+        """
+        Same as get_response, but the call is made with the async session, so that many calls can be awaited
+        together on a single event loop.
+        """
+        if method == "GET":
+            return await self.async_session.get(uri, **kwargs)
+        elif method == "POST":
+            return await self.async_session.post(uri, **kwargs)
+        elif method == "PUT":
+            return await self.async_session.put(uri, **kwargs)
+        elif method == "PATCH":
+            return await self.async_session.patch(uri, **kwargs)
+        elif method == "DELETE":
+            return await self.async_session.delete(uri, **kwargs)
+        else:
+            raise Exception("Invalid method")
+
     def read(
         self,
         uuid=None,
@@ -63,10 +91,14 @@ class Entity:
             uri = self._build_url_with_query(uri, query)
 
         if method == "GET":
-            if timeout:
-                resp = self.get_response(uri, timeout=timeout, headers=headers)
-            else:
-                resp = self.get_response(uri, headers=headers)
+            # Only GETs are cached, POST reads like tasks/poll have to reach the server
+            hit, resp = self._get_cached_response(uri)
+            if not hit:
+                if timeout:
+                    resp = self.get_response(uri, timeout=timeout, headers=headers)
+                else:
+                    resp = self.get_response(uri, headers=headers)
+                self._set_cached_response(uri, None, resp)
         elif method == "POST":
             if timeout:
                 resp = self.get_response(uri, method="POST", data=data, headers=headers, timeout=timeout)
@@ -100,6 +132,7 @@ class Entity:
             resp = self.get_response(uri, method="POST", data=data, jsonify=jsonify, timeout=timeout, files=files)
         else:
             resp = self.get_response(uri, method="POST", data=data, jsonify=jsonify, files=files)
+        self._invalidate_cache()
 
         return resp
 
@@ -126,6 +159,7 @@ class Entity:
                 resp = self.get_response(uri, method="PATCH", data=data)
         else:
             raise "Invalid method"
+        self._invalidate_cache()
         return resp
 
     def list(
@@ -136,7 +170,8 @@ class Entity:
         data=None,
         custom_filters=None,
         timeout=None,
-        entity_type=None
+        entity_type=None,
+        raw_response=False
     ) -> Union[List, Dict]:
         uri = self.resource if use_base_url else self.resource + "/list"
         if endpoint:
@@ -144,10 +179,17 @@ class Entity:
         if query:
             uri = self._build_url_with_query(uri, query)
 
-        if timeout:
-            resp = self.get_response(uri, method="POST", data=data, timeout=timeout)
-        else:
-            resp = self.get_response(uri, method="POST", data=data)
+        hit, resp = self._get_cached_response(uri, data)
+        if not hit:
+            if timeout:
+                resp = self.get_response(uri, method="POST", data=data, timeout=timeout)
+            else:
+                resp = self.get_response(uri, method="POST", data=data)
+            self._set_cached_response(uri, data, resp)
+
+        # Return the whole response, eg. to read the metadata of the list call
+        if raw_response:
+            return resp
 
         entity_type = entity_type if entity_type else self.entity_type
         if custom_filters:
@@ -176,6 +218,7 @@ class Entity:
                                      files=files)
         else:
             resp = self.get_response(uri, method="POST", headers=headers, jsonify=jsonify, data=data, files=files)
+        self._invalidate_cache()
 
         return resp
 
@@ -190,12 +233,14 @@ class Entity:
         uri = self.resource + "/{0}".format(endpoint) if endpoint else self.resource
         if query:
             uri = self._build_url_with_query(uri, query)
-        return self._upload_file(
+        resp = self._upload_file(
             uri,
             source,
             data,
             timeout=timeout,
         )
+        self._invalidate_cache()
+        return resp
 
     def delete(
         self,
@@ -216,6 +261,7 @@ class Entity:
                 resp = self.get_response(uri, method="DELETE")
         except Exception as e:
             raise e
+        self._invalidate_cache()
 
         return resp
 
@@ -231,6 +277,25 @@ class Entity:
                     return None, error
         return spec, None
 
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        # Read cache of the session, if caching is enabled for the session
+        cache = getattr(self.session, "cache", None)
+        return cache if isinstance(cache, ResponseCache) else None
+
+    def _get_cached_response(self, uri: str, data=None):
+        if not self.cache:
+            return False, None
+        return self.cache.get(self.resource, uri, data)
+
+    def _set_cached_response(self, uri: str, data, resp):
+        if self.cache:
+            self.cache.set(self.resource, uri, data, resp)
+
+    def _invalidate_cache(self):
+        if self.cache:
+            self.cache.invalidate(self.resource)
+
     @staticmethod
     def _build_url_with_query(url, query):
         """
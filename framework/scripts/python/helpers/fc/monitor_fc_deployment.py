@@ -3,6 +3,7 @@ import logging
 from framework.helpers.rest_utils import RestAPIUtil
 from framework.scripts.python.script import Script
 from .imaged_clusters import ImagedCluster
+from ..state_monitor.polling_policy import build_polling_policy, record_polling_stats
 from ..v2.cluster import Cluster as PeCluster
 
 
@@ -12,6 +13,8 @@ class MonitorDeployment(Script):
     """
     DEFAULT_USERNAME = "admin"
     DEFAULT_SYSTEM_PASSWORD = "Nutanix/4u"
+    # Imaging takes hours, the ETA from aggregate_percent_complete paces the checks
+    DEFAULT_POLLING_POLICY = {"initial_interval": 60, "min_interval": 30, "max_interval": 300}
 
     def __init__(self, pc_session: RestAPIUtil, cluster_name: str, imaged_cluster_uuid: str, fc_deployment_logger: logging.getLogger):
         """
@@ -32,12 +35,13 @@ class MonitorDeployment(Script):
         Run Image cluster nodes in Foundation Central
         """
         state = ""
-        delay = 60
+        policy = build_polling_policy(type(self).__name__, self.DEFAULT_POLLING_POLICY)
         timeout = time.time() + (3 * 60 * 60)
         while state not in ["COMPLETED", "FAILED"]:
             response = self.imaging.read(self.imaged_cluster_uuid)
             stopped = response["cluster_status"]["imaging_stopped"]
             aggregate_percent_complete = response["cluster_status"]["aggregate_percent_complete"]
+            policy.record_check(aggregate_percent_complete)
             if stopped:
                 if aggregate_percent_complete < 100:
                     message = f"{self.cluster_name} Imaging/Creation stopped/failed before completion. See below details for deployment status:"
@@ -58,7 +62,8 @@ class MonitorDeployment(Script):
                     break
                 self.logger.debug(status)
                 self.logger.info(f"Cluster {self.cluster_name} Deployment Percentage Complete: {aggregate_percent_complete}")
-                time.sleep(delay)
+                time.sleep(policy.next_wait())
+        record_polling_stats(type(self).__name__, policy, state in ["COMPLETED", "FAILED"])
         self.results = {self.cluster_name: {"result": state, "status": status, "imaged_cluster_uuid": self.imaged_cluster_uuid}}
 
     def verify(self):
@@ -1,13 +1,50 @@
 import copy
-import json
-from typing import List, Optional
+import threading
+import time
+import weakref
+from typing import List, Optional, Tuple, Dict
+from framework.helpers.batch_results import BatchResult, get_task_uuid, record_batch_result
 from framework.helpers.log_utils import get_logger
 from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.cache_utils import ResponseCache, invalidate_name_index
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
+from .batch_sizer import AdaptiveBatchSizer, configure_batch_sizing, get_batch_sizer, is_server_error
 
 logger = get_logger(__name__)
 
 BATCH_TIMEOUT = (5, 6 * 60)
 MAX_BATCH_API_CALLS = 60
+# Max batch chunks posted concurrently to a PC, shared by all the batch operations on the PC session
+MAX_BATCH_CHUNKS_IN_FLIGHT = 4
+BATCH_RETRIES = 2
+BATCH_RETRY_BACKOFF_IN_SEC = 5
+
+batch_config = {"max_chunks_in_flight": MAX_BATCH_CHUNKS_IN_FLIGHT}
+# session -> semaphore bounding the chunks in flight to the PC
+_pc_semaphores = weakref.WeakKeyDictionary()
+_pc_semaphores_lock = threading.Lock()
+
+
+def configure_batch_ops(max_chunks_in_flight: Optional[int] = None, sizing: Optional[Dict] = None):
+    """
+    Configure the batch operations. Only the PC sessions used after this call are affected.
+
+    Args:
+        max_chunks_in_flight (int, optional): Max batch chunks posted concurrently to a PC, 1 to post sequentially
+        sizing (dict, optional): Bounds of the adaptive chunk sizes per batch API, eg. {"v3": {"max_size": 60},
+          "v4": {"max_size": 10}}
+    """
+    if max_chunks_in_flight:
+        batch_config["max_chunks_in_flight"] = max_chunks_in_flight
+    if sizing:
+        configure_batch_sizing(**sizing)
+
+
+def get_pc_semaphore(session: RestAPIUtil) -> threading.BoundedSemaphore:
+    with _pc_semaphores_lock:
+        if session not in _pc_semaphores:
+            _pc_semaphores[session] = threading.BoundedSemaphore(batch_config["max_chunks_in_flight"])
+        return _pc_semaphores[session]
 
 
 class PcBatchOp:
@@ -34,6 +71,13 @@ class PcBatchOp:
         self.base_url = "api/nutanix//v3"
         self.resource_type = kwargs.get("resource_type")
         self.kind = kwargs.get("kind")
+        # Latency & size of the chunks of the last batch call, in the order of the chunks
+        self.chunk_latencies = []
+        self.chunk_sizes = []
+        # Retryable failures are resubmitted this many times by batch_create/ batch_update/ batch_delete
+        self.retries = kwargs.get("retries", BATCH_RETRIES)
+        # BatchResult of the last batch_create/ batch_update/ batch_delete call
+        self.last_result = None
 
     def batch(self, api_request_list: List):
         """
@@ -43,27 +87,131 @@ class PcBatchOp:
         Returns:
           list of api_response_list
         """
-        api_request_chunks = [
-            api_request_list[i:i + MAX_BATCH_API_CALLS]
-            for i in range(0, len(api_request_list), MAX_BATCH_API_CALLS)
-        ]
+        sizer = get_batch_sizer(self.session, "v3", self.kind or self.resource_type)
+        position = 0
+        position_lock = threading.Lock()
+        chunk_responses = {}
+
+        def next_chunk() -> Optional[Tuple[int, List]]:
+            # The chunk size is chosen when the chunk is taken, so the chunks follow what the sizer learns
+            nonlocal position
+            with position_lock:
+                if position >= len(api_request_list):
+                    return None
+                size = sizer.get_size(api_request_list[position:position + sizer.max_size])
+                chunk = position, api_request_list[position:position + size]
+                position += size
+                return chunk
 
+        def post_chunks():
+            while True:
+                chunk = next_chunk()
+                if not chunk:
+                    return
+                chunk_responses[chunk[0]] = self._post_chunk(chunk, sizer)
+
+        estimated_chunks = -(-len(api_request_list) // sizer.get_size())
+        max_chunks_in_flight = min(batch_config["max_chunks_in_flight"], estimated_chunks)
+        if max_chunks_in_flight > 1:
+            with ContextThreadPoolExecutor(max_workers=max_chunks_in_flight) as executor:
+                futures = [executor.submit(post_chunks) for _ in range(max_chunks_in_flight)]
+                for future in futures:
+                    future.result()
+        else:
+            post_chunks()
+
+        # Merge in the order of the chunks, so that the api_response_list lines up with the api_request_list
         api_response_list = []
-        for request_list in api_request_chunks:
-            payload = copy.deepcopy(self.PAYLOAD)
-
-            payload["api_request_list"] = request_list
-            logger.debug("Batch Payload: {}".format(payload))
-
-            batch_response = self.session.post(
-                uri=f"{self.base_url}/{self.BATCH_BASE}",
-                data=payload,
-                timeout=BATCH_TIMEOUT
-            )
-            if batch_response.get('api_response_list', None):
-                api_response_list.extend(batch_response.get('api_response_list'))
+        self.chunk_latencies = []
+        self.chunk_sizes = []
+        for chunk_start in sorted(chunk_responses):
+            chunk_response_list, latency, size = chunk_responses[chunk_start]
+            api_response_list.extend(chunk_response_list)
+            self.chunk_latencies.append(latency)
+            self.chunk_sizes.append(size)
+        if self.chunk_latencies:
+            logger.debug(f"Batch of {len(api_request_list)} requests in {len(self.chunk_sizes)} chunks, "
+                         f"chunk sizes: {self.chunk_sizes}, "
+                         f"chunk latencies: {[round(latency, 2) for latency in self.chunk_latencies]}s")
+
+        # Entities are modified by the batch calls, drop the cached reads
+        cache = getattr(self.session, "cache", None)
+        if isinstance(cache, ResponseCache) and self.resource_type and api_request_list:
+            cache.invalidate(self.resource_type)
+        if self.kind and api_request_list:
+            invalidate_name_index(self.session, self.kind)
         return api_response_list
 
+    def batch_with_result(self, api_request_list: List, retries: int = BATCH_RETRIES) -> BatchResult:
+        """
+        Call batch API and resubmit only the requests that failed with RETRYABLE_STATUS_CODES, or with
+        GATEWAY_STATUS_CODES if they aren't creates, with exponential backoff
+
+        Args:
+          api_request_list (list): Payload for batch
+          retries (int, optional): Max times the retryable failures are resubmitted
+        Returns:
+          BatchResult
+        """
+        result = BatchResult()
+        pending = list(enumerate(api_request_list))
+
+        while pending:
+            if result.attempts:
+                backoff = BATCH_RETRY_BACKOFF_IN_SEC * (2 ** (result.attempts - 1))
+                logger.warning(f"Resubmitting {len(pending)} failed requests of the batch in {backoff}s")
+                time.sleep(backoff)
+            result.attempts += 1
+
+            api_response_list = self.batch([request for _, request in pending])
+            # The responses are in the order of the requests
+            retry = []
+            for position, (index, request) in enumerate(pending):
+                response = api_response_list[position] if position < len(api_response_list) else None
+                if BatchResult.is_retryable(response, request) and result.attempts <= retries:
+                    retry.append((index, request))
+                else:
+                    result.add(index, request, response)
+            pending = retry
+
+        result.sort()
+        for failure in result.failed:
+            logger.error(f"Batch request failed with status {failure['status']}: {failure['body']}")
+        record_batch_result(result)
+        return result
+
+    def _post_chunk(self, chunk: Tuple[int, List], sizer: AdaptiveBatchSizer) -> Tuple[List, float, int]:
+        """
+        Post one chunk of the batch, at most max_chunks_in_flight chunks are posted to the PC at a time
+
+        Args:
+            chunk (tuple): Offset of the chunk in the batch and the requests of the chunk
+            sizer (AdaptiveBatchSizer): Sizer to report the outcome of the call to
+        Returns:
+            (list, float, int): api_response_list of the chunk, the latency of the call in seconds and the size
+        """
+        offset, request_list = chunk
+        payload = copy.deepcopy(self.PAYLOAD)
+
+        payload["api_request_list"] = request_list
+        logger.debug("Batch Payload: {}".format(payload))
+
+        with get_pc_semaphore(self.session):
+            start = time.perf_counter()
+            try:
+                batch_response = self.session.post(
+                    uri=f"{self.base_url}/{self.BATCH_BASE}",
+                    data=payload,
+                    timeout=BATCH_TIMEOUT
+                )
+            except Exception as e:
+                sizer.record(len(request_list), time.perf_counter() - start, error=is_server_error(e))
+                raise
+            latency = time.perf_counter() - start
+        sizer.record(len(request_list), latency)
+        logger.debug(f"Batch chunk at {offset} with {len(request_list)} requests took {latency:.2f}s")
+        return batch_response.get('api_response_list', None) or [], latency, len(request_list)
+
     def batch_create(self, request_payload_list: Optional[List]):
         """
         Create entities using v3 batch api
@@ -93,9 +241,9 @@ class PcBatchOp:
                 else:
                     api_request["body"] = request_payload
                 api_request_list.append(api_request)
-        api_response_list = self.batch(api_request_list)
+        self.last_result = self.batch_with_result(api_request_list, retries=self.retries)
 
-        return get_task_uuid_list(api_response_list)
+        return self.last_result.task_uuid_list
 
     def batch_update(self, entity_update_list: List):
         """
@@ -120,8 +268,8 @@ class PcBatchOp:
                     }
                 }
                 api_request_list.append(request)
-        api_response_list = self.batch(api_request_list)
-        return get_task_uuid_list(api_response_list)
+        self.last_result = self.batch_with_result(api_request_list, retries=self.retries)
+        return self.last_result.task_uuid_list
 
     def batch_delete(self, entity_list: List):
         """
@@ -142,8 +290,8 @@ class PcBatchOp:
                 api_request["path_and_params"] += f"/{entity}"
                 api_request_list.append(api_request)
 
-        api_response_list = self.batch(api_request_list)
-        return get_task_uuid_list(api_response_list)
+        self.last_result = self.batch_with_result(api_request_list, retries=self.retries)
+        return self.last_result.task_uuid_list
 
 
 def get_task_uuid_list(api_response_list: List) -> List:
@@ -158,26 +306,11 @@ def get_task_uuid_list(api_response_list: List) -> List:
     for response in api_response_list:
         if response.get("status"):
             if not response["status"].startswith("2"):
-                # todo send all error responses back to the script, instead of logging here
+                # Use PcBatchOp.batch_with_result to get the failed responses back
                 logger.error(response)
 
-        api_response = response.get("api_response", {})
-
-        # todo bug
-        # sometimes api_response in str
-        if isinstance(api_response, str):
-            try:
-                api_response = json.loads(api_response)
-            except Exception as e:
-                raise (Exception(f"Cannot get task list to monitor for the batch call!: {e}")
-                       .with_traceback(e.__traceback__))
-
-        if api_response and api_response.get('status', {}).get('execution_context', {}).get('task_uuid'):
-            task_uuid = api_response['status']['execution_context']['task_uuid']
-            task_uuid_list.append(task_uuid)
-        # In some cases only task_uuid is returned in response
-        elif api_response and api_response.get('task_uuid', {}):
-            task_uuid = api_response["task_uuid"]
+        task_uuid = get_task_uuid(response)
+        if task_uuid:
             task_uuid_list.append(task_uuid)
 
     return task_uuid_list
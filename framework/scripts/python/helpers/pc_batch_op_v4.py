@@ -1,14 +1,15 @@
 import ntnx_prism_py_client
+import time
 import uuid
 
 from typing import List, Optional
+from framework.helpers.cache_utils import invalidate_name_indexes
 from framework.helpers.log_utils import get_logger
 from framework.helpers.v4_api_client import ApiClientV4
+from .batch_sizer import get_batch_sizer, is_server_error
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpec import BatchSpec
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecMetadata import BatchSpecMetadata
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecPayload import BatchSpecPayload
-from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecMetadata import BatchSpecMetadata
-from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecPayload import BatchSpecPayload
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecPayloadMetadata import BatchSpecPayloadMetadata
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecPayloadMetadataHeader import BatchSpecPayloadMetadataHeader
 from ntnx_prism_py_client.models.prism.v4.operations.BatchSpecPayloadMetadataPath import  BatchSpecPayloadMetadataPath
@@ -18,6 +19,14 @@ logger = get_logger(__name__)
 
 BATCH_TIMEOUT = (5, 6 * 60)
 MAX_BATCH_API_CALLS = 60
+# v4 kind -> v3 kinds whose name indexes the v4 writes make stale, all the name indexes are dropped for other kinds
+V3_KINDS = {
+    "Category": ["category"],
+    "VPC": ["vpc"],
+    "SecurityPolicy": ["network_security_rule"],
+    "AddressGroup": ["address_group"],
+    "ServiceGroup": ["service_group"],
+}
 
 
 class PcBatchOpv4:
@@ -37,10 +46,47 @@ class PcBatchOpv4:
         """
         self.base_url = "/api"
         self.resource_type = kwargs.get("resource_type")
+        self.kind = kwargs.get("kind")
         self.client = v4_api_util.get_api_client("prism")
         self.batch_api = ntnx_prism_py_client.BatchesApi(
             api_client=self.client
             )
+        self.sizer = get_batch_sizer(v4_api_util, "v4", self.resource_type)
+        # chunk_size of the last batch
+        self.chunk_size = None
+
+    def _submit_batch(self, action: str, unique_id: uuid.UUID, uri: str, batch_spec_payload_list: List):
+        """
+        Submit the batch with the chunk_size chosen by the sizer, ie. the number of payloads the PC processes
+        concurrently. The chunk_size is 1 unless batch_ops sizing of v4 allows more, it then shrinks on 5xx/ timeouts.
+        """
+        chunk_size = self.sizer.get_size(batch_spec_payload_list)
+        batch_spec = BatchSpec(
+            metadata=BatchSpecMetadata(
+                action=action,
+                name=f"multi_{unique_id}",
+                uri=uri,
+                stop_on_error=True,
+                chunk_size=chunk_size,
+            ),
+            payload=batch_spec_payload_list,
+        )
+        logger.debug(f"Submitting the batch of {len(batch_spec_payload_list)} payloads with chunk_size {chunk_size}")
+
+        start = time.perf_counter()
+        try:
+            api_response_list = self.batch_api.submit_batch(
+                async_req=False, body=batch_spec
+            )
+        except Exception as e:
+            self.sizer.record(chunk_size, time.perf_counter() - start, error=is_server_error(e))
+            raise
+        finally:
+            # The v4 SDK doesn't go through the v3 sessions, drop the name indexes of the kind for all of them
+            invalidate_name_indexes(V3_KINDS.get(self.kind))
+        self.sizer.record(chunk_size, time.perf_counter() - start)
+        self.chunk_size = chunk_size
+        return api_response_list
 
     def batch_create(self, request_payload_list: Optional[List]):
         """
@@ -60,19 +106,9 @@ class PcBatchOpv4:
             for batch_spec_payload in request_payload_list
         ]
 
-        batch_spec = BatchSpec(
-            metadata=BatchSpecMetadata(
-                action=ActionType.CREATE,
-                name=f"multi_{unique_id}",
-                uri=f"{self.base_url}/{self.resource_type}",
-                stop_on_error=True,
-                chunk_size=1,
-            ),
-            payload=batch_spec_payload_list,
+        api_response_list = self._submit_batch(
+            ActionType.CREATE, unique_id, f"{self.base_url}/{self.resource_type}", batch_spec_payload_list
         )
-        api_response_list = self.batch_api.submit_batch(
-                async_req=False, body=batch_spec
-            )
 
         return get_task_uuid_list(api_response_list)
 
@@ -106,19 +142,9 @@ class PcBatchOpv4:
             for batch_spec_payload in entity_list
         ]
 
-        batch_spec = BatchSpec(
-            metadata=BatchSpecMetadata(
-                action=ActionType.DELETE,
-                name=f"multi_{unique_id}",
-                uri=f"{self.base_url}/{self.resource_type}/{{extId}}",
-                stop_on_error=True,
-                chunk_size=1,
-            ),
-            payload=batch_spec_payload_list,
+        api_response_list = self._submit_batch(
+            ActionType.DELETE, unique_id, f"{self.base_url}/{self.resource_type}/{{extId}}", batch_spec_payload_list
         )
-        api_response_list = self.batch_api.submit_batch(
-                async_req=False, body=batch_spec
-            )
 
         return get_task_uuid_list(api_response_list)
 
@@ -156,20 +182,9 @@ class PcBatchOpv4:
             for batch_spec_payload in entity_update_list
         ]
 
-        batch_spec = BatchSpec(
-            metadata=BatchSpecMetadata(
-                action=ActionType.MODIFY,
-                name=f"multi_{unique_id}",
-                uri=f"{self.base_url}/{self.resource_type}/{{extId}}",
-                stop_on_error=True,
-                chunk_size=1,
-            ),
-            payload=batch_spec_payload_list,
+        api_response_list = self._submit_batch(
+            ActionType.MODIFY, unique_id, f"{self.base_url}/{self.resource_type}/{{extId}}", batch_spec_payload_list
         )
-        
-        api_response_list = self.batch_api.submit_batch(
-                async_req=False, body=batch_spec
-            )
 
         return get_task_uuid_list(api_response_list)
 
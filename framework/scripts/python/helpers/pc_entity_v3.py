@@ -1,16 +1,33 @@
 import json
 from copy import deepcopy
-from typing import Optional
+from typing import Optional, List, Dict
+from framework.helpers.cache_utils import (DEFAULT_NAME_INDEX_TTL_IN_SEC, NameIndex, fresh_reads, get_name_index,
+                                           invalidate_name_index, is_fresh_read)
+from framework.helpers.log_utils import get_logger
 from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
 from .entity import Entity
 from .pc_batch_op import PcBatchOp
 
+logger = get_logger(__name__)
+
 
 class PcEntity(Entity):
     __BASEURL__ = "api/nutanix/v3"
     resource_type = ""
     kind = ""
     V3_LIST_CHUNKSIZE = 500
+    # Max pages fetched concurrently by list
+    V3_LIST_MAX_IN_FLIGHT = 4
+    # TTL of the name index in seconds, 0 to always list
+    NAME_INDEX_TTL = DEFAULT_NAME_INDEX_TTL_IN_SEC
+    # Server side filter used to find an entity that is not in the name index
+    NAME_FILTER = "name=={}"
+    # FIQL operators & separators, the names with any of them are not put in the server side filter
+    FIQL_RESERVED_CHARACTERS = frozenset(",;=!<>()'\"*~")
+    # Filter attributes that can be matched against the indexed entities, attribute -> path under spec/ status.
+    # An empty path is the name of the entity
+    INDEX_FILTER_ATTRIBUTES = {"name": ()}
 
     def __init__(self, session: RestAPIUtil, **kwargs):
         resource_type = self.__BASEURL__ + self.resource_type
@@ -18,44 +35,194 @@ class PcEntity(Entity):
         super(PcEntity, self).__init__(session=session, resource_type=resource_type)
 
     def list(self, **kwargs):
+        """
+        List the entities. If "length" is not specified, all the matching entities are listed, the pages after the
+        first one are fetched concurrently.
+
+        Args:
+            length (int, optional): Max entities to list, all the matching entities by default
+            concurrent (bool, optional): Fetch the pages concurrently, True by default
+        Returns:
+            list: Entities, in the order of the pages
+        """
+        length = kwargs.pop("length", None)
+        concurrent = kwargs.pop("concurrent", True)
         payload = {
             "kind": kwargs.pop("kind", self.kind),
             "offset": kwargs.pop("offset", 0),
             "filter": kwargs.pop("filter", ""),
-            "length": kwargs.pop("length", self.V3_LIST_CHUNKSIZE),
+            "length": self.V3_LIST_CHUNKSIZE,
             "sort_order": kwargs.pop("sort_order", None),
             "sort_attribute": kwargs.pop("sort_attribute", None)
         }
-        if payload["length"] > self.V3_LIST_CHUNKSIZE:
-            length = payload["length"]
-            payload["length"] = self.V3_LIST_CHUNKSIZE
-            resp = {self.entity_type: []}
-            while True and payload["offset"] <= length:
-                sub_resp = super(PcEntity, self).list(data=payload, **kwargs)
-                if not sub_resp:
+        if length is not None and length <= self.V3_LIST_CHUNKSIZE:
+            payload["length"] = length
+            return super(PcEntity, self).list(data=payload, **kwargs)
+
+        return self._list_pages(payload, length, concurrent, **kwargs)
+
+    def _list_pages(self, payload: dict, length: Optional[int], concurrent: bool = True, **kwargs) -> List:
+        """
+        The first page gives the total matches, the offsets of the remaining pages are known upfront, so they are
+        fetched with at most V3_LIST_MAX_IN_FLIGHT calls in flight.
+        """
+        custom_filters = kwargs.pop("custom_filters", None)
+        entity_type = kwargs.get("entity_type") or self.entity_type
+        start = payload["offset"]
+
+        first_page = super(PcEntity, self).list(data=payload, raw_response=True, **kwargs)
+        entities = list(first_page.get(entity_type, []))
+        total_matches = first_page.get("metadata", {}).get("total_matches")
+
+        if total_matches is None:
+            # Total is unknown, walk the pages till an empty page
+            for page in self._iter_pages(payload, start + self.V3_LIST_CHUNKSIZE, **kwargs):
+                entities.extend(page)
+                if length is not None and len(entities) >= length:
                     break
-                resp[self.entity_type].extend(sub_resp)
-                payload["offset"] += self.V3_LIST_CHUNKSIZE
-            return resp[self.entity_type]
+        else:
+            end = total_matches if length is None else min(total_matches, start + length)
+            offsets = list(range(start + self.V3_LIST_CHUNKSIZE, end, self.V3_LIST_CHUNKSIZE))
+            # fresh_reads is per thread, the pages fetched by the executor threads have to bypass the cache too
+            fresh_read = is_fresh_read()
 
-        return super(PcEntity, self).list(data=payload, **kwargs)
+            def get_page(offset):
+                page_payload = dict(payload, offset=offset)
+                if fresh_read:
+                    with fresh_reads():
+                        return super(PcEntity, self).list(data=page_payload, **kwargs)
+                return super(PcEntity, self).list(data=page_payload, **kwargs)
 
-    def get_entity_by_name(self, entity_name: str, **kwargs):
-        entities = self.list(**kwargs)
-
-        for entity in entities:
-            if entity.get("spec", {}).get("name"):
-                name = entity["spec"]["name"]
-            elif entity.get("status", {}).get("name"):
-                name = entity["status"]["name"]
-            elif entity.get("info", {}).get("name"):
-                name = entity["info"]["name"]
+            if offsets:
+                logger.debug(f"Fetching {len(offsets) + 1} pages of {self.resource}, total {total_matches}")
+            if concurrent and len(offsets) > 1:
+                with ContextThreadPoolExecutor(max_workers=min(self.V3_LIST_MAX_IN_FLIGHT, len(offsets))) as executor:
+                    # map returns the pages in the order of the offsets
+                    pages = list(executor.map(get_page, offsets))
             else:
-                continue
-            if name == entity_name:
+                pages = [get_page(offset) for offset in offsets]
+            for page in pages:
+                entities.extend(page)
+
+        if length is not None:
+            entities = entities[:length]
+        if custom_filters:
+            entities = self._filter_entities(entities, custom_filters)
+        return entities
+
+    def _iter_pages(self, payload: dict, offset: int, **kwargs):
+        while True:
+            page = super(PcEntity, self).list(data=dict(payload, offset=offset), **kwargs)
+            if not page:
+                return
+            yield page
+            if len(page) < payload["length"]:
+                return
+            offset += payload["length"]
+
+    def iter_list(self, **kwargs):
+        """
+        Lazily list the entities, a page is fetched only when the entities of the previous page are consumed.
+        Goes through self.list, so the defaults added by the subclasses apply.
+
+        Yields:
+            dict: Entity
+        """
+        offset = kwargs.pop("offset", 0)
+        kwargs.pop("length", None)
+        while True:
+            page = self.list(offset=offset, length=self.V3_LIST_CHUNKSIZE, **kwargs)
+            if not page:
+                return
+            yield from page
+            if len(page) < self.V3_LIST_CHUNKSIZE:
+                return
+            offset += self.V3_LIST_CHUNKSIZE
+
+    def get_entity_by_name(self, entity_name: str, **kwargs):
+        """
+        Get the entity by name. Served from the name index of the session, which is built from one bulk list, and
+        falls back to a list call with a server side filter if the entity is not in the index.
+        The index is dropped by the writes made with the session and by the v4 batches, the changes made by other
+        processes are seen once NAME_INDEX_TTL expires. Lookups within fresh_reads() always ask the server.
+
+        Args:
+            entity_name (str): Name of the entity
+            filter (str, optional): Filter the entity has to match, eg. "cluster_name==cluster1;name==subnet1"
+        Returns:
+            dict: The entity, None if it doesn't exist
+        """
+        index_filters = self._parse_index_filter(kwargs.get("filter")) if set(kwargs) <= {"filter"} else None
+        if self.NAME_INDEX_TTL > 0 and index_filters is not None and not is_fresh_read():
+            for entity in self.name_index.get(entity_name, self._build_name_index):
+                if all(self._get_index_attribute(entity, attribute) == value
+                       for attribute, value in index_filters.items()):
+                    return entity
+
+        # Not in the index (or the filter cannot be matched locally), ask the server
+        if not kwargs.get("filter") and self.NAME_FILTER and not self.FIQL_RESERVED_CHARACTERS & set(entity_name):
+            kwargs["filter"] = self.NAME_FILTER.format(entity_name)
+        for entity in self.iter_list(**kwargs):
+            if self.get_entity_name(entity) == entity_name:
+                if index_filters is not None:
+                    self.name_index.add(entity_name, entity)
                 return entity
         return None
 
+    @property
+    def name_index(self) -> NameIndex:
+        return get_name_index(self.session, self.kind, self.NAME_INDEX_TTL, resource=self.resource)
+
+    def refresh_name_index(self):
+        """
+        Drop the name index, so the next lookup rebuilds it. Writes made with the session & the v4 batches
+        already do this.
+        """
+        invalidate_name_index(self.session, self.kind)
+
+    def _build_name_index(self) -> Dict[str, List[Dict]]:
+        index = {}
+        for entity in self.list():
+            name = self.get_entity_name(entity)
+            if name:
+                index.setdefault(name, []).append(entity)
+        logger.debug(f"Built the name index of '{self.kind}' with {len(index)} names")
+        return index
+
+    def _parse_index_filter(self, filter_criteria: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Parse "attr1==value1;attr2==value2" filters that can be matched against the index.
+        Returns None if the filter has other operators or attributes not in INDEX_FILTER_ATTRIBUTES.
+        """
+        if not filter_criteria:
+            return {}
+        index_filters = {}
+        for criteria in filter_criteria.split(";"):
+            attribute, sep, value = criteria.partition("==")
+            if not sep or attribute not in self.INDEX_FILTER_ATTRIBUTES or any(c in value for c in "=!<>,*"):
+                return None
+            index_filters[attribute] = value
+        return index_filters
+
+    def _get_index_attribute(self, entity: Dict, attribute: str) -> Optional[str]:
+        path = self.INDEX_FILTER_ATTRIBUTES[attribute]
+        if not path:
+            return self.get_entity_name(entity)
+        for root in ("spec", "status"):
+            value = entity.get(root, {})
+            for key in path:
+                value = value.get(key, {}) if isinstance(value, dict) else {}
+            if value:
+                return value
+        return None
+
+    @staticmethod
+    def get_entity_name(entity: Dict) -> Optional[str]:
+        for root in ("spec", "status", "info"):
+            if entity.get(root, {}).get("name"):
+                return entity[root]["name"]
+        return None
+
     def get_uuid_by_name(self, entity_name: Optional[str] = None, entity_data: Optional[dict] = None, **kwargs):
         if not entity_data:
             if not entity_name:
@@ -65,6 +232,10 @@ class PcEntity(Entity):
             return None
         return entity_data["metadata"]["uuid"]
 
+    def _invalidate_cache(self):
+        super(PcEntity, self)._invalidate_cache()
+        invalidate_name_index(self.session, self.kind)
+
     def reference_spec(self):
         return deepcopy(
             {
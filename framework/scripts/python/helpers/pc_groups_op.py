@@ -1,7 +1,10 @@
-from typing import Optional, Union
+from typing import Optional, Union, List, Dict
 from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
 
 GROUP_MEMBER_COUNT_THRESHOLD = 500
+# Max pages fetched concurrently by list_entities
+MAX_GROUP_PAGES_IN_FLIGHT = 4
 
 
 class PcGroupsOp:
@@ -21,7 +24,8 @@ class PcGroupsOp:
 
     def list_entities(self, **kwargs):
         """
-        Get all the entities
+        Get all the entities. Once the first page gives the total count, the remaining pages are fetched
+        concurrently.
 
         Args(kwargs):
           attributes(list<str>): The list of attributes to return
@@ -29,8 +33,13 @@ class PcGroupsOp:
           group_member_count_threshold(int): max items to fetch by groups api call
           filter_criteria(csv): filter criteria list as a string
             example - "filter_criteria":"vm_name==name1,vm_name==name2"
+          columnar(bool): Return the attributes as columns, i.e. {"uuid": [..], "attribute": [..]} instead of a
+            dict per entity. Each value is the list of values of the attribute, as returned by the API, None if the
+            entity doesn't have the attribute. False by default
+          concurrent(bool): Fetch the pages concurrently, True by default
         Returns:
           list<dict>: The event list.
+          dict<str, list>: Attribute name to the values of the entities, if columnar
         """
         group_member_offset = 0
         # Note - this will work even if entity count is less than 2500
@@ -39,11 +48,18 @@ class PcGroupsOp:
         # max is 500
         group_member_count_threshold = min(group_member_count_threshold,
                                            GROUP_MEMBER_COUNT_THRESHOLD)
-        entities_json = []
+        columnar = kwargs.pop("columnar", False)
+        concurrent = kwargs.pop("concurrent", True)
+        if columnar:
+            entities_json = {name: [] for name in ["uuid"] + list(kwargs.get("attributes", []))}
+            parse_response = self.__parse_response_columnar
+        else:
+            entities_json = []
+            parse_response = self.__parse_response
         obtained_entities_count = kwargs.pop("obtained_entities_count", None)
         response = self.__groups_post_call(
             group_member_offset, group_member_count_threshold, **kwargs)
-        entities_json.extend(self.__parse_response(response))
+        self.__merge(entities_json, parse_response(response))
         total_entity_count = response["group_results"][0].get("total_entity_count")
         filtered_entity_count = response["group_results"][0].get("filtered_entity_count", None)
         '''modified this assignment as value stays as None
@@ -56,15 +72,32 @@ class PcGroupsOp:
         if obtained_entities_count:
             total_entity_count = min(total_entity_count, obtained_entities_count)
         if total_entity_count > group_member_count_threshold:
-            while True:
-                group_member_offset = group_member_offset + group_member_count_threshold
-                if group_member_offset >= total_entity_count:
-                    break
-                response = self.__groups_post_call(
-                    group_member_offset, group_member_count_threshold, **kwargs)
-                entities_json.extend(self.__parse_response(response))
+            offsets = range(group_member_count_threshold, total_entity_count, group_member_count_threshold)
+
+            def get_page(offset):
+                return parse_response(self.__groups_post_call(offset, group_member_count_threshold, **kwargs))
+
+            if concurrent and len(offsets) > 1:
+                with ContextThreadPoolExecutor(max_workers=min(MAX_GROUP_PAGES_IN_FLIGHT, len(offsets))) as executor:
+                    # map returns the pages in the order of the offsets, each page is parsed as soon as it arrives
+                    for page in executor.map(get_page, offsets):
+                        self.__merge(entities_json, page)
+            else:
+                for offset in offsets:
+                    self.__merge(entities_json, get_page(offset))
         return entities_json
 
+    @staticmethod
+    def __merge(entities_json: Union[List, Dict], page: Union[List, Dict]):
+        if isinstance(entities_json, dict):
+            # Keep the columns aligned, a page may not have all the attributes
+            count, page_count = len(entities_json["uuid"]), len(page["uuid"])
+            for name in set(entities_json) | set(page):
+                column = entities_json.setdefault(name, [None] * count)
+                column.extend(page.get(name) or [None] * page_count)
+        else:
+            entities_json.extend(page)
+
     def list_dvs(self, cluster_uuid: str):
         """
         Get the distributed_virtual_switch from a cluster
@@ -81,9 +114,12 @@ class PcGroupsOp:
                                   attributes=attributes,
                                   filter_criteria=filter_criteria)
 
-    def list_events(self, start_time: Union[int, float]):
+    def list_events(self, start_time: Union[int, float], columnar: bool = False):
         """
         Get the events from the PC
+        Args:
+          start_time: Events created after this time, in usecs
+          columnar(bool): Return attribute name to the list of values, instead of a dict per event
         Returns:
           list<dict>: The event list.
         """
@@ -95,11 +131,15 @@ class PcGroupsOp:
         return self.list_entities(entity_type="event",
                                   attributes=attributes,
                                   filter_criteria=filter_criteria,
-                                  group_member_sort_order="DESCENDING")
+                                  group_member_sort_order="DESCENDING",
+                                  columnar=columnar)
 
-    def list_audits(self, start_time: Union[int, float]):
+    def list_audits(self, start_time: Union[int, float], columnar: bool = False):
         """
         Get the audit list from the PC
+        Args:
+          start_time: Audits started after this time, in usecs
+          columnar(bool): Return attribute name to the list of values, instead of a dict per audit
         Returns:
           list<dict>: The event list.
         """
@@ -111,7 +151,8 @@ class PcGroupsOp:
         return self.list_entities(entity_type="audit",
                                   attributes=attributes,
                                   filter_criteria=filter_criteria,
-                                  group_member_sort_order="DESCENDING")
+                                  group_member_sort_order="DESCENDING",
+                                  columnar=columnar)
 
     def __groups_post_call(self, group_member_offset, group_member_count, **kwargs):
         """
@@ -216,3 +257,35 @@ class PcGroupsOp:
                             entity[data.get("name")] = data.get("values")[0].get("values")
                 entities_json.append(entity)
         return entities_json
+
+    @staticmethod
+    def __parse_response_columnar(response):
+        """
+        Helper to parse the json response from Groups api call into columns, without building a dict per entity
+
+        Args:
+          response(dict): json response from prism client
+        Returns:
+          columns(dict): attribute name to the values of the attribute of each entity, None where the entity doesn't
+            have the attribute
+        """
+        columns = {"uuid": []}
+        if not response.get("group_results"):
+            return columns
+        entity_results = response.get("group_results")[0].get("entity_results") or []
+        for position, entity_result in enumerate(entity_results):
+            columns["uuid"].append(entity_result.get("entity_id"))
+            for data in entity_result.get("data", []):
+                values = data.get("values")
+                values = values[0].get("values") if values else None
+                if not values:
+                    continue
+                column = columns.get(data.get("name"))
+                if column is None:
+                    column = columns[data.get("name")] = [None] * position
+                column.extend([None] * (position - len(column)))
+                column.append(values)
+        # Pad the columns of the attributes missing in the last entities
+        for column in columns.values():
+            column.extend([None] * (len(entity_results) - len(column)))
+        return columns
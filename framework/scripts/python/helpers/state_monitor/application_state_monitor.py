@@ -12,6 +12,7 @@ class ApplicationStateMonitor(StateMonitor):
     """
     DEFAULT_TIMEOUT_IN_SEC = 20*60
     DEFAULT_CHECK_INTERVAL_IN_SEC = 120
+    DEFAULT_POLLING_POLICY = {"initial_interval": 15, "min_interval": 10, "max_interval": 120}
 
     def __init__(self, session, **kwargs):
         """
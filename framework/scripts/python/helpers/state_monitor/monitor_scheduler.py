@@ -0,0 +1,167 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from framework.helpers.cache_utils import fresh_reads
+from framework.helpers.log_utils import get_logger
+from .polling_policy import record_polling_stats
+
+logger = get_logger(__name__)
+
+# Max checks running at the same time, the checks themselves are blocking API calls
+MAX_CHECK_WORKERS = 8
+
+
+class _MonitorEntry:
+    def __init__(self, monitor, future: Future):
+        self.monitor = monitor
+        self.future = future
+        self.start_time = time.time()
+        self.deadline = self.start_time + monitor.DEFAULT_TIMEOUT_IN_SEC
+        # Context of the script that started the monitor, its stats are recorded in it, eg. to its event log
+        self.context = contextvars.copy_context()
+
+
+class MonitorScheduler:
+    """
+    Runs the checks of all the submitted monitors from one scheduler thread, instead of a thread sleeping per
+    monitor. The checks that are due together are grouped by the coalesce key of the monitors, so monitors polling
+    the same endpoint share the API calls, and the callers are notified through futures.
+    """
+
+    def __init__(self, max_check_workers: int = MAX_CHECK_WORKERS):
+        self.max_check_workers = max_check_workers
+        self._condition = threading.Condition()
+        # (due time, sequence, entry)
+        self._queue: List[Tuple[float, int, _MonitorEntry]] = []
+        self._sequence = itertools.count()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._in_flight = 0
+        self.checks = 0
+        self.coalesced_checks = 0
+
+    def submit(self, monitor) -> Future:
+        """
+        Start monitoring, the first check is made right away
+
+        Args:
+            monitor (StateMonitor): The monitor to run
+        Returns:
+            Future: Resolves to (response, True) once the target status is matched, (None, False) on timeout
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        monitor.get_polling_policy().reset()
+        with self._condition:
+            self._start()
+            self._schedule(_MonitorEntry(monitor, future), time.monotonic())
+        logger.info(f"Started monitoring {type(monitor).__name__}...")
+        return future
+
+    def _start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_check_workers,
+                                            thread_name_prefix="MonitorScheduler-check")
+        self._thread = threading.Thread(target=self._run, name="MonitorScheduler", daemon=True)
+        self._thread.start()
+
+    def _schedule(self, entry: _MonitorEntry, due: float):
+        heapq.heappush(self._queue, (due, next(self._sequence), entry))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    if not self._queue and not self._in_flight:
+                        # Nothing to monitor, let the thread exit, it is started again by the next submit
+                        self._thread = None
+                        self._executor.shutdown(wait=False)
+                        return
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout)
+
+                due_entries = []
+                while self._queue and self._queue[0][0] <= time.monotonic():
+                    due_entries.append(heapq.heappop(self._queue)[2])
+                groups = self._group(due_entries)
+                self._in_flight += len(groups)
+
+            for entries in groups:
+                # The API calls of a coalesced check are made in the context of its first monitor, eg. logged to its
+                # event log. A copy, the context of the monitor may be entered again to record its stats
+                self._executor.submit(entries[0].context.copy().run, self._check, entries)
+
+    @staticmethod
+    def _group(entries: List[_MonitorEntry]) -> List[List[_MonitorEntry]]:
+        groups: Dict = {}
+        for entry in entries:
+            key = entry.monitor.coalesce_key()
+            # Monitors without a key are checked on their own
+            key = (type(entry.monitor), key) if key is not None else id(entry)
+            groups.setdefault(key, []).append(entry)
+        return list(groups.values())
+
+    def _check(self, entries: List[_MonitorEntry]):
+        monitors = [entry.monitor for entry in entries]
+        try:
+            # Status checks always have to reach the server
+            with fresh_reads():
+                results = type(monitors[0]).check_status_coalesced(monitors)
+        except Exception as e:
+            results = [e] * len(entries)
+
+        with self._condition:
+            self._in_flight -= 1
+            self.checks += 1
+            self.coalesced_checks += len(entries) - 1
+            now = time.time()
+            for entry, result in zip(entries, results):
+                if isinstance(result, Exception):
+                    entry.future.set_exception(result)
+                    continue
+                response, status_matched = result
+                elapsed_time = now - entry.start_time
+                policy = entry.monitor.get_polling_policy()
+                policy.record_check(entry.monitor.get_progress())
+                if status_matched:
+                    logger.info(f"Completed {type(entry.monitor).__name__} in duration: {elapsed_time:.2f} seconds")
+                    entry.context.run(record_polling_stats, type(entry.monitor).__name__, policy)
+                    entry.future.set_result((response, True))
+                elif now >= entry.deadline:
+                    logger.error(f"{type(entry.monitor).__name__} timed out after {elapsed_time:.2f} seconds")
+                    entry.context.run(record_polling_stats, type(entry.monitor).__name__, policy, completed=False)
+                    entry.future.set_result((None, False))
+                else:
+                    self._schedule(entry, time.monotonic() + policy.next_wait())
+            self._condition.notify()
+
+    def get_stats(self) -> Dict:
+        with self._condition:
+            return {"waiting_monitors": len(self._queue), "checks_in_flight": self._in_flight, "checks": self.checks,
+                    "coalesced_checks": self.coalesced_checks}
+
+
+_scheduler = MonitorScheduler()
+
+
+def get_monitor_scheduler() -> MonitorScheduler:
+    return _scheduler
+
+
+def monitor_all(monitors: List) -> List[Tuple]:
+    """
+    Run the monitors together on the shared scheduler and wait for all of them
+
+    Args:
+        monitors (list): StateMonitors
+    Returns:
+        list: (response, status) of the monitors, in the same order
+    """
+    futures = [monitor.monitor_async() for monitor in monitors]
+    return [future.result() for future in futures]
@@ -14,6 +14,7 @@ class NdbTaskMonitor(StateMonitor):
     """
     DEFAULT_CHECK_INTERVAL_IN_SEC = 60
     DEFAULT_TIMEOUT_IN_SEC = 30 * 60
+    DEFAULT_POLLING_POLICY = {"initial_interval": 15, "min_interval": 10, "max_interval": 60}
 
     def __init__(self, session: RestAPIUtil, task_id: Optional[str] = None, operation_name: Optional[str] = None,
                  success_percentage: int = 100):
@@ -28,6 +29,7 @@ class NdbTaskMonitor(StateMonitor):
         self.task_id = task_id
         self.success_percentage = success_percentage
         self.operation_op = Operation(self.session)
+        self.percentage_complete = None
 
     def check_status(self):
         """
@@ -42,6 +44,7 @@ class NdbTaskMonitor(StateMonitor):
         try:
             response = self.operation_op.get_operation_by_uuid(self.task_id)
             if response.get("id") == self.task_id:
+                self.percentage_complete = response.get("percentageComplete")
                 logger.info(f"Percentage Complete: {response.get('percentageComplete')}/{self.success_percentage}")
                 if int(response.get("percentageComplete")) >= self.success_percentage:
                     completed = True
@@ -51,3 +54,6 @@ class NdbTaskMonitor(StateMonitor):
         except Exception as e:
             logger.error(f"Error while checking NDB Task status: {e}")
         return response, completed
+
+    def get_progress(self) -> Optional[float]:
+        return self.percentage_complete
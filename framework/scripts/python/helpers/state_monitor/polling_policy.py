@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
+from framework.helpers.event_utils import FAILED, SUCCEEDED, emit_event
+from framework.helpers.run_stats import record_run_stats
+
+# Policy arguments from global.yml, monitor class name -> arguments. The "default" arguments apply to all monitors,
+# for the arguments they don't declare themselves
+policy_overrides: Dict[str, Dict] = {}
+_stats: Dict[str, Dict] = {}
+_stats_lock = threading.Lock()
+
+
+def configure_polling_policies(policies: Dict[str, Dict]):
+    """
+    Override the polling policies declared by the monitors
+
+    Args:
+        policies (dict): Monitor class name or "default" to PollingPolicy arguments,
+          eg. {"default": {"jitter": 0.2}, "NdbTaskMonitor": {"max_interval": 30}}. The "default" arguments only
+          fill the arguments a monitor doesn't declare, eg. the fixed 0s interval of the long-polling monitors
+    """
+    for name, arguments in policies.items():
+        policy_overrides.setdefault(name, {}).update(arguments or {})
+
+
+def build_polling_policy(name: str, defaults: Optional[Dict] = None) -> "PollingPolicy":
+    """
+    Build the polling policy of a monitor. The configured policy of the monitor overrides the declared defaults,
+    the "default" policy only adds the arguments that are not declared
+
+    Args:
+        name (str): Monitor class name
+        defaults (dict, optional): PollingPolicy arguments declared by the monitor
+    Returns:
+        PollingPolicy
+    """
+    arguments = dict(policy_overrides.get("default", {}))
+    arguments.update(defaults or {})
+    arguments.update(policy_overrides.get(name, {}))
+    return PollingPolicy(**arguments)
+
+
+class PollingPolicy:
+    """
+    Intervals between the status checks of a monitor. The interval starts at initial_interval and backs off
+    exponentially, with jitter, within the min & max bounds. Once the checks report progress, the next check is
+    scheduled half way to the ETA estimated from the observed rate, so the checks get denser close to completion
+    and slow operations aren't polled more than needed.
+    """
+
+    def __init__(self, initial_interval: float = 5, min_interval: float = 1, max_interval: float = 60,
+                 backoff_factor: float = 2, jitter: float = 0.1):
+        """
+        Args:
+            initial_interval (float, optional): Interval after the first check, in seconds
+            min_interval (float, optional): Min interval in seconds
+            max_interval (float, optional): Max interval in seconds
+            backoff_factor (float, optional): Multiplier of the interval after each check without an ETA
+            jitter (float, optional): Fraction of the interval the waits are randomly spread by
+        """
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.reset()
+
+    def reset(self):
+        self._interval = self.initial_interval
+        # (monotonic time, percent complete) of the checks since the progress last went up from its start
+        self._samples: List[Tuple[float, float]] = []
+        self.start_time = time.monotonic()
+        self.last_check_time: Optional[float] = None
+        self.previous_check_time: Optional[float] = None
+        self.checks = 0
+        self.waiting_time = 0.0
+
+    def record_check(self, progress: Optional[float] = None):
+        """
+        Record a status check
+
+        Args:
+            progress (float, optional): Percent complete seen by the check, if the monitor can tell
+        """
+        now = time.monotonic()
+        self.checks += 1
+        self.previous_check_time, self.last_check_time = self.last_check_time, now
+        if progress is None:
+            return
+        try:
+            progress = float(progress)
+        except (TypeError, ValueError):
+            return
+        if self._samples and progress < self._samples[-1][1]:
+            # Progress went back, eg. a new phase of the operation started, estimate again
+            self._samples = []
+        self._samples.append((now, progress))
+
+    def get_eta(self) -> Optional[float]:
+        """
+        Returns:
+            float: Estimated seconds left, None if there is no progress to estimate from
+        """
+        if len(self._samples) < 2:
+            return None
+        (first_time, first_progress), (last_time, last_progress) = self._samples[0], self._samples[-1]
+        if last_progress <= first_progress or last_time <= first_time:
+            return None
+        rate = (last_progress - first_progress) / (last_time - first_time)
+        return max(100 - last_progress, 0) / rate - (time.monotonic() - last_time)
+
+    def next_interval(self) -> float:
+        """
+        Returns:
+            float: Seconds to wait for the next check
+        """
+        eta = self.get_eta()
+        if eta is not None:
+            interval = eta / 2
+        else:
+            interval = self._interval
+            self._interval = min(self._interval * self.backoff_factor, self.max_interval)
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def next_wait(self) -> float:
+        """
+        Same as next_interval, the interval is counted as time spent waiting
+        """
+        interval = self.next_interval()
+        self.waiting_time += interval
+        return interval
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Checks made, elapsed & waiting time and the time the operation completed after at the earliest,
+              ie. the time of the check before the last one. The real completion is between completed_after and
+              elapsed
+        """
+        last_check_time = self.last_check_time or time.monotonic()
+        previous_check_time = self.previous_check_time or self.start_time
+        return {"checks": self.checks, "elapsed": round(last_check_time - self.start_time, 2),
+                "waiting": round(self.waiting_time, 2),
+                "completed_after": round(previous_check_time - self.start_time, 2)}
+
+
+def record_polling_stats(name: str, policy: PollingPolicy, completed: bool = True):
+    """
+    Add the stats of a finished monitor run to the totals of the monitor class, and to the stats of the current
+    run, and emit its event
+    """
+    stats = policy.get_stats()
+    emit_event("monitor", monitor=name, status=SUCCEEDED if completed else FAILED, **stats)
+    record_run_stats("state_monitors", name, runs=1, timeouts=0 if completed else 1,
+                     **{key: stats[key] for key in ("checks", "elapsed", "waiting", "completed_after")})
+    with _stats_lock:
+        totals = _stats.setdefault(name, {"runs": 0, "timeouts": 0, "checks": 0, "elapsed": 0.0, "waiting": 0.0,
+                                          "completed_after": 0.0})
+        totals["runs"] += 1
+        totals["timeouts"] += 0 if completed else 1
+        for key in ("checks", "elapsed", "waiting", "completed_after"):
+            totals[key] = round(totals[key] + stats[key], 2)
+
+
+def get_polling_stats() -> Dict[str, Dict]:
+    """
+    Returns:
+        dict: Monitor class name to the totals of its runs, time spent waiting vs the time the operations completed
+    """
+    with _stats_lock:
+        return {name: dict(totals) for name, totals in _stats.items()}
+
+
+def reset_polling_stats():
+    with _stats_lock:
+        _stats.clear()
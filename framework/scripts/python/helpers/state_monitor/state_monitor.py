@@ -1,11 +1,34 @@
 import time
-from typing import Optional, Union, Dict
+from concurrent.futures import Future
+from typing import Optional, Union, Dict, List, Hashable
 
 from framework.helpers.log_utils import get_logger
+from framework.helpers.cache_utils import fresh_reads
+from .monitor_scheduler import get_monitor_scheduler
+from .polling_policy import PollingPolicy, build_polling_policy, configure_polling_policies, record_polling_stats
 from abc import abstractmethod, ABC
 
 logger = get_logger(__name__)
 
+# If the monitors wait on the shared MonitorScheduler instead of polling in the calling thread
+monitor_config = {"shared_scheduler": False}
+
+
+def configure_state_monitors(shared_scheduler: Optional[bool] = None, polling_policies: Optional[Dict] = None):
+    """
+    Configure the state monitors
+
+    Args:
+        shared_scheduler (bool, optional): Run the checks of all the monitors on the shared scheduler, so that the
+          checks against the same endpoint are coalesced. The callers of monitor() still wait in their thread, only
+          the callers of monitor_async/ monitor_all wait for several monitors from one thread
+        polling_policies (dict, optional): Monitor class name or "default" to PollingPolicy arguments
+    """
+    if shared_scheduler is not None:
+        monitor_config["shared_scheduler"] = shared_scheduler
+    if polling_policies:
+        configure_polling_policies(polling_policies)
+
 
 class StateMonitor(ABC):
     """
@@ -13,6 +36,8 @@ class StateMonitor(ABC):
     """
     DEFAULT_TIMEOUT_IN_SEC = 1800
     DEFAULT_CHECK_INTERVAL_IN_SEC = 5
+    # PollingPolicy arguments, a fixed DEFAULT_CHECK_INTERVAL_IN_SEC interval if not declared
+    DEFAULT_POLLING_POLICY: Optional[Dict] = None
 
     def monitor(self, query_retries=True) -> (Optional[Union[Dict, str]], bool):
         """
@@ -26,6 +51,12 @@ class StateMonitor(ABC):
         Returns:
           bool: True if target status is matched, False otherwise.
         """
+        if query_retries and monitor_config["shared_scheduler"]:
+            # The checks are coalesced with the other monitors, this thread still waits for the result
+            return self.monitor_async().result()
+
+        policy = self.get_polling_policy()
+        policy.reset()
         start_time = time.time()
         status_matched = False
         response = {}
@@ -34,18 +65,25 @@ class StateMonitor(ABC):
 
         logger.info("Started monitoring the state...")
         while not is_timeout and not status_matched:
-            response, status_matched = self.check_status()
+            # Status checks always have to reach the server
+            with fresh_reads():
+                response, status_matched = self.check_status()
+            policy.record_check(self.get_progress())
             if not query_retries:
                 return status_matched
 
             if not status_matched:
-                logger.info(f"Wait {self.DEFAULT_CHECK_INTERVAL_IN_SEC} seconds for the next check...")
-                time.sleep(self.DEFAULT_CHECK_INTERVAL_IN_SEC)
+                interval = policy.next_wait()
+                # Monitors that wait server side, like the tasks/poll long-poll, don't sleep
+                if interval:
+                    logger.info(f"Wait {round(interval, 1):g} seconds for the next check...")
+                    time.sleep(interval)
 
             elapsed_time = time.time() - start_time
             if elapsed_time >= self.DEFAULT_TIMEOUT_IN_SEC:
                 is_timeout = True
 
+        record_polling_stats(type(self).__name__, policy, status_matched)
         if status_matched:
             logger.info(f"Completed {type(self).__name__} in duration: {elapsed_time:.2f} seconds")
             return response, True
@@ -54,6 +92,57 @@ class StateMonitor(ABC):
             logger.error(timeout_message)
             return None, False
 
+    def monitor_async(self) -> Future:
+        """
+        Monitor on the shared scheduler, instead of blocking the current thread
+
+        Returns:
+          Future: Resolves to (response, True) if target status is matched, (None, False) on timeout
+        """
+        return get_monitor_scheduler().submit(self)
+
+    def get_polling_policy(self) -> PollingPolicy:
+        """
+        Returns:
+          PollingPolicy: Policy of the monitor, built from DEFAULT_POLLING_POLICY & the configured overrides. A
+            DEFAULT_CHECK_INTERVAL_IN_SEC set on the instance, eg. by the caller, wins over the declared policy and
+            the checks are made at that fixed interval
+        """
+        # The subclasses don't call the constructor of StateMonitor, build the policy on first use
+        policy = getattr(self, "_polling_policy", None)
+        if policy is None:
+            defaults = self.DEFAULT_POLLING_POLICY
+            interval_set = "DEFAULT_CHECK_INTERVAL_IN_SEC" in vars(self) and "DEFAULT_POLLING_POLICY" not in vars(self)
+            if defaults is None or interval_set:
+                interval = self.DEFAULT_CHECK_INTERVAL_IN_SEC
+                defaults = {"initial_interval": interval, "min_interval": interval, "max_interval": interval,
+                            "backoff_factor": 1, "jitter": 0}
+            policy = self._polling_policy = build_polling_policy(type(self).__name__, defaults)
+        return policy
+
+    def get_progress(self) -> Optional[float]:
+        """
+        Percent complete seen by the last check, used to estimate the ETA. None if the monitor can't tell
+        """
+        return None
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        """
+        Monitors of the same class with the same key are checked together by check_status_coalesced, eg. the
+        monitors polling the same endpoint. None to always check the monitor on its own
+        """
+        return None
+
+    @classmethod
+    def check_status_coalesced(cls, monitors: List["StateMonitor"]) -> List:
+        """
+        Check the status of the monitors that are due together. Override to share the API calls
+
+        Returns:
+          list: (response, status) of the monitors, in the same order
+        """
+        return [monitor.check_status() for monitor in monitors]
+
     @abstractmethod
     def check_status(self):
         """
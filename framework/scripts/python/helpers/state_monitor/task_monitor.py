@@ -1,18 +1,51 @@
-from typing import List, Optional, Generator
+import math
+import time
+from datetime import datetime
+from typing import List, Optional, Generator, Dict
 from framework.helpers.log_utils import get_logger
 from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
 from .state_monitor import StateMonitor
 from ..v3.task import Task
 
 logger = get_logger(__name__)
 
+# Max tasks/poll calls in flight per check, each call polls a chunk of 100 tasks
+MAX_POLLS_IN_FLIGHT = 4
+POLL_TIMEOUT_IN_SEC = 30
+FAILED_TASK_STATES = ["FAILED", "CANCELED"]
+
+
+def get_distribution(values: List[float]) -> Dict:
+    """
+    Nearest-rank distribution of the values
+
+    Args:
+        values (list): Values, eg. task durations in seconds
+    Returns:
+        dict: count, min, p50, p90, p99 & max of the values, only the count if there are no values
+    """
+    if not values:
+        return {"count": 0}
+
+    values = sorted(values)
+
+    def percentile(p):
+        return round(values[max(math.ceil(p / 100 * len(values)) - 1, 0)], 2)
+
+    return {"count": len(values), "min": round(values[0], 2), "p50": percentile(50), "p90": percentile(90),
+            "p99": percentile(99), "max": round(values[-1], 2)}
+
 
 class PcTaskMonitor(StateMonitor):
     """
-    The class to wait for task status to come in expected state
+    The class to wait for task status to come in expected state. Only the outstanding tasks are polled, the tasks
+    that finished are dropped for good. v3 tasks/poll waits server side until a task finishes, so the monitor
+    doesn't sleep between the checks when it polls v3 tasks.
     """
     DEFAULT_CHECK_INTERVAL_IN_SEC = 5
     DEFAULT_TIMEOUT_IN_SEC = 600
+    DEFAULT_POLLING_POLICY = {"initial_interval": 2, "min_interval": 1, "max_interval": 15}
 
     def __init__(self, session: RestAPIUtil, task_op = None, **kwargs):
         """
@@ -29,6 +62,15 @@ class PcTaskMonitor(StateMonitor):
         self.completed_task_list = []
         self.failed_task_list = []
         self.task_op = task_op or Task(self.session)
+        # Ordered set of the tasks that haven't finished, built on the first check
+        self.outstanding: Optional[Dict[str, None]] = None
+        # task uuid -> duration of the task in seconds
+        self.task_durations: Dict[str, float] = {}
+        self.start_time = None
+        # v4 Task.poll doesn't long-poll, keep sleeping between the checks for it
+        self.long_poll = isinstance(self.task_op, Task)
+        if self.long_poll:
+            self.DEFAULT_CHECK_INTERVAL_IN_SEC = 0
 
     def check_status(self) -> (Optional[str], bool):
         """
@@ -36,34 +78,110 @@ class PcTaskMonitor(StateMonitor):
         Returns:
           True if in expected state else false
         """
-        logger.info("Total Tasks: {}".format(len(self.task_uuid_list)))
-        logger.info("Completed Tasks: {}".format(len(self.completed_task_list)))
+        self._start()
+        logger.info("Total Tasks: {}".format(len(self.task_uuid_list or [])))
+        logger.info("Outstanding Tasks: {}".format(len(self.outstanding)))
 
-        completed = False
-        response = None
+        self._record(self._poll(list(self.outstanding)))
+        return self._evaluate()
 
-        if not self.task_uuid_list:
-            completed = True
+    def get_progress(self) -> Optional[float]:
+        if not self.task_uuid_list or self.outstanding is None:
+            return None
+        return 100 * (len(self.task_uuid_list) - len(self.outstanding)) / len(self.task_uuid_list)
 
-        self.completed_task_list = []
-        self.failed_task_list = []        
-        for subset_uuid_list in self.__uuid_list_chunks(self.task_uuid_list):
-            completed_tasks = self.task_op.poll(subset_uuid_list)
-            for completed_task in completed_tasks:
-                if completed_task.get("status") in ["FAILED", "CANCELED"]:
-                    self.failed_task_list.append(completed_task)
-                else:
-                    self.completed_task_list.append(completed_tasks)
-
-        if len(self.completed_task_list) == len(self.task_uuid_list):
-            completed = True
-        elif len(self.completed_task_list) + len(self.failed_task_list) == len(self.task_uuid_list):
-            completed = True
-            response = f"{self.failed_task_list}"
+    def coalesce_key(self):
+        # Monitors of the same PC poll their tasks together
+        return self.session
+
+    @classmethod
+    def check_status_coalesced(cls, monitors: List["PcTaskMonitor"]) -> List:
+        """
+        Poll the outstanding tasks of all the monitors with one set of tasks/poll calls
+        """
+        if len(monitors) == 1:
+            return [monitors[0].check_status()]
+
+        for monitor in monitors:
+            monitor._start()
+        task_uuid_list = list(dict.fromkeys(uuid for monitor in monitors for uuid in monitor.outstanding))
+        completed_tasks = monitors[0]._poll(task_uuid_list)
+        logger.info(f"Polled {len(task_uuid_list)} tasks of {len(monitors)} monitors together")
+
+        results = []
+        for monitor in monitors:
+            monitor._record(completed_tasks)
+            results.append(monitor._evaluate())
+        return results
+
+    def get_duration_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Distribution of the durations of the finished tasks, in seconds
+        """
+        return get_distribution(list(self.task_durations.values()))
+
+    def _start(self):
+        if self.outstanding is None:
+            self.outstanding = dict.fromkeys(self.task_uuid_list or [])
+            self.start_time = time.time()
+
+    def _poll(self, task_uuid_list: List) -> List:
+        """
+        Poll the chunks of the tasks concurrently
+
+        Returns:
+            list: Tasks that finished
+        """
+        chunks = list(self.__uuid_list_chunks(task_uuid_list))
+        kwargs = {"poll_timeout_secs": POLL_TIMEOUT_IN_SEC} if self.long_poll else {}
+        if len(chunks) <= 1:
+            return self.task_op.poll(chunks[0], **kwargs) if chunks else []
+
+        with ContextThreadPoolExecutor(max_workers=min(MAX_POLLS_IN_FLIGHT, len(chunks))) as executor:
+            responses = list(executor.map(lambda chunk: self.task_op.poll(chunk, **kwargs), chunks))
+        return [task for completed_tasks in responses for task in completed_tasks]
+
+    def _record(self, completed_tasks: List):
+        """
+        Drop the finished tasks from the outstanding tasks and record their durations
+        """
+        now = time.time()
+        for completed_task in completed_tasks:
+            uuid = completed_task.get("uuid") or completed_task.get("ext_id")
+            if uuid not in self.outstanding:
+                continue
+            del self.outstanding[uuid]
+
+            if completed_task.get("status") in FAILED_TASK_STATES:
+                self.failed_task_list.append(completed_task)
+            else:
+                self.completed_task_list.append(completed_task)
+            self.task_durations[uuid] = self._get_duration(completed_task, now)
 
+    def _get_duration(self, task: Dict, now: float) -> float:
+        # v3 tasks
+        created, completed = task.get("creation_time_usecs"), task.get("completion_time_usecs")
+        if created and completed:
+            return (completed - created) / 1e6
+        # v4 tasks
+        created, completed = task.get("created_time"), task.get("completed_time")
+        if isinstance(created, datetime) and isinstance(completed, datetime):
+            return (completed - created).total_seconds()
+        # When the monitor saw the task finish
+        return now - self.start_time
+
+    def _evaluate(self) -> (Optional[str], bool):
         logger.info("[{}/{}] Tasks Completed".format(len(self.completed_task_list),
-                                                     len(self.task_uuid_list)))
-        return response, completed
+                                                     len(self.task_uuid_list or [])))
+        if self.outstanding:
+            return None, False
+
+        if self.task_durations:
+            logger.info(f"Task durations in seconds: {self.get_duration_stats()}")
+        if self.failed_task_list:
+            return f"{self.failed_task_list}", True
+        return None, True
 
     @staticmethod
     def __uuid_list_chunks(uuid_list: List, chunk_size=100) -> Generator[List, None, None]:
@@ -1,3 +1,4 @@
+from typing import Optional
 from framework.helpers.log_utils import get_logger
 from framework.helpers.rest_utils import RestAPIUtil
 from .state_monitor import StateMonitor
@@ -12,6 +13,7 @@ class VmIpMonitorPe(StateMonitor):
     """
     DEFAULT_CHECK_INTERVAL_IN_SEC = 30
     DEFAULT_TIMEOUT_IN_SEC = 2 * 60
+    DEFAULT_POLLING_POLICY = {"initial_interval": 5, "min_interval": 5, "max_interval": 30}
 
     def __init__(self, session: RestAPIUtil, vm_name_list: list):
         """
@@ -52,3 +54,8 @@ class VmIpMonitorPe(StateMonitor):
             response = self.vms_without_ip
         logger.info(f"{len(self.vms_with_ip)}/{len(self.vm_name_list)} VMs have IP address")
         return response, completed
+
+    def get_progress(self) -> Optional[float]:
+        if not self.vm_name_list:
+            return None
+        return 100 * len(self.vms_with_ip) / len(self.vm_name_list)
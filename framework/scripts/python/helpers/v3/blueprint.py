@@ -4,11 +4,13 @@ from ..pc_entity_v3 import PcEntity
 
 class Blueprint(PcEntity):
     kind = 'blueprint'
+    NAME_FILTER = "name=={};state!=DELETED"
 
     def __init__(self, session: RestAPIUtil):
         self.resource_type = "/blueprints"
         super(Blueprint, self).__init__(session=session)
 
     def list(self, **kwargs):
-        filter_criteria = kwargs.pop('filters', 'state!=DELETED')
+        filter_criteria = kwargs.pop('filter', 'state!=DELETED')
+        filter_criteria = kwargs.pop('filters', filter_criteria)
         return super(Blueprint, self).list(filter=filter_criteria, **kwargs)
@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional
 
+from framework.helpers.async_rest_utils import gather_with_concurrency, is_loop_running
 from framework.helpers.rest_utils import RestAPIUtil
 from ..pc_entity_v3 import PcEntity
 
@@ -42,11 +43,50 @@ class Category(PcEntity):
         # We are using update as we need to use PUT to create categories
         self.update(endpoint=name, data=data)
 
+    async def async_get_values(self, name: str) -> Optional[List]:
+        """
+        Get the first page of the values of the category, with the async session. Shares the cached responses
+        with get_values.
+        Args:
+          name(str): The name of the category
+
+        Returns:
+          List<dict>, same as get_values. None if the values don't fit in one page
+        """
+        payload = {
+            "kind": self.kind,
+            "offset": 0,
+            "filter": "",
+            "length": self.V3_LIST_CHUNKSIZE,
+            "sort_order": None,
+            "sort_attribute": None
+        }
+        uri = f"{self.resource}/{name}/list"
+        hit, response = self._get_cached_response(uri, payload)
+        if not hit:
+            response = await self.async_get_response(uri, method="POST", data=payload)
+            self._set_cached_response(uri, payload, response)
+        values = response.get(self.entity_type, [])
+        if response.get("metadata", {}).get("total_matches", 0) > len(values):
+            return None
+        return values
+
     def categories_with_values(self) -> List:
         category_entity_list = self.list()
-        for category in category_entity_list:
-            category["values"] = [value.get("value")
-                                  for value in self.get_values(category["name"])]
+        if not category_entity_list:
+            return category_entity_list
+
+        if is_loop_running():
+            # Called from a coroutine, the calls can't be made over a new event loop
+            values_list = [None] * len(category_entity_list)
+        else:
+            # One values call per category, all of them are made over one event loop
+            values_list = self.async_session.run(
+                gather_with_concurrency(self.async_get_values(category["name"]) for category in category_entity_list))
+        for category, values in zip(category_entity_list, values_list):
+            if values is None:
+                values = self.get_values(category["name"])
+            category["values"] = [value.get("value") for value in values]
 
         return category_entity_list
 
@@ -5,6 +5,7 @@ from ..pc_entity_v3 import PcEntity
 
 class Network(PcEntity):
     kind = "subnet"
+    INDEX_FILTER_ATTRIBUTES = {"name": (), "cluster_name": ("cluster_reference", "name")}
 
     def __init__(self, session: RestAPIUtil):
         self.resource_type = "/subnets"
@@ -16,6 +16,8 @@ class VmPowerState(object):
 class VM(PcEntity):
     kind = "vm"
     MACHINE_TYPE = "Q35"
+    NAME_FILTER = "vm_name=={}"
+    INDEX_FILTER_ATTRIBUTES = {"vm_name": (), "cluster_name": ("cluster_reference", "name")}
 
     def __init__(self, session: RestAPIUtil):
         self.resource_type = "/vms"
@@ -1,7 +1,19 @@
-from typing import List
+from typing import List, Dict, Optional
+from framework.helpers.log_utils import get_logger
 from framework.helpers.v4_api_client import ApiClientV4
+from framework.helpers.worker_pool import ContextThreadPoolExecutor
 import ntnx_prism_py_client
 
+logger = get_logger(__name__)
+
+PENDING_TASK_STATES = ["RUNNING", "QUEUED"]
+# Task ext ids per list call, the ids are sent in the $filter of the url
+TASK_IDS_PER_FILTER = 50
+TASK_LIST_LIMIT = 100
+# Max list/ get calls in flight per poll
+MAX_TASK_POLLS_IN_FLIGHT = 8
+
+
 class Task:
     kind = "task"
 
@@ -11,22 +23,80 @@ class Task:
         self.tasks_api = ntnx_prism_py_client.TasksApi(
             api_client=self.client
             )
+        # Turned off if the PC rejects the filtered list, the tasks are then fetched one by one
+        self.bulk_poll = True
 
-    def poll(self, task_uuid_list: List) -> List:
+    def poll(self, task_uuid_list: List, poll_timeout_secs: Optional[int] = None) -> List:
         """
-        Call tasks/poll api to poll till the task_uuid is complete
+        Get the tasks that are complete. The tasks are listed with an extId filter, the tasks missing from the
+        list are fetched by id.
         Args:
           task_uuid_list (list) : List of Task UUIDs to Poll
+          poll_timeout_secs (int, optional): Unused, v4 has no long-poll. Same signature as the v3 Task.poll
 
         Returns:
-          Response
+          list: Completed tasks, as dicts
+        """
+        tasks = {}
+        if self.bulk_poll and task_uuid_list:
+            try:
+                tasks = self.list_tasks_by_id(task_uuid_list)
+            except Exception as e:
+                logger.warning(f"Failed to list the tasks with an extId filter, fetching them by id: {e}")
+                self.bulk_poll = False
+
+        missing_task_ids = [task_id for task_id in task_uuid_list if task_id not in tasks]
+        if missing_task_ids:
+            tasks.update(self.get_tasks_by_id(missing_task_ids))
+
+        return [tasks[task_id] for task_id in task_uuid_list
+                if task_id in tasks and tasks[task_id].get("status") not in PENDING_TASK_STATES]
+
+    def list_tasks_by_id(self, task_uuid_list: List) -> Dict[str, Dict]:
         """
-        completed_tasks = []
-        for task in task_uuid_list:
-            task_response = self.tasks_api.get_task_by_id(task)
-            if task_response.data.status not in ["RUNNING", "QUEUED"]:
-              completed_tasks.append(task_response.to_dict()['data'])
+        List the tasks with extId filters, the filters of the chunks of ids are listed concurrently
+        Args:
+          task_uuid_list (list): Task ext ids
+
+        Returns:
+          dict: Task ext id to task dict
+        """
+        chunks = [task_uuid_list[i:i + TASK_IDS_PER_FILTER]
+                  for i in range(0, len(task_uuid_list), TASK_IDS_PER_FILTER)]
+        with ContextThreadPoolExecutor(max_workers=min(MAX_TASK_POLLS_IN_FLIGHT, len(chunks))) as executor:
+            responses = list(executor.map(self._list_tasks, chunks))
+        return {task["ext_id"]: task for tasks in responses for task in tasks}
+
+    def get_tasks_by_id(self, task_uuid_list: List) -> Dict[str, Dict]:
+        """
+        Get the tasks one by one, with at most MAX_TASK_POLLS_IN_FLIGHT calls in flight
+        Args:
+          task_uuid_list (list): Task ext ids
+
+        Returns:
+          dict: Task ext id to task dict
+        """
+        with ContextThreadPoolExecutor(max_workers=min(MAX_TASK_POLLS_IN_FLIGHT, len(task_uuid_list))) as executor:
+            responses = list(executor.map(self.tasks_api.get_task_by_id, task_uuid_list))
+        return {task_id: response.to_dict()["data"] for task_id, response in zip(task_uuid_list, responses)}
+
+    def _list_tasks(self, task_uuid_list: List) -> List[Dict]:
+        task_filter = " or ".join(f"extId eq '{task_id}'" for task_id in task_uuid_list)
+        tasks = []
+        page = 0
+        while True:
+            response = self.tasks_api.list_tasks(_page=page, _limit=TASK_LIST_LIMIT, _filter=task_filter)
+            data = response.to_dict().get("data") or []
+            tasks.extend(data)
+
+            total = self._get_total_available_results(response)
+            if not data or len(data) < TASK_LIST_LIMIT or (total is not None and len(tasks) >= total):
+                return tasks
+            page += 1
 
-        return completed_tasks
+    @staticmethod
+    def _get_total_available_results(response) -> Optional[int]:
+        metadata = getattr(response, "metadata", None)
+        return getattr(metadata, "total_available_results", None) if metadata else None
 
     # todo don't make other PcEntity methods available for Tasks
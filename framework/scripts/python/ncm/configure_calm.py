@@ -20,6 +20,7 @@ class CalmConfig(Script):
     """
     Configure Calm with below configs
     """
+    COMPOSITE = True
 
     def __init__(self, data: Dict, global_data: Dict, results_key: str = "", log_file: Optional[str] = None, **kwargs):
         self.data = deepcopy(data)
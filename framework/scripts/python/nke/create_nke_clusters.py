@@ -4,6 +4,7 @@ from framework.helpers.log_utils import get_logger
 from framework.scripts.python.helpers.karbon.karbon_clusters import KarbonCluster, KarbonClusterV1
 from framework.scripts.python.helpers.karbon.karbon_image import KarbonImage
 from framework.scripts.python.helpers.state_monitor.karbon_image_monitor import KarbonImageDownloadMonitor
+from framework.scripts.python.helpers.state_monitor.monitor_scheduler import monitor_all
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.script import Script
 
@@ -56,18 +57,21 @@ class CreateKarbonClusterPc(Script):
                 if image_obj.get("status") == KarbonImage.AVAILABLE and image_obj.get("uuid"):
                     images_to_download.add(image_obj["uuid"])
 
+            # Start all the downloads, then wait for them together on the shared scheduler
+            download_monitors = []
             for image_to_download in images_to_download:
                 self.logger.info(f"Downloading the os-image '{image_to_download}'...")
                 response = image_op.download(image_to_download)
                 if not response.get("image_uuid"):
                     self.logger.error("Downloading image failed")
                     continue
-                image_uuid = response["image_uuid"]
-                response, status = KarbonImageDownloadMonitor(self.pc_session, image_uuid).monitor()
+                download_monitors.append(KarbonImageDownloadMonitor(self.pc_session, response["image_uuid"]))
 
+            for response, status in monitor_all(download_monitors):
                 if not status:
                     self.logger.error(f"Downloading image failed. {response}")
-                self.logger.error("Downloaded the image successfully")
+                else:
+                    self.logger.info("Downloaded the image successfully")
 
             for cluster_to_create in self.data["nke_clusters"]:
                 name = cluster_to_create.get("name")
@@ -16,7 +16,7 @@ from framework.scripts.python.pc.enable.enable_dr_pc import EnableDR
 from framework.scripts.python.pc.enable.enable_flow_pc import EnableMicrosegmentation
 from framework.scripts.python.pc.enable.enable_network_controller import EnableNetworkController
 from framework.scripts.python.pc.enable.enable_nke_pc import EnableNke
-from framework.scripts.python.helpers.batch_script import BatchScript
+from framework.scripts.python.helpers.dag_script import DagScript
 from framework.scripts.python.script import Script
 from framework.scripts.python.pc.create.add_ad_server_pc import AddAdServerPc
 from framework.scripts.python.pc.create.add_name_server_pc import AddNameServersPc
@@ -32,6 +32,7 @@ class PcConfig(Script):
     """
     Configure PC with below configs
     """
+    COMPOSITE = True
 
     def __init__(self, data: Dict, global_data: Dict = None, results_key: str = "", log_file: Optional[str] = None,
                  **kwargs):
@@ -53,84 +54,94 @@ class PcConfig(Script):
             if not self.data.get("pc_session"):
                 create_pc_objects(self.data, global_data=self.global_data)
 
-            pc_batch_scripts = BatchScript(results_key=self.results_key)
+            pc_batch_scripts = DagScript(results_key=self.results_key)
 
             # Initial PC config
             # Assumed this is already taken care in management config
             if "new_pc_admin_credential" in self.data:
                 # todo this will change for a CMSP PC. Need to check
-                pc_batch_scripts.add(ChangeDefaultAdminPasswordPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(ChangeDefaultAdminPasswordPc(self.data, log_file=self.log_file),
+                                     produces=["initial_pc_config"])
             if "eula" in self.data:
-                pc_batch_scripts.add(AcceptEulaPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(AcceptEulaPc(self.data, log_file=self.log_file),
+                                     depends=["ChangeDefaultAdminPasswordPc"], produces=["initial_pc_config"])
             if "enable_pulse" in self.data:
-                pc_batch_scripts.add(UpdatePulsePc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(UpdatePulsePc(self.data, log_file=self.log_file),
+                                     depends=["ChangeDefaultAdminPasswordPc", "AcceptEulaPc"],
+                                     produces=["initial_pc_config"])
 
+            # Add Auth -> needs PC config
+            # Create IdP -> needs AddAdServer, like the auth configs always ran one after the other
             if "pc_directory_services" in self.data or "directory_services" in self.data:
-                # Add Auth -> needs PC config
-                pc_batch_scripts.add(AddAdServerPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(AddAdServerPc(self.data, log_file=self.log_file), depends=["initial_pc_config"])
             if "pc_saml_idp_configs" in self.data or "saml_idp_configs" in self.data:
-                pc_batch_scripts.add(CreateIdp(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateIdp(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config", "AddAdServerPc"])
 
             # Add Role-mappings -> needs AddAdServer
-            # Add NTP servers -> InitialPcConfig
-            # Add Name servers -> InitialPcConfig
-            pc_enable_scripts = BatchScript(parallel=True)
+            # Enable services, Add NTP servers, Add Name servers -> InitialPcConfig
             if "enable_microsegmentation" in self.data and self.data["enable_microsegmentation"] is True:
-                pc_enable_scripts.add(EnableMicrosegmentation(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(EnableMicrosegmentation(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
             if "enable_dr" in self.data and self.data["enable_dr"] is True:
-                pc_enable_scripts.add(EnableDR(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(EnableDR(self.data, log_file=self.log_file), depends=["initial_pc_config"])
             if "enable_nke" in self.data and self.data["enable_nke"] is True:
-                pc_enable_scripts.add(EnableNke(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(EnableNke(self.data, log_file=self.log_file), depends=["initial_pc_config"])
             if "remote_azs" in self.data:
-                pc_enable_scripts.add(ConnectToAz(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(ConnectToAz(self.data, log_file=self.log_file), depends=["initial_pc_config"])
             if "ntp_servers_list" in self.data or "pc_ntp_servers_list" in self.data:
-                pc_enable_scripts.add(AddNtpServersPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(AddNtpServersPc(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
             if "name_servers_list" in self.data or "pc_name_servers_list" in self.data:
-                pc_enable_scripts.add(AddNameServersPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(AddNameServersPc(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
             if "pc_directory_services" in self.data or "directory_services" in self.data:
-                pc_enable_scripts.add(CreateRoleMappingPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateRoleMappingPc(self.data, log_file=self.log_file),
+                                     depends=["AddAdServerPc"])
             if "enable_network_controller" in self.data and self.data["enable_network_controller"] is True:
-                pc_enable_scripts.add(EnableNetworkController(self.data, log_file=self.log_file))
-            if pc_enable_scripts.script_list:
-                pc_batch_scripts.add(pc_enable_scripts)
+                pc_batch_scripts.add(EnableNetworkController(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
 
             # Entities without any dependencies
             # Create Categories in PC
             # Create AddressGroups
             # Create ServiceGroups
-            pc_create_scripts = BatchScript(parallel=True)
             if "categories" in self.data:
-                pc_create_scripts.add(CreateCategoryPc(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateCategoryPc(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
             if "address_groups" in self.data:
-                pc_create_scripts.add(CreateAddressGroups(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateAddressGroups(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
             if "service_groups" in self.data:
-                pc_create_scripts.add(CreateServiceGroups(self.data, log_file=self.log_file))
-
-            if pc_create_scripts.script_list:
-                pc_batch_scripts.add(pc_create_scripts)
+                pc_batch_scripts.add(CreateServiceGroups(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config"])
 
             # Entities with dependencies
-            # Add Security Policies -> needs CreateAddressGroups, CreateServiceGroups
-            # create PP -> needs EnableDR
-            pc_dependant_scripts = BatchScript(parallel=True)
+            # The dependencies that aren't in the config are ignored, so all of them depend on the PC config too
+            # Add Security Policies -> needs CreateAddressGroups, CreateServiceGroups, the categories & Flow enabled
+            # create PP -> needs EnableDR, the categories & the remote AZs
             if "security_policies" in self.data:
-                pc_dependant_scripts.add(CreateNetworkSecurityPolicy(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateNetworkSecurityPolicy(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config", "CreateAddressGroups", "CreateServiceGroups",
+                                              "CreateCategoryPc", "EnableMicrosegmentation",
+                                              "EnableNetworkController"])
             if "protection_rules" in self.data:
-                pc_dependant_scripts.add(CreateProtectionPolicy(self.data, log_file=self.log_file))
-
-            if pc_dependant_scripts.script_list:
-                pc_batch_scripts.add(pc_dependant_scripts)
+                pc_batch_scripts.add(CreateProtectionPolicy(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config", "EnableDR", "CreateCategoryPc", "ConnectToAz"])
 
-            # create RP -> needs CreateProtectionPolicy
+            # create RP -> needs CreateProtectionPolicy, the categories & the remote AZs
             if "recovery_plans" in self.data:
-                pc_batch_scripts.add(CreateRecoveryPlan(self.data, log_file=self.log_file))
+                pc_batch_scripts.add(CreateRecoveryPlan(self.data, log_file=self.log_file),
+                                     depends=["initial_pc_config", "EnableDR", "CreateCategoryPc", "ConnectToAz",
+                                              "CreateProtectionPolicy"])
 
             if "objects" in self.data or "enable_objects" in self.data:
-                # Create objects
+                # Create objects -> needs the NTP & Name servers
                 if self.data.get("objects", {}).get("objectstores"):
                     pc_batch_scripts.add(OssConfig(data=deepcopy(self.data), global_data=self.data,
                                                    results_key="objects",
-                                                   log_file="objects_ops.log"))
+                                                   log_file="objects_ops.log"),
+                                         depends=["initial_pc_config", "AddNtpServersPc", "AddNameServersPc"])
             self.results.update(pc_batch_scripts.run())
             self.data["json_output"] = self.results
         except Exception as e:
@@ -1,6 +1,8 @@
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import (CREATE, PlanItem, batch_api_calls, diff, get_inventory,
+                                                invalidate_inventory)
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.pc.pc_script import PcScript
 
@@ -24,14 +26,15 @@ class CreateAddressGroups(PcScript):
 
     def execute(self):
         try:
-            address_group_name_list = self.address_group_util.get_name_list()
             if not self.address_groups:
                 self.logger.warning(f"No Address Groups to create in {self.data['pc_ip']!r}. Skipping...")
                 return
 
             ags_to_create = []
-            for ag in self.address_groups:
-                if ag["name"] in address_group_name_list:
+            # Only the address groups that don't exist yet
+            for item in self.plan():
+                ag = item.spec
+                if item.action != CREATE:
                     self.logger.warning(f"'{ag['name']}' Address Group already exists in {self.data['pc_ip']!r}!")
                     continue
                 try:
@@ -45,6 +48,7 @@ class CreateAddressGroups(PcScript):
                 return
             self.logger.info(f"Trigger batch create API for Address groups in {self.data['pc_ip']!r}")
             self.task_uuid_list = self.address_group_util.batch_op.batch_create(request_payload_list=ags_to_create)
+            invalidate_inventory(self.pc_session, "address_group")
             
             # Monitor the tasks
             if self.task_uuid_list:
@@ -64,6 +68,12 @@ class CreateAddressGroups(PcScript):
         except Exception as e:
             self.exceptions.append(e)
 
+    def plan(self) -> Optional[List[PlanItem]]:
+        existing = get_inventory(self.pc_session, "address_group",
+                                 lambda: {name: [] for name in self.address_group_util.get_name_list()})
+        # Created with one batch call
+        return batch_api_calls(diff(self.address_groups, existing, "address_group", target=self.data["pc_ip"]))
+
     def verify(self):
         if not self.address_groups:
             return
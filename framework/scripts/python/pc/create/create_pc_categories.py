@@ -1,6 +1,9 @@
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.helpers.log_utils import get_logger
+from framework.helpers.cache_utils import fresh_reads
+from framework.helpers.reconcile_utils import (CREATE, UNCHANGED, PlanItem, batch_api_calls, diff, get_inventory,
+                                                group_by_name, invalidate_inventory)
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.pc.pc_script import PcScript
 
@@ -28,26 +31,24 @@ class CreateCategoryPc(PcScript):
                 self.logger.warning(f"No categories to create. Skipping category creation in {self.data['pc_ip']!r}")
                 return
 
-            existing_categories_list = self.category_util.categories_with_values()
-
             category_list = []
-            for category_to_create in self.categories:
-                name = category_to_create.get("name")
-                description = category_to_create.get("description")
-                values = category_to_create.get("values")
-
-                category_exists = next((existing_category for existing_category in existing_categories_list
-                                        if existing_category["name"] == name), None)
+            # Only the categories that don't exist yet & the values missing in the existing ones
+            for item in self.plan():
+                if item.action == UNCHANGED:
+                    continue
+                name = item.name
+                description = item.spec.get("description")
+                values = item.spec.get("values")
 
                 try:
                     # Category is already there, just need to add values to the category
-                    if category_exists:
-                        values = [value_to_create for value_to_create in values
-                                  if value_to_create not in category_exists["values"]]
+                    if item.action != CREATE:
+                        values = item.changes["values"]
                     else:
                         # create category first
                         self.logger.info(f"Creating category {name} in {self.data['pc_ip']!r}")
                         self.category_util.create_category(name, description)
+                        invalidate_inventory(self.pc_session, "category")
 
                     if values:
                         # add values to the category
@@ -66,6 +67,7 @@ class CreateCategoryPc(PcScript):
 
             self.logger.info(f"Trigger batch create API for Categories in {self.data['pc_ip']!r}")
             self.task_uuid_list = self.category_util.batch_values_add(category_list)
+            invalidate_inventory(self.pc_session, "category")
             # Monitor the tasks
             if self.task_uuid_list:
                 app_response, status = PcTaskMonitor(
@@ -82,6 +84,23 @@ class CreateCategoryPc(PcScript):
         except Exception as e:
             self.exceptions.append(e)
 
+    def plan(self) -> Optional[List[PlanItem]]:
+        existing = get_inventory(self.pc_session, "category",
+                                 lambda: group_by_name(self.category_util.categories_with_values()))
+
+        def get_changes(category: Dict, existing_categories: List[Dict]) -> Optional[Dict]:
+            missing_values = [value for value in category.get("values") or []
+                              if value not in existing_categories[0]["values"]]
+            return {"values": missing_values} if missing_values else None
+
+        items = diff(self.categories, existing, "category", target=self.data["pc_ip"], get_changes=get_changes)
+        # The values of all the categories are added with one batch call, the new categories are created one by one
+        batch_api_calls([item for item in items if item.action != CREATE or item.spec.get("values")])
+        for item in items:
+            if item.action == CREATE:
+                item.api_calls += 1
+        return items
+
     def verify(self):
         if not self.categories:
             return
@@ -95,7 +114,10 @@ class CreateCategoryPc(PcScript):
         # todo modify verifications to include values
         existing_categories_list = []
         for category_to_create in self.categories:
-            existing_categories_list = existing_categories_list or self.category_util.categories_with_values() 
+            if not existing_categories_list:
+                # Categories were just created, don't use the cached list
+                with fresh_reads():
+                    existing_categories_list = self.category_util.categories_with_values()
             name = category_to_create.get("name")
             values = category_to_create.get("values")
             # Initial status
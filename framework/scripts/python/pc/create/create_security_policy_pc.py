@@ -1,5 +1,6 @@
 from typing import Dict
 from framework.helpers.log_utils import get_logger
+from framework.helpers.cache_utils import fresh_reads
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.pc.pc_script import PcScript
 
@@ -72,7 +73,10 @@ class CreateNetworkSecurityPolicy(PcScript):
         for sg in self.security_policies:
             self.results["Create_Security_policies"][sg['name']] = "CAN'T VERIFY"
 
-            security_policy_name_list = security_policy_name_list or self.security_policy_util.get_name_list()
+            if not security_policy_name_list:
+                # Policies were just created, don't use the cached list
+                with fresh_reads():
+                    security_policy_name_list = self.security_policy_util.get_name_list()
 
             if sg["name"] in security_policy_name_list:
                 self.results["Create_Security_policies"][sg['name']] = "PASS"
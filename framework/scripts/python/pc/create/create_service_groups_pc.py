@@ -1,6 +1,8 @@
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import (CREATE, PlanItem, batch_api_calls, diff, get_inventory,
+                                                invalidate_inventory)
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.helpers.v3.service_group import ServiceGroup
 from framework.scripts.python.pc.pc_script import PcScript
@@ -29,11 +31,11 @@ class CreateServiceGroups(PcScript):
                 self.logger.warning(f"No service_groups to create in {self.data['pc_ip']!r}. Skipping...")
                 return
 
-            service_group_name_list = self.service_group_util.get_name_list()
-            
             sgs_to_create = []
-            for sg in self.service_groups:
-                if sg["name"] in service_group_name_list:
+            # Only the service groups that don't exist yet
+            for item in self.plan():
+                sg = item.spec
+                if item.action != CREATE:
                     self.logger.warning(f"{sg['name']} already exists!")
                     continue
                 try:
@@ -47,6 +49,7 @@ class CreateServiceGroups(PcScript):
 
             self.logger.info(f"Trigger batch create API for service groups in {self.data['pc_ip']!r}")
             self.task_uuid_list = self.service_group_util.batch_op.batch_create(request_payload_list=sgs_to_create)
+            invalidate_inventory(self.pc_session, "service_group")
             
             # Monitor the tasks
             if self.task_uuid_list:
@@ -64,6 +67,12 @@ class CreateServiceGroups(PcScript):
         except Exception as e:
             self.exceptions.append(e)
 
+    def plan(self) -> Optional[List[PlanItem]]:
+        existing = get_inventory(self.pc_session, "service_group", lambda: {
+            name: [{"uuid": uuid}] for name, uuid in self.service_group_util.get_name_uuid_dict().items()})
+        # Created with one batch call
+        return batch_api_calls(diff(self.service_groups, existing, "service_group", target=self.data["pc_ip"]))
+
     def verify(self):
         if not self.service_groups:
             return
@@ -1,5 +1,7 @@
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import (DELETE, PlanItem, batch_api_calls, diff, get_inventory,
+                                                invalidate_inventory)
 from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor as TaskMonitor
 from framework.scripts.python.pc.pc_script import PcScript
 
@@ -23,8 +25,6 @@ class DeleteServiceGroups(PcScript):
 
     def execute(self):
         try:
-            service_group_name_uuid_dict = self.service_group_helper.get_name_uuid_dict()
-
             if not self.service_groups:
                 self.logger.warning(
                     f"No service_groups provided to delete in {self.data['pc_ip']!r}"
@@ -32,14 +32,13 @@ class DeleteServiceGroups(PcScript):
                 return
 
             sgs_to_delete = []
-            for sg in self.service_groups:
-                if sg["name"] not in service_group_name_uuid_dict:
-                    self.logger.warning(f"{sg['name']} doesn't exist in {self.data['pc_ip']!r}!")
+            # Only the service groups that exist
+            for item in self.plan():
+                if item.action != DELETE:
+                    self.logger.warning(f"{item.name} doesn't exist in {self.data['pc_ip']!r}!")
                 else:
                     sgs_to_delete.append(
-                        self.service_group_helper.delete_service_group_spec(
-                            service_group_name_uuid_dict[sg["name"]]
-                            )
+                        self.service_group_helper.delete_service_group_spec(item.spec["uuid"])
                     )
 
             if not sgs_to_delete:
@@ -52,6 +51,7 @@ class DeleteServiceGroups(PcScript):
             self.task_uuid_list = self.service_group_helper.batch_op.batch_delete(
                 entity_list=sgs_to_delete
             )
+            invalidate_inventory(self.pc_session, "service_group")
 
             # Monitor the tasks
             if self.task_uuid_list:
@@ -71,6 +71,13 @@ class DeleteServiceGroups(PcScript):
         except Exception as e:
             self.exceptions.append(e)
 
+    def plan(self) -> Optional[List[PlanItem]]:
+        existing = get_inventory(self.pc_session, "service_group", lambda: {
+            name: [{"uuid": uuid}] for name, uuid in self.service_group_helper.get_name_uuid_dict().items()})
+        # Deleted with one batch call
+        return batch_api_calls(diff([], existing, "service_group", target=self.data["pc_ip"],
+                                    delete=[sg["name"] for sg in self.service_groups or []]))
+
     def verify(self):
         if not self.service_groups:
             return
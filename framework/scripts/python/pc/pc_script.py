@@ -1,4 +1,8 @@
+import threading
+import time
+import weakref
 from abc import abstractmethod
+from typing import Optional
 from framework.helpers.log_utils import get_logger
 from framework.scripts.python.script import Script
 from framework.scripts.python.helpers.v3.prism_central import PrismCentral
@@ -33,20 +37,55 @@ ENTITY_VERSION_MAP = {
     "NetworkController": ("pc.2024.3", "network_controller"),
 }
 
+# Versions detected per PC session, reused by the workflows of a long-running process. The sessions are shared
+# per endpoint & credential, see SessionRegistry
+PC_VERSION_TTL_IN_SEC = 3600
+_pc_versions = weakref.WeakKeyDictionary()
+_pc_versions_lock = threading.Lock()
+
+
+def get_cached_pc_version(pc_session) -> Optional[str]:
+    try:
+        with _pc_versions_lock:
+            expiry, version = _pc_versions.get(pc_session, (0, None))
+    except TypeError:
+        # Not weak referenceable, eg. no session
+        return None
+    return version if expiry > time.monotonic() else None
+
+
+def cache_pc_version(pc_session, version: str):
+    try:
+        with _pc_versions_lock:
+            _pc_versions[pc_session] = (time.monotonic() + PC_VERSION_TTL_IN_SEC, version)
+    except TypeError:
+        pass
+
+
 class PcScript(Script):
+    CHECKPOINT_ENABLED = True
+
     def __init__(self, **kwargs):
         if not self.data.get("pc_version"):
             self.data["pc_version"] = self.get_pc_version()
         super(PcScript, self).__init__(**kwargs)
 
     def get_pc_version(self):
+        version = get_cached_pc_version(self.pc_session)
+        if version:
+            return version
         try:
             pc = PrismCentral(self.pc_session)
             pc_data = pc.read()
-            return pc_data['resources']['version']
+            version = pc_data['resources']['version']
         except Exception as e:
             logger.error(f"Failed to get PC version with Unexpected Error: {e}")
             return "default"
+        cache_pc_version(self.pc_session, version)
+        return version
+
+    def get_checkpoint_target(self) -> str:
+        return self.data.get("pc_ip", "")
 
     @staticmethod
     def compare_versions(pc_version, threshold_version):
@@ -1,9 +1,12 @@
 import threading
 import multiprocessing
-import concurrent.futures
 from abc import abstractmethod
-from typing import Dict
+from typing import Dict, List, Optional
+from framework.helpers.checkpoint_utils import TargetCheckpoints, TargetExceptions
+from framework.helpers.event_utils import FAILED, timed_event
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import PlanItem
+from framework.helpers.worker_pool import get_worker_pool
 from framework.scripts.python.script import Script
 
 logger = get_logger(__name__)
@@ -18,34 +21,71 @@ class ClusterScript(Script):
         self.parallel = parallel
         super(ClusterScript, self).__init__(**kwargs)
         self.results["clusters"] = {}
+        # Exceptions are counted per cluster, for the checkpoints
+        self.exceptions = TargetExceptions()
+        self.checkpoints = None
         # Set the value of max_workers based on the number of CPU cores
         self.max_workers = multiprocessing.cpu_count() + 4
 
     def execute(self, **kwargs):
+        # The clusters that succeeded in the run being resumed are skipped, their results are restored
+        self.checkpoints = TargetCheckpoints(type(self).__name__, self.pe_clusters)
+        self.results["clusters"].update(self.checkpoints.restored)
+        clusters = self.checkpoints.pending
+
         if self.parallel:
             try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    executor.map(self.execute_single_cluster, self.pe_clusters.keys(), self.pe_clusters.values())
+                get_worker_pool().map(self._execute_single_cluster, clusters.keys(), clusters.values(),
+                                      hosts=clusters.keys(), script_class=type(self).__name__,
+                                      max_in_flight=self.max_workers, return_exceptions=True)
             except Exception as e:
                 self.exceptions.append(e)
         else:
             try:
-                for cluster_ip, cluster_details in self.pe_clusters.items():
-                    self.execute_single_cluster(cluster_ip, cluster_details)
+                for cluster_ip, cluster_details in clusters.items():
+                    self._execute_single_cluster(cluster_ip, cluster_details)
             except Exception as e:
                 self.exceptions.append(e)
 
     def verify(self, **kwargs):
+        clusters = self.checkpoints.pending if self.checkpoints else self.pe_clusters
         if self.parallel:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                executor.map(self.verify_single_cluster, self.pe_clusters.keys(), self.pe_clusters.values())
+            get_worker_pool().map(self.verify_single_cluster, clusters.keys(), clusters.values(),
+                                  hosts=clusters.keys(), script_class=type(self).__name__,
+                                  max_in_flight=self.max_workers, return_exceptions=True)
         else:
             try:
-                for cluster_ip, cluster_details in self.pe_clusters.items():
+                for cluster_ip, cluster_details in clusters.items():
                     self.verify_single_cluster(cluster_ip, cluster_details)
             except Exception as e:
                 self.exceptions.append(e)
 
+        if self.checkpoints:
+            self.checkpoints.record(self.exceptions, self.results["clusters"])
+
+    def plan(self) -> Optional[List[PlanItem]]:
+        plans = get_worker_pool().map(self.plan_single_cluster, self.pe_clusters.keys(), self.pe_clusters.values(),
+                                      hosts=self.pe_clusters.keys(), script_class=type(self).__name__,
+                                      max_in_flight=self.max_workers)
+        if any(items is None for items in plans):
+            return None
+        return [item for items in plans for item in items]
+
+    def plan_single_cluster(self, cluster_ip: str, cluster_details: Dict) -> Optional[List[PlanItem]]:
+        """
+        Changes the script would make in the cluster, None if the script can't plan its changes
+        """
+        return None
+
+    def get_checkpoint_target(self) -> str:
+        return ", ".join(self.pe_clusters)
+
+    def _execute_single_cluster(self, cluster_ip: str, cluster_details: Dict):
+        with timed_event("target", script=type(self).__name__, target=cluster_ip) as event:
+            self.checkpoints.run(cluster_ip, self.execute_single_cluster, cluster_ip, cluster_details)
+            if self.exceptions.has_failed(cluster_ip):
+                event.update(status=FAILED)
+
     @abstractmethod
     def execute_single_cluster(self, cluster_ip: str, cluster_details: Dict):
         pass
@@ -5,7 +5,7 @@ from framework.scripts.python.pe.create.add_ad_server_pe import AddAdServerPe
 from framework.scripts.python.pe.create.create_container_pe import CreateContainerPe
 # from framework.scripts.python.pc.create.create_pc_subnets import CreateSubnetsPc
 from framework.scripts.python.pe.create.create_rolemapping_pe import CreateRoleMappingPe
-from framework.scripts.python.helpers.batch_script import BatchScript
+from framework.scripts.python.helpers.dag_script import DagScript
 from framework.scripts.python.pe.other_ops.accept_eula import AcceptEulaPe
 from framework.scripts.python.pe.other_ops.change_system_password import ChangeDefaultAdminPasswordPe
 from framework.scripts.python.pe.other_ops.open_replication_ports_clusters import OpenRepPort
@@ -27,6 +27,7 @@ class ClusterConfig(Script):
     """
     Configure Cluster with below configs
     """
+    COMPOSITE = True
 
     def __init__(self, data: Dict, global_data: Dict = None, results_key: str = "", log_file: Optional[str] = None,
                  **kwargs):
@@ -44,7 +45,7 @@ class ClusterConfig(Script):
         if not self.data.get("vault_to_use"):
             self.data["vault_to_use"] = self.global_data.get("vault_to_use")
 
-        cluster_batch_scripts = BatchScript(results_key=self.results_key)
+        cluster_batch_scripts = DagScript(results_key=self.results_key)
 
         # Initial cluster config in all clusters
         cluster_batch_scripts.add(
@@ -54,8 +55,7 @@ class ClusterConfig(Script):
         # Add Auth, AcceptEulaPe, UpdatePulsePe, Register PE to PC, Create containers, Add NTP, Add Name servers,
         # CreateSubnetPe -> needs ChangeDefaultAdminPasswordPe
         # Don't know if we can execute OpenRepPort, before or with ChangeDefaultAdminPasswordPe, so keeping it here
-        main_cluster_batch_scripts = BatchScript(parallel=True)
-        main_cluster_batch_scripts.add_all([
+        cluster_batch_scripts.add_all([
             AcceptEulaPe(self.data, log_file=self.log_file),
             UpdatePulsePe(self.data, log_file=self.log_file),
             AddAdServerPe(self.data, log_file=self.log_file),
@@ -66,19 +66,16 @@ class ClusterConfig(Script):
             CreateSubnetPe(self.data, log_file=self.log_file),
             HaReservation(self.data, log_file=self.log_file),
             RebuildCapacityReservation(self.data, log_file=self.log_file)
-        ])
+        ], depends=["ChangeDefaultAdminPasswordPe"])
         if not self.data.get("skip_pc_registration") and self.data.get("pc_ip") and self.data.get("pc_credential"):
-            main_cluster_batch_scripts.add(RegisterToPc(self.data, log_file=self.log_file))
-        cluster_batch_scripts.add(main_cluster_batch_scripts)
+            cluster_batch_scripts.add(RegisterToPc(self.data, log_file=self.log_file),
+                                      depends=["ChangeDefaultAdminPasswordPe"])
 
         # Update DSIP -> needs ChangeDefaultAdminPasswordPe, fails if we update DSIP with Auth
         # Add Role-mappings -> needs AddAdServer
-        primary_cluster_batch_scripts = BatchScript(parallel=True)
-        primary_cluster_batch_scripts.add_all([
-            UpdateDsip(self.data, log_file=self.log_file),
-            CreateRoleMappingPe(self.data, log_file=self.log_file)
-        ])
-        cluster_batch_scripts.add(primary_cluster_batch_scripts)
+        cluster_batch_scripts.add(UpdateDsip(self.data, log_file=self.log_file),
+                                  depends=["ChangeDefaultAdminPasswordPe", "AddAdServerPe"])
+        cluster_batch_scripts.add(CreateRoleMappingPe(self.data, log_file=self.log_file), depends=["AddAdServerPe"])
 
         self.results.update(cluster_batch_scripts.run())
         self.data["json_output"] = self.results
@@ -1,7 +1,9 @@
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.scripts.python.pe.cluster_script import ClusterScript
 from framework.scripts.python.helpers.v1.container import Container
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import (CREATE, PlanItem, diff, get_inventory, group_by_name,
+                                                invalidate_inventory)
 
 logger = get_logger(__name__)
 
@@ -28,17 +30,17 @@ class CreateContainerPe(ClusterScript):
             if cluster_details.get("containers"):
                 container_op = Container(pe_session)
 
-                # check if already exists
-                container_list = container_op.read()
-                container_name_list = [container.get("name") for container in container_list]
-
-                for container_to_create in cluster_details["containers"]:
-                    if container_to_create.get("name") in container_name_list:
-                        self.logger.warning(f"Container {container_to_create['name']} already exists!")
+                # Only the containers that don't exist yet
+                plan = self.plan_single_cluster(cluster_ip, cluster_details)
+                for item in plan:
+                    if item.action != CREATE:
+                        self.logger.warning(f"Container {item.name} already exists!")
                         continue
 
+                    container_to_create = item.spec
                     self.logger.info(f"Creating new container '{container_to_create['name']}' in {cluster_info!r}")
                     response = container_op.create(**container_to_create)
+                    invalidate_inventory(pe_session, "container")
 
                     if response.get("value"):
                         self.logger.info(f"Creation of Storage container {container_to_create.get('name')} successful!")
@@ -51,6 +53,14 @@ class CreateContainerPe(ClusterScript):
                                    f"{cluster_info!r} with the error: {e}")
             return
 
+    def plan_single_cluster(self, cluster_ip: str, cluster_details: Dict) -> Optional[List[PlanItem]]:
+        # Nothing to plan, don't read the inventory of the cluster
+        if not cluster_details.get("containers"):
+            return []
+        pe_session = cluster_details["pe_session"]
+        existing = get_inventory(pe_session, "container", lambda: group_by_name(Container(pe_session).read()))
+        return diff(cluster_details.get("containers"), existing, "container", target=cluster_ip)
+
     def verify_single_cluster(self, cluster_ip: str, cluster_details: Dict):
         # Check if containers were created
         try:
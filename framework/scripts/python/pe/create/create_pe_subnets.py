@@ -1,7 +1,9 @@
-from typing import Dict
+from typing import Dict, List, Optional
 from framework.scripts.python.pe.cluster_script import ClusterScript
 from framework.scripts.python.helpers.v2.network import Network
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import (CREATE, PlanItem, diff, get_inventory, group_by_name,
+                                                invalidate_inventory)
 
 logger = get_logger(__name__)
 
@@ -28,10 +30,18 @@ class CreateSubnetPe(ClusterScript):
             if cluster_details.get("networks"):
                 network_op = Network(session=pe_session)
 
-                for network_to_create in cluster_details["networks"]:
+                # Only the networks that don't exist yet
+                plan = self.plan_single_cluster(cluster_ip, cluster_details)
+                for item in plan:
+                    if item.action != CREATE:
+                        self.logger.warning(f"Network {item.name!r} already exists in {cluster_info!r}!")
+                        continue
+
+                    network_to_create = item.spec
                     try:
                         self.logger.info(f"Creating a new network {network_to_create['name']!r} in {cluster_info!r}")
                         response = network_op.create(**network_to_create)
+                        invalidate_inventory(pe_session, "network")
 
                         if response.get("network_uuid"):
                             self.logger.info(f"Creation of network {network_to_create.get('name')} successful!")
@@ -47,6 +57,14 @@ class CreateSubnetPe(ClusterScript):
                                    f"{cluster_info!r} with the error: {e}")
             return
 
+    def plan_single_cluster(self, cluster_ip: str, cluster_details: Dict) -> Optional[List[PlanItem]]:
+        # Nothing to plan, don't read the inventory of the cluster
+        if not cluster_details.get("networks"):
+            return []
+        pe_session = cluster_details["pe_session"]
+        existing = get_inventory(pe_session, "network", lambda: group_by_name(Network(session=pe_session).read()))
+        return diff(cluster_details.get("networks"), existing, "network", target=cluster_ip)
+
     def verify_single_cluster(self, cluster_ip: str, cluster_details: Dict):
         # Check if network is created in PE
         try:
@@ -1,19 +1,40 @@
 import threading
 from abc import abstractmethod, ABC
+from typing import Optional, List
+from framework.helpers.event_utils import FAILED, get_event_log, timed_event
 from framework.helpers.log_utils import get_logger
+from framework.helpers.reconcile_utils import PlanItem
+from framework.helpers.batch_results import BatchResult, collect_batch_results
 
 logger = get_logger(__name__)
 
 
 class Script(ABC):
+    # Scripts that run as a single step are skipped as a whole when the run is resumed, if they succeeded for the
+    # same inputs. Scripts that run other scripts must not enable it, their own scripts are checkpointed instead
+    CHECKPOINT_ENABLED = False
+    # Scripts that only build & run other scripts, they still run in plan mode so that their scripts are planned
+    COMPOSITE = False
+
     def __init__(self, **kwargs):
         # If log_file is passed create a new logger and a file handler with the specified log file
         self.logger = get_logger(kwargs['log_file'], file_name=kwargs['log_file']) if kwargs.get('log_file') else None
+        # Correlation fields of the events of the script, eg. {"pod_block": "block-1", "site": "site-1"}
+        self.event_fields = kwargs.get('event_fields') or {}
         self.name = type(self).__name__
         self.results = {}
         self.exceptions = []
 
     def run(self, **kwargs):
+        # The events of the script, and of the API calls & monitors it makes, carry the script & its target
+        target = self.get_checkpoint_target() if get_event_log() else None
+        with timed_event("script", script=type(self).__name__, target=target, **self.event_fields) as event:
+            results = self._run(**kwargs)
+            if self.exceptions:
+                event.update(status=FAILED, exceptions=len(self.exceptions))
+        return results
+
+    def _run(self, **kwargs):
         current_thread = threading.current_thread()
 
         if current_thread != threading.main_thread():
@@ -21,7 +42,9 @@ class Script(ABC):
             current_thread.name = f"Thread-{type(self).__name__}"
 
         logger.info(f"Calling the script {type(self).__name__!r}...")
-        self.execute(**kwargs)
+        with collect_batch_results() as batch_results:
+            self.execute(**kwargs)
+        self.report_batch_failures(batch_results)
 
         if self.exceptions:
             for exception in self.exceptions:
@@ -44,6 +67,37 @@ class Script(ABC):
                 self.logger.info(self.results)
         return self.results
 
+    def report_batch_failures(self, batch_results: List[BatchResult]):
+        """
+        The requests of the batch calls that failed, after the retries, are failures of the script. They are added
+        to the exceptions and to the results, under "batch_failures"
+        """
+        failures = [failure for result in batch_results for failure in result.to_dict()["failed"]]
+        if not failures:
+            return
+        self.exceptions.append(f"{len(failures)} batch requests failed: {failures}")
+        if isinstance(self.results, dict):
+            self.results.setdefault("batch_failures", {})[self.name] = failures
+
+    def get_checkpoint_target(self) -> str:
+        """
+        Target of the script in the checkpoint journal, eg. the PC the script configures
+        """
+        return ""
+
+    def get_checkpoint_inputs(self):
+        """
+        Inputs of the script, the script runs again on resume if they changed
+        """
+        return getattr(self, "data", None)
+
+    def plan(self) -> Optional[List[PlanItem]]:
+        """
+        Changes the script would make, without making them. None if the script can't plan its changes, it is then
+        listed as running as a whole
+        """
+        return None
+
     @abstractmethod
     def execute(self, **kwargs):
         pass
@@ -1,7 +1,7 @@
 """
     This file is the starting point of the framework
     The process of adding new workflow/ job to the framework is as follows:
-        1. Add a new workflow_type by adding a new case statement in the below match, case expression
+        1. Add a new workflow_type by adding it to WORKFLOW_CONFIG in "helpers/registry.py"
         2. Add/ modify the pre_run_actions, post_run_actions or keep the default actions, which would run before and
         after the scripts respectively
         3. To add an action/ function to the pre_run_actions or post_run_actions, you can define the function
@@ -9,93 +9,74 @@
         list variables.
         4. "schema" will verify the SCHEMA of the input file. You have to define the schema in "helpers/schema.py"
         5. Finally, you'll define the Scripts that are to be executed by the workflow. You'll have to write the
-        scripts in "scripts/python"
-        6. Note the order in which functions/ scripts are defined in actions/ scripts is the order of execution of
+        scripts in "scripts/python" and add them to SCRIPTS in "scripts/python/__init__.py"
+        6. The schema, actions & scripts are referred to by name, they are imported only when the workflow runs
+        7. Note the order in which functions/ scripts are defined in actions/ scripts is the order of execution of
         actions/ scripts
 """
 
 import argparse
 import os
 import sys
+import uuid
 from pathlib import Path
 from framework.helpers.log_utils import get_logger, ConfigureRootLogger
+from framework.helpers.config_cache import configure_config_cache, CONFIG_CACHE_DIRECTORY
 from framework.helpers.workflow_utils import Workflow
-from framework.scripts.python import *
-from framework.helpers.helper_functions import (create_pe_objects, create_pc_objects, save_pod_logs,
-                                                generate_html_from_json, create_ipam_object)
-from framework.helpers.schema import *
+from framework.helpers.registry import get_run_config
 from framework.helpers.helper_functions import get_input_data, validate_input_data, save_logs, get_creds_from_vault
 
 parser = argparse.ArgumentParser(description="Description")
 parser.add_argument("--workflow", type=str, help="workflow to run", required=False)
 parser.add_argument("--script", type=str, help="script/s to run", required=False)
 parser.add_argument("--schema", type=str, help="schema for the script", required=False)
-parser.add_argument("-f", "--file", type=str, help="input file/s", required=True)
+parser.add_argument("-f", "--file", type=str, help="input file/s", required=False)
 parser.add_argument("--debug", action='store_true')
 parser.add_argument("--uuid", type=str, help="uuid for the logs", required=False)
-args = parser.parse_args()
+parser.add_argument("--plan", action='store_true',
+                    help="print the changes the workflow would make & the API calls, without making them")
+parser.add_argument("--resume", type=str, help="uuid of the run to resume, the steps that succeeded in it are skipped",
+                    required=False)
+parser.add_argument("--fleet", type=str, required=False,
+                    help="directory or manifest of independent input configs, run concurrently in the process")
+parser.add_argument("--max-concurrent", type=int, required=False,
+                    help="max configs of the fleet running at a time, 4 by default")
 
 # Find path to the project root
 project_root = Path(__file__).parent
 
-WORKFLOW_CONFIG = {
-    "imaging": {
-        "schema": IMAGING_SCHEMA,
-        "pre_run_actions": [create_ipam_object],
-        "post_run_actions": [generate_html_from_json, save_pod_logs],
-        "scripts": [FoundationScript]
-    },
-    "config-cluster": {
-        "schema": CLUSTER_SCHEMA,
-        "pre_run_actions": [create_pe_objects, create_pc_objects],
-        "post_run_actions": [generate_html_from_json, save_logs],
-        "scripts": [ClusterConfig]
-    },
-    "deploy-pc": {
-        "schema": DEPLOY_PC_CONFIG_SCHEMA,
-        "pre_run_actions": [create_pe_objects],
-        "post_run_actions": [generate_html_from_json, save_logs],
-        "scripts": [DeployPC]
-    },
-    "config-pc": {
-        "schema": PC_SCHEMA,
-        "pre_run_actions": [create_pc_objects],
-        "post_run_actions": [generate_html_from_json, save_logs],
-        "scripts": [PcConfig]
-    },
-    "calm-vm-workloads": {
-        "schema": CREATE_VM_WORKLOAD_SCHEMA,
-        "scripts": [InitCalmDsl, CreateAppFromDsl, save_logs]
-    },
-    "calm-edgeai-vm-workload": {
-        "schema": CREATE_AI_WORKLOAD_SCHEMA,
-        "scripts": [InitCalmDsl, UpdateCalmProject, CreateBp, LaunchBp]
-    },
-    "pod-config": {
-        "schema": POD_CONFIG_SCHEMA,
-        "pre_run_actions": [create_ipam_object],
-        "post_run_actions": [generate_html_from_json, save_pod_logs],
-        "scripts": [PodConfig]
-    },
-    "deploy-management-pc": {
-        "schema": POD_MANAGEMENT_DEPLOY_SCHEMA,
-        "post_run_actions": [generate_html_from_json, save_pod_logs],
-        "scripts": [DeployManagementPlane]
-    },
-    "config-management-pc": {
-        "schema": POD_MANAGEMENT_CONFIG_SCHEMA,
-        "post_run_actions": [generate_html_from_json, save_pod_logs],
-        "scripts": [ConfigManagementPlane]
-    },
-    "ndb": {
-        "schema": NDB_SCHEMA,
-        "post_run_actions": [generate_html_from_json, save_logs],
-        "scripts": [NdbConfig]
-    }
-}
+def run_fleet():
+    """
+    Run the configs of the fleet concurrently, each with its own workflow data & log file, see FleetRunner
+    """
+    from framework.api.fleet import FleetRunner, load_fleet
+    from framework.api.jobs import DEFAULT_CREDENTIAL_CACHE_TTL_IN_SEC, DEFAULT_MAX_CONCURRENT_JOBS
+    from framework.helpers.vault_utils import configure_credential_cache
+    logger = get_logger(__name__)
+    # The configs of a fleet usually share their vault credentials, global.yml can override it
+    configure_credential_cache(ttl=DEFAULT_CREDENTIAL_CACHE_TTL_IN_SEC)
+
+    try:
+        fleet = load_fleet(project_root, args.fleet, workflow=args.workflow,
+                           scripts=args.script.split(",") if args.script else None, schema=args.schema, plan=args.plan)
+        max_concurrent = args.max_concurrent or fleet["max_concurrent"] or DEFAULT_MAX_CONCURRENT_JOBS
+        runner = FleetRunner(project_root, max_concurrent=max_concurrent, fleet_id=args.uuid)
+        summary = runner.run(fleet["configs"])
+    except ValueError as e:
+        logger.error(e)
+        sys.exit(1)
+    if summary["failed"]:
+        sys.exit(1)
+
 
 def main():
     logger = get_logger(__name__)
+    if args.fleet:
+        run_fleet()
+        return
+    if not args.file:
+        logger.error("Specify the input file/s with -f, or a fleet of input configs with --fleet")
+        sys.exit(1)
     pre_run_actions = [get_input_data, get_creds_from_vault, validate_input_data]
     post_run_actions = [save_logs]
     schema = {}
@@ -110,35 +91,13 @@ def main():
             if not os.path.exists(file):
                 raise FileNotFoundError("Specify the correct path of the input file or check the name!")
 
-        if workflow_type:
-            config = WORKFLOW_CONFIG.get(workflow_type)
-            if config:
-                schema = config.get("schema", {})
-                pre_run_actions += config.get("pre_run_actions", [])
-                post_run_actions = config.get("post_run_actions", post_run_actions)
-                scripts = config.get("scripts", [])
-            else:
-                logger.warning("No workflow is selected")
-        elif args.script:
-            try:
-                input_scripts = [eval(script.strip()) for script in args.script.split(",")] if args.script else []
-            except Exception as e:
-                logger.error("Invalid Script specified. Specify the correct Script and try again")
-                raise ModuleNotFoundError(e)
-
-            pre_run_actions += [create_pe_objects, create_pc_objects, create_ipam_object]
-            scripts = input_scripts
-
-            if args.schema:
-                try:
-                    schema = eval(args.schema.strip())
-                except Exception as e:
-                    logger.error("Invalid Schema specified. Specify the correct Schema and try again")
-                    raise ModuleNotFoundError(e)
-            else:
-                pre_run_actions.remove(validate_input_data)
-        else:
-            raise Exception("Select either pre-configured workflow or script to run the framework.")
+        run_config = get_run_config(workflow=workflow_type,
+                                    scripts=args.script.split(",") if args.script else None,
+                                    schema=args.schema)
+        schema = run_config["schema"]
+        pre_run_actions = run_config["pre_run_actions"]
+        post_run_actions = run_config["post_run_actions"]
+        scripts = run_config["scripts"]
     except Exception as e:
         logger.exception(e)
 
@@ -151,7 +110,10 @@ def main():
         workflow_type=workflow_type,
         project_root=project_root,
         schema=schema,
-        input_files=files
+        input_files=files,
+        run_id=args.resume or args.uuid or str(uuid.uuid4()),
+        resume=bool(args.resume),
+        plan=args.plan
     )
 
     try:
@@ -164,9 +126,12 @@ def main():
     logger.info("Done!")
 
 if __name__ == '__main__':
+    args = parser.parse_args()
     debug = args.debug
     if args.uuid:
         ConfigureRootLogger(debug, file_name=f"{args.uuid}-zero_touch.log")
     else:
         ConfigureRootLogger(debug)
+    # Unchanged global.yml & input files are loaded from their parsed copies
+    configure_config_cache(os.path.join(project_root, "runs", CONFIG_CACHE_DIRECTORY))
     main()
@@ -0,0 +1,33 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+
+class StandInPcHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        StandInPcHandler.requests.append(self.path)
+        # Slow enough for the jobs to overlap
+        time.sleep(0.3)
+        payload = json.dumps({"resources": {"version": "pc.2024.3"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_pc():
+    StandInPcHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInPcHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,92 @@
+import json
+import logging
+import pytest
+from framework.api.fleet import FleetRunner, load_fleet
+from framework.api.jobs import SUCCEEDED, FAILED
+from framework.helpers import registry
+from framework.helpers.session_registry import session_registry
+from tests.unit.api.test_server import ReadPcVersion, GLOBAL_CONFIG
+
+SITES = ["site-1", "site-2", "site-3"]
+
+
+@pytest.fixture
+def project_root(tmp_path, stand_in_pc, mocker, caplog):
+    caplog.set_level(logging.INFO)
+    get_script = registry.get_script
+    mocker.patch("framework.helpers.registry.get_script",
+                 side_effect=lambda name: ReadPcVersion if name == "ReadPcVersion" else get_script(name))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "global.yml").write_text(GLOBAL_CONFIG)
+    (tmp_path / "fleet").mkdir()
+    for site in SITES:
+        (tmp_path / "fleet" / f"{site}.yml").write_text(
+            f"site: {site}\nstand_in_port: {stand_in_pc.server_address[1]}\n")
+    (tmp_path / "fleet" / "README.md").write_text("not a config")
+    return tmp_path
+
+
+def test_fleet_runs_configs_concurrently(project_root, stand_in_pc, caplog):
+    sessions = session_registry.get_stats()["sessions"]
+    fleet = load_fleet(project_root, "fleet", scripts=["ReadPcVersion"])
+    assert [config["name"] for config in fleet["configs"]] == SITES
+
+    summary = FleetRunner(project_root, max_concurrent=3, fleet_id="fleet-1").run(fleet["configs"])
+
+    assert (summary["total"], summary["succeeded"], summary["failed"]) == (3, 3, 0)
+    # The configs overlapped
+    assert summary["elapsed"] < summary["sequential"]
+    assert all({"queued", "pre_run_actions", "scripts", "total"} <= set(config["timings"])
+               for config in summary["configs"])
+    # The configs shared the session of the PC
+    assert len(stand_in_pc.RequestHandlerClass.requests) == 3
+    stats = session_registry.get_stats()["sessions"]
+    assert stats["misses"] - sessions["misses"] == 1
+
+    # Each config has its own log & results
+    for config, site in zip(summary["configs"], SITES):
+        assert config["log_file"] == str(project_root / "runs" / "fleet-runs" / "fleet-1" / f"{site}.log")
+        with open(config["log_file"]) as f:
+            log = f.read()
+        assert f"Site {site}: pc.2024.3" in log
+        assert not any(f"Site {other}:" in log for other in SITES if other != site)
+    with open(project_root / "runs" / "fleet-runs" / "fleet-1" / "summary.json") as f:
+        saved = json.load(f)
+    assert saved["succeeded"] == 3
+    assert {site: saved["results"][site]["site"] for site in SITES} == {site: site for site in SITES}
+    assert "3/3 configs succeeded" in caplog.text
+
+
+def test_fleet_manifest(project_root, stand_in_pc):
+    (project_root / "fleet.yml").write_text(
+        "max_concurrent: 2\n"
+        "configs:\n"
+        "  - fleet/site-1.yml\n"
+        "  - files: [fleet/site-1.yml]\n"
+        "  - name: broken\n"
+        "    files: [fleet/site-2.yml, fleet/missing.yml]\n"
+    )
+    fleet = load_fleet(project_root, "fleet.yml", scripts=["ReadPcVersion"], plan=True)
+    assert fleet["max_concurrent"] == 2
+    assert [config["name"] for config in fleet["configs"]] == ["site-1", "site-1-2", "broken"]
+    assert all(config["scripts"] == ["ReadPcVersion"] and config["plan"] for config in fleet["configs"])
+
+    # An invalid config fails the fleet before any config runs
+    with pytest.raises(ValueError, match="missing.yml"):
+        FleetRunner(project_root).run(fleet["configs"])
+    assert not stand_in_pc.RequestHandlerClass.requests
+
+    with pytest.raises(ValueError, match="doesn't exist"):
+        load_fleet(project_root, "no-such-fleet")
+    (project_root / "empty").mkdir()
+    with pytest.raises(ValueError, match="no configs"):
+        load_fleet(project_root, "empty")
+
+
+def test_failed_config(project_root):
+    (project_root / "fleet" / "site-2.yml").write_text("site: [site-2\n")
+    fleet = load_fleet(project_root, "fleet", scripts=["ReadPcVersion"])
+    summary = FleetRunner(project_root, max_concurrent=3).run(fleet["configs"])
+
+    assert [config["status"] for config in summary["configs"]] == [SUCCEEDED, FAILED, SUCCEEDED]
+    assert summary["failed"] == 1 and summary["configs"][1]["error"]
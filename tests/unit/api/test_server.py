@@ -0,0 +1,141 @@
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from typing import Dict
+import pytest
+from framework.api.jobs import JobManager, SUCCEEDED, FAILED
+from framework.api.server import ApiServer
+from framework.helpers import registry
+from framework.helpers.log_utils import get_logger
+from framework.helpers.session_registry import session_registry
+from framework.scripts.python.script import Script
+
+logger = get_logger(__name__)
+
+GLOBAL_CONFIG = """
+vault_to_use: local
+vaults:
+  local:
+    credentials:
+      pc_user:
+        username: admin
+        password: secret
+ip_allocation_method: static
+ipam: {}
+"""
+
+
+class ReadPcVersion(Script):
+    def __init__(self, data: Dict, **kwargs):
+        self.data = data
+        super(ReadPcVersion, self).__init__(**kwargs)
+        self.logger = self.logger or logger
+
+    def execute(self, **kwargs):
+        session = session_registry.get_session("127.0.0.1", "admin", "secret", port=str(self.data["stand_in_port"]),
+                                               secured=False)
+        response = session.get("api/nutanix/v3/prism_central")
+        self.logger.info(f"Site {self.data['site']}: {response['resources']['version']}")
+        self.data["json_output"] = {"site": self.data["site"], "version": response["resources"]["version"]}
+
+    def verify(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def project_root(tmp_path, stand_in_pc):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "global.yml").write_text(GLOBAL_CONFIG)
+    for site in ["site-1", "site-2"]:
+        (tmp_path / f"{site}.yml").write_text(f"site: {site}\nstand_in_port: {stand_in_pc.server_address[1]}\n")
+    return tmp_path
+
+
+@pytest.fixture
+def api_server(project_root, mocker, caplog):
+    caplog.set_level(logging.INFO)
+    get_script = registry.get_script
+    mocker.patch("framework.helpers.registry.get_script",
+                 side_effect=lambda name: ReadPcVersion if name == "ReadPcVersion" else get_script(name))
+    server = ApiServer(JobManager(project_root, max_concurrent_jobs=2), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def call(server: ApiServer, path: str, body: Dict = None):
+    request = urllib.request.Request(server.url + path, data=json.dumps(body).encode() if body else None,
+                                     method="POST" if body else "GET")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def wait_for_job(server: ApiServer, job_id: str, timeout: int = 20) -> Dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        _, job = call(server, f"/jobs/{job_id}")
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_jobs_run_concurrently_with_warm_sessions(api_server, stand_in_pc):
+    sessions = session_registry.get_stats()["sessions"]
+    submitted = []
+    for site in ["site-1", "site-2"]:
+        status, job = call(api_server, "/jobs", {"scripts": ["ReadPcVersion"], "files": [f"{site}.yml"]})
+        assert status == 202
+        submitted.append(job["id"])
+    jobs = [wait_for_job(api_server, job_id) for job_id in submitted]
+
+    assert [job["status"] for job in jobs] == [SUCCEEDED, SUCCEEDED]
+    assert [(job["json_output"]["site"], job["json_output"]["version"]) for job in jobs] == [
+        ("site-1", "pc.2024.3"), ("site-2", "pc.2024.3")]
+    # Each job has its own checkpoint journal
+    assert [job["json_output"]["checkpoints"]["run_id"] for job in jobs] == submitted
+    # The jobs overlapped
+    assert jobs[0]["started"] < jobs[1]["finished"] and jobs[1]["started"] < jobs[0]["finished"]
+    assert {"queued", "pre_run_actions", "scripts", "total"} <= set(jobs[0]["timings"])
+    # Both jobs used the same session
+    assert len(stand_in_pc.RequestHandlerClass.requests) == 2
+    stats = session_registry.get_stats()["sessions"]
+    assert (stats["misses"] - sessions["misses"], stats["hits"] - sessions["hits"]) == (1, 1)
+
+    # Each job has its own log
+    for job, site in zip(jobs, ["site-1", "site-2"]):
+        with open(job["log_file"]) as f:
+            log = f.read()
+        assert f"Site {site}: pc.2024.3" in log
+        assert "site-1" not in log if site == "site-2" else "site-2" not in log
+
+    status, stats = call(api_server, "/stats")
+    assert status == 200 and stats["jobs"][SUCCEEDED] == 2
+    status, listed = call(api_server, "/jobs")
+    assert [job["id"] for job in listed["jobs"]] == submitted
+
+
+def test_invalid_requests(api_server):
+    assert call(api_server, "/jobs", {"workflow": "no-such-workflow", "files": ["site-1.yml"]})[0] == 400
+    assert call(api_server, "/jobs", {"scripts": ["ReadPcVersion"], "files": ["missing.yml"]})[0] == 400
+    assert call(api_server, "/jobs", {"scripts": ["ReadPcVersion"]})[0] == 400
+    # The name & the job to resume end up in file paths
+    assert call(api_server, "/jobs", {"scripts": ["ReadPcVersion"], "files": ["site-1.yml"],
+                                      "name": "../../x"})[0] == 400
+    assert call(api_server, "/jobs", {"scripts": ["ReadPcVersion"], "files": ["site-1.yml"],
+                                      "resume": "../../x"})[0] == 400
+    assert call(api_server, "/jobs/unknown")[0] == 404
+    assert call(api_server, "/health") == (200, {"status": "ok"})
+
+
+def test_failed_job(api_server, project_root):
+    (project_root / "config" / "global.yml").write_text("vault_to_use: unknown\n")
+    _, job = call(api_server, "/jobs", {"scripts": ["ReadPcVersion"], "files": ["site-1.yml"]})
+    job = wait_for_job(api_server, job["id"])
+    assert job["status"] == FAILED
+    assert "vault_to_use" in job["error"]
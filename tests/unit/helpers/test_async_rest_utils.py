@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from framework.helpers.async_rest_utils import AsyncRestAPIUtil, gather_with_concurrency
+from framework.helpers.exception_utils import RestError
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.v3.category import Category
+
+
+async def start_server(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port
+
+
+def run_with_server(routes, test_coroutine):
+    async def runner_coroutine():
+        runner, port = await start_server(routes)
+        session = AsyncRestAPIUtil("127.0.0.1", user="admin", pwd="pwd", secured=False, port=str(port))
+        try:
+            return await test_coroutine(session)
+        finally:
+            await session.close()
+            await runner.cleanup()
+    return asyncio.run(runner_coroutine())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(mocker):
+    mocker.patch.object(AsyncRestAPIUtil, "get_backoff_time", return_value=0)
+
+
+class TestAsyncRestAPIUtil:
+    def test_get_json(self):
+        async def handler(request):
+            return web.json_response({"data": "success", "auth": request.headers.get("Authorization")})
+
+        async def test(session):
+            return await session.get("api/test")
+
+        response = run_with_server([web.get("/api/test", handler)], test)
+        assert response["data"] == "success"
+        assert response["auth"].startswith("Basic ")
+
+    def test_post_payload(self):
+        async def handler(request):
+            return web.json_response({"received": await request.json()})
+
+        async def test(session):
+            return await session.post("api/test/list", data={"kind": "vm"})
+
+        assert run_with_server([web.post("/api/test/list", handler)], test) == {"received": {"kind": "vm"}}
+
+    def test_text_response(self):
+        async def handler(request):
+            return web.Response(text='{"result": "success"}', content_type="text/plain")
+
+        async def test(session):
+            return await session.delete("api/test/1")
+
+        assert run_with_server([web.delete("/api/test/1", handler)], test) == {"result": "success"}
+
+    @pytest.mark.parametrize(
+        "status_code, expected_error",
+        [
+            (401, "Unauthorized. Please check your credentials."),
+            (404, "{'code': 404,"),
+        ],
+    )
+    def test_error(self, status_code, expected_error):
+        async def handler(request):
+            return web.Response(status=status_code)
+
+        async def test(session):
+            with pytest.raises(RestError) as excinfo:
+                await session.get("api/test")
+            return excinfo.value
+
+        error = run_with_server([web.get("/api/test", handler)], test)
+        assert expected_error in str(error)
+        assert error.error == "HTTPError"
+
+    def test_retry_on_server_error(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            if len(calls) < 3:
+                return web.Response(status=503)
+            return web.json_response({"data": "success"})
+
+        async def test(session):
+            return await session.put("api/test", data={"a": 1})
+
+        assert run_with_server([web.put("/api/test", handler)], test) == {"data": "success"}
+        assert len(calls) == 3
+
+    def test_retries_exhausted(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            return web.Response(status=500)
+
+        async def test(session):
+            with pytest.raises(RestError) as excinfo:
+                await session.patch("api/test", data={"a": 1})
+            return excinfo.value
+
+        assert "{'code': 500," in str(run_with_server([web.patch("/api/test", handler)], test))
+        assert len(calls) == 4
+
+    def test_fan_out(self):
+        in_flight = []
+        max_in_flight = []
+
+        async def handler(request):
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return web.json_response({"id": request.match_info["id"]})
+
+        async def test(session):
+            return await gather_with_concurrency((session.get(f"api/test/{i}") for i in range(20)), limit=5)
+
+        response = run_with_server([web.get("/api/test/{id}", handler)], test)
+        assert [r["id"] for r in response] == [str(i) for i in range(20)]
+        assert max(max_in_flight) <= 5
+
+    def test_get_async_session(self):
+        session = RestAPIUtil("10.1.1.1", user="admin", pwd="pwd", port="9440")
+        async_session = session.get_async_session()
+        assert isinstance(async_session, AsyncRestAPIUtil)
+        assert async_session.prepare_url("api/nutanix/v3/vms") == "https://10.1.1.1:9440/api/nutanix/v3/vms"
+        assert session.get_async_session() is async_session
+
+    def test_session_per_loop(self):
+        session = AsyncRestAPIUtil("127.0.0.1", user="admin", pwd="pwd", secured=False)
+
+        async def get_session():
+            return session._get_session()
+
+        async def get_session_twice():
+            return session._get_session(), session._get_session()
+
+        first, second = asyncio.run(get_session_twice())
+        assert first is second
+        # The session of a loop that ended is never handed to another loop
+        assert asyncio.run(get_session()) is not first
+
+        client_session = session.run(get_session())
+        assert client_session.closed
+
+    @staticmethod
+    def categories_with_values(test, values_calls=None, **session_kwargs):
+        async def list_categories(request):
+            return web.json_response({"entities": [{"name": "AppType"}, {"name": "Environment"}],
+                                      "metadata": {"total_matches": 2}})
+
+        async def list_values(request):
+            name = request.match_info["name"]
+            if values_calls is not None:
+                values_calls.append(name)
+            return web.json_response({"entities": [{"value": f"{name}-1"}, {"value": f"{name}-2"}],
+                                      "metadata": {"total_matches": 2}})
+
+        loop = asyncio.new_event_loop()
+        runner, port = loop.run_until_complete(start_server([
+            web.post("/api/nutanix/v3/categories/list", list_categories),
+            web.post("/api/nutanix/v3/categories/{name}/list", list_values)
+        ]))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            session = RestAPIUtil("127.0.0.1", user="admin", pwd="pwd", secured=False, port=str(port),
+                                  **session_kwargs)
+            return test(Category(session))
+        finally:
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def test_categories_with_values(self):
+        categories = self.categories_with_values(lambda category: category.categories_with_values())
+
+        assert categories == [{"name": "AppType", "values": ["AppType-1", "AppType-2"]},
+                              {"name": "Environment", "values": ["Environment-1", "Environment-2"]}]
+
+    def test_categories_with_values_in_running_loop(self):
+        async def from_coroutine(category):
+            # asyncio.run can't be nested, the values are read with the sync session
+            return category.categories_with_values()
+
+        categories = self.categories_with_values(lambda category: asyncio.run(from_coroutine(category)))
+
+        assert [c["values"] for c in categories] == [["AppType-1", "AppType-2"], ["Environment-1", "Environment-2"]]
+
+    def test_categories_with_values_cached(self):
+        values_calls = []
+
+        def read_twice(category):
+            category.categories_with_values()
+            # Same cache entries for the async & the sync reads
+            return category.categories_with_values(), category.get_values("AppType")
+
+        categories, values = self.categories_with_values(read_twice, values_calls, cache=True)
+
+        assert values_calls == ["AppType", "Environment"]
+        assert categories[1]["values"] == ["Environment-1", "Environment-2"]
+        assert [v["value"] for v in values] == ["AppType-1", "AppType-2"]
@@ -0,0 +1,30 @@
+from framework.helpers.batch_results import BatchResult, collect_batch_results, record_batch_result
+
+
+def test_is_retryable():
+    assert BatchResult.is_retryable({"status": "503"}, {"operation": "POST"})
+    assert BatchResult.is_retryable({"status": "504"}, {"operation": "PUT"})
+    # A create the gateway gave up on may have been applied
+    assert not BatchResult.is_retryable({"status": "502"}, {"operation": "POST"})
+    assert not BatchResult.is_retryable({"status": "400"}, {"operation": "PUT"})
+    assert not BatchResult.is_retryable(None)
+
+
+def test_add_results():
+    result = BatchResult()
+    result.add(1, {"operation": "PUT"}, {"status": "503", "api_response": "busy"})
+    result.add(0, {"operation": "POST"}, {"status": "202", "api_response": {"task_uuid": "task1"}})
+    result.sort()
+
+    assert result.task_uuid_list == ["task1"]
+    assert result.to_dict() == {"succeeded": 1, "failed": [{"status": "503", "body": "busy", "retryable": True}],
+                                "attempts": 0}
+
+
+def test_collect_batch_results():
+    record_batch_result(BatchResult())
+    with collect_batch_results() as results:
+        result = BatchResult()
+        record_batch_result(result)
+
+    assert results == [result]
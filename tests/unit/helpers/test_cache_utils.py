@@ -0,0 +1,126 @@
+import pytest
+from unittest.mock import MagicMock
+from framework.helpers.cache_utils import ResponseCache, fresh_reads, get_cache_stats
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.entity import Entity
+from framework.scripts.python.helpers.pc_batch_op import PcBatchOp
+
+RESOURCE = "api/nutanix/v3/subnets"
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_entries=3, default_ttl=60, resource_ttls={"tasks": 0})
+
+
+class TestResponseCache:
+    def test_get_set(self, cache):
+        assert cache.get(RESOURCE, f"{RESOURCE}/list", {"kind": "subnet"}) == (False, None)
+        cache.set(RESOURCE, f"{RESOURCE}/list", {"kind": "subnet", "offset": 0}, [{"name": "vlan10"}])
+        # payload is normalized
+        assert cache.get(RESOURCE, f"{RESOURCE}/list", {"offset": 0, "kind": "subnet"}) == (True, [{"name": "vlan10"}])
+        assert cache.get_stats() == {"hits": 1, "misses": 1, "invalidations": 0, "entries": 1}
+
+    def test_cached_response_is_copied(self, cache):
+        cache.set(RESOURCE, RESOURCE, None, {"entities": []})
+        _, response = cache.get(RESOURCE, RESOURCE)
+        response["entities"].append("modified")
+        assert cache.get(RESOURCE, RESOURCE) == (True, {"entities": []})
+
+    def test_ttl(self, cache, mocker):
+        mock_time = mocker.patch("framework.helpers.cache_utils.time.monotonic")
+        mock_time.return_value = 100
+        cache.set(RESOURCE, RESOURCE, None, "response")
+        cache.set("api/nutanix/v3/tasks", "api/nutanix/v3/tasks", None, "response")
+        mock_time.return_value = 159
+        assert cache.get(RESOURCE, RESOURCE) == (True, "response")
+        # ttl 0 is never cached
+        assert cache.get("api/nutanix/v3/tasks", "api/nutanix/v3/tasks") == (False, None)
+        mock_time.return_value = 161
+        assert cache.get(RESOURCE, RESOURCE) == (False, None)
+
+    def test_lru_eviction(self, cache):
+        for i in range(3):
+            cache.set(RESOURCE, f"{RESOURCE}/{i}", None, i)
+        cache.get(RESOURCE, f"{RESOURCE}/0")
+        cache.set(RESOURCE, f"{RESOURCE}/3", None, 3)
+        assert cache.get(RESOURCE, f"{RESOURCE}/1") == (False, None)
+        assert cache.get(RESOURCE, f"{RESOURCE}/0") == (True, 0)
+
+    def test_invalidate(self, cache):
+        cache.set(RESOURCE, f"{RESOURCE}/list", None, "subnets")
+        cache.set("api/nutanix/v3/vms", "api/nutanix/v3/vms/list", None, "vms")
+        cache.invalidate("/subnets")
+        assert cache.get(RESOURCE, f"{RESOURCE}/list") == (False, None)
+        assert cache.get("api/nutanix/v3/vms", "api/nutanix/v3/vms/list") == (True, "vms")
+
+    def test_fresh_reads(self, cache):
+        cache.set(RESOURCE, RESOURCE, None, "stale")
+        with fresh_reads():
+            assert cache.get(RESOURCE, RESOURCE) == (False, None)
+        assert cache.get(RESOURCE, RESOURCE) == (True, "stale")
+
+    def test_get_cache_stats(self, cache):
+        before = get_cache_stats()
+        cache.get(RESOURCE, RESOURCE)
+        assert get_cache_stats()["misses"] == before["misses"] + 1
+
+
+class TestEntityCache:
+    @pytest.fixture
+    def session(self):
+        session = MagicMock(spec=RestAPIUtil)
+        session.cache = ResponseCache()
+        return session
+
+    @pytest.fixture
+    def entity(self, session):
+        return Entity(session=session, resource_type=RESOURCE)
+
+    def test_list_cached(self, entity, session):
+        session.post.return_value = {"entities": [{"name": "vlan10"}]}
+        assert entity.list(data={"kind": "subnet"}) == [{"name": "vlan10"}]
+        assert entity.list(data={"kind": "subnet"}) == [{"name": "vlan10"}]
+        assert session.post.call_count == 1
+
+        with fresh_reads():
+            entity.list(data={"kind": "subnet"})
+        assert session.post.call_count == 2
+
+    def test_read_get_cached_post_not_cached(self, entity, session):
+        session.get.return_value = {"name": "vlan10"}
+        session.post.return_value = {"task_uuid": "uuid"}
+        entity.read(uuid="1")
+        entity.read(uuid="1")
+        assert session.get.call_count == 1
+        entity.read(method="POST", endpoint="poll", data={})
+        entity.read(method="POST", endpoint="poll", data={})
+        assert session.post.call_count == 2
+
+    @pytest.mark.parametrize("write", [
+        lambda entity: entity.create(data={"name": "vlan20"}),
+        lambda entity: entity.update(data={"name": "vlan20"}),
+        lambda entity: entity.delete(uuid="1"),
+    ])
+    def test_write_invalidates(self, entity, session, write):
+        session.post.return_value = {"entities": []}
+        entity.list(data={"kind": "subnet"})
+        write(entity)
+        entity.list(data={"kind": "subnet"})
+        assert session.post.call_args_list[-1].args[0] == f"{RESOURCE}/list"
+        assert len([c for c in session.post.call_args_list if c.args[0] == f"{RESOURCE}/list"]) == 2
+
+    def test_no_cache(self):
+        session = MagicMock(spec=RestAPIUtil)
+        session.post.return_value = {"entities": []}
+        entity = Entity(session=session, resource_type=RESOURCE)
+        entity.list()
+        entity.list()
+        assert session.post.call_count == 2
+
+    def test_batch_invalidates(self, entity, session):
+        session.post.return_value = {"entities": []}
+        entity.list(data={"kind": "subnet"})
+        session.post.return_value = {"api_response_list": []}
+        PcBatchOp(session, resource_type="/subnets", kind="subnet").batch([{"operation": "POST"}])
+        assert session.cache.get(RESOURCE, f"{RESOURCE}/list", {"kind": "subnet"}) == (False, None)
@@ -0,0 +1,165 @@
+import json
+from typing import Dict
+import pytest
+from framework.helpers.log_utils import get_logger
+from framework.helpers.checkpoint_utils import (CheckpointJournal, configure_checkpoints, disable_checkpoints,
+                                                hash_inputs, run_checkpointed, get_journal_path)
+from framework.scripts.python.helpers.batch_script import BatchScript
+from framework.scripts.python.pe.cluster_script import ClusterScript
+from framework.scripts.python.script import Script
+
+logger = get_logger(__name__)
+
+
+class Session:
+    pass
+
+
+class CountingScript(Script):
+    CHECKPOINT_ENABLED = True
+
+    def __init__(self, data: Dict, fail: bool = False, **kwargs):
+        self.data = data
+        self.fail = fail
+        self.calls = 0
+        super(CountingScript, self).__init__(**kwargs)
+        self.logger = self.logger or logger
+
+    def get_checkpoint_target(self) -> str:
+        return self.data["pc_ip"]
+
+    def execute(self, **kwargs):
+        self.calls += 1
+        if self.fail:
+            self.exceptions.append("failed")
+        self.results = {"pc": self.data["pc_ip"], "status": "PASS"}
+
+    def verify(self, **kwargs):
+        pass
+
+
+class CountingClusterScript(ClusterScript):
+    def __init__(self, data: Dict, failing=(), **kwargs):
+        super(CountingClusterScript, self).__init__(data, **kwargs)
+        self.logger = self.logger or logger
+        self.failing = failing
+        self.calls = []
+
+    def execute_single_cluster(self, cluster_ip: str, cluster_details: Dict):
+        self.calls.append(cluster_ip)
+        if cluster_ip in self.failing:
+            self.exceptions.append(f"{cluster_ip} failed")
+
+    def verify_single_cluster(self, cluster_ip: str, cluster_details: Dict):
+        self.results["clusters"][cluster_ip] = {"Create_container": {"container": "PASS"}}
+
+
+@pytest.fixture(autouse=True)
+def no_checkpoints():
+    yield
+    disable_checkpoints()
+
+
+@pytest.fixture
+def clusters():
+    return {f"10.1.1.{i}": {"cluster_info": {"name": f"cluster-{i}"}, "pe_session": Session()} for i in range(3)}
+
+
+def test_hash_inputs_ignores_runtime_keys_and_sessions():
+    inputs = {"pc_ip": "10.1.1.1", "pc_session": Session()}
+    assert hash_inputs(inputs) == hash_inputs({**inputs, "pc_session": Session(), "json_output": {"a": 1},
+                                               "pc_version": "pc.2024.3"})
+    assert hash_inputs(inputs) != hash_inputs({**inputs, "pc_ip": "10.1.1.2"})
+
+
+def test_journal_resume(tmp_path):
+    file_path = str(tmp_path / "run.jsonl")
+    journal = CheckpointJournal(file_path, "run")
+    journal.record("CreateContainerPe", "10.1.1.1", "hash", succeeded=True, results={"a": "PASS"})
+    journal.record("CreateContainerPe", "10.1.1.2", "hash", succeeded=False, error="timed out")
+    # Incomplete line of a killed run
+    with open(file_path, "a") as f:
+        f.write('{"script": ')
+
+    resumed = CheckpointJournal(file_path, "run", resume=True)
+    assert resumed.get_succeeded("CreateContainerPe", "10.1.1.1", "hash")["results"] == {"a": "PASS"}
+    assert resumed.get_succeeded("CreateContainerPe", "10.1.1.1", "new-hash") is None
+    assert resumed.get_succeeded("CreateContainerPe", "10.1.1.2", "hash") is None
+
+    with pytest.raises(FileNotFoundError):
+        CheckpointJournal(str(tmp_path / "missing.jsonl"), "missing", resume=True)
+
+
+def test_run_checkpointed(tmp_path):
+    data = {"pc_ip": "10.1.1.1", "pc_session": Session()}
+    configure_checkpoints(str(tmp_path), "run")
+    script = CountingScript(data)
+    assert run_checkpointed(script) == {"pc": "10.1.1.1", "status": "PASS"}
+    failing = CountingScript({"pc_ip": "10.1.1.2"}, fail=True)
+    run_checkpointed(failing)
+
+    journal = configure_checkpoints(str(tmp_path), "run", resume=True)
+    resumed = CountingScript(data)
+    assert run_checkpointed(resumed) == {"pc": "10.1.1.1", "status": "PASS"}
+    assert resumed.calls == 0
+    resumed_failing = CountingScript({"pc_ip": "10.1.1.2"})
+    run_checkpointed(resumed_failing)
+    assert resumed_failing.calls == 1
+    changed = CountingScript({**data, "categories": ["new"]})
+    run_checkpointed(changed)
+    assert changed.calls == 1
+    assert journal.get_stats()["skipped"] == 1
+
+
+def test_batch_script_skips_succeeded_scripts(tmp_path):
+    configure_checkpoints(str(tmp_path), "run")
+    batch_script = BatchScript(parallel=True)
+    batch_script.add_all([CountingScript({"pc_ip": "10.1.1.1"}), CountingScript({"pc_ip": "10.1.1.2"}, fail=True)])
+    batch_script.run()
+
+    configure_checkpoints(str(tmp_path), "run", resume=True)
+    scripts = [CountingScript({"pc_ip": "10.1.1.1"}), CountingScript({"pc_ip": "10.1.1.2"})]
+    batch_script = BatchScript(parallel=True)
+    batch_script.add_all(scripts)
+    batch_script.run()
+    assert [script.calls for script in scripts] == [0, 1]
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_cluster_script_skips_succeeded_clusters(tmp_path, clusters, parallel):
+    configure_checkpoints(str(tmp_path), "run")
+    script = CountingClusterScript({"clusters": clusters}, failing=["10.1.1.1"], parallel=parallel)
+    script.run()
+    assert sorted(script.calls) == sorted(clusters)
+
+    configure_checkpoints(str(tmp_path), "run", resume=True)
+    script = CountingClusterScript({"clusters": clusters}, parallel=parallel)
+    results = script.run()
+    assert script.calls == ["10.1.1.1"]
+    # Results of the skipped clusters are restored from the journal
+    assert sorted(results["clusters"]) == sorted(clusters)
+
+    with open(get_journal_path(str(tmp_path), "run")) as f:
+        entries = [json.loads(line) for line in f]
+    assert [(entry["target"], entry["status"]) for entry in entries] == [
+        ("10.1.1.0", "succeeded"), ("10.1.1.1", "failed"), ("10.1.1.2", "succeeded"), ("10.1.1.1", "succeeded")]
+
+
+def test_cluster_script_failed_verification(tmp_path, clusters):
+    class FailingVerification(CountingClusterScript):
+        def verify_single_cluster(self, cluster_ip: str, cluster_details: Dict):
+            self.results["clusters"][cluster_ip] = {"Create_container": {"container": "FAIL"}}
+
+    configure_checkpoints(str(tmp_path), "run")
+    FailingVerification({"clusters": clusters}, parallel=False).run()
+
+    configure_checkpoints(str(tmp_path), "run", resume=True)
+    script = FailingVerification({"clusters": clusters}, parallel=False)
+    script.run()
+    assert script.calls == list(clusters)
+
+
+def test_no_journal(clusters):
+    script = CountingClusterScript({"clusters": clusters}, parallel=False)
+    script.run()
+    assert script.calls == list(clusters)
@@ -0,0 +1,91 @@
+import pytest
+import yaml
+from framework.helpers.config_cache import ConfigCache
+from framework.helpers.exception_utils import JsonError, YamlError
+from framework.helpers import general_utils
+from framework.helpers.general_utils import Loader, get_json_file_contents, get_yml_file_contents, parse_json
+
+
+@pytest.fixture
+def config_cache(tmp_path, mocker):
+    cache = ConfigCache(directory=str(tmp_path / "config-cache"))
+    mocker.patch.object(general_utils, "config_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def configs(tmp_path):
+    (tmp_path / "includes").mkdir()
+    (tmp_path / "pod.yml").write_text("pod:\n  pod_name: pod-1\n  blocks: !include includes/blocks.yml\n")
+    (tmp_path / "includes" / "blocks.yml").write_text("- name: block-1\n  sites: !include sites.json\n")
+    (tmp_path / "includes" / "sites.json").write_text('["site-1"]')
+    return tmp_path
+
+
+def parse_calls(mocker):
+    return mocker.patch.object(general_utils, "parse_yml", wraps=general_utils.parse_yml)
+
+
+def test_yml_with_includes(configs, config_cache, mocker):
+    expected = {"pod": {"pod_name": "pod-1", "blocks": [{"name": "block-1", "sites": ["site-1"]}]}}
+    parse_yml = parse_calls(mocker)
+
+    assert get_yml_file_contents(str(configs / "pod.yml")) == expected
+    assert get_yml_file_contents(str(configs / "pod.yml")) == expected
+    # Parsed once, the second time it's loaded from the cache
+    assert parse_yml.call_count == 2
+    assert (config_cache.get_stats()["hits"], config_cache.get_stats()["misses"]) == (1, 1)
+    # A new copy on every call
+    assert get_yml_file_contents(str(configs / "pod.yml")) is not get_yml_file_contents(str(configs / "pod.yml"))
+
+
+def test_changed_include_invalidates(configs, config_cache):
+    get_yml_file_contents(str(configs / "pod.yml"))
+
+    # A file included by an included file
+    (configs / "includes" / "sites.json").write_text('["site-1", "site-2"]')
+    assert get_yml_file_contents(str(configs / "pod.yml"))["pod"]["blocks"][0]["sites"] == ["site-1", "site-2"]
+    (configs / "includes" / "blocks.yml").write_text("- name: block-2\n")
+    assert get_yml_file_contents(str(configs / "pod.yml"))["pod"]["blocks"] == [{"name": "block-2"}]
+    (configs / "pod.yml").write_text("pod:\n  pod_name: pod-2\n")
+    assert get_yml_file_contents(str(configs / "pod.yml")) == {"pod": {"pod_name": "pod-2"}}
+    assert config_cache.get_stats()["misses"] == 4
+
+
+def test_corrupted_entry_is_parsed_again(configs, config_cache, tmp_path):
+    get_yml_file_contents(str(configs / "pod.yml"))
+    for entry in (tmp_path / "config-cache").iterdir():
+        entry.write_bytes(b"corrupted")
+    assert get_yml_file_contents(str(configs / "pod.yml"))["pod"]["pod_name"] == "pod-1"
+    assert config_cache.get_stats()["misses"] == 2
+
+
+def test_json(tmp_path, config_cache):
+    (tmp_path / "strict.json").write_text('{"a": [1, 2.5, null, true]}')
+    (tmp_path / "json5.json").write_text("{a: [1, 2.5, null, true,], // comment\n}")
+    assert get_json_file_contents(str(tmp_path / "strict.json")) == {"a": [1, 2.5, None, True]}
+    assert get_json_file_contents(str(tmp_path / "json5.json")) == {"a": [1, 2.5, None, True]}
+    assert parse_json('{"a": 1}') == {"a": 1}
+
+    (tmp_path / "invalid.json").write_text("{a: ")
+    with pytest.raises(JsonError):
+        get_json_file_contents(str(tmp_path / "invalid.json"))
+    (tmp_path / "invalid.yml").write_text("a: [b")
+    with pytest.raises(YamlError):
+        get_yml_file_contents(str(tmp_path / "invalid.yml"))
+
+
+def test_c_loader():
+    if yaml.__with_libyaml__:
+        assert issubclass(Loader, yaml.CSafeLoader)
+    assert yaml.load("a: [1, b]", Loader=Loader) == {"a": [1, "b"]}
+
+
+def test_configs_json_can_not_represent_are_not_cached(tmp_path, config_cache):
+    (tmp_path / "dates.yml").write_text("created: 2024-01-01\n")
+    (tmp_path / "int_keys.yml").write_text("vlans:\n  10: vlan-10\n")
+    for _ in range(2):
+        assert get_yml_file_contents(str(tmp_path / "int_keys.yml")) == {"vlans": {10: "vlan-10"}}
+        assert str(get_yml_file_contents(str(tmp_path / "dates.yml"))["created"]) == "2024-01-01"
+    assert config_cache.get_stats()["hits"] == 0
+    assert not (tmp_path / "config-cache").exists() or not list((tmp_path / "config-cache").iterdir())
@@ -0,0 +1,142 @@
+import contextvars
+import json
+import pytest
+import requests_mock
+from framework.helpers.event_utils import configure_event_log, emit_event, event_context, main, read_events, \
+    stop_event_log, summarize_events, timed_event
+from framework.helpers.log_utils import get_logger
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.helpers.worker_pool import get_worker_pool
+from framework.scripts.python.helpers.pc_entity_v3 import PcEntity
+from framework.scripts.python.script import Script
+from tests.unit.config.test_data import REST_ARGS, API_HEADERS
+
+logger = get_logger(__name__)
+
+
+class FailingScript(Script):
+    def __init__(self, **kwargs):
+        super(FailingScript, self).__init__(**kwargs)
+        self.logger = self.logger or logger
+
+    def execute(self, **kwargs):
+        self.exceptions.append(Exception("failed"))
+
+    def verify(self, **kwargs):
+        pass
+
+    def get_checkpoint_target(self) -> str:
+        return "10.1.1.1"
+
+
+def run_in_new_context(fn, *args):
+    # The event log is set per context, the runs don't leak into the other tests
+    return contextvars.copy_context().run(fn, *args)
+
+
+def test_events_carry_the_correlation_fields(tmp_path):
+    def run():
+        event_log = configure_event_log(str(tmp_path), "run-1")
+        with requests_mock.Mocker() as request_mocker:
+            request_mocker.get("https://1.1.1.1:9440/api/nutanix/v3/vms/1a2b3c4d-0000-1111-2222-333344445555",
+                               json={}, status_code=200, headers=API_HEADERS)
+            with event_context(pod_block="block-1"):
+                with timed_event("script", script="CreateVms", target="1.1.1.1"):
+                    # Items of the worker pool run in the context of the submitter
+                    get_worker_pool().map(RestAPIUtil(**REST_ARGS).get,
+                                          ["api/nutanix/v3/vms/1a2b3c4d-0000-1111-2222-333344445555"])
+                FailingScript(event_fields={"site": "site-1"}).run()
+        stop_event_log()
+        # Nothing is emitted once the run is over
+        emit_event("http")
+        return event_log
+
+    event_log = run_in_new_context(run)
+    events = read_events([event_log.file_path])
+    assert [event["event"] for event in events] == ["http", "script", "script"]
+    assert event_log.get_stats()["events"] == 3
+
+    http, script, failed_script = events
+    assert {key: http[key] for key in ("run_id", "pod_block", "script", "target", "method", "host", "status")} == {
+        "run_id": "run-1", "pod_block": "block-1", "script": "CreateVms", "target": "1.1.1.1", "method": "GET",
+        "host": "1.1.1.1", "status": 200}
+    assert http["uri"] == "/api/nutanix/v3/vms/1a2b3c4d-0000-1111-2222-333344445555"
+    assert script["status"] == "succeeded" and script["duration"] >= http["latency"]
+    assert {key: failed_script[key] for key in ("pod_block", "site", "script", "target", "status", "exceptions")} \
+        == {"pod_block": "block-1", "site": "site-1", "script": "FailingScript", "target": "10.1.1.1",
+            "status": "failed", "exceptions": 1}
+
+
+class PagedVm(PcEntity):
+    kind = "vm"
+    resource_type = "/vms"
+    V3_LIST_CHUNKSIZE = 2
+
+
+def test_events_of_the_pages_fetched_concurrently(tmp_path):
+    entities = [{"spec": {"name": f"vm{i}"}, "metadata": {"uuid": f"uuid{i}"}} for i in range(5)]
+
+    def list_vms(request, context):
+        offset, length = request.json()["offset"], request.json()["length"]
+        return {"entities": entities[offset:offset + length], "metadata": {"total_matches": len(entities)}}
+
+    def run():
+        event_log = configure_event_log(str(tmp_path), "run-1")
+        with requests_mock.Mocker() as request_mocker:
+            request_mocker.post("https://1.1.1.1:9440/api/nutanix/v3/vms/list", json=list_vms, status_code=200,
+                                headers=API_HEADERS)
+            with timed_event("script", script="ListVms", target="1.1.1.1"):
+                assert PagedVm(session=RestAPIUtil(**REST_ARGS)).list() == entities
+        stop_event_log()
+        return event_log
+
+    events = read_events([run_in_new_context(run).file_path])
+    # The 2 pages after the first one are fetched by the list executor, their calls are logged too
+    http_events = [event for event in events if event["event"] == "http"]
+    assert len(http_events) == 3
+    assert all((event["run_id"], event["script"], event["method"], event["status"]) == ("run-1", "ListVms", "POST", 200)
+               for event in http_events)
+
+
+def test_timed_event_of_an_exception(tmp_path):
+    def run():
+        event_log = configure_event_log(str(tmp_path), "run-1")
+        with pytest.raises(ValueError):
+            with timed_event("target", script="CreateSubnetPe", target="10.1.1.1"):
+                raise ValueError("invalid subnet")
+        stop_event_log()
+        return event_log
+
+    event, = read_events([run_in_new_context(run).file_path])
+    assert (event["status"], event["error"]) == ("failed", "ValueError: invalid subnet")
+
+
+def test_summary_and_cli(tmp_path, capsys):
+    events = [
+        {"run_id": "run-1", "event": "script", "script": "PcConfig", "pod_block": "block-1", "duration": 30},
+        {"run_id": "run-1", "event": "target", "script": "CreateSubnetPe", "target": "10.1.1.1", "duration": 50},
+        {"run_id": "run-1", "event": "http", "method": "GET", "host": "10.1.1.1", "uri": "/api/vms/1a2b3c4d-0000-"
+         "1111-2222-333344445555", "status": 200, "latency": 2, "retries": 0},
+        {"run_id": "run-1", "event": "http", "method": "GET", "host": "10.1.1.1", "uri": "/api/vms/00000000-0000-"
+         "1111-2222-333344445555", "status": 503, "latency": 4, "retries": 3},
+        {"run_id": "run-1", "event": "http", "method": "POST", "host": "10.1.1.2", "uri": "/api/tasks/12/poll",
+         "status": 200, "latency": 1, "retries": 0},
+        {"run_id": "run-1", "event": "monitor", "monitor": "PcTaskMonitor", "status": "succeeded", "checks": 4,
+         "waiting": 12.5},
+    ]
+    summary = summarize_events(events, top=1)
+    assert summary["slowest_scripts"][0]["script"] == "CreateSubnetPe" and len(summary["slowest_scripts"]) == 1
+    assert summary["slowest_endpoints"] == [{"method": "GET", "uri": "/api/vms/{uuid}", "calls": 2, "total": 6,
+                                             "p95": 4, "max": 4}]
+    assert list(summary["hosts"]) == ["10.1.1.1", "10.1.1.2"]
+    assert summary["hosts"]["10.1.1.1"] == {"calls": 2, "retries": 3, "errors": 1, "latency": 6}
+    assert summary["monitors"]["PcTaskMonitor"]["waiting"] == 12.5
+    assert summarize_events(events)["slowest_endpoints"][1]["uri"] == "/api/tasks/{id}/poll"
+
+    event_log = tmp_path / "run-1.jsonl"
+    event_log.write_text("\n".join(json.dumps(event) for event in events) + "\n{\"incomplete")
+    main([str(event_log), "--top", "1"])
+    output = capsys.readouterr().out
+    assert "Slowest endpoints" in output and "GET /api/vms/{uuid}" in output and "PcTaskMonitor" in output
+    main([str(event_log), "--json"])
+    assert json.loads(capsys.readouterr().out)["runs"] == ["run-1"]
@@ -110,6 +110,22 @@ class TestHelperFunctions:
         print(data)
         assert any(key in data for key in ["vaults", "vault_to_use", "ipam", "ip_allocation_method", "pc_ip", "pc_credential"])
 
+    def test_process_config_only_from_global_config(self, mocker, tmp_path):
+        mocker.patch("framework.helpers.helper_functions._process_configured", False)
+        mock_configure = mocker.patch("framework.helpers.helper_functions.configure_worker_pool")
+        (tmp_path / "config").mkdir()
+        (tmp_path / "config" / "global.yml").write_text("worker_pool:\n  max_workers: 8\n")
+        input_file = tmp_path / "input.yml"
+        input_file.write_text("pc_ip: 10.1.1.1\nworker_pool:\n  max_workers: 1\n")
+
+        for _ in range(2):
+            data = {"project_root": tmp_path, "input_files": [str(input_file)]}
+            get_input_data(data)
+
+        # Configured once, from global.yml only
+        mock_configure.assert_called_once_with(max_workers=8)
+        assert data["pc_ip"] == "10.1.1.1" and data["worker_pool"] == {"max_workers": 8}
+
     def test_validate_input_data(self):
         data = {"schema": {}}
         result = validate_input_data(data)
@@ -1,56 +1,61 @@
 import logging
+import re
+import threading
 import pytest
 from unittest.mock import MagicMock, patch
-from framework.helpers.log_utils import ConfigureRootLogger, add_file_formatter, get_logger
+from framework.helpers.log_utils import ConfigureRootLogger, QueuedHandler, add_file_formatter, flush_logs, \
+    get_logger, log_context, log_writer, release_file_handler
 
 class TestLogUtils:
     
     @patch('framework.helpers.log_utils.RainbowLoggingHandler')
-    @patch('framework.helpers.log_utils.logging.FileHandler')
+    @patch('framework.helpers.log_utils.acquire_file_handler')
     @patch('framework.helpers.log_utils.logging.basicConfig')
-    def test_configure_root_logger(self, mock_basicConfig, mock_FileHandler, mock_RainbowLoggingHandler):
+    def test_configure_root_logger(self, mock_basicConfig, mock_acquire, mock_RainbowLoggingHandler):
         # Mock the RainbowLoggingHandler and FileHandler
         mock_ch = MagicMock()
         mock_fh = MagicMock()
         mock_RainbowLoggingHandler.return_value = mock_ch
-        mock_FileHandler.return_value = mock_fh
+        mock_acquire.return_value = mock_fh
 
         # Create an instance of ConfigureRootLogger
         logger = ConfigureRootLogger(debug=True, file_name="test.log")
 
         # Assert that the logging.basicConfig method is called with the correct arguments
-        mock_basicConfig.assert_called_once_with(
-            level=logging.DEBUG,
-            handlers=[mock_ch, mock_fh]
-        )
+        mock_basicConfig.assert_called_once()
+        assert mock_basicConfig.call_args.kwargs["level"] == logging.DEBUG
+
+        # Assert that the records are queued for the writer thread to write to both the handlers
+        handler, = mock_basicConfig.call_args.kwargs["handlers"]
+        assert isinstance(handler, QueuedHandler)
+        assert handler.handlers == [mock_ch, mock_fh]
+        mock_acquire.assert_called_once_with("test.log")
 
         # Assert that the setFormatter method is called with the correct argument
         mock_ch.setFormatter.assert_called_once()
-        mock_fh.setFormatter.assert_called_once()
 
 
     @patch('framework.helpers.log_utils.RainbowLoggingHandler')
-    @patch('framework.helpers.log_utils.logging.FileHandler')
+    @patch('framework.helpers.log_utils.acquire_file_handler')
     @patch('framework.helpers.log_utils.logging.basicConfig')
-    def test_configure_root_logger_without_debug(self, mock_basicConfig, mock_FileHandler, mock_RainbowLoggingHandler):
+    def test_configure_root_logger_without_debug(self, mock_basicConfig, mock_acquire, mock_RainbowLoggingHandler):
         # Mock the RainbowLoggingHandler and FileHandler
         mock_ch = MagicMock()
         mock_fh = MagicMock()
         mock_RainbowLoggingHandler.return_value = mock_ch
-        mock_FileHandler.return_value = mock_fh
+        mock_acquire.return_value = mock_fh
 
         # Create an instance of ConfigureRootLogger without debug
         logger = ConfigureRootLogger(debug=False, file_name="test.log")
 
         # Assert that the logging.basicConfig method is called with the correct arguments
-        mock_basicConfig.assert_called_once_with(
-            level=logging.INFO,
-            handlers=[mock_ch, mock_fh]
-        )
+        mock_basicConfig.assert_called_once()
+        assert mock_basicConfig.call_args.kwargs["level"] == logging.INFO
+        handler, = mock_basicConfig.call_args.kwargs["handlers"]
+        assert handler.handlers == [mock_ch, mock_fh]
 
         # Assert that the setFormatter method is called with the correct argument
         mock_ch.setFormatter.assert_called_once()
-        mock_fh.setFormatter.assert_called_once()
     
 
     def test_add_file_formatter(self):
@@ -79,4 +84,51 @@ class TestLogUtils:
         mock_getLogger.assert_called_once_with("test_logger")
 
         # Assert that the addHandler method of the mock logger is called with the correct argument
-        mock_logger.addHandler.assert_called_once()
\ No newline at end of file
+        mock_logger.addHandler.assert_called_once()
+
+
+def test_get_logger_shares_one_handler_per_file(tmp_path):
+    log_file = str(tmp_path / "script.log")
+    logger = get_logger(log_file, file_name=log_file)
+    other_logger = get_logger("other-script", file_name=log_file)
+    try:
+        # A script constructed again with the same log file doesn't add another handler
+        assert get_logger(log_file, file_name=log_file) is logger
+        assert len(logger.handlers) == 1
+        assert other_logger.handlers == logger.handlers
+
+        logger.warning("first")
+        other_logger.warning("second")
+        flush_logs()
+        lines = (tmp_path / "script.log").read_text().splitlines()
+        assert len(lines) == 2
+        # Formatted by the writer thread, with the thread & the function that logged
+        assert re.search(r"\[MainThread\] \[WARNING\] \[test_log_utils\.test_get_logger_shares_one_handler_per_file"
+                         r"\(\):\d+\] first$", lines[0])
+    finally:
+        logger.handlers.clear()
+        other_logger.handlers.clear()
+        release_file_handler(log_file)
+        release_file_handler(log_file)
+
+
+def test_log_context_file(tmp_path):
+    logger = get_logger("log-context-test")
+    logger.setLevel(logging.INFO)
+    try:
+        def run(context_id):
+            with log_context(context_id, file_name=str(tmp_path / f"{context_id}.log")):
+                logger.info(f"logged by {context_id}")
+
+        threads = [threading.Thread(target=run, args=(f"run-{i}",)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Written by the time the context exits, each run's file has only its records
+        for i in range(2):
+            assert (tmp_path / f"run-{i}.log").read_text().strip().endswith(f"logged by run-{i}")
+        assert log_writer._thread.name == "LogWriter"
+    finally:
+        logger.setLevel(logging.NOTSET)
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock
+from framework.helpers.checkpoint_utils import run_checkpointed
+from framework.helpers.reconcile_utils import (CREATE, UPDATE, DELETE, UNCHANGED, batch_api_calls, diff,
+                                               get_inventory, invalidate_inventory, start_plan, stop_plan,
+                                               group_by_name)
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.batch_script import BatchScript
+from framework.scripts.python.pe.create.create_container_pe import CreateContainerPe
+from framework.scripts.python.pe.other_ops.accept_eula import AcceptEulaPe
+
+CONTAINERS = [{"name": "default"}, {"name": "images"}]
+
+
+@pytest.fixture(autouse=True)
+def no_plan():
+    yield
+    stop_plan()
+
+
+@pytest.fixture
+def clusters():
+    return {"10.1.1.1": {"cluster_info": {"name": "cluster-1"}, "pe_session": MagicMock(spec=RestAPIUtil),
+                         "containers": CONTAINERS}}
+
+
+@pytest.fixture
+def mock_container(mocker):
+    mock_container = mocker.patch("framework.scripts.python.pe.create.create_container_pe.Container")
+    mock_container.return_value.read.return_value = [{"name": "default", "uuid": "1"}]
+    mock_container.return_value.create.return_value = {"value": True}
+    return mock_container
+
+
+def test_diff():
+    existing = {"a": [{"name": "a", "values": [1]}], "b": [{"name": "b", "values": [1, 2]}], "old": [{"uuid": "1"}]}
+    desired = [{"name": "a", "values": [1, 2]}, {"name": "b", "values": [1]}, {"name": "c", "values": [1]}]
+
+    def get_changes(spec, entities):
+        missing = [value for value in spec["values"] if value not in entities[0]["values"]]
+        return {"values": missing} if missing else None
+
+    items = diff(desired, existing, "category", "10.1.1.1", get_changes=get_changes, delete=["old", "missing"])
+    assert [(item.action, item.name) for item in items] == [
+        (UPDATE, "a"), (UNCHANGED, "b"), (CREATE, "c"), (DELETE, "old"), (UNCHANGED, "missing")]
+    assert items[0].changes == {"values": [2]}
+    assert items[3].spec == {"uuid": "1"}
+    assert [item.api_calls for item in items] == [1, 0, 1, 1, 0]
+
+
+def test_batch_api_calls():
+    items = diff([{"name": str(i)} for i in range(5)], {"0": []}, "address_group")
+    assert sum(item.api_calls for item in batch_api_calls(items)) == 1
+    assert sum(item.api_calls for item in batch_api_calls(items, batch_size=3)) == 2
+
+
+def test_inventory_is_shared_until_invalidated():
+    session = MagicMock()
+    build = MagicMock(return_value={"default": [{"name": "default"}]})
+    assert get_inventory(session, "container", build) == {"default": [{"name": "default"}]}
+    # A copy is handed out
+    get_inventory(session, "container", build)["images"] = []
+    assert get_inventory(session, "container", build) == {"default": [{"name": "default"}]}
+    assert build.call_count == 1
+
+    invalidate_inventory(session, "container")
+    get_inventory(session, "container", build)
+    assert build.call_count == 2
+    # Other sessions have their own inventories
+    get_inventory(MagicMock(), "container", build)
+    assert build.call_count == 3
+
+
+def test_create_container_creates_only_the_delta(clusters, mock_container):
+    CreateContainerPe({"clusters": clusters}, parallel=False).run()
+    mock_container.return_value.create.assert_called_once_with(name="images")
+
+    # The inventory is listed again after the create
+    mock_container.return_value.read.return_value = [{"name": "default"}, {"name": "images"}]
+    mock_container.return_value.create.reset_mock()
+    CreateContainerPe({"clusters": clusters}, parallel=False).run()
+    mock_container.return_value.create.assert_not_called()
+
+
+def test_plan_mode(clusters, mock_container, mocker):
+    mock_accept_eula = mocker.patch.object(AcceptEulaPe, "execute")
+    plan = start_plan()
+    batch_script = BatchScript()
+    batch_script.add_all([CreateContainerPe({"clusters": clusters}), AcceptEulaPe({"clusters": clusters})])
+    run_checkpointed(batch_script)
+
+    # Nothing is executed
+    mock_container.return_value.create.assert_not_called()
+    mock_accept_eula.assert_not_called()
+    stats = plan.get_stats()
+    assert (stats[CREATE], stats[UNCHANGED], stats["unplanned"], stats["api_calls"], stats["inventory_reads"]) == (
+        1, 1, 1, 1, 1)
+    assert plan.get_items() == [
+        {"script": "CreateContainerPe", "action": CREATE, "kind": "container", "name": "images",
+         "target": "10.1.1.1"},
+        {"script": "AcceptEulaPe", "action": "unplanned", "target": "10.1.1.1"}]
+    lines = plan.format()
+    assert lines[0].startswith("Plan: 1 to create, 0 to update, 0 to delete, 1 unchanged, 1 scripts not planned")
+    assert "+ CreateContainerPe 10.1.1.1: container 'images'" in lines[1]
+
+
+def test_group_by_name():
+    assert group_by_name([{"name": "a"}, {"name": "a", "id": 2}, {"uuid": "3"}]) == {
+        "a": [{"name": "a"}, {"name": "a", "id": 2}]}
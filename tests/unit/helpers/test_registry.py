@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from framework.helpers import helper_functions
+from framework.helpers.registry import get_action, get_schema, get_script, import_object, get_run_config
+from framework.helpers.schema import IMAGING_SCHEMA
+
+PROJECT_ROOT = Path(__file__).parents[3]
+# Modules the start-up of main.py must not import, they are imported by the scripts that need them
+HEAVY_MODULES = ["calm.dsl", "ntnx_microseg_py_client", "ntnx_networking_py_client", "ntnx_prism_py_client",
+                 "paramiko"]
+# Budget of the benchmark below, not checked by the tests as the wall-clock time depends on the runner.
+# The start-up took ~1.1s with the eager imports and takes ~0.1s now
+IMPORT_TIME_BUDGET_IN_MS = int(os.environ.get("IMPORT_TIME_BUDGET_IN_MS", 600))
+
+
+def import_times(code: str) -> dict:
+    """
+    Run the code with "python -X importtime" in a new interpreter
+
+    Returns:
+        dict: Module to its cumulative import time in micro seconds
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def imported_modules(code: str) -> set:
+    """
+    Run the code in a new interpreter, importlib.import_module isn't reported by "-X importtime"
+
+    Returns:
+        set: Modules imported by the code
+    """
+    code += "; import sys, json; print(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def test_scripts_are_imported_on_first_use():
+    modules = imported_modules("import framework.scripts.python as scripts; scripts.CreateContainerPe")
+    assert "framework.scripts.python.pe.create.create_container_pe" in modules
+    assert "framework.scripts.python.configure_pod" not in modules
+
+
+def test_main_does_not_import_heavy_modules():
+    times = import_times("import main")
+    imported = [module for module in HEAVY_MODULES if module in times]
+    assert not imported, f"main.py imports {imported} at start-up"
+
+
+def test_imaging_workflow_import():
+    modules = imported_modules("import main; from framework.helpers.registry import get_run_config; "
+                               "get_run_config('imaging')")
+    assert "framework.scripts.python.pc.fc.foundation_script" in modules
+    assert "calm.dsl" not in modules
+    assert not any(module.startswith("ntnx_") for module in modules)
+
+
+def test_get_run_config():
+    run_config = get_run_config("imaging")
+    assert run_config["schema"] is IMAGING_SCHEMA
+    assert run_config["pre_run_actions"] == [helper_functions.get_input_data, helper_functions.get_creds_from_vault,
+                                             helper_functions.validate_input_data,
+                                             helper_functions.create_ipam_object]
+    assert run_config["post_run_actions"] == [helper_functions.generate_html_from_json,
+                                              helper_functions.save_pod_logs]
+    assert [script.__name__ for script in run_config["scripts"]] == ["FoundationScript"]
+
+    # Scripts run on their own
+    run_config = get_run_config(scripts=["CreateContainerPe", " save_logs"])
+    assert run_config["schema"] == {}
+    assert helper_functions.validate_input_data not in run_config["pre_run_actions"]
+    assert helper_functions.create_pe_objects in run_config["pre_run_actions"]
+    assert run_config["scripts"][1] is helper_functions.save_logs
+    assert run_config["post_run_actions"] == [helper_functions.save_logs]
+
+
+def test_unknown_names():
+    with pytest.raises(ValueError):
+        get_run_config("no-such-workflow")
+    with pytest.raises(ValueError):
+        get_run_config()
+    with pytest.raises(ValueError):
+        get_script("NoSuchScript")
+    with pytest.raises(ValueError):
+        get_action("logger")
+    with pytest.raises(ValueError):
+        get_schema("get_logger")
+    assert import_object("framework.helpers.schema.IMAGING_SCHEMA") is IMAGING_SCHEMA
+
+
+if __name__ == "__main__":
+    # Benchmark, the slowest imports of main.py: PYTHONPATH=. python tests/unit/helpers/test_registry.py
+    # Exits with 1 if the start-up takes more than IMPORT_TIME_BUDGET_IN_MS
+    main_times = import_times("import main")
+    for module, cumulative in sorted(main_times.items(), key=lambda item: -item[1])[:20]:
+        print(f"{cumulative / 1000:8.1f}ms {module}")
+    print(f"main.py start-up: {main_times['main'] / 1000:.1f}ms, budget {IMPORT_TIME_BUDGET_IN_MS}ms")
+    sys.exit(main_times["main"] / 1000 >= IMPORT_TIME_BUDGET_IN_MS)
@@ -4,8 +4,10 @@ import requests
 import responses 
 import requests_mock
 import json
+import logging
 
 from unittest.mock import patch, MagicMock
+from framework.helpers import rest_utils
 from framework.helpers.rest_utils import RestAPIUtil, rest_api_call
 from framework.helpers.exception_utils import RestError, ResponseError
 from tests.unit.config.test_data import *
@@ -182,6 +184,28 @@ class TestRestAPIUtil:
             rest_util_obj = RestAPIUtil(**REST_ARGS)
             assert rest_util_obj.post(REST_URI) == POST_RESPONSE
 
+    def test_payload_formatted_only_for_debug(self):
+        class Payload:
+            formatted = 0
+
+            def __str__(self):
+                Payload.formatted += 1
+                return "payload"
+
+        with requests_mock.Mocker() as request_mocker:
+            request_mocker.post(f"https://1.1.1.1:9440/{REST_URI}", json=POST_RESPONSE, status_code=200,
+                                headers=API_HEADERS)
+            rest_util_obj = RestAPIUtil(**REST_ARGS)
+            try:
+                rest_utils.logger.setLevel(logging.INFO)
+                rest_util_obj.post(REST_URI, data=Payload(), jsonify=False)
+                assert Payload.formatted == 0
+                rest_utils.logger.setLevel(logging.DEBUG)
+                rest_util_obj.post(REST_URI, data=Payload(), jsonify=False)
+                assert Payload.formatted > 0
+            finally:
+                rest_utils.logger.setLevel(logging.NOTSET)
+
     def test_response_patch_json(self):
         with requests_mock.Mocker() as request_mocker:
             request_mocker.patch(f"https://1.1.1.1:9440/{REST_URI}", json=PATCH_RESPONSE, status_code=200,
@@ -0,0 +1,131 @@
+import copy
+import re
+import threading
+import time
+from pathlib import Path
+import cerberus
+import pytest
+import yaml
+from framework.helpers.general_utils import Loader, validate_schema
+from framework.helpers.schema import POD_CONFIG_SCHEMA
+from framework.helpers.schema_validator import SchemaValidator
+
+POD_CONFIG = Path(__file__).parents[3] / "config" / "example-configs" / "pod-configs" / "pod-config.yml"
+
+
+def synthetic_pod_config(blocks: int, sites_per_block: int) -> dict:
+    """
+    Pod config of blocks * sites_per_block sites, from the example pod config with valid values for its placeholders
+    """
+    text = POD_CONFIG.read_text()
+    text = re.sub(r"valid-[\w-]*?ip(?=[\s:/\"])", "10.1.1.10", text)
+    text = re.sub(r"valid-name-server\d", "10.1.1.2", text).replace("valid-prefix", "32")
+    text = re.sub(r"\bip\d\b", "10.1.1.20", text).replace("10.1.1.10/10.1.1.10", "10.1.1.10")
+    config = yaml.load(text, Loader=Loader)
+    block = config["pod"]["pod_blocks"][0]
+    # The security policies of the example don't match the schema
+    block.pop("security_policies", None)
+    site = block["edge_sites"][0]
+    block["edge_sites"] = [dict(copy.deepcopy(site), site_name=f"site-{i}") for i in range(sites_per_block)]
+    config["pod"]["pod_blocks"] = [dict(copy.deepcopy(block), pod_block_name=f"block-{i}") for i in range(blocks)]
+    return config
+
+
+def break_config(config: dict) -> dict:
+    """
+    An invalid IP per site, a block that isn't a dict and a missing pod_name
+    """
+    config = copy.deepcopy(config)
+    for block in config["pod"]["pod_blocks"]:
+        block["pc_ip"] = "10.1.1"
+        for site in block["edge_sites"]:
+            site["clusters"] = {"10.1.1.300": site["clusters"][next(iter(site["clusters"]))]}
+    config["pod"]["pod_blocks"][1] = "block-1"
+    config["pod"].pop("pod_name")
+    return config
+
+
+def cerberus_errors(schema: dict, data: dict) -> dict:
+    validator = cerberus.Validator(schema, allow_unknown=True)
+    validator.validate(data)
+    return validator.errors
+
+
+@pytest.fixture(scope="module")
+def pod_config():
+    return synthetic_pod_config(blocks=3, sites_per_block=2)
+
+
+def test_same_result_as_cerberus(pod_config):
+    validator = SchemaValidator(max_workers=1)
+    assert validator.validate(POD_CONFIG_SCHEMA, pod_config) == (True, {})
+    assert validate_schema(POD_CONFIG_SCHEMA, pod_config)
+
+    invalid = break_config(pod_config)
+    valid, errors = validator.validate(POD_CONFIG_SCHEMA, invalid)
+    assert not valid
+    assert errors == cerberus_errors(POD_CONFIG_SCHEMA, invalid)
+    assert not validate_schema(POD_CONFIG_SCHEMA, invalid)
+
+    # Schemas without pod blocks are validated as a whole
+    schema = {"name": {"type": "string", "required": True}}
+    assert validator.validate(schema, {"name": 1}) == (False, {"name": ["must be of string type"]})
+
+
+def test_validators_are_cached_per_schema_and_thread():
+    validator = SchemaValidator(max_workers=1)
+    schema = {"name": {"type": "string"}}
+    assert validator.get_validator(schema) is validator.get_validator(schema)
+    assert validator.get_validator(schema) is not validator.get_validator({"name": {"type": "string"}})
+
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(validator.get_validator(schema)))
+    thread.start()
+    thread.join()
+    assert other_thread[0] is not validator.get_validator(schema)
+
+
+def test_blocks_validated_in_parallel(pod_config, caplog):
+    validator = SchemaValidator(max_workers=2, min_parallel_blocks=2)
+    try:
+        invalid = break_config(pod_config)
+        assert validator.validate(POD_CONFIG_SCHEMA, invalid) == (False, cerberus_errors(POD_CONFIG_SCHEMA, invalid))
+        assert validator.validate(POD_CONFIG_SCHEMA, pod_config) == (True, {})
+        assert validator._executor is not None
+        assert "Couldn't validate the blocks in parallel" not in caplog.text
+    finally:
+        validator.shutdown()
+
+
+def benchmark(blocks: int = 50, sites_per_block: int = 20, max_workers: int = 4):
+    """
+    Validation of a synthetic pod config of blocks * sites_per_block sites, valid and with an error per site, best
+    of 3 runs
+        python tests/unit/helpers/test_schema_validator.py
+    """
+    config = synthetic_pod_config(blocks, sites_per_block)
+    print(f"{blocks * sites_per_block} sites in {blocks} pod blocks")
+    sequential = SchemaValidator(max_workers=1)
+    parallel = SchemaValidator(max_workers=max_workers, min_parallel_blocks=2)
+    # Compiles the schemas & starts the workers, the way a warm process validates the next configs
+    sequential.validate(POD_CONFIG_SCHEMA, config)
+    parallel.validate(POD_CONFIG_SCHEMA, config)
+
+    for name, data in [("valid", config), ("invalid", break_config(config))]:
+        for engine, validate in [
+            ("cerberus.Validator per call", lambda: cerberus.Validator(POD_CONFIG_SCHEMA, allow_unknown=True)
+             .validate(data)),
+            ("SchemaValidator", lambda: sequential.validate(POD_CONFIG_SCHEMA, data)),
+            (f"SchemaValidator, {max_workers} processes", lambda: parallel.validate(POD_CONFIG_SCHEMA, data)),
+        ]:
+            timings = []
+            for _ in range(3):
+                start_time = time.perf_counter()
+                validate()
+                timings.append(time.perf_counter() - start_time)
+            print(f"{name:<8} {engine:<32} {min(timings):8.2f}s")
+    parallel.shutdown()
+
+
+if __name__ == '__main__':
+    benchmark()
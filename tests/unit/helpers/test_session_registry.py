@@ -0,0 +1,88 @@
+import json
+import threading
+from copy import deepcopy
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from framework.helpers.rest_utils import RestAPIUtil, PoolStats
+from framework.helpers.session_registry import SessionRegistry
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"data": "success"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def registry():
+    PoolStats.reset()
+    return SessionRegistry()
+
+
+class TestSessionRegistry:
+    def test_get_session_shared(self, registry):
+        session = registry.get_session("10.1.1.1", user="admin", pwd="pwd", port="9440")
+        assert isinstance(session, RestAPIUtil)
+        assert registry.get_session("10.1.1.1", user="admin", pwd="pwd", port="9440") is session
+        assert registry.get_stats()["sessions"] == {"hits": 1, "misses": 1, "active": 1}
+
+    @pytest.mark.parametrize("other", [
+        {"ip_address": "10.1.1.2", "user": "admin", "pwd": "pwd", "port": "9440"},
+        {"ip_address": "10.1.1.1", "user": "admin", "pwd": "other", "port": "9440"},
+        {"ip_address": "10.1.1.1", "user": "admin", "pwd": "pwd", "port": "9440", "secured": False},
+        {"ip_address": "10.1.1.1", "user": "admin", "pwd": "pwd", "port": ""},
+    ])
+    def test_get_session_different_key(self, registry, other):
+        session = registry.get_session("10.1.1.1", user="admin", pwd="pwd", port="9440")
+        assert registry.get_session(**other) is not session
+
+    def test_pool_sizing(self, registry, mocker):
+        mock_rest_util = mocker.patch("framework.helpers.session_registry.RestAPIUtil")
+        registry.configure(default_pool_maxsize=10, host_pool_maxsize={"10.1.1.1": 50})
+        registry.get_session("10.1.1.1", user="admin", pwd="pwd")
+        registry.get_session("10.1.1.2", user="admin", pwd="pwd")
+        assert [c.kwargs["pool_maxsize"] for c in mock_rest_util.call_args_list] == [50, 10]
+
+    def test_v4_api_util_shared(self, registry):
+        api_util = registry.get_v4_api_util("10.1.1.1", "9440", "admin", "pwd")
+        assert registry.get_v4_api_util("10.1.1.1", "9440", "admin", "pwd") is api_util
+        assert registry.get_v4_api_util("10.1.1.1", "9440", "admin", "other") is not api_util
+
+    def test_pool_stats(self, registry):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), JsonHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        try:
+            session = registry.get_session("127.0.0.1", user="admin", pwd="pwd", port=str(port), secured=False)
+            for _ in range(3):
+                assert session.get("api/test") == {"data": "success"}
+        finally:
+            server.shutdown()
+        # First call opens the connection, the rest reuse it
+        assert registry.get_stats()["pools"][f"http://127.0.0.1:{port}"] == {
+            "hits": 2, "misses": 1, "blocked_waits": 0
+        }
+
+    def test_pool_stats_counters(self, registry):
+        PoolStats.record("https", "10.1.1.1", 9440, "misses")
+        PoolStats.record("https", "10.1.1.1", 9440, "hits")
+        PoolStats.record("https", "10.1.1.1", 9440, "hits")
+        assert registry.get_stats()["pools"] == {
+            "https://10.1.1.1:9440": {"hits": 2, "misses": 1, "blocked_waits": 0}
+        }
+
+    def test_session_shared_across_deepcopy(self, registry):
+        data = {"pc_session": registry.get_session("10.1.1.1", user="admin", pwd="pwd", port="9440"),
+                "v4_api_util": registry.get_v4_api_util("10.1.1.1", "9440", "admin", "pwd")}
+        data_copy = deepcopy(data)
+        assert data_copy["pc_session"] is data["pc_session"]
+        assert data_copy["v4_api_util"] is data["v4_api_util"]
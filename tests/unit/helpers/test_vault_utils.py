@@ -1,5 +1,5 @@
 from unittest.mock import MagicMock, patch
-from framework.helpers.vault_utils import CyberArk
+from framework.helpers.vault_utils import CyberArk, CredentialCache
 import pytest
 
 class TestVaultUtils:
@@ -38,5 +38,17 @@ class TestVaultUtils:
         cyber_ark.session_log_off()
         cyber_ark.session.post.assert_called_with("PasswordVault/API/Auth/LogOff")
 
+    @patch("framework.helpers.vault_utils.time.monotonic")
+    def test_credential_cache(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        cache = CredentialCache()
+        # Disabled by default
+        cache.set(("host", "user"), ("user", "password"))
+        assert cache.get(("host", "user")) is None
 
-
+        cache.configure(ttl=60)
+        cache.set(("host", "user"), ("user", "password"))
+        assert cache.get(("host", "user")) == ("user", "password")
+        mock_monotonic.return_value = 161
+        assert cache.get(("host", "user")) is None
+        assert cache.get_stats() == {"ttl": 60, "entries": 0, "hits": 1, "misses": 1}
@@ -0,0 +1,121 @@
+import contextvars
+import threading
+import time
+import pytest
+from framework.helpers.worker_pool import ContextThreadPoolExecutor, WorkerPool
+
+_value = contextvars.ContextVar("value", default=None)
+
+
+class Tracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.max_in_flight = {}
+
+    def run(self, key, delay=0.02, result=None):
+        with self.lock:
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+            self.max_in_flight[key] = max(self.max_in_flight.get(key, 0), self.in_flight[key])
+        time.sleep(delay)
+        with self.lock:
+            self.in_flight[key] -= 1
+        return result
+
+
+class TestWorkerPool:
+    @pytest.fixture
+    def pool(self):
+        return WorkerPool(max_workers=4, max_workers_per_host=2, max_workers_per_class=3)
+
+    def test_map(self, pool):
+        assert pool.map(lambda a, b: a + b, [1, 2, 3], [10, 20, 30]) == [11, 22, 33]
+        stats = pool.get_stats()
+        assert stats["completed"] == 3
+        assert (stats["active_workers"], stats["inline_workers"], stats["queue_depth"]) == (0, 0, 0)
+
+    def test_map_exceptions(self, pool):
+        def fail(i):
+            if i == 1:
+                raise ValueError("failed")
+            return i
+
+        with pytest.raises(ValueError):
+            pool.map(fail, range(3))
+        results = pool.map(fail, range(3), return_exceptions=True)
+        assert results[0] == 0 and isinstance(results[1], ValueError) and results[2] == 2
+
+    def test_global_budget(self, pool):
+        tracker = Tracker()
+        pool.map(lambda i: tracker.run("all"), range(20))
+        # 4 pooled workers & the waiting thread
+        assert 1 < tracker.max_in_flight["all"] <= 5
+        assert pool.get_stats()["max_active_workers"] == 4
+        assert pool.get_stats()["max_queue_depth"] >= 16
+
+    def test_host_budget(self, pool):
+        tracker = Tracker()
+        hosts = ["10.1.1.1"] * 6 + ["10.1.1.2"] * 6
+        pool.map(lambda host: tracker.run(host), hosts, hosts=hosts)
+        # 2 pooled workers per host & the waiting thread
+        assert tracker.max_in_flight["10.1.1.1"] <= 3
+        assert tracker.max_in_flight["10.1.1.2"] <= 3
+
+    def test_host_limits(self, pool):
+        pool.configure(host_limits={"10.1.1.1": 1})
+        tracker = Tracker()
+        hosts = ["10.1.1.1"] * 6
+        pool.map(lambda host: tracker.run(host), hosts, hosts=hosts)
+        assert tracker.max_in_flight["10.1.1.1"] <= 2
+
+    def test_class_budget(self, pool):
+        tracker = Tracker()
+        pool.map(lambda i: tracker.run("CreateContainerPe"), range(10), script_class="CreateContainerPe")
+        assert tracker.max_in_flight["CreateContainerPe"] <= 4
+
+    def test_job_max_in_flight(self, pool):
+        tracker = Tracker()
+        pool.map(lambda i: tracker.run("job"), range(10), max_in_flight=2)
+        assert tracker.max_in_flight["job"] == 2
+
+    def test_nested_jobs_do_not_deadlock(self, pool):
+        tracker = Tracker()
+
+        def outer(i):
+            # Every pooled worker waits on a nested job
+            return sum(pool.map(lambda j: tracker.run("inner", 0.01, 1), range(5)))
+
+        assert pool.map(outer, range(8)) == [5] * 8
+        assert pool.get_stats()["max_active_workers"] <= 4
+
+    def test_job_submit_while_waiting(self, pool):
+        job = pool.job()
+        results = []
+
+        def step(i):
+            results.append(i)
+            if i < 5:
+                job.submit(step, i + 1)
+
+        job.submit(step, 0)
+        job.wait()
+        assert results == [0, 1, 2, 3, 4, 5]
+
+    def test_thread_name_restored(self, pool):
+        def rename():
+            threading.current_thread().name = "Thread-Script"
+
+        name = threading.current_thread().name
+        pool.map(lambda i: rename(), range(10))
+        assert threading.current_thread().name == name
+
+
+class TestContextThreadPoolExecutor:
+    def test_calls_run_in_the_context_of_the_submitter(self):
+        token = _value.set("job")
+        try:
+            with ContextThreadPoolExecutor(max_workers=2) as executor:
+                assert executor.submit(_value.get).result() == "job"
+                assert list(executor.map(lambda i: (i, _value.get()), range(2))) == [(0, "job"), (1, "job")]
+        finally:
+            _value.reset(token)
@@ -1,6 +1,10 @@
+import contextvars
+import threading
 import pytest
 from unittest.mock import MagicMock, patch
 from framework.helpers.workflow_utils import Workflow
+from framework.helpers.worker_pool import get_worker_pool
+from framework.scripts.python.helpers.state_monitor.polling_policy import PollingPolicy, record_polling_stats
 
 class TestWorkflow:
     def test_run_scripts(self):
@@ -13,6 +17,45 @@ class TestWorkflow:
         # Assert that the logger.info method is called with the correct argument
         mock_script.assert_called_once_with(data = {})
     
+    def test_run_scripts_logs_pool_stats(self):
+        with patch("framework.helpers.workflow_utils.session_registry") as mock_registry:
+            Workflow().run_scripts([MagicMock()])
+        mock_registry.log_stats.assert_called_once_with({"sessions": {}, "pools": {}})
+
+    def test_run_scripts_reports_own_stats(self):
+        # Two jobs of the same process, running at the same time
+        barrier = threading.Barrier(2)
+
+        def make_script(monitor, items):
+            class RecordingScript:
+                def __init__(self, data):
+                    pass
+
+                def run(self):
+                    barrier.wait()
+                    record_polling_stats(monitor, PollingPolicy())
+                    get_worker_pool().map(lambda i: i, range(items))
+                    barrier.wait()
+
+            return RecordingScript
+
+        outputs = {"first": {}, "second": {}}
+        threads = [
+            threading.Thread(target=contextvars.Context().run, args=(
+                Workflow(json_output=outputs["first"]).run_scripts, [make_script("FirstMonitor", 2)])),
+            threading.Thread(target=contextvars.Context().run, args=(
+                Workflow(json_output=outputs["second"]).run_scripts, [make_script("SecondMonitor", 3)]))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert list(outputs["first"]["state_monitors"]) == ["FirstMonitor"]
+        assert list(outputs["second"]["state_monitors"]) == ["SecondMonitor"]
+        assert outputs["first"]["worker_pool"]["completed"] == 2
+        assert outputs["second"]["worker_pool"]["completed"] == 3
+
     def test_run_functions(self):
         # Create a mock function
         mock_function = MagicMock()
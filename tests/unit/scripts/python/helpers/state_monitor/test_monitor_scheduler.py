@@ -0,0 +1,103 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.state_monitor.monitor_scheduler import MonitorScheduler, monitor_all
+from framework.scripts.python.helpers.state_monitor.state_monitor import StateMonitor
+from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor
+from framework.scripts.python.helpers.v3.task import Task
+
+
+class CountingMonitor(StateMonitor):
+    DEFAULT_CHECK_INTERVAL_IN_SEC = 0.01
+    DEFAULT_TIMEOUT_IN_SEC = 5
+
+    def __init__(self, checks_needed: int, error: Exception = None):
+        self.checks_needed = checks_needed
+        self.error = error
+        self.checks = 0
+        self.threads = set()
+
+    def check_status(self):
+        self.checks += 1
+        self.threads.add(threading.current_thread().name)
+        if self.error:
+            raise self.error
+        return {"checks": self.checks}, self.checks >= self.checks_needed
+
+
+@pytest.fixture
+def scheduler():
+    return MonitorScheduler(max_check_workers=2)
+
+
+class TestMonitorScheduler:
+    def test_futures_resolve(self, scheduler):
+        monitors = [CountingMonitor(checks_needed=i) for i in range(1, 20)]
+
+        futures = [scheduler.submit(monitor) for monitor in monitors]
+
+        assert [future.result(timeout=5) for future in futures] == [({"checks": i}, True) for i in range(1, 20)]
+        # All the checks ran on the workers of the scheduler
+        assert set().union(*(monitor.threads for monitor in monitors)) <= {"MonitorScheduler-check_0",
+                                                                            "MonitorScheduler-check_1"}
+
+    def test_timeout(self, scheduler):
+        monitor = CountingMonitor(checks_needed=10 ** 6)
+        monitor.DEFAULT_TIMEOUT_IN_SEC = 0.05
+
+        assert scheduler.submit(monitor).result(timeout=5) == (None, False)
+
+    def test_check_error(self, scheduler):
+        future = scheduler.submit(CountingMonitor(checks_needed=1, error=ValueError("failed")))
+
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+    def test_scheduler_thread_restarts(self, scheduler):
+        assert scheduler.submit(CountingMonitor(checks_needed=1)).result(timeout=5)[1]
+        scheduler._thread and scheduler._thread.join(timeout=5)
+        assert scheduler.submit(CountingMonitor(checks_needed=2)).result(timeout=5)[1]
+
+    def test_monitor_all(self):
+        monitors = [CountingMonitor(checks_needed=2), CountingMonitor(checks_needed=1)]
+
+        assert monitor_all(monitors) == [({"checks": 2}, True), ({"checks": 1}, True)]
+
+
+class TestPcTaskMonitorCoalescing:
+    def test_tasks_of_a_pc_polled_together(self, mocker):
+        session = MagicMock(spec=RestAPIUtil)
+        polls = []
+
+        def poll(task_uuid_list, *args, **kwargs):
+            polls.append(list(task_uuid_list))
+            return [{"uuid": uuid, "status": "FAILED" if uuid == "t3" else "SUCCEEDED"} for uuid in task_uuid_list]
+
+        mocker.patch.object(Task, "poll", side_effect=poll)
+        monitors = [PcTaskMonitor(session, task_uuid_list=["t1", "t2"]),
+                    PcTaskMonitor(session, task_uuid_list=["t2", "t3"])]
+
+        results = PcTaskMonitor.check_status_coalesced(monitors)
+
+        assert polls == [["t1", "t2", "t3"]]
+        assert results[0] == (None, True)
+        assert results[1][1] is True and "t3" in results[1][0]
+
+    def test_coalesce_key(self):
+        session = MagicMock(spec=RestAPIUtil)
+        monitors = [PcTaskMonitor(session, task_uuid_list=["t1"]), PcTaskMonitor(session, task_uuid_list=["t2"]),
+                    PcTaskMonitor(MagicMock(spec=RestAPIUtil), task_uuid_list=["t3"])]
+
+        entries = [MagicMock(monitor=monitor) for monitor in monitors]
+        groups = MonitorScheduler._group(entries)
+
+        assert [[entry.monitor for entry in group] for group in groups] == [monitors[:2], monitors[2:]]
+
+    def test_monitor_uses_shared_scheduler(self, mocker):
+        mocker.patch.dict("framework.scripts.python.helpers.state_monitor.state_monitor.monitor_config",
+                          {"shared_scheduler": True})
+        monitor = CountingMonitor(checks_needed=2)
+
+        assert monitor.monitor() == ({"checks": 2}, True)
+        assert monitor.threads and threading.current_thread().name not in monitor.threads
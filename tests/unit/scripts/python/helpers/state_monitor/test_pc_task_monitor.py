@@ -32,12 +32,21 @@ class TestPcTaskMonitor:
             {"status": "FAILED", "uuid":"test_uuid4"}, {"status": "COMPLETED", "uuid":"test_uuid5"}
             ]
         assert pc_task_monitor.check_status() == ("[{'status': 'FAILED', 'uuid': 'test_uuid2'}, {'status': 'FAILED', 'uuid': 'test_uuid4'}]", True)
-        mock_task_poll.return_value = [
-            {"status": "COMPLETED", "uuid":"test_uuid1"}, {"status": "COMPLETED", "uuid":"test_uuid2"}, {"status": "COMPLETED", "uuid":"test_uuid3"},
-            {"status": "COMPLETED", "uuid":"test_uuid4"}, {"status": "COMPLETED", "uuid":"test_uuid5"}
+        assert pc_task_monitor.completed_task_list == [
+            {"status": "COMPLETED", "uuid":"test_uuid1"}, {"status": "COMPLETED", "uuid":"test_uuid3"},
+            {"status": "COMPLETED", "uuid":"test_uuid5"}
             ]
+        # Only the outstanding tasks are polled
+        assert mock_task_poll.call_args.args[0] == ["test_uuid1", "test_uuid2", "test_uuid3", "test_uuid4", "test_uuid5"]
+
+        pc_task_monitor = PcTaskMonitor(session=self.session, task_uuid_list=["test_uuid1", "test_uuid2"])
+        mock_task_poll.return_value = [{"status": "COMPLETED", "uuid":"test_uuid1"}]
+        assert pc_task_monitor.check_status() == (None, False)
+        mock_task_poll.return_value = [{"status": "COMPLETED", "uuid":"test_uuid2"}]
         assert pc_task_monitor.check_status() == (None, True)
-        pc_task_monitor.task_uuid_list = []
+        assert mock_task_poll.call_args.args[0] == ["test_uuid2"]
+
+        pc_task_monitor = PcTaskMonitor(session=self.session, task_uuid_list=[])
         assert pc_task_monitor.check_status() == (None, True)
 
     def test__uuid_list_chunks(self, pc_task_monitor):
@@ -0,0 +1,136 @@
+import pytest
+from unittest.mock import MagicMock
+from framework.scripts.python.helpers.state_monitor import polling_policy
+from framework.scripts.python.helpers.state_monitor.polling_policy import PollingPolicy, build_polling_policy, \
+    configure_polling_policies, get_polling_stats, reset_polling_stats
+from framework.scripts.python.helpers.state_monitor.state_monitor import StateMonitor
+
+
+@pytest.fixture(autouse=True)
+def clean_policies():
+    yield
+    polling_policy.policy_overrides.clear()
+    reset_polling_stats()
+
+
+@pytest.fixture
+def clock(mocker):
+    mock_time = mocker.patch.object(polling_policy, "time", MagicMock())
+    mock_time.monotonic.return_value = 0
+    return mock_time
+
+
+class TestPollingPolicy:
+    def test_backoff_bounds(self):
+        policy = PollingPolicy(initial_interval=2, min_interval=1, max_interval=10, jitter=0)
+        assert [policy.next_interval() for _ in range(5)] == [2, 4, 8, 10, 10]
+        policy.reset()
+        assert policy.next_interval() == 2
+
+    def test_jitter(self):
+        policy = PollingPolicy(initial_interval=10, min_interval=1, max_interval=100, backoff_factor=1, jitter=0.2)
+        intervals = [policy.next_interval() for _ in range(50)]
+        assert all(8 <= interval <= 12 for interval in intervals)
+        assert len(set(intervals)) > 1
+
+    def test_eta(self, clock):
+        policy = PollingPolicy(initial_interval=5, min_interval=1, max_interval=600, jitter=0)
+        policy.record_check(10)
+        assert policy.get_eta() is None
+        clock.monotonic.return_value = 100
+        policy.record_check(20)
+        # 10% in 100 seconds, 80% left
+        assert policy.get_eta() == 800
+        assert policy.next_interval() == 400
+
+        # Close to completion the checks get denser, down to the min interval
+        clock.monotonic.return_value = 890
+        policy.record_check(99)
+        assert policy.next_interval() == 5
+        clock.monotonic.return_value = 899
+        assert policy.next_interval() == 1
+
+    def test_progress_going_back_restarts_estimate(self, clock):
+        policy = PollingPolicy(initial_interval=5, jitter=0)
+        policy.record_check(50)
+        clock.monotonic.return_value = 10
+        policy.record_check(60)
+        policy.record_check(5)
+        assert policy.get_eta() is None
+        policy.record_check("not a number")
+        assert policy.get_eta() is None
+
+    def test_stats(self, clock):
+        policy = PollingPolicy(initial_interval=5, backoff_factor=1, jitter=0)
+        policy.record_check()
+        policy.next_wait()
+        clock.monotonic.return_value = 5
+        policy.record_check()
+        policy.next_wait()
+        clock.monotonic.return_value = 10
+        policy.record_check()
+        assert policy.get_stats() == {"checks": 3, "elapsed": 10, "waiting": 10, "completed_after": 5}
+
+    def test_overrides(self):
+        configure_polling_policies({"default": {"jitter": 0}, "NdbTaskMonitor": {"max_interval": 30}})
+        policy = build_polling_policy("NdbTaskMonitor", {"initial_interval": 15, "max_interval": 60, "jitter": 0.5})
+        assert (policy.initial_interval, policy.max_interval, policy.jitter) == (15, 30, 0.5)
+        policy = build_polling_policy("VmIpMonitorPe", {"max_interval": 60})
+        assert (policy.max_interval, policy.jitter) == (60, 0)
+
+
+class FakeMonitor(StateMonitor):
+    DEFAULT_POLLING_POLICY = {"initial_interval": 1, "min_interval": 1, "max_interval": 4, "jitter": 0}
+
+    def __init__(self, checks):
+        self.checks = checks
+        self.progress = None
+
+    def check_status(self):
+        self.progress, completed = self.checks.pop(0)
+        return None, completed
+
+    def get_progress(self):
+        return self.progress
+
+
+class TestStateMonitorPolicy:
+    def test_monitor_backs_off(self, mocker):
+        mock_sleep = mocker.patch("time.sleep")
+        assert FakeMonitor([(None, False)] * 4 + [(None, True)]).monitor() == (None, True)
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2, 4, 4]
+
+        stats = get_polling_stats()["FakeMonitor"]
+        assert (stats["runs"], stats["timeouts"], stats["checks"], stats["waiting"]) == (1, 0, 5, 11)
+
+    def test_default_policy_from_interval(self):
+        class Monitor(StateMonitor):
+            DEFAULT_CHECK_INTERVAL_IN_SEC = 30
+
+            def check_status(self):
+                return None, True
+
+        policy = Monitor().get_polling_policy()
+        assert [policy.next_interval() for _ in range(3)] == [30, 30, 30]
+
+    def test_interval_set_by_caller(self, mocker):
+        mock_sleep = mocker.patch("time.sleep")
+        monitor = FakeMonitor([(None, False)] * 3 + [(None, True)])
+        monitor.DEFAULT_CHECK_INTERVAL_IN_SEC = 10
+
+        assert monitor.monitor() == (None, True)
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [10, 10, 10]
+
+    def test_default_override_keeps_interval_set_by_monitor(self, mocker):
+        mock_sleep = mocker.patch("time.sleep")
+        configure_polling_policies({"default": {"initial_interval": 5, "min_interval": 2, "jitter": 0.5}})
+        monitor = FakeMonitor([(None, False)] * 2 + [(None, True)])
+        # eg. the long-polling PcTaskMonitor
+        monitor.DEFAULT_CHECK_INTERVAL_IN_SEC = 0
+
+        assert monitor.monitor() == (None, True)
+        mock_sleep.assert_not_called()
+
+    def test_override_from_config(self):
+        configure_polling_policies({"FakeMonitor": {"initial_interval": 3}})
+        assert FakeMonitor([]).get_polling_policy().next_interval() == 3
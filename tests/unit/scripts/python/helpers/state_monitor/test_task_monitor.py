@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.state_monitor.task_monitor import PcTaskMonitor, get_distribution
+from framework.scripts.python.helpers.v3.task import Task
+
+
+class TestPcTaskMonitor:
+    @pytest.fixture
+    def session(self):
+        return MagicMock(spec=RestAPIUtil)
+
+    def test_finished_tasks_not_polled_again(self, session, mocker):
+        polls = []
+        responses = [
+            [{"uuid": "t1", "status": "SUCCEEDED"}, {"uuid": "t2", "status": "FAILED"}],
+            [{"uuid": "t3", "status": "SUCCEEDED"}],
+        ]
+
+        def poll(task_uuid_list, **kwargs):
+            polls.append((list(task_uuid_list), kwargs))
+            return responses.pop(0)
+
+        mocker.patch.object(Task, "poll", side_effect=poll)
+        monitor = PcTaskMonitor(session, task_uuid_list=["t1", "t2", "t3"])
+
+        assert monitor.check_status() == (None, False)
+        assert monitor.check_status() == ("[{'uuid': 't2', 'status': 'FAILED'}]", True)
+        assert polls == [(["t1", "t2", "t3"], {"poll_timeout_secs": 30}), (["t3"], {"poll_timeout_secs": 30})]
+        assert [task["uuid"] for task in monitor.completed_task_list] == ["t1", "t3"]
+        # No more polls once all the tasks finished
+        assert monitor.check_status() == ("[{'uuid': 't2', 'status': 'FAILED'}]", True)
+        assert len(polls) == 2
+
+    def test_no_tasks(self, session, mocker):
+        mock_poll = mocker.patch.object(Task, "poll")
+        assert PcTaskMonitor(session, task_uuid_list=[]).check_status() == (None, True)
+        mock_poll.assert_not_called()
+
+    def test_chunks_polled_concurrently(self, session, mocker):
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def poll(task_uuid_list, **kwargs):
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+            return [{"uuid": uuid, "status": "SUCCEEDED"} for uuid in task_uuid_list]
+
+        mocker.patch.object(Task, "poll", side_effect=poll)
+        task_uuid_list = [f"t{i}" for i in range(350)]
+        monitor = PcTaskMonitor(session, task_uuid_list=task_uuid_list)
+
+        assert monitor.check_status() == (None, True)
+        assert [task["uuid"] for task in monitor.completed_task_list] == task_uuid_list
+        assert 1 < max(max_in_flight) <= 4
+
+    def test_long_poll_replaces_sleep(self, session, mocker):
+        mocker.patch.object(Task, "poll", side_effect=[[], [{"uuid": "t1", "status": "SUCCEEDED"}]])
+        mock_sleep = mocker.patch("time.sleep")
+        monitor = PcTaskMonitor(session, task_uuid_list=["t1"])
+
+        assert monitor.monitor() == (None, True)
+        mock_sleep.assert_not_called()
+
+    def test_v4_task_op_sleeps(self, session):
+        task_op = MagicMock()
+        task_op.poll.return_value = [{"ext_id": "t1", "status": "SUCCEEDED"}]
+        monitor = PcTaskMonitor(session, task_op=task_op, task_uuid_list=["t1"])
+
+        assert monitor.DEFAULT_CHECK_INTERVAL_IN_SEC == PcTaskMonitor.DEFAULT_CHECK_INTERVAL_IN_SEC
+        assert monitor.check_status() == (None, True)
+        task_op.poll.assert_called_once_with(["t1"])
+
+    def test_task_durations(self, session, mocker):
+        mocker.patch.object(Task, "poll", return_value=[
+            {"uuid": "t1", "status": "SUCCEEDED", "creation_time_usecs": 1_000_000,
+             "completion_time_usecs": 3_000_000},
+            {"uuid": "t2", "status": "SUCCEEDED", "creation_time_usecs": 1_000_000,
+             "completion_time_usecs": 11_000_000},
+        ])
+        monitor = PcTaskMonitor(session, task_uuid_list=["t1", "t2"])
+        monitor.check_status()
+
+        assert monitor.task_durations == {"t1": 2, "t2": 10}
+        assert monitor.get_duration_stats() == {"count": 2, "min": 2, "p50": 2, "p90": 10, "p99": 10, "max": 10}
+
+
+def test_get_distribution():
+    assert get_distribution([]) == {"count": 0}
+    assert get_distribution([float(i) for i in range(100, 0, -1)]) == {
+        "count": 100, "min": 1, "p50": 50, "p90": 90, "p99": 99, "max": 100}
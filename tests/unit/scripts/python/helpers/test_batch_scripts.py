@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
+from framework.helpers.worker_pool import get_worker_pool
 from framework.scripts.python.helpers.batch_script import BatchScript
 from framework.scripts.python.script import Script
 
@@ -86,7 +87,7 @@ class TestBatchScripts:
         script2.run.assert_called_once()
 
     def test_parallel_execute(self, batch_script, mocker):
-        mock_executor = mocker.patch("concurrent.futures.ThreadPoolExecutor")
+        mock_job = mocker.spy(get_worker_pool(), "job")
         script1 = MagicMock()
         script1.run.return_value = {"result1": "value1"}
         script2 = MagicMock()
@@ -95,11 +96,20 @@ class TestBatchScripts:
         batch_script.add(script1)
         batch_script.add(script2)
 
-        mock_executor.return_value.__enter__.return_value.map.return_value = [script1.run(), script2.run()]
-
         batch_script._parallel_execute()
 
         assert batch_script.results == {"result1": "value1", "result2": "value2"}
         script1.run.assert_called_once()
         script2.run.assert_called_once()
-        mock_executor.assert_called_once_with(max_workers=batch_script.max_workers)
\ No newline at end of file
+        mock_job.assert_called_once_with(max_in_flight=batch_script.max_workers)
+
+    def test_parallel_execute_error(self, batch_script):
+        script1 = MagicMock()
+        script1.run.side_effect = Exception("failed")
+        script2 = MagicMock()
+        script2.run.return_value = {"result2": "value2"}
+        batch_script.add_all([script1, script2])
+
+        batch_script._parallel_execute()
+
+        assert batch_script.results == {"result2": "value2"}
\ No newline at end of file
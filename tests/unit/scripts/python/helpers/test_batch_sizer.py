@@ -0,0 +1,112 @@
+import pytest
+from unittest.mock import MagicMock
+from framework.helpers.exception_utils import RestError
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.batch_sizer import AdaptiveBatchSizer, get_batch_sizer, \
+    get_batch_sizing_stats, is_server_error
+from framework.scripts.python.helpers.pc_batch_op import PcBatchOp
+
+
+@pytest.fixture
+def sizer():
+    return AdaptiveBatchSizer("v3 vm", initial_size=40, min_size=4, max_size=60, max_body_bytes=10000,
+                              target_latency=10)
+
+
+class TestAdaptiveBatchSizer:
+    def test_grows_when_fast(self, sizer):
+        for _ in range(10):
+            sizer.record(sizer.get_size(), latency=1)
+        assert sizer.get_size() == 60
+
+    def test_shrinks_when_slow(self, sizer):
+        sizer.record(40, latency=20)
+        assert sizer.get_size() == 30
+
+    def test_halves_on_server_error(self, sizer):
+        sizer.record(40, latency=1, error=True)
+        assert sizer.get_size() == 20
+        for _ in range(5):
+            sizer.record(sizer.get_size(), latency=1, error=True)
+        assert sizer.get_size() == 4
+
+    def test_keeps_shrinking_while_error_rate_is_high(self, sizer):
+        sizer.record(40, latency=1, error=True)
+        sizer.record(20, latency=1)
+        assert sizer.get_size() == 15
+
+    def test_capped_by_body_size(self, sizer):
+        assert sizer.get_size([{"name": "a"}] * 40) == 40
+        # ~1000 bytes per request, at most 10 fit in max_body_bytes
+        assert sizer.get_size([{"name": "a" * 990}] * 40) == 9
+        # Never below min_size
+        assert sizer.get_size([{"name": "a" * 10000}] * 40) == 4
+
+    def test_stats(self, sizer):
+        sizer.record(40, latency=1)
+        sizer.record(50, latency=3, error=True)
+        assert sizer.get_stats() == {"size": 25, "min_size": 4, "max_size": 60, "chunks": 2, "errors": 1,
+                                     "avg_latency": 2.0, "sizes_used": [40, 50]}
+
+    @pytest.mark.parametrize("error, expected", [
+        (RestError(message="{'code': 503}", status_code=503), True),
+        (RestError(message="{'code': 404}", status_code=404), False),
+        (TimeoutError(), True),
+        (ValueError(), False),
+    ])
+    def test_is_server_error(self, error, expected):
+        assert is_server_error(error) == expected
+
+
+class TestPcBatchOpSizing:
+    def test_shared_per_session(self):
+        session = MagicMock(spec=RestAPIUtil)
+        assert get_batch_sizer(session, "v3", "vm") is get_batch_sizer(session, "v3", "vm")
+        assert get_batch_sizer(session, "v3", "vm") is not get_batch_sizer(MagicMock(), "v3", "vm")
+
+    def test_batch_shrinks_after_server_error(self):
+        session = MagicMock(spec=RestAPIUtil)
+        session.post.side_effect = RestError(message="{'code': 500}", status_code=500)
+        batch_op = PcBatchOp(session, resource_type="/vms", kind="vm")
+
+        with pytest.raises(RestError):
+            batch_op.batch(list(range(60)))
+
+        session.post.side_effect = lambda uri, data=None, **kwargs: {
+            "api_response_list": [{"request": r} for r in data["api_request_list"]]}
+        response = batch_op.batch(list(range(60)))
+
+        assert [r["request"] for r in response] == list(range(60))
+        assert batch_op.chunk_sizes[0] == 30
+        assert get_batch_sizing_stats()["v3 vm"]["errors"] == 1
+
+    def test_batch_splits_large_payloads(self, mocker):
+        mocker.patch.dict("framework.scripts.python.helpers.batch_sizer.sizing_config",
+                          {"v3": {"initial_size": 60, "min_size": 1, "max_size": 60, "max_body_bytes": 50000,
+                                  "target_latency": 30}})
+        session = MagicMock(spec=RestAPIUtil)
+        session.post.side_effect = lambda uri, data=None, **kwargs: {
+            "api_response_list": [{} for _ in data["api_request_list"]]}
+        batch_op = PcBatchOp(session, resource_type="/network_security_rules", kind="network_security_rule")
+
+        batch_op.batch([{"body": {"rules": "x" * 5000}}] * 60)
+
+        assert batch_op.chunk_sizes[0] == 9
+        assert sum(batch_op.chunk_sizes) == 60
+
+    def test_v4_chunk_size_stays_at_one(self):
+        sizer = get_batch_sizer(MagicMock(), "v4", "vmm/v4.0/ahv/config/vms")
+        for _ in range(10):
+            sizer.record(sizer.get_size(), latency=0.1)
+
+        assert sizer.get_size([{"name": "vm"}] * 20) == 1
+
+    def test_v4_chunk_size_configured(self, mocker):
+        mocker.patch.dict("framework.scripts.python.helpers.batch_sizer.sizing_config",
+                          {"v4": {"initial_size": 1, "min_size": 1, "max_size": 10, "max_body_bytes": 0,
+                                  "target_latency": 30}})
+        sizer = get_batch_sizer(MagicMock(), "v4", "vmm/v4.0/ahv/config/vms")
+        for _ in range(10):
+            sizer.record(sizer.get_size(), latency=0.1)
+
+        assert sizer.get_size([{"name": "vm"}] * 20) == 10
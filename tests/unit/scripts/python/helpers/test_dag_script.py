@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+from framework.helpers.log_utils import get_logger
+from framework.scripts.python.helpers.batch_script import BatchScript
+from framework.scripts.python.helpers.dag_script import DagScript
+from framework.scripts.python.script import Script
+
+
+class SleepScript(Script):
+    def __init__(self, name, delay=0.0, events=None, lock=None, result=None):
+        super(SleepScript, self).__init__()
+        self.name = name
+        self.delay = delay
+        self.events = events if events is not None else []
+        self.lock = lock or threading.Lock()
+        self.result = result if result is not None else {name: "done"}
+        self.logger = self.logger or get_logger(__name__)
+
+    def execute(self, **kwargs):
+        with self.lock:
+            self.events.append(("start", self.name))
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(("end", self.name))
+        self.results = self.result
+
+    def verify(self, **kwargs):
+        pass
+
+
+class TestDagScript:
+    @pytest.fixture
+    def events(self):
+        return []
+
+    def test_dag_script_init(self):
+        dag = DagScript(results_key="pc", max_workers=3)
+        assert isinstance(dag, BatchScript)
+        assert dag.max_workers == 3
+        assert dag.nodes == []
+
+    def test_starts_as_soon_as_prerequisites_finish(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("slow", 0.3, events))
+        dag.add(SleepScript("fast", 0.01, events), produces=["groups"])
+        dag.add(SleepScript("policies", 0.01, events), depends=["groups"])
+        dag.run()
+
+        # "policies" doesn't wait for "slow", like the next stage of a BatchScript would
+        assert events.index(("end", "policies")) < events.index(("end", "slow"))
+        assert events.index(("start", "policies")) > events.index(("end", "fast"))
+
+    def test_missing_dependencies_ignored(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("recovery_plans", 0, events), depends=["CreateProtectionPolicy"])
+        assert dag.run() == {"recovery_plans": "done"}
+
+    def test_dependency_on_all_producers(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("site1", 0.05, events), produces=["clusters"])
+        dag.add(SleepScript("site2", 0.1, events), produces=["clusters"])
+        dag.add(SleepScript("pc", 0, events), depends=["clusters"])
+        dag.run()
+        assert events[-2:] == [("start", "pc"), ("end", "pc")]
+
+    def test_results_merged_in_add_order(self, events):
+        dag = DagScript(results_key="block")
+        dag.add(SleepScript("first", 0.1, events, result={"pc": {"a": 1}, "key": "first"}))
+        dag.add(SleepScript("second", 0, events, result={"pc": {"b": 2}, "key": "second"}))
+        assert dag.run() == {"block": {"pc": {"a": 1, "b": 2}, "key": "second"}}
+
+    def test_concurrency_cap(self, events):
+        lock = threading.Lock()
+        dag = DagScript(max_workers=2)
+        for i in range(6):
+            dag.add(SleepScript(f"s{i}", 0.02, events, lock))
+        dag.run()
+
+        in_flight = max_in_flight = 0
+        for event, _ in events:
+            in_flight += 1 if event == "start" else -1
+            max_in_flight = max(max_in_flight, in_flight)
+        assert max_in_flight == 2
+
+    def test_cycle(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("a", 0, events), depends=["b"])
+        dag.add(SleepScript("b", 0, events), depends=["a"])
+        with pytest.raises(ValueError, match="cycle"):
+            dag.run()
+        assert events == []
+
+    def test_duplicate_names(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("a", 0, events))
+        dag.add(SleepScript("a", 0, events))
+        assert [node.name for node in dag.nodes] == ["a", "a#2"]
+
+    def test_failed_script_does_not_block(self, events, mocker):
+        failing = SleepScript("failing", 0, events)
+        mocker.patch.object(failing, "run", side_effect=Exception("failed"))
+        dag = DagScript()
+        dag.add(failing)
+        dag.add(SleepScript("next", 0, events), depends=["failing"])
+        assert dag.run() == {"next": "done"}
+
+    def test_critical_path(self, events):
+        dag = DagScript()
+        dag.add(SleepScript("password", 0.05, events))
+        dag.add(SleepScript("groups", 0.01, events), depends=["password"])
+        dag.add(SleepScript("dr", 0.15, events), depends=["password"])
+        dag.add(SleepScript("policies", 0.01, events), depends=["groups"])
+        dag.add(SleepScript("recovery_plans", 0.01, events), depends=["dr"])
+        dag.run()
+        assert [node.name for node in dag.critical_path] == ["password", "dr", "recovery_plans"]
@@ -1,6 +1,11 @@
+import random
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock, patch
+from framework.scripts.python.helpers import pc_batch_op as pc_batch_op_module
 from framework.scripts.python.helpers.pc_batch_op import PcBatchOp, get_task_uuid_list
+from framework.scripts.python.script import Script
 from framework.helpers.rest_utils import RestAPIUtil
 
 @pytest.fixture
@@ -125,4 +130,139 @@ class TestPcBatchOp:
                 assert str(e) == "Cannot get task list to monitor for the batch call!: Expecting value: line 1 column 1 (char 0)"
             finally:
                 if task_uuid_list is None:
-                    mock_logger.return_value.error.assert_called_once()
\ No newline at end of file
+                    mock_logger.return_value.error.assert_called_once()
+
+    def test_batch_concurrent_chunks_in_order(self, pc_batch_op, session, mocker):
+        mocker.patch.dict(pc_batch_op_module.batch_config, {"max_chunks_in_flight": 3})
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def post(uri, data=None, **kwargs):
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            # Chunks complete out of order
+            time.sleep(random.uniform(0, 0.02))
+            with lock:
+                in_flight.pop()
+            return {"api_response_list": [{"request": request} for request in data["api_request_list"]]}
+
+        session.post.side_effect = post
+        api_request_list = list(range(500))
+
+        response = pc_batch_op.batch(api_request_list)
+
+        assert [r["request"] for r in response] == api_request_list
+        assert session.post.call_count == 9
+        assert 1 < max(max_in_flight) <= 3
+        assert len(pc_batch_op.chunk_latencies) == 9
+
+    def test_batch_chunks_bounded_per_pc(self, session, mocker):
+        mocker.patch.dict(pc_batch_op_module.batch_config, {"max_chunks_in_flight": 2})
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def post(uri, data=None, **kwargs):
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+            return {"api_response_list": [{} for _ in data["api_request_list"]]}
+
+        session.post.side_effect = post
+        batch_ops = [PcBatchOp(session, resource_type="/entities", kind="test-kind") for _ in range(3)]
+        threads = [threading.Thread(target=batch_op.batch, args=(list(range(200)),)) for batch_op in batch_ops]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The PC session is shared, so are the chunks in flight
+        assert max(max_in_flight) <= 2
+        assert session.post.call_count == 12
+
+    def test_batch_with_result_resubmits_retryable(self, pc_batch_op, session, mocker):
+        mock_sleep = mocker.patch("framework.scripts.python.helpers.pc_batch_op.time.sleep")
+        attempts = {}
+
+        def post(uri, data=None, **kwargs):
+            responses = []
+            for request in data["api_request_list"]:
+                attempts[request["id"]] = attempts.get(request["id"], 0) + 1
+                if request["id"] == 1:
+                    responses.append({"status": "400", "api_response": {"message": "bad spec"}})
+                elif request["id"] == 2 and attempts[2] < 2:
+                    responses.append({"status": "503", "api_response": {"message": "busy"}})
+                elif request["id"] == 3:
+                    responses.append({"status": "429", "api_response": {"message": "throttled"}})
+                else:
+                    responses.append({"status": "202", "api_response": {"task_uuid": f"task{request['id']}"}})
+            return {"api_response_list": responses}
+
+        session.post.side_effect = post
+
+        result = pc_batch_op.batch_with_result([{"id": i} for i in range(5)], retries=2)
+
+        assert result.task_uuid_list == ["task0", "task2", "task4"]
+        assert [s["index"] for s in result.succeeded] == [0, 2, 4]
+        assert [(f["index"], f["status"], f["retryable"]) for f in result.failed] == [(1, "400", False),
+                                                                                      (3, "429", True)]
+        assert result.permanent[0]["body"] == {"message": "bad spec"}
+        assert attempts == {0: 1, 1: 1, 2: 2, 3: 3, 4: 1}
+        assert result.attempts == 3
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [5, 10]
+
+    def test_script_reports_batch_failures(self, pc_batch_op, session):
+        session.post.return_value = {"api_response_list": [
+            {"status": "202", "api_response": {"task_uuid": "uuid1"}},
+            {"status": "400", "api_response": {"message": "bad spec"}}]}
+
+        class CreateEntities(Script):
+            def __init__(self):
+                super(CreateEntities, self).__init__()
+                self.logger = MagicMock()
+
+            def execute(self):
+                pc_batch_op.batch_create([{"spec": {"name": "test1"}}, {"spec": {"name": "test2"}}])
+
+            def verify(self):
+                pass
+
+        script = CreateEntities()
+        results = script.run()
+
+        assert results["batch_failures"] == {
+            "CreateEntities": [{"status": "400", "body": {"message": "bad spec"}, "retryable": False}]}
+        assert len(script.exceptions) == 1
+
+    def test_gateway_timeouts_of_creates_not_resubmitted(self, pc_batch_op, session, mocker):
+        mocker.patch("framework.scripts.python.helpers.pc_batch_op.time.sleep")
+        session.post.side_effect = [
+            {"api_response_list": [{"status": "504", "api_response": {}}, {"status": "502", "api_response": {}}]},
+            {"api_response_list": [{"status": "202", "api_response": {"task_uuid": "uuid2"}}]},
+        ]
+
+        result = pc_batch_op.batch_with_result([{"operation": "POST", "id": 1}, {"operation": "PUT", "id": 2}])
+
+        # The create may have been applied, only the update is resubmitted
+        assert session.post.call_args.kwargs["data"]["api_request_list"] == [{"operation": "PUT", "id": 2}]
+        assert result.task_uuid_list == ["uuid2"]
+        assert [(f["index"], f["status"], f["retryable"]) for f in result.failed] == [(0, "504", False)]
+
+    def test_batch_create_uses_retries(self, pc_batch_op, session, mocker):
+        mocker.patch("framework.scripts.python.helpers.pc_batch_op.time.sleep")
+        session.post.side_effect = [
+            {"api_response_list": [{"status": "202", "api_response": {"task_uuid": "uuid1"}},
+                                   {"status": "503", "api_response": {}}]},
+            {"api_response_list": [{"status": "202", "api_response": {"task_uuid": "uuid2"}}]},
+        ]
+
+        response = pc_batch_op.batch_create([{"spec": {"name": "test1"}}, {"spec": {"name": "test2"}}])
+
+        assert response == ["uuid1", "uuid2"]
+        assert session.post.call_args.kwargs["data"]["api_request_list"][0]["body"]["spec"] == {"name": "test2"}
+        assert pc_batch_op.last_result.to_dict() == {"succeeded": 2, "failed": [], "attempts": 2}
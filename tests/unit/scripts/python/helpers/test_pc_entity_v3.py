@@ -0,0 +1,224 @@
+import pytest
+from unittest.mock import MagicMock
+import responses
+from framework.helpers.cache_utils import (ResponseCache, fresh_reads, invalidate_name_indexes,
+                                           invalidate_written_name_indexes)
+from framework.helpers.rest_utils import RestAPIUtil
+from framework.scripts.python.helpers.pc_entity_v3 import PcEntity
+from framework.scripts.python.helpers.v3.blueprint import Blueprint
+from framework.scripts.python.helpers.v3.network import Network
+
+
+def build_server(total, chunk=500):
+    entities = [{"spec": {"name": f"entity{i}"}, "metadata": {"uuid": f"uuid{i}"}} for i in range(total)]
+    payloads = []
+
+    def post(uri, data=None, **kwargs):
+        payloads.append(dict(data))
+        page = entities[data["offset"]:data["offset"] + data["length"]]
+        return {"entities": page, "metadata": {"total_matches": total, "offset": data["offset"]}}
+
+    return entities, payloads, post
+
+
+@pytest.fixture
+def mock_session():
+    return MagicMock(spec=RestAPIUtil)
+
+
+class VmEntity(PcEntity):
+    kind = "vm"
+    resource_type = "/vms"
+
+
+@pytest.fixture
+def pc_entity(mock_session):
+    return VmEntity(session=mock_session)
+
+
+class TestPcEntityV3:
+    def test_list_all_pages(self, pc_entity, mock_session):
+        entities, payloads, mock_session.post.side_effect = build_server(1234)
+
+        response = pc_entity.list()
+
+        assert response == entities
+        assert sorted(p["offset"] for p in payloads) == [0, 500, 1000]
+        assert all(p["length"] == 500 and p["kind"] == "vm" for p in payloads)
+
+    def test_fresh_reads_bypass_cached_pages(self, pc_entity, mock_session):
+        mock_session.cache = ResponseCache()
+        entities, payloads, mock_session.post.side_effect = build_server(1234)
+        pc_entity.list()
+
+        with fresh_reads():
+            assert pc_entity.list() == entities
+
+        # The pages fetched by the executor threads reach the server too
+        assert sorted(p["offset"] for p in payloads) == [0, 0, 500, 500, 1000, 1000]
+
+    def test_list_single_page(self, pc_entity, mock_session):
+        entities, payloads, mock_session.post.side_effect = build_server(1234)
+
+        assert pc_entity.list(length=10, offset=5) == entities[5:15]
+        assert payloads == [{"kind": "vm", "offset": 5, "filter": "", "length": 10, "sort_order": None,
+                             "sort_attribute": None}]
+
+    def test_list_length_over_chunk(self, pc_entity, mock_session):
+        entities, payloads, mock_session.post.side_effect = build_server(1234)
+
+        response = pc_entity.list(length=600, concurrent=False)
+
+        assert response == entities[:600]
+        assert [p["offset"] for p in payloads] == [0, 500]
+
+    def test_list_custom_filters(self, pc_entity, mock_session):
+        _, _, mock_session.post.side_effect = build_server(1234)
+
+        response = pc_entity.list(custom_filters={"spec": {"name": "entity1100"}})
+
+        assert [e["metadata"]["uuid"] for e in response] == ["uuid1100"]
+
+    def test_list_without_total_matches(self, pc_entity, mock_session):
+        entities = [{"spec": {"name": f"entity{i}"}} for i in range(700)]
+        mock_session.post.side_effect = lambda uri, data=None, **kwargs: {
+            "entities": entities[data["offset"]:data["offset"] + data["length"]]}
+
+        assert pc_entity.list() == entities
+        assert mock_session.post.call_count == 2
+
+    def test_iter_list_is_lazy(self, pc_entity, mock_session):
+        _, payloads, mock_session.post.side_effect = build_server(1234)
+
+        iterator = pc_entity.iter_list()
+        assert next(iterator)["spec"]["name"] == "entity0"
+        assert len(payloads) == 1
+        assert [e["spec"]["name"] for e in iterator][-1] == "entity1233"
+        assert len(payloads) == 3
+
+    def test_iter_list_uses_subclass_list(self, mock_session):
+        _, payloads, mock_session.post.side_effect = build_server(10)
+        blueprint = Blueprint(session=mock_session)
+
+        assert len(list(blueprint.iter_list())) == 10
+        assert payloads[0]["filter"] == "state!=DELETED"
+
+
+class TestNameIndex:
+    def test_lookups_served_from_index(self, pc_entity, mock_session):
+        _, payloads, mock_session.post.side_effect = build_server(1234)
+
+        uuids = [pc_entity.get_uuid_by_name(f"entity{i}") for i in range(0, 1234, 100)]
+
+        assert uuids == [f"uuid{i}" for i in range(0, 1234, 100)]
+        # One bulk list of 3 pages for all the lookups
+        assert len(payloads) == 3
+        assert pc_entity.name_index.get_stats()["builds"] == 1
+
+    def test_index_entities_are_copies(self, pc_entity, mock_session):
+        _, _, mock_session.post.side_effect = build_server(10)
+
+        pc_entity.get_entity_by_name("entity1")["spec"]["name"] = "modified"
+
+        assert pc_entity.get_entity_by_name("entity1")["spec"]["name"] == "entity1"
+
+    def test_miss_falls_back_to_filter(self, pc_entity, mock_session):
+        entities, payloads, mock_session.post.side_effect = build_server(10)
+        assert pc_entity.get_uuid_by_name("entity1") == "uuid1"
+
+        # Created after the index was built
+        entities.append({"spec": {"name": "new"}, "metadata": {"uuid": "uuid_new"}})
+        mock_session.post.side_effect = lambda uri, data=None, **kwargs: payloads.append(data) or {
+            "entities": [e for e in entities if data["filter"] == "name==new"]}
+
+        assert pc_entity.get_uuid_by_name("new") == "uuid_new"
+        assert payloads[-1]["filter"] == "name==new"
+        assert pc_entity.get_uuid_by_name("new") == "uuid_new"
+        assert len(payloads) == 2
+
+    def test_writes_invalidate_index(self, pc_entity, mock_session):
+        _, payloads, list_call = build_server(10)
+        mock_session.post.side_effect = lambda uri, data=None, **kwargs: (
+            list_call(uri, data) if uri.endswith("/list") else {"api_response_list": []})
+
+        pc_entity.get_uuid_by_name("entity1")
+        pc_entity.batch_op.batch([{"operation": "POST", "path_and_params": "/api/nutanix/v3/vms", "body": {}}])
+        pc_entity.get_uuid_by_name("entity1")
+
+        assert pc_entity.name_index.get_stats()["builds"] == 2
+
+    def test_session_writes_invalidate_index(self, pc_entity, mock_session):
+        _, _, mock_session.post.side_effect = build_server(10)
+        pc_entity.get_uuid_by_name("entity1")
+
+        invalidate_written_name_indexes(mock_session, "api/nutanix/v3/vms/list")
+        invalidate_written_name_indexes(mock_session, "api/nutanix/v3/subnets/uuid1")
+        pc_entity.get_uuid_by_name("entity1")
+        assert pc_entity.name_index.get_stats()["builds"] == 1
+
+        invalidate_written_name_indexes(mock_session, "api/nutanix/v3/vms/uuid1")
+        pc_entity.get_uuid_by_name("entity1")
+        assert pc_entity.name_index.get_stats()["builds"] == 2
+
+    def test_rest_api_util_writes_invalidate_index(self):
+        session = RestAPIUtil("10.1.1.1", user="admin", pwd="secret")
+        pc_entity = VmEntity(session=session)
+        entity = {"spec": {"name": "vm1"}, "metadata": {"uuid": "uuid1"}}
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, "https://10.1.1.1/api/nutanix/v3/vms/list",
+                     json={"entities": [entity], "metadata": {"total_matches": 1}})
+            rsps.add(responses.DELETE, "https://10.1.1.1/api/nutanix/v3/vms/uuid1", json={})
+            pc_entity.get_uuid_by_name("vm1")
+
+            session.delete("api/nutanix/v3/vms/uuid1")
+            pc_entity.get_uuid_by_name("vm1")
+
+        assert pc_entity.name_index.get_stats()["builds"] == 2
+
+    def test_v4_writes_invalidate_index(self, pc_entity, mock_session):
+        _, _, mock_session.post.side_effect = build_server(10)
+        pc_entity.get_uuid_by_name("entity1")
+
+        invalidate_name_indexes(["subnet"])
+        pc_entity.get_uuid_by_name("entity1")
+        assert pc_entity.name_index.get_stats()["builds"] == 1
+
+        invalidate_name_indexes(["vm"])
+        pc_entity.get_uuid_by_name("entity1")
+        assert pc_entity.name_index.get_stats()["builds"] == 2
+
+    def test_names_with_fiql_characters_not_filtered_on_server(self, pc_entity, mock_session):
+        entities, payloads, mock_session.post.side_effect = build_server(10)
+        pc_entity.get_uuid_by_name("entity1")
+        entities.append({"spec": {"name": "vm,a;b==c"}, "metadata": {"uuid": "uuid_new"}})
+
+        assert pc_entity.get_uuid_by_name("vm,a;b==c") == "uuid_new"
+        assert payloads[-1]["filter"] == ""
+
+    def test_fresh_reads_bypass_index(self, pc_entity, mock_session):
+        _, payloads, mock_session.post.side_effect = build_server(10)
+        pc_entity.get_uuid_by_name("entity1")
+
+        with fresh_reads():
+            assert pc_entity.get_uuid_by_name("entity1") == "uuid1"
+
+        assert payloads[-1]["filter"] == "name==entity1"
+
+    def test_filter_matched_against_index(self, mock_session):
+        subnets = [
+            {"spec": {"name": "subnet1", "cluster_reference": {"name": f"cluster{i}"}},
+             "metadata": {"uuid": f"uuid{i}"}} for i in range(3)
+        ]
+        mock_session.post.return_value = {"entities": subnets, "metadata": {"total_matches": 3}}
+        network = Network(session=mock_session)
+
+        assert network.get_uuid_by_name("cluster2", "subnet1") == "uuid2"
+        assert network.get_uuid_by_name("cluster0", "subnet1") == "uuid0"
+        assert mock_session.post.call_count == 1
+
+    def test_unsupported_filter_goes_to_server(self, pc_entity, mock_session):
+        _, payloads, mock_session.post.side_effect = build_server(10)
+
+        pc_entity.get_entity_by_name("entity1", filter="name==entity1;power_state==ON")
+
+        assert [p["filter"] for p in payloads] == ["name==entity1;power_state==ON"]
@@ -129,4 +129,54 @@ class TestPcGroupsOp:
         assert result[0]["uuid"] == "mock_id_1"
         assert result[0]["name"] == "mock_value_1"
         assert result[1]["uuid"] == "mock_id_2"
-        assert result[1]["name"] == "mock_value_2"
\ No newline at end of file
+        assert result[1]["name"] == "mock_value_2"
+    def test_list_entities_pages_in_order(self, pc_groups_op, mock_session):
+        total = 1234
+
+        def post(uri, data=None):
+            offset, count = data["group_member_offset"], data["group_member_count"]
+            return {"group_results": [{
+                "entity_results": [
+                    {"entity_id": f"id{i}", "data": [{"name": "name", "values": [{"values": [f"vm{i}"]}]}]}
+                    for i in range(offset, min(offset + count, total))
+                ],
+                "total_entity_count": total
+            }]}
+
+        mock_session.post.side_effect = post
+
+        result = pc_groups_op.list_entities(entity_type="vm", attributes=["name"])
+
+        assert [entity["uuid"] for entity in result] == [f"id{i}" for i in range(total)]
+        assert sorted(c.kwargs["data"]["group_member_offset"] for c in mock_session.post.call_args_list) == \
+            [0, 500, 1000]
+
+    def test_list_entities_columnar(self, pc_groups_op, mock_session):
+        pages = [
+            {"group_results": [{"entity_results": [
+                {"entity_id": "id1", "data": [{"name": "title", "values": [{"values": ["t1"]}]},
+                                              {"name": "param_name_list", "values": [{"values": ["a", "b"]}]}]},
+                {"entity_id": "id2", "data": [{"name": "title", "values": []}]},
+            ], "total_entity_count": 3}]},
+            {"group_results": [{"entity_results": [
+                {"entity_id": "id3", "data": [{"name": "cluster", "values": [{"values": ["c1"]}]}]},
+            ], "total_entity_count": 3}]},
+        ]
+        mock_session.post.side_effect = pages
+
+        result = pc_groups_op.list_entities(entity_type="event", attributes=["title", "param_name_list"],
+                                            group_member_count_threshold=2, columnar=True)
+
+        assert result == {
+            "uuid": ["id1", "id2", "id3"],
+            "title": [["t1"], None, None],
+            "param_name_list": [["a", "b"], None, None],
+            "cluster": [None, None, ["c1"]]
+        }
+
+    def test_list_events_columnar(self, pc_groups_op):
+        pc_groups_op.list_entities = MagicMock(return_value={"uuid": []})
+
+        pc_groups_op.list_events(1625097600000000, columnar=True)
+
+        assert pc_groups_op.list_entities.call_args.kwargs["columnar"] is True
@@ -1,16 +1,26 @@
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock
+from framework.helpers.v4_api_client import ApiClientV4
 from framework.scripts.python.helpers.v4.task import Task
 
+
+def list_response(tasks, total=None):
+    return MagicMock(to_dict=lambda: {"data": tasks},
+                     metadata=MagicMock(total_available_results=len(tasks) if total is None else total))
+
+
 class TestTask:
     @pytest.fixture
     def task(self):
-        return Task()
+        return Task(MagicMock(spec=ApiClientV4))
 
     def test_task_init(self, task):
         assert task.resource_type == "/tasks"
 
     def test_poll(self, task, mocker):
+        mocker.patch.object(task.tasks_api, 'list_tasks', side_effect=Exception("Invalid filter"))
         mock_task_api = mocker.patch.object(task.tasks_api, 'get_task_by_id')
         
         mock_task_api.side_effect = [
@@ -29,3 +39,64 @@ class TestTask:
         ]
         mock_task_api.assert_any_call("uuid1")
         mock_task_api.assert_any_call("uuid2")
+        # The filtered list isn't tried again
+        assert task.bulk_poll is False
+
+    def test_poll_bulk(self, task, mocker):
+        mock_list = mocker.patch.object(task.tasks_api, 'list_tasks', return_value=list_response([
+            {"ext_id": "uuid2", "status": "RUNNING"}, {"ext_id": "uuid1", "status": "SUCCEEDED"},
+            {"ext_id": "uuid3", "status": "FAILED"},
+        ]))
+        mock_get = mocker.patch.object(task.tasks_api, 'get_task_by_id')
+
+        assert task.poll(["uuid1", "uuid2", "uuid3"]) == [
+            {"ext_id": "uuid1", "status": "SUCCEEDED"}, {"ext_id": "uuid3", "status": "FAILED"}]
+        mock_list.assert_called_once_with(
+            _page=0, _limit=100, _filter="extId eq 'uuid1' or extId eq 'uuid2' or extId eq 'uuid3'")
+        mock_get.assert_not_called()
+
+    def test_poll_bulk_pages_and_chunks(self, task, mocker):
+        task_ids = [f"uuid{i}" for i in range(120)]
+
+        def list_tasks(_page, _limit, _filter):
+            ids = [f.split("'")[1] for f in _filter.split(" or ")]
+            tasks = [{"ext_id": task_id, "status": "SUCCEEDED"} for task_id in ids]
+            # Pages of 40 tasks
+            return list_response(tasks[_page * 40:(_page + 1) * 40], total=len(tasks))
+
+        mocker.patch("framework.scripts.python.helpers.v4.task.TASK_LIST_LIMIT", 40)
+        mock_list = mocker.patch.object(task.tasks_api, 'list_tasks', side_effect=list_tasks)
+
+        assert [t["ext_id"] for t in task.poll(task_ids)] == task_ids
+        # 3 filters of at most 50 ids, 2 pages each for the full chunks
+        assert mock_list.call_count == 5
+
+    def test_poll_missing_fetched_by_id(self, task, mocker):
+        mocker.patch.object(task.tasks_api, 'list_tasks', return_value=list_response([
+            {"ext_id": "uuid1", "status": "SUCCEEDED"}]))
+        mock_get = mocker.patch.object(task.tasks_api, 'get_task_by_id', return_value=MagicMock(
+            to_dict=lambda: {"data": {"ext_id": "uuid2", "status": "SUCCEEDED"}}))
+
+        assert [t["ext_id"] for t in task.poll(["uuid1", "uuid2"])] == ["uuid1", "uuid2"]
+        mock_get.assert_called_once_with("uuid2")
+        assert task.bulk_poll is True
+
+    def test_get_tasks_by_id_bounded(self, task, mocker):
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def get_task_by_id(task_id):
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+            return MagicMock(to_dict=lambda: {"data": {"ext_id": task_id, "status": "SUCCEEDED"}})
+
+        mocker.patch.object(task.tasks_api, 'get_task_by_id', side_effect=get_task_by_id)
+        task_ids = [f"uuid{i}" for i in range(40)]
+
+        assert list(task.get_tasks_by_id(task_ids)) == task_ids
+        assert 1 < max(max_in_flight) <= 8
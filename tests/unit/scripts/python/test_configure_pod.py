@@ -0,0 +1,107 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from framework.helpers.reconcile_utils import get_plan, start_plan, stop_plan
+from framework.scripts.python.configure_pod import PodConfig
+
+
+class TestPodConfig:
+    @staticmethod
+    def pod_config(pc_ips, **pod):
+        blocks = [{"pod_block_name": f"block {i}", "pc_ip": pc_ip} for i, pc_ip in enumerate(pc_ips)]
+        return PodConfig({"pod": {"pod_name": "pod", "pod_blocks": blocks, **pod}})
+
+    @staticmethod
+    def add_block_scripts(pod_config, delays, tracker):
+        lock = threading.Lock()
+        for i, (block, delay) in enumerate(zip(pod_config.blocks, delays)):
+            def run(block=block, delay=delay, i=i):
+                with lock:
+                    tracker["in_flight"].append(block["pc_ip"])
+                    tracker["max_in_flight"] = max(tracker["max_in_flight"], len(tracker["in_flight"]))
+                    tracker["max_same_pc"] = max(tracker["max_same_pc"],
+                                                 tracker["in_flight"].count(block["pc_ip"]))
+                time.sleep(delay)
+                with lock:
+                    tracker["in_flight"].remove(block["pc_ip"])
+                return {f"block{i}": {"pc": {"order": i}}}
+            pod_config.block_batch_scripts[f"block{i}"] = MagicMock(run=run)
+
+    def test_init(self):
+        pod_config = self.pod_config(["10.1.1.1"], max_blocks_in_flight=4)
+        assert pod_config.max_blocks_in_flight == 4
+        assert pod_config.max_blocks_per_pc == 1
+
+    def test_run_blocks_in_parallel(self):
+        pod_config = self.pod_config(["10.1.1.1", "10.1.1.2", "10.1.1.1", "10.1.1.3"], max_blocks_in_flight=3)
+        tracker = {"in_flight": [], "max_in_flight": 0, "max_same_pc": 0}
+        # The first block finishes last
+        self.add_block_scripts(pod_config, [0.2, 0.05, 0.05, 0.05], tracker)
+
+        results = pod_config.run_blocks_in_parallel([f"block{i}" for i in range(4)])
+
+        assert results == [{f"block{i}": {"pc": {"order": i}}} for i in range(4)]
+        assert tracker["max_in_flight"] == 3
+        # Blocks of the same PC never overlap
+        assert tracker["max_same_pc"] == 1
+
+    def test_failed_block_keeps_other_results(self):
+        pod_config = self.pod_config(["10.1.1.1", "10.1.1.2", "10.1.1.3"], max_blocks_in_flight=3)
+        tracker = {"in_flight": [], "max_in_flight": 0, "max_same_pc": 0}
+        self.add_block_scripts(pod_config, [0.05, 0, 0.05], tracker)
+        pod_config.block_batch_scripts["block1"].run = MagicMock(side_effect=Exception("PC unreachable"))
+
+        results = pod_config.run_blocks_in_parallel([f"block{i}" for i in range(3)])
+
+        assert results == [{"block0": {"pc": {"order": 0}}}, {"block1": {"error": "PC unreachable"}},
+                           {"block2": {"pc": {"order": 2}}}]
+        assert pod_config.exceptions == ["Block 'block1' failed: PC unreachable"]
+
+    def test_blocks_run_in_the_context_of_the_pod(self):
+        pod_config = self.pod_config(["10.1.1.1", "10.1.1.2"], max_blocks_in_flight=2)
+        for i in range(2):
+            pod_config.block_batch_scripts[f"block{i}"] = MagicMock(run=lambda: get_plan())
+
+        plan = start_plan()
+        try:
+            results = pod_config.run_blocks_in_parallel(["block0", "block1"])
+        finally:
+            stop_plan()
+
+        assert results == [plan, plan]
+
+    def test_execute_merges_in_block_order(self, mocker):
+        pod_config = self.pod_config(["10.1.1.1", "10.1.1.2"], max_blocks_in_flight=2)
+        mocker.patch("framework.scripts.python.configure_pod.create_pc_objects")
+        mocker.patch("framework.scripts.python.configure_pod.PcConfig")
+        tracker = {"in_flight": [], "max_in_flight": 0, "max_same_pc": 0}
+
+        def run_blocks_in_parallel(block_names):
+            self.add_block_scripts(pod_config, [0.1, 0], tracker)
+            return PodConfig.run_blocks_in_parallel(pod_config, block_names)
+
+        mocker.patch.object(pod_config, "run_blocks_in_parallel", side_effect=run_blocks_in_parallel)
+        pod_config.execute()
+
+        assert list(pod_config.results) == ["block0", "block1"]
+        assert pod_config.data["json_output"] == pod_config.results
+
+    def test_blocks_keep_their_own_nke_clusters(self, mocker):
+        pod_config = self.pod_config(["10.1.1.1", "10.1.1.2"], max_blocks_in_flight=2)
+        for i, block in enumerate(pod_config.blocks):
+            block["edge_sites"] = [{"site_name": f"site {i}", "nke_clusters": [{"name": f"nke{i}"}]}]
+            block["pc_session"] = None
+        mocker.patch("framework.scripts.python.configure_pod.create_pc_objects")
+        mocker.patch("framework.scripts.python.configure_pod.PcConfig")
+        mocker.patch("framework.scripts.python.configure_pod.CreateKarbonClusterPc",
+                     side_effect=lambda edge_site, **kwargs: edge_site["nke_clusters"][0]["name"])
+        mocker.patch.object(pod_config, "run_blocks_in_parallel", return_value=[{}, {}])
+
+        pod_config.execute()
+
+        nke_clusters = []
+        for i in range(2):
+            node, = [node for node in pod_config.block_batch_scripts[f"block{i}"].nodes if node.name == "NkeObjects"]
+            nke_scripts, = node.script.script_list
+            nke_clusters.append(nke_scripts.script_list)
+        assert nke_clusters == [["nke0"], ["nke1"]]